@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Benchmark response bytes and latency with and without compression.
+
+Each route is requested REQUESTS times through the Flask test client in a
+scratch directory with a month of entries, in three modes:
+
+  identity   compression off (nutrition-pad --no-compress), as before
+  gzip       compressed on every request
+  cached     compressed bodies of immutable responses reused (past-date
+             pages and ETagged APIs; other routes match `gzip`)
+
+Latency is the median server time plus the time to send the body over a
+link of --mbps megabits per second (old tablets on busy Wi-Fi manage a
+few).
+
+Usage:
+    python benchmarks/bench_compression.py [--requests 50] [--mbps 5]
+"""
+
+import sys
+import os
+import io
+import time
+import argparse
+import tempfile
+import contextlib
+from datetime import date, timedelta
+
+# Add parent dir to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PAST = (date.today() - timedelta(days=3)).isoformat()
+ROUTES = ['/', '/today', f'/today?date={PAST}', f'/nutrition?date={PAST}',
+          f'/calories?date={PAST}', '/api/entries?days=30', '/api/foods']
+MODES = ['identity', 'gzip', 'cached']
+
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def seed_entries(days=30, per_day=25):
+    """Write a month of entries straight into the day logs"""
+    from nutrition_pad.data import get_all_pads, get_food_data, append_log_entries, generate_entry_id
+    foods = [(pad_key, food_key) for pad_key, pad in get_all_pads().items()
+             for food_key in pad.get('foods', {})]
+    for day in range(days):
+        target_date = date.today() - timedelta(days=day)
+        entries = []
+        for i in range(per_day):
+            pad_key, food_key = foods[(day + i) % len(foods)]
+            food = get_food_data(pad_key, food_key)
+            entries.append({
+                'id': generate_entry_id(),
+                'timestamp': f'{target_date.isoformat()}T{8 + i // 3:02d}:{(i * 7) % 60:02d}:00',
+                'time': f'{8 + i // 3:02d}:{(i * 7) % 60:02d}',
+                'pad': pad_key,
+                'food': food_key,
+                'name': food.get('name', food_key),
+                'calories': food.get('calories', 100),
+                'protein': food.get('protein', 5),
+                'fiber': 1,
+                'type': 'unit',
+                'amount': 1,
+                'amount_display': '1 units',
+            })
+        append_log_entries(target_date, entries)
+
+
+def bench(requests, mbps):
+    os.chdir(tempfile.mkdtemp(prefix='nutrition_pad_bench_compression_'))
+    with contextlib.redirect_stdout(io.StringIO()):
+        from nutrition_pad.main import app
+        from nutrition_pad.compression import clear_compression_cache
+        seed_entries()
+        client = app.test_client()
+
+    results = {}
+    for mode in MODES:
+        app.config['COMPRESS'] = mode != 'identity'
+        headers = {'Accept-Encoding': 'gzip, deflate'}
+        for route in ROUTES:
+            times = []
+            with contextlib.redirect_stdout(io.StringIO()):
+                clear_compression_cache()
+                client.get(route, headers=headers)  # warm up (and fill the cache)
+                for _ in range(requests):
+                    if mode == 'gzip':
+                        clear_compression_cache()
+                    start = time.perf_counter()
+                    response = client.get(route, headers=headers)
+                    times.append(time.perf_counter() - start)
+            assert response.status_code == 200, (route, response.status_code)
+            size = len(response.data)
+            server_ms = median(times) * 1000
+            results[mode, route] = (size, server_ms, server_ms + size * 8 / (mbps * 1000))
+    app.config['COMPRESS'] = True
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark response compression')
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--mbps', type=float, default=5.0, help='Link speed for the latency estimate')
+    args = parser.parse_args()
+
+    print("\n" + "="*78)
+    print(f"  COMPRESSION BENCHMARK (median of {args.requests} requests, {args.mbps:g} Mbit/s link)")
+    print("="*78 + "\n")
+    results = bench(args.requests, args.mbps)
+    print(f"  {'route':28s}" + ''.join(f"{mode:>16s}" for mode in MODES))
+    print(f"  {'':28s}" + ''.join(f"{'bytes  ms':>16s}" for _ in MODES))
+    for route in ROUTES:
+        row = [results[mode, route] for mode in MODES]
+        print(f"  {route[:28]:28s}" + ''.join(f"{size:9d} {total:6.2f}" for size, _, total in row))
+    print("\n  server time only (ms):")
+    for route in ROUTES:
+        row = [results[mode, route] for mode in MODES]
+        print(f"  {route[:28]:28s}" + ''.join(f"{server:16.2f}" for _, server, _ in row))
+    print()
+
+
+if __name__ == '__main__':
+    main()
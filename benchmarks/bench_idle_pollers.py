@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Benchmark idle long-pollers against the threaded and --async servers.
+
+For each mode a server is started in a scratch directory, POLLERS
+clients open /poll-updates and sit idle, and the server's thread count
+and resident memory (from /proc) are compared with the idle baseline.
+One update (meal mode on) then has to reach every poller; the time
+until the last one answers is reported.
+
+Usage:
+    python benchmarks/bench_idle_pollers.py [--pollers 500] [--modes threaded,async]
+"""
+
+import sys
+import os
+import json
+import time
+import socket
+import argparse
+import tempfile
+import subprocess
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def proc_status(pid):
+    """(threads, rss_kb) of a process from /proc"""
+    fields = {}
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            name, _, value = line.partition(':')
+            fields[name] = value.split()
+    return int(fields['Threads'][0]), int(fields['VmRSS'][0])
+
+
+def start_server(mode, port, workdir):
+    args = [sys.executable, '-m', 'nutrition_pad.main', '--port', str(port),
+            '--host', '127.0.0.1', '--pidfile', os.path.join(workdir, 'server.pid')]
+    if mode == 'async':
+        args.append('--async')
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    server = subprocess.Popen(args, cwd=workdir, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/get-meal-items', timeout=1).read()
+            return server
+        except OSError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError(f'{mode} server did not start')
+
+
+def post(port, path, data):
+    request = urllib.request.Request(f'http://127.0.0.1:{port}{path}', data=json.dumps(data).encode(),
+                                     headers={'Content-Type': 'application/json'})
+    urllib.request.urlopen(request, timeout=5).read()
+
+
+def open_pollers(port, count):
+    """Sockets each holding an idle /poll-updates request"""
+    version = json.loads(urllib.request.urlopen(
+        f'http://127.0.0.1:{port}/poll-updates?version=-1', timeout=5).read())['version']
+    request = (f'GET /poll-updates?since={time.time() + 3600}&version={version} HTTP/1.1\r\n'
+               f'Host: 127.0.0.1:{port}\r\nConnection: close\r\n\r\n').encode()
+    sockets = []
+    for i in range(count):
+        s = socket.create_connection(('127.0.0.1', port))
+        s.sendall(request)
+        sockets.append(s)
+        if i % 50 == 49:
+            time.sleep(0.05)  # don't overrun the listen backlog
+    return sockets
+
+
+def read_all(sockets, timeout):
+    """Wait for every poller's response; returns (answered, seconds for the last)"""
+    start = time.perf_counter()
+    answered = 0
+    last = float('nan')
+    for s in sockets:
+        s.settimeout(max(timeout - (time.perf_counter() - start), 0.01))
+        try:
+            data = b''
+            while True:
+                chunk = s.recv(65536)
+                if not chunk:
+                    break
+                data += chunk
+            if b'"meal_mode": true' in data or b'"meal_mode":true' in data:
+                answered += 1
+                last = time.perf_counter() - start
+        except OSError:
+            pass
+        s.close()
+    return answered, last
+
+
+def bench(mode, pollers):
+    workdir = tempfile.mkdtemp(prefix=f'nutrition_pad_bench_{mode}_')
+    port = free_port()
+    server = start_server(mode, port, workdir)
+    try:
+        time.sleep(0.5)
+        idle_threads, idle_rss = proc_status(server.pid)
+        sockets = open_pollers(port, pollers)
+        time.sleep(2)
+        threads, rss = proc_status(server.pid)
+        post(port, '/set-meal-mode', {'active': True})
+        answered, last = read_all(sockets, timeout=20)
+        print(f"  {mode:9s} threads {idle_threads:4d} -> {threads:4d}   "
+              f"RSS {idle_rss / 1024:6.1f} -> {rss / 1024:6.1f} MB "
+              f"(+{(rss - idle_rss) / pollers:.1f} KB/poller)   "
+              f"woken {answered}/{pollers}, last after {last * 1000:.0f} ms")
+    finally:
+        server.terminate()
+        server.wait(10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark idle long-pollers')
+    parser.add_argument('--pollers', type=int, default=500)
+    parser.add_argument('--modes', default='threaded,async')
+    args = parser.parse_args()
+
+    print("\n" + "="*60)
+    print(f"  IDLE POLLERS BENCHMARK ({args.pollers} pollers)")
+    print("="*60 + "\n")
+    for mode in args.modes.split(','):
+        bench(mode, args.pollers)
+    print()
+
+
+if __name__ == '__main__':
+    main()
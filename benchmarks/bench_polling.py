@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Benchmark long-poll wakeups with many concurrent pollers.
+
+Part 1 runs POLLERS threads against /poll-updates (Flask test client)
+while a writer calls mark_updated() every INTERVAL seconds, and reports
+wakeup latency (update -> poll response) and the peak thread count.
+
+Part 2 compares the wakeup primitive alone against the old
+Event + Timer(0.1, clear) scheme, for changes that land while a poller
+is between requests (slider-drag bursts, meal mode toggles). Under the
+old scheme those are only seen at the next update or the poll timeout,
+and every update starts a timer thread.
+
+Usage:
+    python benchmarks/bench_polling.py [--pollers 50] [--updates 40] [--bursts 6]
+"""
+
+import sys
+import os
+import io
+import time
+import argparse
+import tempfile
+import threading
+import contextlib
+
+# Add parent dir to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    if not values:
+        return float('nan')
+    return values[min(int(len(values) * pct / 100), len(values) - 1)]
+
+
+def report(name, latencies, peak_threads, extra=''):
+    ms = [v * 1000 for v in latencies]
+    print(f"  {name}")
+    print(f"    wakeups: {len(ms)}  p50 {percentile(ms, 50):.1f} ms  "
+          f"p95 {percentile(ms, 95):.1f} ms  max {max(ms) if ms else float('nan'):.1f} ms")
+    print(f"    peak threads: {peak_threads}{extra}")
+
+
+def sample_threads(stop, peak):
+    while not stop.is_set():
+        peak[0] = max(peak[0], threading.active_count())
+        time.sleep(0.005)
+
+
+def bench_route(pollers, updates, interval):
+    """Pollers hitting /poll-updates through the Flask test client"""
+    from nutrition_pad.main import app
+    from nutrition_pad import polling
+
+    latencies = []
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def poller():
+        client = app.test_client()
+        since = polling.get_live_state()['last_update']
+        while not stop.is_set():
+            data = client.get(f'/poll-updates?since={since}').get_json()
+            if data.get('updated'):
+                with lock:
+                    latencies.append(time.time() - data['timestamp'])
+                since = data['timestamp']
+
+    peak = [threading.active_count()]
+    sampler_stop = threading.Event()
+    sampler = threading.Thread(target=sample_threads, args=(sampler_stop, peak), daemon=True)
+    sampler.start()
+    threads = [threading.Thread(target=poller, daemon=True) for _ in range(pollers)]
+    for t in threads:
+        t.start()
+    time.sleep(0.2)
+    for _ in range(updates):
+        polling.mark_updated()
+        time.sleep(interval)
+    stop.set()
+    polling.mark_updated()  # release everyone
+    for t in threads:
+        t.join(5)
+    sampler_stop.set()
+    report(f"/poll-updates, {pollers} pollers, {updates} updates", latencies, peak[0])
+
+
+def update_schedule(bursts):
+    """Gaps between updates: slider-drag bursts (every 10 ms) with idle pauses"""
+    gaps = []
+    for _ in range(bursts):
+        gaps += [0.01] * 15 + [0.35]
+    return gaps
+
+
+def bench_primitive(pollers, bursts, rearm_delay, timeout):
+    """Condition + version vs Event + Timer for state changes between polls.
+
+    Models meal-mode style changes: the poller learns the new state from
+    whatever response it gets next, and spends rearm_delay between polls
+    (handling the response, waiting to re-poll). Latency is from the first
+    update the poller hadn't seen to the response that delivered it.
+    """
+    from nutrition_pad import polling
+
+    # Old scheme, as polling.py used to do it
+    event = threading.Event()
+    timers_started = [0]
+
+    def legacy_update():
+        event.set()
+        threading.Timer(0.1, event.clear).start()
+        timers_started[0] += 1
+
+    def run(name, update, wait, current):
+        stamps = []  # stamps[k] = time of update k+1
+        latencies = []
+        missed = [0]
+        lock = threading.Lock()
+        stop = threading.Event()
+
+        def poller():
+            seen = current()
+            while not stop.is_set():
+                woke = wait(seen)
+                now = time.time()
+                latest = current()
+                if latest > seen:
+                    with lock:
+                        latencies.append(now - stamps[seen])
+                        if not woke:
+                            missed[0] += 1
+                seen = latest
+                time.sleep(rearm_delay)
+
+        peak = [threading.active_count()]
+        sampler_stop = threading.Event()
+        sampler = threading.Thread(target=sample_threads, args=(sampler_stop, peak), daemon=True)
+        sampler.start()
+        threads = [threading.Thread(target=poller, daemon=True) for _ in range(pollers)]
+        for t in threads:
+            t.start()
+        time.sleep(0.1)
+        for gap in update_schedule(bursts):
+            stamps.append(time.time())
+            update()
+            time.sleep(gap)
+        time.sleep(timeout)
+        stop.set()
+        for t in threads:
+            t.join(timeout + 1)
+        sampler_stop.set()
+        report(name, latencies, peak[0], f"  delivered only by timeout: {missed[0]}")
+
+    # Old: the poller only has the event to go on
+    legacy_seq = [0]
+
+    def legacy_counted_update():
+        legacy_seq[0] += 1
+        legacy_update()
+
+    run("Event + Timer (old)", legacy_counted_update,
+        lambda seen: event.wait(timeout), lambda: legacy_seq[0])
+    print(f"    timer threads started: {timers_started[0]}")
+
+    # New: the poller passes back the version it last saw
+    base = polling.get_update_version()
+    run("Condition + version (new)", polling.mark_updated,
+        lambda seen: polling.wait_for_update(base + seen, timeout) > base + seen,
+        lambda: polling.get_update_version() - base)
+    print("    timer threads started: 0")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark long-poll wakeups')
+    parser.add_argument('--pollers', type=int, default=50)
+    parser.add_argument('--updates', type=int, default=40)
+    parser.add_argument('--interval', type=float, default=0.05, help='Seconds between updates')
+    parser.add_argument('--bursts', type=int, default=6, help='Slider bursts in the primitive comparison')
+    args = parser.parse_args()
+
+    # Keep foods.toml and daily_logs out of the working tree
+    os.chdir(tempfile.mkdtemp(prefix='nutrition_pad_bench_'))
+
+    print("\n" + "="*60)
+    print("  LONG-POLL WAKEUP BENCHMARK")
+    print("="*60 + "\n")
+
+    # The poll route prints debug lines per request
+    with contextlib.redirect_stdout(io.StringIO()):
+        import nutrition_pad.main  # noqa: F401 (creates default config)
+    out = sys.stdout
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        bench_route(args.pollers, args.updates, args.interval)
+        route_output = sys.stdout.getvalue()
+    out.write(''.join(line + '\n' for line in route_output.splitlines() if not line.startswith('[DEBUG]')))
+    print(f"    elapsed: {time.perf_counter() - start:.1f} s\n")
+
+    bench_primitive(args.pollers, bursts=args.bursts, rearm_delay=0.15, timeout=2)
+    print()
+
+
+if __name__ == '__main__':
+    main()
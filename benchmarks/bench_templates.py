@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark page render time per route with and without the template cache.
+
+Each page route is requested REQUESTS times through the Flask test client
+in a scratch directory with a day of entries, in three modes:
+
+  compile    the Jinja template cache disabled, so every request lexes and
+             compiles its page as render_template_string() used to
+  bytecode   no in-memory cache, but compiled code loaded from an on-disk
+             bytecode cache (a fresh process with --template-cache)
+  cached     templates compiled once and kept in memory (the default)
+
+Usage:
+    python benchmarks/bench_templates.py [--requests 50]
+"""
+
+import sys
+import os
+import io
+import time
+import argparse
+import tempfile
+import contextlib
+
+# Add parent dir to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ROUTES = ['/', '/today', '/nutrition', '/edit-foods', '/calories', '/notes',
+          '/meals/build', '/resolve-unknowns']
+MODES = ['compile', 'bytecode', 'cached']
+
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def seed_entries(client):
+    """Log a day's worth of foods so the pages have something to render"""
+    from nutrition_pad.data import get_all_pads
+    foods = [(pad_key, food_key) for pad_key, pad in get_all_pads().items()
+             for food_key in pad.get('foods', {})]
+    for i in range(30):
+        pad_key, food_key = foods[i % len(foods)]
+        client.post('/log', json={'pad': pad_key, 'food': food_key})
+
+
+def set_mode(app, mode, bytecode_dir):
+    from jinja2 import FileSystemBytecodeCache
+    from jinja2.utils import LRUCache
+    env = app.jinja_env
+    env.cache = None if mode in ('compile', 'bytecode') else LRUCache(400)
+    env.bytecode_cache = FileSystemBytecodeCache(bytecode_dir) if mode == 'bytecode' else None
+    if mode == 'cached':
+        from nutrition_pad.page_templates import compile_templates
+        compile_templates(app)
+
+
+def bench(requests):
+    os.chdir(tempfile.mkdtemp(prefix='nutrition_pad_bench_templates_'))
+    with contextlib.redirect_stdout(io.StringIO()):
+        from nutrition_pad.main import app
+        client = app.test_client()
+        seed_entries(client)
+    bytecode_dir = tempfile.mkdtemp(prefix='nutrition_pad_bytecode_')
+
+    results = {}
+    for mode in MODES:
+        set_mode(app, mode, bytecode_dir)
+        for route in ROUTES:
+            times = []
+            with contextlib.redirect_stdout(io.StringIO()):
+                client.get(route)  # warm up (and fill the bytecode cache)
+                for _ in range(requests):
+                    start = time.perf_counter()
+                    response = client.get(route)
+                    times.append(time.perf_counter() - start)
+            assert response.status_code == 200, (route, response.status_code)
+            results[mode, route] = median(times) * 1000
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark page renders with the template cache')
+    parser.add_argument('--requests', type=int, default=50)
+    args = parser.parse_args()
+
+    print("\n" + "="*60)
+    print(f"  TEMPLATE RENDER BENCHMARK (median of {args.requests} requests, ms)")
+    print("="*60 + "\n")
+    results = bench(args.requests)
+    print(f"  {'route':18s}" + ''.join(f"{mode:>10s}" for mode in MODES) + "   speedup")
+    for route in ROUTES:
+        row = [results[mode, route] for mode in MODES]
+        print(f"  {route:18s}" + ''.join(f"{ms:10.2f}" for ms in row) + f"   {row[0] / row[-1]:6.1f}x")
+    print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+Static CSS and JavaScript bundles with content-hashed URLs.
+
+Modules register their stylesheets and scripts here by name when they
+are imported, as strings or as builders taking the app (for bundles that
+depend on its config, like polling.js with --event-stream). Each bundle is
+built once per app, hashed and gzipped in advance, and served from
+/assets/<name>.<hash>.<ext> with an ETag and a year-long immutable
+Cache-Control. Pages link to them with {{ asset_url('base.css') }}, so a
+tablet fetches each bundle once and a changed bundle gets a new URL.
+"""
+import gzip
+import hashlib
+import os
+import threading
+
+from flask import Response, current_app, request
+
+HASH_LENGTH = 12
+IMMUTABLE = 'public, max-age=31536000, immutable'
+MIMETYPES = {'.css': 'text/css', '.js': 'application/javascript'}
+
+_sources = {}  # name -> str or callable(app) -> str
+_build_lock = threading.Lock()
+
+
+def register_asset(name, source):
+    """Serve `source` (text, or a function of the app returning it) as bundle `name`"""
+    _sources[name] = source
+    return name
+
+
+class Bundle:
+    """One built asset: its body, gzipped body and hashed filename"""
+
+    def __init__(self, name, text):
+        stem, ext = os.path.splitext(name)
+        self.name = name
+        self.mimetype = MIMETYPES.get(ext, 'application/octet-stream')
+        self.body = text.encode('utf-8')
+        self.digest = hashlib.sha256(self.body).hexdigest()[:HASH_LENGTH]
+        self.filename = f'{stem}.{self.digest}{ext}'
+        self.gzipped = gzip.compress(self.body, 9, mtime=0)
+
+    def response(self, cache_control):
+        """The bundle, gzipped if the client accepts it, or 304 if its copy is current"""
+        use_gzip = 'gzip' in request.accept_encodings
+        etag = self.digest + ('-gz' if use_gzip else '')
+        response = Response(self.gzipped if use_gzip else self.body, mimetype=self.mimetype)
+        if use_gzip:
+            response.headers['Content-Encoding'] = 'gzip'
+        response.headers['Vary'] = 'Accept-Encoding'
+        response.headers['Cache-Control'] = cache_control
+        response.set_etag(etag)
+        return response.make_conditional(request)
+
+
+def build_assets(app):
+    """Build every registered bundle for `app` (once); returns {name: Bundle}"""
+    bundles = app.extensions.get('assets')
+    if bundles is None:
+        with _build_lock:
+            bundles = app.extensions.get('assets')
+            if bundles is None:
+                bundles = {}
+                for name, source in _sources.items():
+                    bundles[name] = Bundle(name, source(app) if callable(source) else source)
+                app.extensions['assets'] = bundles
+    return bundles
+
+
+def get_bundle(name):
+    return build_assets(current_app)[name]
+
+
+def asset_url(name):
+    """Hashed URL of a bundle, for templates"""
+    return '/assets/' + get_bundle(name).filename
+
+
+def send_bundle(name):
+    """Response for an unhashed bundle URL (e.g. /static/base.css): revalidated on every use"""
+    return get_bundle(name).response('no-cache')
+
+
+def register_asset_routes(app):
+    """Serve bundles under /assets/ and make asset_url() available to templates"""
+    app.jinja_env.globals['asset_url'] = asset_url
+
+    @app.route('/assets/<filename>')
+    def asset(filename):
+        stem, ext = os.path.splitext(filename)
+        name = os.path.splitext(stem)[0] + ext
+        bundles = build_assets(app)
+        if name not in bundles:
+            return Response('Not found', status=404, mimetype='text/plain')
+        bundle = bundles[name]
+        if filename != bundle.filename:
+            # A page from before the bundle changed: serve the current one uncached
+            return bundle.response('no-cache')
+        return bundle.response(IMMUTABLE)
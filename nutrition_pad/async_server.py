@@ -0,0 +1,268 @@
+"""
+Asyncio serving mode (`nutrition-pad --async`).
+
+/poll-updates and /events run as coroutines waiting on an asyncio event,
+so an idle tablet or dashboard costs a socket and a small task instead of
+an OS thread blocked in wait_for_update(). Every other route goes to the
+Flask app through a small WSGI bridge on a bounded thread pool.
+
+Standard library only: HTTP/1.1, one request per connection.
+"""
+import asyncio
+import io
+import sys
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, unquote_to_bytes, urlsplit
+
+from . import polling
+
+# Threads running Flask routes; idle polls and streams don't use one
+WSGI_THREADS = 16
+MAX_HEADER_LINES = 100
+LISTEN_BACKLOG = 1024
+
+
+class UpdateNotifier:
+    """asyncio view of the polling update version.
+
+    Registered in polling.update_listeners, so every update (from any
+    thread) schedules a wakeup on the event loop. Waiters sleep on an
+    asyncio.Event that is replaced by a fresh one at each wakeup.
+    """
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.changed = asyncio.Event()
+
+    def wake(self, version):
+        self.loop.call_soon_threadsafe(self._wake)
+
+    def _wake(self):
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+    async def wait(self, version, timeout):
+        """Wait until the update version moves past `version` or timeout; return it"""
+        deadline = self.loop.time() + timeout
+        # The version is bumped before listeners run, so checking it before
+        # taking self.changed can't miss an update
+        while polling.get_update_version() <= version:
+            remaining = deadline - self.loop.time()
+            if remaining <= 0:
+                break
+            try:
+                await asyncio.wait_for(self.changed.wait(), remaining)
+            except asyncio.TimeoutError:
+                break
+        return polling.get_update_version()
+
+
+def query_arg(query, name, type, default=None):
+    """First value of a query parameter converted with `type`, else default"""
+    try:
+        return type(query[name][0])
+    except (KeyError, IndexError, ValueError):
+        return default
+
+
+class AsyncServer:
+    """Serves polling natively and everything else through the Flask app"""
+
+    def __init__(self, app, loop, wsgi_threads=WSGI_THREADS):
+        self.app = app
+        self.loop = loop
+        self.executor = ThreadPoolExecutor(max_workers=wsgi_threads, thread_name_prefix='wsgi')
+        self.notifier = UpdateNotifier(loop)
+
+    def run(self, func, *args):
+        return self.loop.run_in_executor(self.executor, func, *args)
+
+    async def handle(self, reader, writer):
+        try:
+            request = await self.read_request(reader)
+            if request is None:
+                return
+            method, target, headers, body = request
+            url = urlsplit(target)
+            query = parse_qs(url.query)
+            if method == 'GET' and url.path == '/poll-updates':
+                await self.poll(writer, query)
+            elif method == 'GET' and url.path == '/events':
+                await self.events(writer, query, headers)
+            else:
+                await self.wsgi(writer, method, url, headers, body)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:
+            # Shutting down; end quietly rather than as a cancelled task
+            pass
+        except Exception:
+            traceback.print_exc()
+            try:
+                await self.send(writer, '500 Internal Server Error', [], b'')
+            except ConnectionError:
+                pass
+        finally:
+            writer.close()
+
+    async def read_request(self, reader):
+        """(method, target, [(name, value)], body) or None for an empty connection"""
+        line = await reader.readline()
+        if not line.strip():
+            return None
+        method, target, _ = line.decode('latin-1').split(' ', 2)
+        headers = []
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            if len(headers) >= MAX_HEADER_LINES:
+                raise ValueError('Too many headers')
+            name, _, value = line.decode('latin-1').partition(':')
+            headers.append((name.strip(), value.strip()))
+        length = next((int(v) for n, v in headers if n.lower() == 'content-length'), 0)
+        body = await reader.readexactly(length) if length else b''
+        return method, target, headers, body
+
+    async def send(self, writer, status, headers, body):
+        head = [f'HTTP/1.1 {status}']
+        head += [f'{name}: {value}' for name, value in headers]
+        if not any(name.lower() == 'content-length' for name, _ in headers):
+            head.append(f'Content-Length: {len(body)}')
+        head.append('Connection: close')
+        writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + body)
+        await writer.drain()
+
+    async def poll(self, writer, query):
+        """/poll-updates, as polling.poll_updates() but without holding a thread"""
+        since = query_arg(query, 'since', float, 0.0)
+        client_version = query_arg(query, 'version', int)
+        client = query_arg(query, 'client', str) or self.peer(writer)
+
+        version = polling.get_update_version()
+        snapshot = await self.snapshot()
+        if not snapshot.changed_since(since) and (client_version is None or client_version == version):
+            if await self.notifier.wait(version, polling.POLL_TIMEOUT) > version:
+                snapshot = await self.snapshot()
+        polling.count_amount_delivery(client, snapshot.state)
+        await self.send(writer, '200 OK', [('Content-Type', 'application/json')],
+                        snapshot.body(since, client_version).encode())
+
+    async def snapshot(self):
+        """The shared poll snapshot; only its first builder per version uses a thread"""
+        return polling.current_poll_snapshot() or await self.run(polling.poll_snapshot)
+
+    async def events(self, writer, query, headers):
+        """/events, as polling.event_stream() but without holding a thread"""
+        try:
+            last_event_id = int(next(v for n, v in headers if n.lower() == 'last-event-id'))
+        except (StopIteration, ValueError):
+            last_event_id = None
+        seen, missed = polling.stream_start(last_event_id, query_arg(query, 'since', float))
+        client = query_arg(query, 'client', str) or self.peer(writer)
+
+        writer.write(b'HTTP/1.1 200 OK\r\n'
+                     b'Content-Type: text/event-stream; charset=utf-8\r\n'
+                     b'Cache-Control: no-cache\r\n'
+                     b'X-Accel-Buffering: no\r\n'
+                     b'Connection: close\r\n\r\n')
+        writer.write(f'retry: {polling.SSE_RETRY_MS}\n\n'.encode())
+        if missed:
+            writer.write((await self.run(polling.format_events, missed, client)).encode())
+        await writer.drain()
+
+        deadline = self.loop.time() + polling.SSE_MAX_SECONDS
+        while True:
+            remaining = deadline - self.loop.time()
+            if remaining <= 0:
+                return
+            wait = min(polling.SSE_HEARTBEAT_SECONDS, remaining)
+            if await self.notifier.wait(seen, wait) == seen:
+                writer.write(b': heartbeat\n\n')
+            else:
+                seen, events = polling.stream_next(seen)
+                writer.write((await self.run(polling.format_events, events, client)).encode())
+            await writer.drain()
+
+    @staticmethod
+    def peer(writer):
+        return (writer.get_extra_info('peername') or ('',))[0]
+
+    def wsgi_environ(self, writer, method, url, headers, body):
+        server_name, server_port = writer.get_extra_info('sockname')[:2]
+        peer = writer.get_extra_info('peername') or ('', 0)
+        environ = {
+            'REQUEST_METHOD': method,
+            'SCRIPT_NAME': '',
+            'PATH_INFO': unquote_to_bytes(url.path).decode('latin-1'),
+            'QUERY_STRING': url.query,
+            'SERVER_NAME': str(server_name),
+            'SERVER_PORT': str(server_port),
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'REMOTE_ADDR': peer[0],
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        for name, value in headers:
+            key = name.upper().replace('-', '_')
+            if key in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+                environ[key] = value
+            else:
+                key = 'HTTP_' + key
+                environ[key] = environ[key] + ',' + value if key in environ else value
+        return environ
+
+    async def wsgi(self, writer, method, url, headers, body):
+        """Run a Flask route on the thread pool and send its (buffered) response"""
+        environ = self.wsgi_environ(writer, method, url, headers, body)
+        started = {}
+        chunks = []
+
+        def start_response(status, response_headers, exc_info=None):
+            started['status'] = status
+            started['headers'] = response_headers
+            return chunks.append
+
+        def call_app():
+            result = self.app(environ, start_response)
+            try:
+                chunks.extend(result)
+            finally:
+                if hasattr(result, 'close'):
+                    result.close()
+            return b''.join(chunks)
+
+        response = await self.run(call_app)
+        await self.send(writer, started['status'], started['headers'], response)
+
+
+def serve(app, host='localhost', port=5001, wsgi_threads=WSGI_THREADS, sock=None):
+    """Run the app with polling on asyncio until interrupted.
+
+    Listens on `sock` instead of host/port if given (--workers).
+    """
+
+    async def main():
+        server = AsyncServer(app, asyncio.get_running_loop(), wsgi_threads)
+        polling.update_listeners.append(server.notifier.wake)
+        try:
+            if sock is not None:
+                listener = await asyncio.start_server(server.handle, sock=sock)
+            else:
+                listener = await asyncio.start_server(server.handle, host, port, backlog=LISTEN_BACKLOG)
+            async with listener:
+                await listener.serve_forever()
+        finally:
+            polling.update_listeners.remove(server.notifier.wake)
+            server.executor.shutdown(wait=False)
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -3,8 +3,382 @@ Calories timeline view - shows when food was eaten with cumulative graphs.
 Tracks calories, protein, and fiber with drink markers.
 """
 
-from flask import render_template_string
-from datetime import datetime, date
+from flask import render_template, request, jsonify, make_response
+from datetime import datetime, date, timedelta
+
+from .assets import register_asset
+from .page_templates import register_template
+from .page_cache import past_page
+from .compression import cache_compressed
+from .conditional import conditional_response
+from .data import (
+    load_log_for_date, get_day_totals, log_version, get_config_signature, load_day_rollups,
+    eating_sessions
+)
+
+CALORIES_CSS = """
+.header-icons {
+    display: flex;
+    justify-content: center;
+    gap: 15px;
+    margin-bottom: 10px;
+}
+.settings-cog, .food-link, .notes-link, .meal-link, .amounts-link {
+    font-size: 1.5em;
+    color: rgba(255, 255, 255, 0.7);
+    text-decoration: none;
+    transition: all 0.3s ease;
+    cursor: pointer;
+    padding: 10px;
+    min-width: 44px;
+    min-height: 44px;
+    display: flex;
+    align-items: center;
+    justify-content: center;
+}
+.settings-cog:hover {
+    color: #ffd93d;
+    transform: rotate(90deg) scale(1.1);
+}
+.food-link:hover {
+    transform: scale(1.2);
+    filter: drop-shadow(0 0 8px rgba(255, 100, 100, 0.6));
+}
+.notes-link:hover {
+    color: #ff6b6b;
+    transform: scale(1.1);
+}
+
+.timeline-container {
+    max-width: 900px;
+    margin: 20px auto;
+    padding: 0 15px;
+}
+
+/* Graph section */
+.graph-section {
+    background: rgba(255, 255, 255, 0.08);
+    border-radius: 15px;
+    padding: 20px;
+    margin-bottom: 25px;
+    backdrop-filter: blur(20px);
+    border: 1px solid rgba(255, 255, 255, 0.1);
+}
+
+.graph-title {
+    font-size: 1.1em;
+    color: rgba(255, 255, 255, 0.7);
+    margin-bottom: 15px;
+    text-align: center;
+}
+
+/* Cumulative graph using SVG */
+.cumulative-graph {
+    position: relative;
+    height: 220px;
+    background: rgba(0, 0, 0, 0.2);
+    border-radius: 10px;
+    overflow: visible;
+    margin-top: 30px;
+}
+
+.cumulative-graph svg {
+    width: 100%;
+    height: 100%;
+}
+
+.graph-line {
+    fill: none;
+    stroke-width: 2.5;
+    stroke-linecap: round;
+    stroke-linejoin: round;
+}
+
+.calories-line { stroke: #ff6b6b; }
+.protein-line { stroke: #4ecdc4; }
+.fiber-line { stroke: #ffd93d; }
+
+.graph-area {
+    opacity: 0.15;
+}
+.calories-area { fill: #ff6b6b; }
+
+.entry-dot {
+    fill: #ff6b6b;
+    cursor: pointer;
+}
+.entry-dot:hover {
+    fill: #fff;
+    r: 2.5;
+}
+.graph-tooltip {
+    position: absolute;
+    top: 8px;
+    left: 50%;
+    transform: translateX(-50%);
+    background: rgba(0, 0, 0, 0.85);
+    border: 1px solid rgba(255, 255, 255, 0.2);
+    border-radius: 8px;
+    padding: 6px 12px;
+    font-size: 0.8em;
+    color: #fff;
+    pointer-events: none;
+    opacity: 0;
+    transition: opacity 0.15s;
+    z-index: 10;
+}
+.graph-tooltip.visible { opacity: 1; }
+.graph-tooltip .tt-name { font-weight: 600; }
+.graph-tooltip .tt-detail { color: rgba(255,255,255,0.6); margin-left: 8px; }
+
+.hour-labels {
+    display: flex;
+    justify-content: space-between;
+    padding: 4px 0 0 0;
+}
+.hour-label {
+    font-size: 0.7em;
+    color: rgba(255, 255, 255, 0.4);
+    width: 0;
+    text-align: center;
+}
+.hour-label:first-child { text-align: left; width: auto; }
+.hour-label:last-child { text-align: right; width: auto; }
+
+/* Day / week / month / year switcher */
+.range-links {
+    display: flex;
+    justify-content: center;
+    gap: 18px;
+    margin-top: 8px;
+    font-size: 0.9em;
+}
+.range-links a {
+    color: rgba(255, 255, 255, 0.5);
+    text-decoration: none;
+}
+.range-links a.active { color: #ffd93d; }
+
+/* Graph legend */
+.graph-legend {
+    display: flex;
+    justify-content: center;
+    gap: 20px;
+    margin-top: 15px;
+    flex-wrap: wrap;
+}
+
+.legend-item {
+    display: flex;
+    align-items: center;
+    gap: 6px;
+    font-size: 0.9em;
+}
+
+.legend-color {
+    width: 12px;
+    height: 12px;
+    border-radius: 3px;
+}
+
+.legend-color.calories { background: #ff6b6b; }
+.legend-color.protein { background: #4ecdc4; }
+.legend-color.fiber { background: #ffd93d; }
+
+/* Summary stats */
+.summary-stats {
+    display: flex;
+    justify-content: space-around;
+    gap: 15px;
+    margin-bottom: 20px;
+    flex-wrap: wrap;
+}
+
+.stat-item {
+    text-align: center;
+}
+
+.stat-value {
+    font-size: 1.8em;
+    font-weight: 700;
+}
+
+.stat-value.calories { color: #ff6b6b; }
+.stat-value.protein { color: #4ecdc4; }
+.stat-value.fiber { color: #ffd93d; }
+
+.stat-label {
+    font-size: 0.8em;
+    color: rgba(255, 255, 255, 0.6);
+    text-transform: uppercase;
+}
+.stat-delta {
+    font-size: 0.85em;
+    font-weight: 600;
+    margin-top: 2px;
+}
+
+/* Window bars */
+.window-row {
+    display: flex;
+    align-items: center;
+    gap: 8px;
+    margin-bottom: 6px;
+}
+.window-label {
+    width: 45px;
+    font-size: 0.8em;
+    color: rgba(255, 255, 255, 0.6);
+    text-align: right;
+    flex-shrink: 0;
+}
+.window-bar-bg {
+    flex: 1;
+    height: 20px;
+    background: rgba(255, 255, 255, 0.05);
+    border-radius: 4px;
+    overflow: hidden;
+}
+.window-bar {
+    height: 100%;
+    background: linear-gradient(90deg, #ff6b6b, #ff8e8e);
+    border-radius: 4px;
+    min-width: 2px;
+}
+.window-cal {
+    width: 110px;
+    font-size: 0.8em;
+    color: rgba(255, 255, 255, 0.6);
+    flex-shrink: 0;
+}
+.window-row { cursor: pointer; }
+.window-foods {
+    display: none;
+    margin: 0 0 8px 53px;
+    padding: 6px 10px;
+    background: rgba(0, 0, 0, 0.2);
+    border-radius: 6px;
+    font-size: 0.8em;
+}
+.window-foods.open { display: block; }
+.window-food-item {
+    display: flex;
+    justify-content: space-between;
+    padding: 2px 0;
+    color: rgba(255, 255, 255, 0.6);
+}
+.window-food-item .wf-cal { color: #ff6b6b; }
+
+/* Entries list */
+.entries-section {
+    background: rgba(255, 255, 255, 0.08);
+    border-radius: 15px;
+    padding: 20px;
+    margin-bottom: 100px;
+    backdrop-filter: blur(20px);
+    border: 1px solid rgba(255, 255, 255, 0.1);
+}
+
+.entries-title {
+    font-size: 1.1em;
+    color: rgba(255, 255, 255, 0.7);
+    margin-bottom: 15px;
+}
+
+.entry-item {
+    display: grid;
+    grid-template-columns: 40px 1fr auto auto auto auto;
+    gap: 10px;
+    align-items: center;
+    padding: 12px 0;
+    border-bottom: 1px solid rgba(255, 255, 255, 0.05);
+}
+
+.entry-item:last-child {
+    border-bottom: none;
+}
+
+.entry-time {
+    color: rgba(255, 255, 255, 0.5);
+    font-size: 0.9em;
+}
+
+.entry-food {
+    font-weight: 500;
+}
+
+.entry-food .amount {
+    font-size: 0.85em;
+    color: rgba(255, 255, 255, 0.5);
+    margin-left: 8px;
+}
+
+.entry-calories {
+    color: #ff6b6b;
+    font-weight: 600;
+    text-align: right;
+    min-width: 60px;
+}
+
+.entry-protein {
+    color: #4ecdc4;
+    font-weight: 600;
+    text-align: right;
+    min-width: 50px;
+}
+
+.entry-running {
+    color: rgba(255, 255, 255, 0.4);
+    font-size: 0.85em;
+    text-align: right;
+    min-width: 60px;
+}
+
+.empty-state {
+    text-align: center;
+    padding: 40px 20px;
+    color: rgba(255, 255, 255, 0.5);
+}
+
+@media (max-width: 600px) {
+    .entry-item {
+        grid-template-columns: 45px 1fr auto;
+    }
+    .entry-protein, .entry-running {
+        display: none;
+    }
+}
+"""
+register_asset('calories.css', CALORIES_CSS)
+
+CALORIES_JS = """
+(function() {
+    var tip = document.getElementById('graphTooltip');
+    document.querySelectorAll('.entry-dot').forEach(function(dot) {
+        dot.addEventListener('mouseenter', function() {
+            var n = dot.getAttribute('data-name');
+            var t = dot.getAttribute('data-time');
+            var c = dot.getAttribute('data-cal');
+            var p = dot.getAttribute('data-protein');
+            var f = dot.getAttribute('data-fiber');
+            var a = dot.getAttribute('data-amount');
+            var cc = dot.getAttribute('data-ccal');
+            var cp = dot.getAttribute('data-cprot');
+            var cf = dot.getAttribute('data-cfib');
+            var pct = dot.getAttribute('data-pct');
+            tip.innerHTML =
+                '<div style="font-weight:600;margin-bottom:3px;">' + n + ' <span style="color:rgba(255,255,255,0.5)">' + a + ' @ ' + t + '</span></div>' +
+                '<div><span style="color:#ff6b6b">' + c + ' cal</span> · <span style="color:#4ecdc4">' + p + 'g prot</span> · <span style="color:#ffd93d">' + f + 'g fiber</span></div>' +
+                '<div style="margin-top:3px;color:rgba(255,255,255,0.5);">\u03A3 <span style="color:#ff6b6b">' + cc + ' cal</span> · <span style="color:#4ecdc4">' + cp + 'g prot</span> · <span style="color:#ffd93d">' + cf + 'g fiber</span> · <span style="color:#fff">' + pct + '%</span> of day</div>';
+            tip.classList.add('visible');
+        });
+        dot.addEventListener('mouseleave', function() {
+            tip.classList.remove('visible');
+        });
+    });
+})();
+"""
+register_asset('calories.js', CALORIES_JS)
 
 HTML_CALORIES = """
 <!DOCTYPE html>
@@ -12,327 +386,9 @@ HTML_CALORIES = """
 <head>
     <title>Calories Timeline</title>
     <meta name="viewport" content="width=device-width, initial-scale=1">
-    <link rel="stylesheet" href="/static/base.css">
+    <link rel="stylesheet" href="{{ asset_url('base.css') }}">
     <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css">
-    <style>
-        .header-icons {
-            display: flex;
-            justify-content: center;
-            gap: 15px;
-            margin-bottom: 10px;
-        }
-        .settings-cog, .food-link, .notes-link, .meal-link, .amounts-link {
-            font-size: 1.5em;
-            color: rgba(255, 255, 255, 0.7);
-            text-decoration: none;
-            transition: all 0.3s ease;
-            cursor: pointer;
-            padding: 10px;
-            min-width: 44px;
-            min-height: 44px;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-        }
-        .settings-cog:hover {
-            color: #ffd93d;
-            transform: rotate(90deg) scale(1.1);
-        }
-        .food-link:hover {
-            transform: scale(1.2);
-            filter: drop-shadow(0 0 8px rgba(255, 100, 100, 0.6));
-        }
-        .notes-link:hover {
-            color: #ff6b6b;
-            transform: scale(1.1);
-        }
-        
-        .timeline-container {
-            max-width: 900px;
-            margin: 20px auto;
-            padding: 0 15px;
-        }
-        
-        /* Graph section */
-        .graph-section {
-            background: rgba(255, 255, 255, 0.08);
-            border-radius: 15px;
-            padding: 20px;
-            margin-bottom: 25px;
-            backdrop-filter: blur(20px);
-            border: 1px solid rgba(255, 255, 255, 0.1);
-        }
-        
-        .graph-title {
-            font-size: 1.1em;
-            color: rgba(255, 255, 255, 0.7);
-            margin-bottom: 15px;
-            text-align: center;
-        }
-        
-        /* Cumulative graph using SVG */
-        .cumulative-graph {
-            position: relative;
-            height: 220px;
-            background: rgba(0, 0, 0, 0.2);
-            border-radius: 10px;
-            overflow: visible;
-            margin-top: 30px;
-        }
-
-        .cumulative-graph svg {
-            width: 100%;
-            height: 100%;
-        }
-
-        .graph-line {
-            fill: none;
-            stroke-width: 2.5;
-            stroke-linecap: round;
-            stroke-linejoin: round;
-        }
-
-        .calories-line { stroke: #ff6b6b; }
-        .protein-line { stroke: #4ecdc4; }
-        .fiber-line { stroke: #ffd93d; }
-
-        .graph-area {
-            opacity: 0.15;
-        }
-        .calories-area { fill: #ff6b6b; }
-
-        .entry-dot {
-            fill: #ff6b6b;
-            cursor: pointer;
-        }
-        .entry-dot:hover {
-            fill: #fff;
-            r: 2.5;
-        }
-        .graph-tooltip {
-            position: absolute;
-            top: 8px;
-            left: 50%;
-            transform: translateX(-50%);
-            background: rgba(0, 0, 0, 0.85);
-            border: 1px solid rgba(255, 255, 255, 0.2);
-            border-radius: 8px;
-            padding: 6px 12px;
-            font-size: 0.8em;
-            color: #fff;
-            pointer-events: none;
-            opacity: 0;
-            transition: opacity 0.15s;
-            z-index: 10;
-        }
-        .graph-tooltip.visible { opacity: 1; }
-        .graph-tooltip .tt-name { font-weight: 600; }
-        .graph-tooltip .tt-detail { color: rgba(255,255,255,0.6); margin-left: 8px; }
-
-        .hour-labels {
-            display: flex;
-            justify-content: space-between;
-            padding: 4px 0 0 0;
-        }
-        .hour-label {
-            font-size: 0.7em;
-            color: rgba(255, 255, 255, 0.4);
-            width: 0;
-            text-align: center;
-        }
-        .hour-label:first-child { text-align: left; width: auto; }
-        .hour-label:last-child { text-align: right; width: auto; }
-        
-        /* Graph legend */
-        .graph-legend {
-            display: flex;
-            justify-content: center;
-            gap: 20px;
-            margin-top: 15px;
-            flex-wrap: wrap;
-        }
-        
-        .legend-item {
-            display: flex;
-            align-items: center;
-            gap: 6px;
-            font-size: 0.9em;
-        }
-        
-        .legend-color {
-            width: 12px;
-            height: 12px;
-            border-radius: 3px;
-        }
-        
-        .legend-color.calories { background: #ff6b6b; }
-        .legend-color.protein { background: #4ecdc4; }
-        .legend-color.fiber { background: #ffd93d; }
-        
-        /* Summary stats */
-        .summary-stats {
-            display: flex;
-            justify-content: space-around;
-            gap: 15px;
-            margin-bottom: 20px;
-            flex-wrap: wrap;
-        }
-        
-        .stat-item {
-            text-align: center;
-        }
-        
-        .stat-value {
-            font-size: 1.8em;
-            font-weight: 700;
-        }
-        
-        .stat-value.calories { color: #ff6b6b; }
-        .stat-value.protein { color: #4ecdc4; }
-        .stat-value.fiber { color: #ffd93d; }
-        
-        .stat-label {
-            font-size: 0.8em;
-            color: rgba(255, 255, 255, 0.6);
-            text-transform: uppercase;
-        }
-        .stat-delta {
-            font-size: 0.85em;
-            font-weight: 600;
-            margin-top: 2px;
-        }
-        
-        /* Window bars */
-        .window-row {
-            display: flex;
-            align-items: center;
-            gap: 8px;
-            margin-bottom: 6px;
-        }
-        .window-label {
-            width: 45px;
-            font-size: 0.8em;
-            color: rgba(255, 255, 255, 0.6);
-            text-align: right;
-            flex-shrink: 0;
-        }
-        .window-bar-bg {
-            flex: 1;
-            height: 20px;
-            background: rgba(255, 255, 255, 0.05);
-            border-radius: 4px;
-            overflow: hidden;
-        }
-        .window-bar {
-            height: 100%;
-            background: linear-gradient(90deg, #ff6b6b, #ff8e8e);
-            border-radius: 4px;
-            min-width: 2px;
-        }
-        .window-cal {
-            width: 110px;
-            font-size: 0.8em;
-            color: rgba(255, 255, 255, 0.6);
-            flex-shrink: 0;
-        }
-        .window-row { cursor: pointer; }
-        .window-foods {
-            display: none;
-            margin: 0 0 8px 53px;
-            padding: 6px 10px;
-            background: rgba(0, 0, 0, 0.2);
-            border-radius: 6px;
-            font-size: 0.8em;
-        }
-        .window-foods.open { display: block; }
-        .window-food-item {
-            display: flex;
-            justify-content: space-between;
-            padding: 2px 0;
-            color: rgba(255, 255, 255, 0.6);
-        }
-        .window-food-item .wf-cal { color: #ff6b6b; }
-
-        /* Entries list */
-        .entries-section {
-            background: rgba(255, 255, 255, 0.08);
-            border-radius: 15px;
-            padding: 20px;
-            margin-bottom: 100px;
-            backdrop-filter: blur(20px);
-            border: 1px solid rgba(255, 255, 255, 0.1);
-        }
-        
-        .entries-title {
-            font-size: 1.1em;
-            color: rgba(255, 255, 255, 0.7);
-            margin-bottom: 15px;
-        }
-        
-        .entry-item {
-            display: grid;
-            grid-template-columns: 40px 1fr auto auto auto auto;
-            gap: 10px;
-            align-items: center;
-            padding: 12px 0;
-            border-bottom: 1px solid rgba(255, 255, 255, 0.05);
-        }
-        
-        .entry-item:last-child {
-            border-bottom: none;
-        }
-        
-        .entry-time {
-            color: rgba(255, 255, 255, 0.5);
-            font-size: 0.9em;
-        }
-        
-        .entry-food {
-            font-weight: 500;
-        }
-        
-        .entry-food .amount {
-            font-size: 0.85em;
-            color: rgba(255, 255, 255, 0.5);
-            margin-left: 8px;
-        }
-        
-        .entry-calories {
-            color: #ff6b6b;
-            font-weight: 600;
-            text-align: right;
-            min-width: 60px;
-        }
-        
-        .entry-protein {
-            color: #4ecdc4;
-            font-weight: 600;
-            text-align: right;
-            min-width: 50px;
-        }
-        
-        .entry-running {
-            color: rgba(255, 255, 255, 0.4);
-            font-size: 0.85em;
-            text-align: right;
-            min-width: 60px;
-        }
-        
-        .empty-state {
-            text-align: center;
-            padding: 40px 20px;
-            color: rgba(255, 255, 255, 0.5);
-        }
-        
-        @media (max-width: 600px) {
-            .entry-item {
-                grid-template-columns: 45px 1fr auto;
-            }
-            .entry-protein, .entry-running {
-                display: none;
-            }
-        }
-    </style>
+    <link rel="stylesheet" href="{{ asset_url('calories.css') }}">
 </head>
 <body>
     <div class="header">
@@ -352,6 +408,12 @@ HTML_CALORIES = """
             <span style="width: 44px;"></span>
             {% endif %}
         </div>
+        <div class="range-links">
+            <a href="/calories?date={{ current_date }}" class="active">Day</a>
+            <a href="/calories?range=week&date={{ current_date }}">Week</a>
+            <a href="/calories?range=month&date={{ current_date }}">Month</a>
+            <a href="/calories?range=year&date={{ current_date }}">Year</a>
+        </div>
     </div>
     
     <div class="timeline-container">
@@ -419,33 +481,7 @@ HTML_CALORIES = """
                 </svg>
                 <div class="graph-tooltip" id="graphTooltip"></div>
             </div>
-            <script>
-            (function() {
-                var tip = document.getElementById('graphTooltip');
-                document.querySelectorAll('.entry-dot').forEach(function(dot) {
-                    dot.addEventListener('mouseenter', function() {
-                        var n = dot.getAttribute('data-name');
-                        var t = dot.getAttribute('data-time');
-                        var c = dot.getAttribute('data-cal');
-                        var p = dot.getAttribute('data-protein');
-                        var f = dot.getAttribute('data-fiber');
-                        var a = dot.getAttribute('data-amount');
-                        var cc = dot.getAttribute('data-ccal');
-                        var cp = dot.getAttribute('data-cprot');
-                        var cf = dot.getAttribute('data-cfib');
-                        var pct = dot.getAttribute('data-pct');
-                        tip.innerHTML =
-                            '<div style="font-weight:600;margin-bottom:3px;">' + n + ' <span style="color:rgba(255,255,255,0.5)">' + a + ' @ ' + t + '</span></div>' +
-                            '<div><span style="color:#ff6b6b">' + c + ' cal</span> · <span style="color:#4ecdc4">' + p + 'g prot</span> · <span style="color:#ffd93d">' + f + 'g fiber</span></div>' +
-                            '<div style="margin-top:3px;color:rgba(255,255,255,0.5);">\u03A3 <span style="color:#ff6b6b">' + cc + ' cal</span> · <span style="color:#4ecdc4">' + cp + 'g prot</span> · <span style="color:#ffd93d">' + cf + 'g fiber</span> · <span style="color:#fff">' + pct + '%</span> of day</div>';
-                        tip.classList.add('visible');
-                    });
-                    dot.addEventListener('mouseleave', function() {
-                        tip.classList.remove('visible');
-                    });
-                });
-            })();
-            </script>
+            <script src="{{ asset_url('calories.js') }}"></script>
             <div class="hour-labels">
                 {% for h in range(0, 25, 3) %}
                 <span class="hour-label">{{ '%02d'|format(h % 24) }}</span>
@@ -544,6 +580,482 @@ HTML_CALORIES = """
 </body>
 </html>
 """
+register_template('calories.html', HTML_CALORIES)
+
+# Client-rendered mode (/calories?client=1): the page is a shell, and each
+# day comes from /api/timeline as compact JSON and is drawn here, so going
+# to the next or previous day is one small fetch (usually already
+# prefetched) instead of a whole page.
+CALORIES_CLIENT_JS = r"""
+(function() {
+    var app = document.getElementById('timelineApp');
+    var days = {};      // date -> /api/timeline response
+    var waiting = {};   // date -> callbacks for a fetch in flight
+    var shown = null;
+
+    function esc(s) {
+        return String(s).replace(/&/g, '&amp;').replace(/</g, '&lt;')
+                        .replace(/>/g, '&gt;').replace(/"/g, '&quot;');
+    }
+    function clamp(v) { return Math.max(0, Math.min(100, v)); }
+    function xOf(mins) { return clamp(mins / 1440 * 100); }
+    function f1(v) { return v.toFixed(1); }
+    function pct(part, whole) { return whole > 0 ? Math.round(part / whole * 100) : 0; }
+    function hhmm(mins) {
+        var h = Math.floor(mins / 60), m = mins % 60;
+        return (h < 10 ? '0' : '') + h + ':' + (m < 10 ? '0' : '') + m;
+    }
+    var WEEKDAYS = ['Sun', 'Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat'];
+    function clock(d, mins) {
+        // Minutes from d's midnight; overnight fasts reach into other days
+        var offset = Math.floor(mins / 1440);
+        if (!offset) return hhmm(mins);
+        var ymd = d.date.split('-');
+        var day = new Date(+ymd[0], ymd[1] - 1, +ymd[2] + offset);
+        return WEEKDAYS[day.getDay()] + ' ' + hhmm(mins - offset * 1440);
+    }
+    function signed(v, digits) {
+        var s = digits ? v.toFixed(digits) : String(Math.round(v));
+        return (v >= 0 ? '+' : '') + s;
+    }
+
+    function fetchDay(day, callback) {
+        // Past days don't change while the page is open; today is revalidated
+        if (days[day] && !days[day].is_today) { callback(days[day]); return; }
+        if (waiting[day]) { waiting[day].push(callback); return; }
+        waiting[day] = [callback];
+        var xhr = new XMLHttpRequest();
+        xhr.open('GET', '/api/timeline?date=' + day, true);
+        xhr.onreadystatechange = function() {
+            if (xhr.readyState !== 4) return;
+            var callbacks = waiting[day];
+            delete waiting[day];
+            if (xhr.status !== 200) return;
+            days[day] = JSON.parse(xhr.responseText);
+            for (var i = 0; i < callbacks.length; i++) callbacks[i](days[day]);
+        };
+        xhr.send();
+    }
+
+    function cumulativePath(d, max) {
+        var e = d.entries, parts = ['M 0 100'], total = 0, prevY = 100;
+        if (!e.t.length) return ['M 0 100 L 100 100', 'M 0 100 L 100 100 L 0 100 Z'];
+        for (var i = 0; i < e.t.length; i++) {
+            var x = xOf(e.t[i]);
+            parts.push('L ' + f1(x) + ' ' + f1(prevY));
+            total += e.cal[i];
+            var y = clamp(max > 0 ? 100 - total / max * 100 : 100);
+            parts.push('L ' + f1(x) + ' ' + f1(y));
+            prevY = y;
+        }
+        parts.push('L 100 ' + f1(prevY));
+        var line = parts.join(' ');
+        return [line, line + ' L 100 100 L 0 100 Z'];
+    }
+
+    function ratioPath(d, key, maxRatio) {
+        var e = d.entries, parts = [], cal = 0, nutrient = 0, prevY = null;
+        for (var i = 0; i < e.t.length; i++) {
+            var x = xOf(e.t[i]);
+            cal += e.cal[i];
+            nutrient += e[key][i];
+            if (nutrient > 0) {
+                var y = clamp(100 - cal / nutrient / maxRatio * 100);
+                parts.push((prevY !== null ? 'L ' + f1(x) + ' ' + f1(prevY) : 'M ' + f1(x) + ' ' + f1(y)));
+                parts.push('L ' + f1(x) + ' ' + f1(y));
+                prevY = y;
+            }
+        }
+        if (!parts.length) return 'M 0 100 L 100 100';
+        parts.push('L 100 ' + f1(prevY));
+        return parts.join(' ');
+    }
+
+    function graphSvg(d) {
+        var e = d.entries, total = d.totals.calories, max = Math.max(total, 2000);
+        var cum = cumulativePath(d, max);
+        var html = '<svg viewBox="0 0 100 100" preserveAspectRatio="none">';
+        for (var h = 0; h <= 24; h += 6) {
+            html += '<line x1="' + (h / 24 * 100) + '" y1="0" x2="' + (h / 24 * 100) +
+                    '" y2="100" stroke="rgba(255,255,255,0.1)" stroke-width="0.5"/>';
+        }
+        html += '<path class="graph-area calories-area" d="' + cum[1] + '"/>' +
+                '<path class="graph-line calories-line" d="' + cum[0] + '"/>' +
+                '<path class="graph-line protein-line" d="' + ratioPath(d, 'protein', 30) + '"/>' +
+                '<path class="graph-line fiber-line" d="' + ratioPath(d, 'fiber', 200) + '"/>';
+        var cal = 0;
+        for (var i = 0; i < e.t.length; i++) {
+            cal += e.cal[i];
+            var y = clamp(100 - cal / max * 100);
+            html += '<circle class="entry-dot" cx="' + xOf(e.t[i]) + '" cy="' + y + '" r="1.5" data-i="' + i + '"/>';
+        }
+        return html + '</svg>';
+    }
+
+    function tooltip(d, i) {
+        var e = d.entries, cc = 0, cp = 0, cf = 0;
+        for (var j = 0; j <= i; j++) { cc += e.cal[j]; cp += e.protein[j]; cf += e.fiber[j]; }
+        return '<div style="font-weight:600;margin-bottom:3px;">' + esc(e.name[i]) +
+            ' <span style="color:rgba(255,255,255,0.5)">' + esc(e.amount[i]) + ' @ ' + hhmm(e.t[i]) + '</span></div>' +
+            '<div><span style="color:#ff6b6b">' + Math.round(e.cal[i]) + ' cal</span> · <span style="color:#4ecdc4">' +
+            f1(e.protein[i]) + 'g prot</span> · <span style="color:#ffd93d">' + f1(e.fiber[i]) + 'g fiber</span></div>' +
+            '<div style="margin-top:3px;color:rgba(255,255,255,0.5);">Σ <span style="color:#ff6b6b">' + Math.round(cc) +
+            ' cal</span> · <span style="color:#4ecdc4">' + f1(cp) + 'g prot</span> · <span style="color:#ffd93d">' + f1(cf) +
+            'g fiber</span> · <span style="color:#fff">' + pct(cc, d.totals.calories) + '%</span> of day</div>';
+    }
+
+    function statHtml(cls, value, label, delta, digits) {
+        var html = '<div class="stat-item"><div class="stat-value ' + cls + '">' + value + '</div>' +
+                   '<div class="stat-label">' + label + '</div>';
+        if (delta !== null && (digits || delta !== 0)) {
+            html += '<div class="stat-delta" style="color: ' + (delta < 0 ? '#4ecdc4' : '#ff6b6b') + ';">' +
+                    signed(delta, digits) + '</div>';
+        }
+        return html + '</div>';
+    }
+
+    function summaryHtml(d) {
+        var t = d.totals;
+        return statHtml('calories', Math.round(t.calories), 'Calories', d.deltas.calories, 0) +
+            statHtml('protein', t.protein > 0 ? f1(t.calories / t.protein) : '--', 'kcal/g protein', d.deltas.cpp, 1) +
+            statHtml('fiber', t.fiber > 0 ? f1(t.calories / t.fiber) : '--', 'kcal/g fiber', d.deltas.cpf, 1);
+    }
+
+    function windowsHtml(d) {
+        var e = d.entries, total = d.totals.calories, w = d.windows, cum = 0;
+        if (!w.length) return '';
+        var html = '<div class="graph-title">Calories by 2-Hour Window</div>';
+        for (var i = 0; i < w.length; i++) {
+            var cal = w[i][1];
+            cum += cal;
+            html += '<div class="window-row" onclick="this.nextElementSibling.classList.toggle(\'open\')">' +
+                '<div class="window-label">' + w[i][0] + '</div>' +
+                '<div class="window-bar-bg"><div class="window-bar" style="width: ' + pct(cal, w[0][1]) + '%;"></div></div>' +
+                '<div class="window-cal">' + Math.round(cal) + ' cal <span style="color:rgba(255,255,255,0.4);">' +
+                pct(cal, total) + '%</span> <span style="color:rgba(255,255,255,0.3);">' + pct(cum, total) + '%</span></div></div>' +
+                '<div class="window-foods">';
+            var fcum = 0;
+            for (var j = 0; j < w[i][2].length; j++) {
+                var k = w[i][2][j];
+                fcum += e.cal[k];
+                html += '<div class="window-food-item"><span>' + esc(e.name[k]) +
+                    ' <span style="color:rgba(255,255,255,0.3)">' + esc(e.amount[k]) + '</span></span>' +
+                    '<span><span class="wf-cal">' + Math.round(e.cal[k]) + '</span> <span style="color:rgba(255,255,255,0.5);">' +
+                    pct(fcum, cal) + '%</span> <span style="color:rgba(255,255,255,0.35);">(' + pct(e.cal[k], cal) + '%)</span> · ' +
+                    '<span style="color:#4ecdc4">' + f1(e.protein[k]) + 'g p</span> · <span style="color:#ffd93d">' +
+                    f1(e.fiber[k]) + 'g f</span></span></div>';
+            }
+            html += '</div>';
+        }
+        return html;
+    }
+
+    function fastsHtml(d) {
+        var f = d.fasts;
+        if (!f.length) return '';
+        var html = '<div class="graph-title">Longest Fasting Gaps</div>';
+        for (var i = 0; i < f.length; i++) {
+            var mins = f[i][2], hours = Math.floor(mins / 60), rest = mins % 60;
+            var duration = hours > 0 ? hours + 'h ' + (rest < 10 ? '0' : '') + rest + 'm' : rest + 'm';
+            html += '<div class="window-row" style="cursor: default;"><div class="window-label">' + clock(d, f[i][0]) + '</div>' +
+                '<div class="window-bar-bg"><div class="window-bar" style="width: ' + pct(mins, f[0][2]) +
+                '%; background: linear-gradient(90deg, #4ecdc4, #2ab7ad);"></div></div>' +
+                '<div class="window-cal" style="color:#4ecdc4;">' + duration + ' <span style="color:rgba(255,255,255,0.4);">' +
+                f[i][3] + ' ate → ' + clock(d, f[i][1]) + ' (' + f[i][4] + ')</span></div></div>';
+        }
+        return html;
+    }
+
+    function entriesHtml(d) {
+        var e = d.entries, g = d.groups, total = d.totals.calories, running = 0;
+        var html = '<div class="entries-title">By Calories</div>';
+        if (!g.length) return html + '<div class="empty-state">No entries yet today</div>';
+        for (var i = 0; i < g.length; i++) {
+            var first = g[i][0];
+            running += g[i][2];
+            html += '<div class="entry-item"><div class="entry-time">' + hhmm(e.t[first]) + '</div>' +
+                '<div class="entry-food">' + (g[i][1] > 1 ? g[i][1] + 'x ' : '') + esc(e.name[first]) +
+                ' <span class="amount">' + esc(g[i][5]) + '</span></div>' +
+                '<div class="entry-calories">' + Math.round(g[i][2]) + ' cal <span style="color:rgba(255,255,255,0.4);">(' +
+                pct(g[i][2], total) + '%)</span></div>' +
+                '<div class="entry-protein">' + f1(g[i][3]) + 'g p</div>' +
+                '<div class="entry-fiber" style="color:#ffd93d;">' + f1(g[i][4]) + 'g f</div>' +
+                '<div class="entry-running">' + pct(running, total) + '%</div></div>';
+        }
+        return html;
+    }
+
+    function section(id, html) {
+        var el = document.getElementById(id);
+        el.innerHTML = html;
+        el.style.display = html ? '' : 'none';
+    }
+
+    function render(d) {
+        shown = d;
+        document.getElementById('dayTitle').textContent = d.title;
+        document.getElementById('prevDay').href = '/calories?date=' + d.prev_date;
+        var next = document.getElementById('nextDay');
+        next.href = '/calories?date=' + d.next_date;
+        next.style.visibility = d.is_today ? 'hidden' : 'visible';
+        document.getElementById('summaryStats').innerHTML = summaryHtml(d);
+        document.getElementById('graph').innerHTML = graphSvg(d);
+        section('windowsSection', windowsHtml(d));
+        section('fastsSection', fastsHtml(d));
+        document.getElementById('entriesSection').innerHTML = entriesHtml(d);
+        var links = document.getElementById('rangeLinks').getElementsByTagName('a');
+        for (var i = 0; i < links.length; i++) {
+            var range = links[i].getAttribute('data-range');
+            links[i].href = '/calories?' + (range ? 'range=' + range + '&' : '') + 'date=' + d.date;
+        }
+        document.getElementById('dashboardButton').onclick = function() {
+            window.location.href = '/nutrition' + (d.is_today ? '' : '?date=' + d.date);
+        };
+        // Warm the days either side so the arrows answer instantly
+        fetchDay(d.prev_date, function() {});
+        if (!d.is_today) fetchDay(d.next_date, function() {});
+    }
+
+    function show(day, push) {
+        app.setAttribute('data-date', day);
+        fetchDay(day, function(d) {
+            if (app.getAttribute('data-date') !== day) return;  // navigated on meanwhile
+            if (push) history.pushState({date: day}, '', '/calories?date=' + day);
+            render(d);
+        });
+    }
+
+    function navigate(event) {
+        event.preventDefault();
+        show(/date=([0-9-]+)/.exec(this.href)[1], true);
+    }
+    document.getElementById('prevDay').addEventListener('click', navigate);
+    document.getElementById('nextDay').addEventListener('click', navigate);
+    window.addEventListener('popstate', function(event) {
+        show(event.state ? event.state.date : app.getAttribute('data-initial'), false);
+    });
+
+    var tip = document.getElementById('graphTooltip');
+    var graph = document.getElementById('graph');
+    graph.addEventListener('mouseover', function(event) {
+        var i = event.target.getAttribute && event.target.getAttribute('data-i');
+        if (i === null || !shown) return;
+        tip.innerHTML = tooltip(shown, parseInt(i, 10));
+        tip.classList.add('visible');
+    });
+    graph.addEventListener('mouseout', function(event) {
+        if (event.target.getAttribute && event.target.getAttribute('data-i') !== null) tip.classList.remove('visible');
+    });
+
+    show(app.getAttribute('data-initial'), false);
+})();
+"""
+register_asset('calories_client.js', CALORIES_CLIENT_JS)
+
+HTML_CALORIES_CLIENT = """
+<!DOCTYPE html>
+<html>
+<head>
+    <title>Calories Timeline</title>
+    <meta name="viewport" content="width=device-width, initial-scale=1">
+    <link rel="stylesheet" href="{{ asset_url('base.css') }}">
+    <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css">
+    <link rel="stylesheet" href="{{ asset_url('calories.css') }}">
+</head>
+<body>
+    <div class="header">
+        <div class="header-icons">
+            <a href="/" class="food-link" title="Food Pads">🍎</a>
+            <a href="/?pad=amounts" class="amounts-link" title="Set Amount"><i class="fas fa-ruler"></i></a>
+            <a href="/meals/build" class="meal-link" title="Build Meal"><i class="fas fa-utensils"></i></a>
+            <a href="/notes" class="notes-link" title="Food Notes"><i class="fas fa-sticky-note"></i></a>
+            <a href="/edit-foods" class="settings-cog" title="Edit Foods Configuration"><i class="fas fa-cog"></i></a>
+        </div>
+        <div style="display: flex; align-items: center; justify-content: center; gap: 20px;">
+            <a id="prevDay" href="#" style="color: rgba(255,255,255,0.7); text-decoration: none; font-size: 1.5em; padding: 10px;">&larr;</a>
+            <h1 id="dayTitle" style="margin: 0;">&nbsp;</h1>
+            <a id="nextDay" href="#" style="color: rgba(255,255,255,0.7); text-decoration: none; font-size: 1.5em; padding: 10px; visibility: hidden;">&rarr;</a>
+        </div>
+        <div class="range-links" id="rangeLinks">
+            <a href="/calories?date={{ current_date }}" class="active">Day</a>
+            <a href="/calories?range=week&date={{ current_date }}" data-range="week">Week</a>
+            <a href="/calories?range=month&date={{ current_date }}" data-range="month">Month</a>
+            <a href="/calories?range=year&date={{ current_date }}" data-range="year">Year</a>
+        </div>
+    </div>
+
+    <div class="timeline-container" id="timelineApp" data-initial="{{ current_date }}" data-date="{{ current_date }}">
+        <div class="summary-stats" id="summaryStats"></div>
+
+        <div class="graph-section">
+            <div class="graph-title">Cumulative Intake</div>
+            <div class="cumulative-graph">
+                <div id="graph" style="width: 100%; height: 100%;"></div>
+                <div class="graph-tooltip" id="graphTooltip"></div>
+            </div>
+            <div class="hour-labels">
+                {% for h in range(0, 25, 3) %}
+                <span class="hour-label">{{ '%02d'|format(h % 24) }}</span>
+                {% endfor %}
+            </div>
+            <div class="graph-legend">
+                <div class="legend-item">
+                    <div class="legend-color calories"></div>
+                    <span>Calories</span>
+                </div>
+                <div class="legend-item">
+                    <div class="legend-color protein"></div>
+                    <span>kcal/g protein</span>
+                </div>
+                <div class="legend-item">
+                    <div class="legend-color fiber"></div>
+                    <span>kcal/g fiber</span>
+                </div>
+            </div>
+        </div>
+
+        <div class="graph-section" id="windowsSection" style="margin-bottom: 25px; display: none;"></div>
+        <div class="graph-section" id="fastsSection" style="margin-bottom: 25px; display: none;"></div>
+        <div class="entries-section" id="entriesSection"></div>
+    </div>
+
+    <div class="bottom-nav">
+        <button class="bottom-nav-btn" id="dashboardButton" onclick="window.location.href='/nutrition'" style="background: linear-gradient(135deg, #4ecdc4, #00d4ff);">
+            Dashboard
+        </button>
+    </div>
+    <script src="{{ asset_url('calories_client.js') }}"></script>
+</body>
+</html>
+"""
+register_template('calories_client.html', HTML_CALORIES_CLIENT)
+
+# Week, month and year views (/calories?range=...), drawn from the per-day
+# totals records rather than the logs
+HTML_CALORIES_RANGE = """
+<!DOCTYPE html>
+<html>
+<head>
+    <title>Calories Timeline</title>
+    <meta name="viewport" content="width=device-width, initial-scale=1">
+    <link rel="stylesheet" href="{{ asset_url('base.css') }}">
+    <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css">
+    <link rel="stylesheet" href="{{ asset_url('calories.css') }}">
+</head>
+<body>
+    <div class="header">
+        <div class="header-icons">
+            <a href="/" class="food-link" title="Food Pads">🍎</a>
+            <a href="/?pad=amounts" class="amounts-link" title="Set Amount"><i class="fas fa-ruler"></i></a>
+            <a href="/meals/build" class="meal-link" title="Build Meal"><i class="fas fa-utensils"></i></a>
+            <a href="/notes" class="notes-link" title="Food Notes"><i class="fas fa-sticky-note"></i></a>
+            <a href="/edit-foods" class="settings-cog" title="Edit Foods Configuration"><i class="fas fa-cog"></i></a>
+        </div>
+        <div style="display: flex; align-items: center; justify-content: center; gap: 20px;">
+            <a href="/calories?range={{ range_name }}&date={{ prev_end }}" style="color: rgba(255,255,255,0.7); text-decoration: none; font-size: 1.5em; padding: 10px;">&larr;</a>
+            <h1 style="margin: 0;">{{ title }}</h1>
+            {% if next_end %}
+            <a href="/calories?range={{ range_name }}&date={{ next_end }}" style="color: rgba(255,255,255,0.7); text-decoration: none; font-size: 1.5em; padding: 10px;">&rarr;</a>
+            {% else %}
+            <span style="width: 44px;"></span>
+            {% endif %}
+        </div>
+        <div class="range-links">
+            <a href="/calories?date={{ end_date }}">Day</a>
+            {% for name in range_names %}
+            <a href="/calories?range={{ name }}&date={{ end_date }}"{% if name == range_name %} class="active"{% endif %}>{{ name|capitalize }}</a>
+            {% endfor %}
+        </div>
+    </div>
+
+    <div class="timeline-container">
+        <div class="summary-stats">
+            <div class="stat-item">
+                <div class="stat-value calories">{{ avg_calories }}</div>
+                <div class="stat-label">Calories / day</div>
+            </div>
+            <div class="stat-item">
+                <div class="stat-value protein">{{ cal_per_protein }}</div>
+                <div class="stat-label">kcal/g protein</div>
+            </div>
+            <div class="stat-item">
+                <div class="stat-value fiber">{{ cal_per_fiber }}</div>
+                <div class="stat-label">kcal/g fiber</div>
+            </div>
+            <div class="stat-item">
+                <div class="stat-value">{{ days_logged }}/{{ day_count }}</div>
+                <div class="stat-label">Days logged</div>
+            </div>
+        </div>
+
+        <div class="graph-section">
+            <div class="graph-title">Cumulative Intake by Day</div>
+            <div class="cumulative-graph">
+                <svg viewBox="0 0 100 100" preserveAspectRatio="none">
+                    {% for x in gridlines %}
+                    <line x1="{{ x }}" y1="0" x2="{{ x }}" y2="100" stroke="rgba(255,255,255,0.1)" stroke-width="0.3"/>
+                    {% endfor %}
+                    <path class="graph-area calories-area" d="{{ area_path }}"/>
+                    <path class="graph-line calories-line" d="{{ line_path }}" style="stroke-width: 1.5;"/>
+                    {% if avg_y is not none %}
+                    <line x1="0" y1="{{ avg_y }}" x2="100" y2="{{ avg_y }}" stroke="#ffd93d" stroke-width="0.6" stroke-dasharray="2,2"/>
+                    {% endif %}
+                </svg>
+            </div>
+            <div class="hour-labels">
+                <span class="hour-label">{{ start_label }}</span>
+                <span class="hour-label">{{ end_label }}</span>
+            </div>
+            <div class="graph-legend">
+                <div class="legend-item">
+                    <div class="legend-color calories"></div>
+                    <span>Calories through each day</span>
+                </div>
+                <div class="legend-item">
+                    <div class="legend-color fiber"></div>
+                    <span>Average of logged days</span>
+                </div>
+            </div>
+        </div>
+
+        {% if longest_fasts %}
+        <div class="graph-section">
+            <div class="graph-title">Longest Fasts</div>
+            {% for fast in longest_fasts %}
+            <div class="window-row" style="cursor: default;">
+                <div class="window-label"><a href="{{ fast.link }}" style="color: inherit;">{{ fast.label }}</a></div>
+                <div class="window-bar-bg">
+                    <div class="window-bar" style="width: {{ (fast.minutes / longest_fasts[0].minutes * 100)|round }}%; background: linear-gradient(90deg, #4ecdc4, #2ab7ad);"></div>
+                </div>
+                <div class="window-cal" style="color:#4ecdc4;">{{ fast.duration }} <span style="color:rgba(255,255,255,0.4);">{{ fast.start }} → {{ fast.end }}</span></div>
+            </div>
+            {% endfor %}
+        </div>
+        {% endif %}
+
+        <div class="entries-section">
+            <div class="entries-title">{{ 'By Month' if range_name == 'year' else 'By Day' }}</div>
+            {% for row in rows %}
+            <div class="entry-item" style="grid-template-columns: 90px 1fr auto auto auto;">
+                <div class="entry-time">{% if row.link %}<a href="{{ row.link }}" style="color: inherit;">{{ row.label }}</a>{% else %}{{ row.label }}{% endif %}</div>
+                <div class="window-bar-bg"><div class="window-bar" style="width: {{ (row.calories / max_row_calories * 100)|round }}%;"></div></div>
+                <div class="entry-calories">{{ row.calories|round|int }} cal</div>
+                <div class="entry-protein">{{ row.protein|round(1) }}g p</div>
+                <div class="entry-fiber" style="color:#ffd93d;">{{ row.fiber|round(1) }}g f</div>
+            </div>
+            {% endfor %}
+        </div>
+    </div>
+
+    <div class="bottom-nav">
+        <button class="bottom-nav-btn" onclick="window.location.href='/nutrition'" style="background: linear-gradient(135deg, #4ecdc4, #00d4ff);">
+            Dashboard
+        </button>
+    </div>
+</body>
+</html>
+"""
+register_template('calories_range.html', HTML_CALORIES_RANGE)
 
 def time_to_x(time_str):
     """Convert time string (HH:MM) to x position (0-100) on graph"""
@@ -654,12 +1166,245 @@ def build_entry_dots(entries, max_calories):
     return dots
 
 
+def time_to_mins(t):
+    """'HH:MM' to minutes since midnight"""
+    parts = t.split(':')
+    return int(parts[0]) * 60 + int(parts[1])
+
+
+def group_consecutive(entries):
+    """Merge runs of consecutive entries with the same food key"""
+    grouped = []
+    for entry in entries:
+        if grouped and grouped[-1].get('food') == entry.get('food'):
+            g = grouped[-1]
+            g['calories'] = round(g['calories'] + entry.get('calories', 0), 1)
+            g['protein'] = round(g['protein'] + entry.get('protein', 0), 1)
+            g['fiber'] = round(g['fiber'] + entry.get('fiber', 0), 1)
+            g['count'] = g.get('count', 1) + 1
+            if entry.get('type') == 'amount' or 'g' in str(entry.get('amount_display', '')):
+                old_amt = g.get('amount', 0)
+                new_amt = old_amt + entry.get('amount', 0)
+                g['amount'] = new_amt
+                g['amount_display'] = f"{new_amt}g"
+            else:
+                g['amount_display'] = f"{g['count']} units"
+        else:
+            g = dict(entry)
+            g['count'] = 1
+            grouped.append(g)
+    return grouped
+
+
+def format_duration(minutes):
+    hours, rest = divmod(minutes, 60)
+    return f"{hours}h {rest:02d}m" if hours > 0 else f"{rest}m"
+
+
+def fast_label(timestamp, target_date):
+    """HH:MM of a fast's start or end, with the weekday if it falls on another day"""
+    moment = datetime.fromisoformat(timestamp)
+    return moment.strftime('%H:%M' if moment.date() == target_date else '%a %H:%M')
+
+
+def _minutes_from(midnight, timestamp):
+    return int((datetime.fromisoformat(timestamp[:16]) - midnight).total_seconds() // 60)
+
+
+def fasting_gaps(target_date, limit=5):
+    """A day's longest fasts between eating sessions, overnight ones included.
+
+    Read from the eating-session index (data.eating_sessions), so a fast
+    that started the evening before counts. start_mins and end_mins are
+    minutes from the day's midnight: negative for the previous day.
+    """
+    midnight = datetime.combine(target_date, datetime.min.time())
+    return [{
+        'start': fast_label(start, target_date), 'end': fast_label(end, target_date),
+        'start_mins': _minutes_from(midnight, start), 'end_mins': _minutes_from(midnight, end),
+        'minutes': minutes, 'duration': format_duration(minutes),
+        'before_count': before_count, 'after_count': after_count,
+    } for minutes, start, end, before_count, after_count in eating_sessions.fasts_on(target_date)[:limit]]
+
+
+def calorie_windows(entries):
+    """2-hour windows with their calories and foods, biggest window first"""
+    windows = {}
+    for entry in entries:
+        try:
+            hour = int(entry.get('time', '12:00').split(':')[0])
+        except (ValueError, IndexError):
+            hour = 12
+        bucket = (hour // 2) * 2
+        label = f"{bucket:02d}-{bucket+2:02d}"
+        if label not in windows:
+            windows[label] = {'cal': 0, 'foods': []}
+        windows[label]['cal'] += entry.get('calories', 0)
+        windows[label]['foods'].append(entry)
+    # Sort foods within each window by calories desc
+    for w in windows.values():
+        w['foods'].sort(key=lambda e: e.get('calories', 0), reverse=True)
+    return [{'label': k, 'cal': v['cal'], 'foods': v['foods']}
+            for k, v in sorted(windows.items(), key=lambda x: x[1]['cal'], reverse=True)]
+
+
+def day_title(target_date):
+    if target_date == date.today():
+        return "Today"
+    elif target_date == date.today() - timedelta(days=1):
+        return "Yesterday"
+    return target_date.strftime('%a %d %b')
+
+
+def load_timeline_entries(target_date):
+    """A day's entries as copies with a fiber field"""
+    entries = [dict(e) for e in load_log_for_date(target_date)]
+    for entry in entries:
+        if 'fiber' not in entry:
+            entry['fiber'] = 0
+    return entries
+
+
+def previous_day_deltas(target_date, total_calories, total_protein, total_fiber):
+    """(cal_delta, cpp_delta, cpf_delta) against the previous day (at the same time, for today)"""
+    prev_day = target_date - timedelta(days=1)
+    if target_date == date.today():
+        # Filter previous day entries to only those up to current time
+        now_time = datetime.now().strftime('%H:%M')
+        prev_entries = [e for e in load_log_for_date(prev_day) if e.get('time', '00:00') <= now_time]
+        prev_cal = sum(e.get('calories', 0) for e in prev_entries)
+        prev_prot = sum(e.get('protein', 0) for e in prev_entries)
+        prev_fib = sum(e.get('fiber', 0) for e in prev_entries)
+    else:
+        prev_totals = get_day_totals(prev_day)
+        prev_cal = prev_totals['calories']
+        prev_prot = prev_totals['protein']
+        prev_fib = prev_totals['fiber']
+
+    cal_delta = round(total_calories - prev_cal)
+    prev_cpp = prev_cal / prev_prot if prev_prot > 0 else 0
+    prev_cpf = prev_cal / prev_fib if prev_fib > 0 else 0
+    curr_cpp = total_calories / total_protein if total_protein > 0 else 0
+    curr_cpf = total_calories / total_fiber if total_fiber > 0 else 0
+    # For ratios, lower is better so delta sign is inverted for display
+    cpp_delta = round(curr_cpp - prev_cpp, 1) if prev_prot > 0 and total_protein > 0 else None
+    cpf_delta = round(curr_cpf - prev_cpf, 1) if prev_fib > 0 and total_fiber > 0 else None
+    return cal_delta, cpp_delta, cpf_delta
+
+
+def _entry_minutes(entry):
+    try:
+        return time_to_mins(entry.get('time', '12:00'))
+    except (ValueError, IndexError):
+        return 720
+
+
+def timeline_json(target_date):
+    """One day of the timeline as compact arrays plus aggregates, for /api/timeline.
+
+    Entries are columns in log order (the order the graph steps through),
+    with times in minutes since midnight. Windows and groups refer to
+    entries by index, so names are sent once.
+    """
+    entries = load_timeline_entries(target_date)
+    totals = get_day_totals(target_date)
+    total_calories = totals['calories']
+    total_protein = totals['protein']
+    total_fiber = totals['fiber']
+    cal_delta, cpp_delta, cpf_delta = previous_day_deltas(target_date, total_calories,
+                                                          total_protein, total_fiber)
+    index = {id(entry): i for i, entry in enumerate(entries)}
+    # Groups are runs of consecutive entries, so each starts where the last ended
+    groups = []
+    first = 0
+    for g in group_consecutive(entries):
+        groups.append([first, g['count'], g['calories'], g['protein'], g['fiber'],
+                       g.get('amount_display', '')])
+        first += g['count']
+    groups.sort(key=lambda g: g[2], reverse=True)
+
+    return {
+        'date': target_date.isoformat(),
+        'prev_date': (target_date - timedelta(days=1)).isoformat(),
+        'next_date': (target_date + timedelta(days=1)).isoformat(),
+        'title': day_title(target_date),
+        'is_today': target_date == date.today(),
+        'entries': {
+            't': [_entry_minutes(e) for e in entries],
+            'cal': [e.get('calories', 0) for e in entries],
+            'protein': [e.get('protein', 0) for e in entries],
+            'fiber': [e.get('fiber', 0) for e in entries],
+            'name': [e.get('name', e.get('food', '?')) for e in entries],
+            'amount': [e.get('amount_display', '') for e in entries],
+        },
+        'totals': {'calories': total_calories, 'protein': total_protein, 'fiber': total_fiber},
+        'deltas': {'calories': cal_delta, 'cpp': cpp_delta, 'cpf': cpf_delta},
+        # [label, calories, entry indices by calories]
+        'windows': [[w['label'], round(w['cal'], 1), [index[id(e)] for e in w['foods']]]
+                    for w in calorie_windows(entries)],
+        # [start, end, minutes, entries before, entries after], start/end in
+        # minutes from midnight (outside 0-1440 for overnight fasts)
+        'fasts': [[g['start_mins'], g['end_mins'], g['minutes'], g['before_count'], g['after_count']]
+                  for g in fasting_gaps(target_date)],
+        # [first entry index, count, calories, protein, fiber, amount], by calories
+        'groups': groups,
+    }
+
+
+# Days shown by each range, and the points each day's cumulative curve is
+# downsampled to (24 must divide by it)
+RANGE_DAYS = {'week': 7, 'month': 30, 'year': 365}
+RANGE_POINTS_PER_DAY = {'week': 12, 'month': 4, 'year': 1}
+
+
+def downsample_cumulative(hourly, points):
+    """Cumulative calories at the end of each of `points` equal slots of the day"""
+    step = 24 // points
+    curve = []
+    total = 0
+    for i in range(points):
+        total += sum(hourly[i * step:(i + 1) * step])
+        curve.append(total)
+    return curve
+
+
+def build_range_paths(rollups, points, max_value):
+    """SVG line and area paths with each day's cumulative curve laid end to end"""
+    day_count = len(rollups)
+    line_parts = []
+    area_parts = []
+    for d, (_, totals) in enumerate(rollups):
+        x0 = d / day_count * 100
+        day_parts = [f"M {x0:.2f} 100"]
+        for k, value in enumerate(downsample_cumulative(totals['hourly'], points)):
+            x = (d + (k + 1) / points) / day_count * 100
+            y = max(0, min(100, 100 - value / max_value * 100))
+            day_parts.append(f"L {x:.2f} {y:.1f}")
+        line_parts.extend(day_parts)
+        area_parts.extend(day_parts + [f"L {(d + 1) / day_count * 100:.2f} 100 Z"])
+    return " ".join(line_parts), " ".join(area_parts)
+
+
+def range_rows(rollups, by_month):
+    """Table rows: one per day (newest first), or per month for a year"""
+    rows = []
+    for date_str, totals in reversed(rollups):
+        label = date_str[:7] if by_month else date_str
+        if by_month and rows and rows[-1]['key'] == label:
+            row = rows[-1]
+        else:
+            row = {'key': label, 'calories': 0, 'protein': 0, 'fiber': 0,
+                   'label': (date.fromisoformat(date_str).strftime('%b %Y') if by_month
+                             else date.fromisoformat(date_str).strftime('%a %d %b')),
+                   'link': None if by_month else f'/calories?date={date_str}'}
+            rows.append(row)
+        for key in ('calories', 'protein', 'fiber'):
+            row[key] += totals[key]
+    return rows
+
+
 def register_calories_routes(app):
     """Register calories timeline routes with the Flask app"""
-    
-    from .data import load_today_log, load_log_for_date, LOGS_DIR
-    from datetime import timedelta
-    from flask import request
 
     @app.route('/calories')
     def calories_timeline():
@@ -672,31 +1417,93 @@ def register_calories_routes(app):
         else:
             target_date = date.today()
 
-        entries = load_log_for_date(target_date)
+        range_name = request.args.get('range')
+        if range_name in RANGE_DAYS:
+            return render_range(range_name, min(target_date, date.today()))
+
+        mode = request.args.get('client')
+        client_mode = request.cookies.get('calories_client') == '1' if mode is None else mode == '1'
+        if client_mode:
+            response = make_response(render_template('calories_client.html',
+                                                     current_date=target_date.isoformat()))
+        else:
+            # Overnight fasts can come from neighbouring days' logs
+            response = make_response(past_page('calories', target_date,
+                                               lambda: render_calories(target_date),
+                                               extra=tuple(eating_sessions.fasts_on(target_date)[:5])))
+        if mode is not None:
+            # ?client=1 / ?client=0 is remembered by the device
+            response.set_cookie('calories_client', mode, max_age=365 * 24 * 3600)
+        return response
+
+    def render_range(range_name, end_date):
+        day_count = RANGE_DAYS[range_name]
+        start_date = end_date - timedelta(days=day_count - 1)
+        rollups = load_day_rollups(start_date, end_date)
+
+        logged = [totals for _, totals in rollups if totals['count']]
+        total_calories = sum(t['calories'] for t in logged)
+        total_protein = sum(t['protein'] for t in logged)
+        total_fiber = sum(t['fiber'] for t in logged)
+        avg_calories = total_calories / len(logged) if logged else 0
+
+        max_calories = max([t['calories'] for t in logged] + [2000])
+        line_path, area_path = build_range_paths(rollups, RANGE_POINTS_PER_DAY[range_name], max_calories)
+        if range_name == 'week':
+            gridlines = [round(d / day_count * 100, 2) for d in range(day_count + 1)]
+        else:
+            # Month boundaries
+            gridlines = [round(d / day_count * 100, 2) for d, (date_str, _) in enumerate(rollups)
+                         if date_str.endswith('-01')]
+        rows = range_rows(rollups, by_month=(range_name == 'year'))
+        longest_fasts = []
+        for minutes, start, end, _, _ in eating_sessions.fasts_between(
+                f'{start_date.isoformat()}T00:00:00', f'{(end_date + timedelta(days=1)).isoformat()}T00:00:00')[:5]:
+            start_day = date.fromisoformat(start[:10])
+            longest_fasts.append({'label': start_day.strftime('%d %b'), 'link': f'/calories?date={start[:10]}',
+                                  'start': start[11:16], 'end': fast_label(end, start_day),
+                                  'minutes': minutes, 'duration': format_duration(minutes)})
+
+        next_end = end_date + timedelta(days=day_count)
+        return render_template('calories_range.html',
+                                    range_name=range_name,
+                                    range_names=list(RANGE_DAYS),
+                                    title=f"{start_date.strftime('%d %b')} – {end_date.strftime('%d %b %Y')}",
+                                    end_date=end_date.isoformat(),
+                                    prev_end=(end_date - timedelta(days=day_count)).isoformat(),
+                                    next_end=(min(next_end, date.today()).isoformat()
+                                              if end_date < date.today() else None),
+                                    avg_calories=round(avg_calories),
+                                    cal_per_protein=f"{total_calories / total_protein:.1f}" if total_protein > 0 else '--',
+                                    cal_per_fiber=f"{total_calories / total_fiber:.1f}" if total_fiber > 0 else '--',
+                                    days_logged=len(logged),
+                                    day_count=day_count,
+                                    line_path=line_path,
+                                    area_path=area_path,
+                                    avg_y=round(100 - avg_calories / max_calories * 100, 1) if logged else None,
+                                    gridlines=gridlines,
+                                    start_label=start_date.strftime('%d %b'),
+                                    end_label=end_date.strftime('%d %b'),
+                                    rows=rows,
+                                    longest_fasts=longest_fasts,
+                                    max_row_calories=max([row['calories'] for row in rows] + [1]))
+
+    def render_calories(target_date):
+        entries = load_timeline_entries(target_date)
         is_today = (target_date == date.today())
         prev_date = (target_date - timedelta(days=1)).isoformat()
         next_date = (target_date + timedelta(days=1)).isoformat()
+        title = day_title(target_date)
 
-        if target_date == date.today():
-            title = "Today"
-        elif target_date == date.today() - timedelta(days=1):
-            title = "Yesterday"
-        else:
-            title = target_date.strftime('%a %d %b')
-        
-        # Ensure fiber field exists for all entries
-        for entry in entries:
-            if 'fiber' not in entry:
-                entry['fiber'] = 0
-        
         # Calculate totals
-        total_calories = sum(entry.get('calories', 0) for entry in entries)
-        total_protein = sum(entry.get('protein', 0) for entry in entries)
-        total_fiber = sum(entry.get('fiber', 0) for entry in entries)
-        
+        totals = get_day_totals(target_date)
+        total_calories = totals['calories']
+        total_protein = totals['protein']
+        total_fiber = totals['fiber']
+
         # Determine max values for scaling
         max_calories = max(total_calories, 2000)  # At least 2000 cal scale
-        
+
         # Build cumulative graph paths
         calories_line, calories_area = build_cumulative_path(entries, 'calories', max_calories)
         # Ratio lines: kcal/g protein (scale 0-30), kcal/g fiber (scale 0-200)
@@ -706,126 +1513,22 @@ def register_calories_routes(app):
         # Build entry dots for the calorie line
         entry_dots = build_entry_dots(entries, max_calories)
 
-        # Group consecutive entries with the same food key
-        grouped = []
-        for entry in entries:
-            if grouped and grouped[-1].get('food') == entry.get('food'):
-                g = grouped[-1]
-                g['calories'] = round(g['calories'] + entry.get('calories', 0), 1)
-                g['protein'] = round(g['protein'] + entry.get('protein', 0), 1)
-                g['fiber'] = round(g['fiber'] + entry.get('fiber', 0), 1)
-                g['count'] = g.get('count', 1) + 1
-                if entry.get('type') == 'amount' or 'g' in str(entry.get('amount_display', '')):
-                    old_amt = g.get('amount', 0)
-                    new_amt = old_amt + entry.get('amount', 0)
-                    g['amount'] = new_amt
-                    g['amount_display'] = f"{new_amt}g"
-                else:
-                    g['amount_display'] = f"{g['count']} units"
-            else:
-                g = dict(entry)
-                g['count'] = 1
-                grouped.append(g)
-
         # Entries sorted by calories descending
-        entries_by_cal = sorted(grouped, key=lambda e: e.get('calories', 0), reverse=True)
-
-        # Group entries into eating sessions (within 15 min of each other)
-        # then compute fasting gaps between sessions
-        fasting_gaps = []
-        if entries:
-            sorted_by_time = sorted(entries, key=lambda e: e.get('time', '00:00'))
-
-            def time_to_mins(t):
-                parts = t.split(':')
-                return int(parts[0]) * 60 + int(parts[1])
-
-            # Build sessions: groups of entries where consecutive entries are <= 15 min apart
-            sessions = []
-            current_session = [sorted_by_time[0]]
-            for i in range(1, len(sorted_by_time)):
-                t_prev = time_to_mins(sorted_by_time[i - 1].get('time', '00:00'))
-                t_curr = time_to_mins(sorted_by_time[i].get('time', '00:00'))
-                if t_curr - t_prev <= 15:
-                    current_session.append(sorted_by_time[i])
-                else:
-                    sessions.append(current_session)
-                    current_session = [sorted_by_time[i]]
-            sessions.append(current_session)
-
-            # Gaps between sessions
-            for i in range(len(sessions) - 1):
-                last_entry = sessions[i][-1]
-                first_entry = sessions[i + 1][0]
-                t1 = last_entry.get('time', '00:00')
-                t2 = first_entry.get('time', '00:00')
-                try:
-                    mins = time_to_mins(t2) - time_to_mins(t1)
-                    if mins > 0:
-                        hours = mins // 60
-                        remaining = mins % 60
-                        dur = f"{hours}h {remaining:02d}m" if hours > 0 else f"{remaining}m"
-                        fasting_gaps.append({
-                            'start': t1, 'end': t2,
-                            'minutes': mins, 'duration': dur,
-                            'before_count': len(sessions[i]),
-                            'after_count': len(sessions[i + 1]),
-                        })
-                except (ValueError, IndexError):
-                    pass
-        fasting_gaps.sort(key=lambda g: g['minutes'], reverse=True)
-        top_fasts = fasting_gaps[:5]
-
-        # 2-hour window calorie breakdown with food lists
-        windows = {}
-        for entry in entries:
-            try:
-                hour = int(entry.get('time', '12:00').split(':')[0])
-            except (ValueError, IndexError):
-                hour = 12
-            bucket = (hour // 2) * 2
-            label = f"{bucket:02d}-{bucket+2:02d}"
-            if label not in windows:
-                windows[label] = {'cal': 0, 'foods': []}
-            windows[label]['cal'] += entry.get('calories', 0)
-            windows[label]['foods'].append(entry)
-        # Sort foods within each window by calories desc
-        for w in windows.values():
-            w['foods'].sort(key=lambda e: e.get('calories', 0), reverse=True)
-        windows_sorted = [{'label': k, 'cal': v['cal'], 'foods': v['foods']}
-                          for k, v in sorted(windows.items(), key=lambda x: x[1]['cal'], reverse=True)]
+        entries_by_cal = sorted(group_consecutive(entries), key=lambda e: e.get('calories', 0), reverse=True)
+
+        top_fasts = fasting_gaps(target_date)
+
+        windows_sorted = calorie_windows(entries)
         max_window_cal = windows_sorted[0]['cal'] if windows_sorted else 1
 
         cal_per_protein = f"{total_calories / total_protein:.1f}" if total_protein > 0 else '--'
         cal_per_fiber = f"{total_calories / total_fiber:.1f}" if total_fiber > 0 else '--'
 
         # Compare to previous day at the same time
-        prev_day = target_date - timedelta(days=1)
-        prev_entries = load_log_for_date(prev_day)
-        for e in prev_entries:
-            if 'fiber' not in e:
-                e['fiber'] = 0
+        cal_delta, cpp_delta, cpf_delta = previous_day_deltas(target_date, total_calories,
+                                                              total_protein, total_fiber)
 
-        if is_today:
-            # Filter previous day entries to only those up to current time
-            now_time = datetime.now().strftime('%H:%M')
-            prev_entries = [e for e in prev_entries if e.get('time', '00:00') <= now_time]
-
-        prev_cal = sum(e.get('calories', 0) for e in prev_entries)
-        prev_prot = sum(e.get('protein', 0) for e in prev_entries)
-        prev_fib = sum(e.get('fiber', 0) for e in prev_entries)
-
-        # Deltas
-        cal_delta = round(total_calories - prev_cal)
-        prev_cpp = prev_cal / prev_prot if prev_prot > 0 else 0
-        prev_cpf = prev_cal / prev_fib if prev_fib > 0 else 0
-        curr_cpp = total_calories / total_protein if total_protein > 0 else 0
-        curr_cpf = total_calories / total_fiber if total_fiber > 0 else 0
-        # For ratios, lower is better so delta sign is inverted for display
-        cpp_delta = round(curr_cpp - prev_cpp, 1) if prev_prot > 0 and total_protein > 0 else None
-        cpf_delta = round(curr_cpf - prev_cpf, 1) if prev_fib > 0 and total_fiber > 0 else None
-
-        return render_template_string(HTML_CALORIES,
+        return render_template('calories.html',
                                     entries=entries_by_cal,
                                     windows_sorted=windows_sorted,
                                     max_window_cal=max_window_cal,
@@ -844,4 +1547,33 @@ def register_calories_routes(app):
                                     title=title,
                                     prev_date=prev_date,
                                     next_date=next_date,
-                                    is_today=is_today)
\ No newline at end of file
+                                    is_today=is_today,
+                                    current_date=target_date.isoformat())
+
+    @app.route('/api/fasts')
+    def api_fasts():
+        """Fasting stats over the whole history from the eating-session index"""
+        def build():
+            return jsonify(dict(eating_sessions.stats(),
+                                last_eaten=eating_sessions.last_eaten(),
+                                # [start, end, minutes, entries before, entries after]
+                                longest=[[start, end, minutes, before, after] for minutes, start, end, before, after
+                                         in eating_sessions.longest_fasts(10)]))
+        return conditional_response([eating_sessions.version()], build)
+
+    @app.route('/api/timeline')
+    def api_timeline():
+        """One day's entries and aggregates for the client-rendered calories page"""
+        try:
+            target_date = date.fromisoformat(request.args.get('date') or date.today().isoformat())
+        except ValueError:
+            return jsonify({'error': 'date must be YYYY-MM-DD'}), 400
+        previous = target_date - timedelta(days=1)
+        versions = [date.today().isoformat(), log_version(target_date), log_version(previous),
+                    get_config_signature(), eating_sessions.fasts_on(target_date)[:5]]
+        if target_date == date.today():
+            # Compared with yesterday up to now, so changes by the minute
+            versions.append(datetime.now().strftime('%H:%M'))
+        if target_date < date.today():
+            cache_compressed()
+        return conditional_response(versions, lambda: jsonify(timeline_json(target_date)))
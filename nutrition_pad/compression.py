@@ -0,0 +1,150 @@
+"""
+Negotiated gzip/deflate compression for HTML and JSON responses.
+
+Pages carry tens of kilobytes of markup and SVG, and /api/entries?days=N
+can return megabytes of JSON, all sent to the tablets over Wi-Fi. An
+after_request hook compresses any text, JSON or JavaScript response of at
+least `COMPRESS_MIN_SIZE` bytes with the best encoding the client accepts.
+
+Compressing the same bytes again is wasted work, so compressed bodies of
+immutable responses are kept in a small LRU cache: responses with an ETag
+(the read APIs, see conditional.py) and pages for past dates, which call
+cache_compressed(). Bundles under /assets/ are gzipped when built and
+pass through untouched.
+
+Set app.config['COMPRESS'] = False (`nutrition-pad --no-compress`) to
+turn it off.
+"""
+import hashlib
+import threading
+import zlib
+from collections import OrderedDict
+
+from flask import g, jsonify, request
+
+COMPRESS_MIN_SIZE = 1024  # smaller bodies fit in a packet anyway
+COMPRESS_LEVEL = 6
+CACHE_MAX_BYTES = 16 * 1024 * 1024
+COMPRESSIBLE = {'text/html', 'text/plain', 'text/css', 'application/json',
+                'application/javascript', 'image/svg+xml'}
+# Preference order, and the ETag suffix for each encoding (a strong ETag
+# names exact bytes, so the compressed variants need their own)
+ENCODINGS = {'gzip': 31, 'deflate': 15}  # zlib wbits: gzip / zlib container
+ETAG_SUFFIXES = {'gzip': '-gz', 'deflate': '-deflate'}
+
+_cache = OrderedDict()  # (encoding, key) -> compressed bytes
+_cache_bytes = 0
+_cache_lock = threading.Lock()
+_stats = {'compressed': 0, 'cache_hits': 0, 'bytes_in': 0, 'bytes_out': 0}
+
+
+def cache_compressed():
+    """Let the compressed body of the current (immutable) response be cached"""
+    g.cache_compressed = True
+
+
+def etag_variants(etag):
+    """`etag` and the tags its compressed variants are sent with"""
+    return [etag] + [etag + suffix for suffix in ETAG_SUFFIXES.values()]
+
+
+def compress(body, encoding, level=COMPRESS_LEVEL):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, ENCODINGS[encoding])
+    return compressor.compress(body) + compressor.flush()
+
+
+def _cache_get(key):
+    with _cache_lock:
+        body = _cache.get(key)
+        if body is not None:
+            _cache.move_to_end(key)
+        return body
+
+
+def _cache_put(key, body):
+    global _cache_bytes
+    if len(body) > CACHE_MAX_BYTES // 4:
+        return
+    with _cache_lock:
+        if key in _cache:
+            return
+        _cache[key] = body
+        _cache_bytes += len(body)
+        while _cache_bytes > CACHE_MAX_BYTES:
+            _, evicted = _cache.popitem(last=False)
+            _cache_bytes -= len(evicted)
+
+
+def clear_compression_cache():
+    global _cache_bytes
+    with _cache_lock:
+        _cache.clear()
+        _cache_bytes = 0
+
+
+def get_compression_stats():
+    with _cache_lock:
+        return dict(_stats, cache_entries=len(_cache), cache_bytes=_cache_bytes)
+
+
+def _negotiate():
+    accepted = [encoding for encoding in ENCODINGS if request.accept_encodings[encoding]]
+    if not accepted:
+        return None
+    # Highest q-value wins; ties go to the ENCODINGS order
+    return max(accepted, key=lambda encoding: request.accept_encodings[encoding])
+
+
+def compress_response(response):
+    """after_request hook: compress `response` in place if worthwhile"""
+    if response.mimetype not in COMPRESSIBLE:
+        return response
+    response.vary.add('Accept-Encoding')
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers):
+        return response
+    body = response.get_data()
+    if len(body) < COMPRESS_MIN_SIZE:
+        return response
+    encoding = _negotiate()
+    if encoding is None:
+        return response
+
+    etag, weak = response.get_etag()
+    cache_key = None
+    if etag and not weak:
+        cache_key = (encoding, 'etag', request.path, etag)
+    elif g.get('cache_compressed'):
+        cache_key = (encoding, 'body', hashlib.blake2b(body, digest_size=16).digest())
+    compressed = _cache_get(cache_key) if cache_key else None
+    cache_hit = compressed is not None
+    if not cache_hit:
+        compressed = compress(body, encoding)
+        if cache_key:
+            _cache_put(cache_key, compressed)
+    with _cache_lock:
+        _stats['compressed'] += 1
+        _stats['cache_hits'] += cache_hit
+        _stats['bytes_in'] += len(body)
+        _stats['bytes_out'] += len(compressed)
+
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    if etag:
+        response.set_etag(etag + ETAG_SUFFIXES[encoding], weak)
+    return response
+
+
+def register_compression(app):
+    """Compress the app's responses unless app.config['COMPRESS'] is False"""
+    app.config.setdefault('COMPRESS', True)
+
+    @app.after_request
+    def compress_after_request(response):
+        if not app.config['COMPRESS']:
+            return response
+        return compress_response(response)
+
+    @app.route('/api/compression/stats')
+    def api_compression_stats():
+        return jsonify(get_compression_stats())
@@ -0,0 +1,48 @@
+"""
+Conditional GET for the JSON read APIs.
+
+The CLIs fetch /api/entries, /api/notes, /api/foods, /api/foods/raw and
+/api/meals on every invocation. Those routes wrap their work in
+conditional_response() with the version tokens of the data they read
+(day-log versions, notes and meals stamps, the foods.toml signature).
+The strong ETag is a hash of those tokens and the request URL, so an
+If-None-Match that matches is answered 304 before any log, notes or
+config file is opened. The compressed variants of a response carry the
+ETag with an encoding suffix (see compression.py), and match too.
+"""
+import hashlib
+import json
+
+from flask import Response, make_response, request
+
+from .compression import etag_variants
+
+ETAG_LENGTH = 20
+
+
+def data_etag(*versions):
+    """Strong ETag for the current URL built from `versions` (JSON-able tokens)"""
+    key = json.dumps([request.full_path, versions], default=str, separators=(',', ':'))
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()[:ETAG_LENGTH]
+
+
+def conditional_response(versions, build):
+    """Return 304 if the client has the payload for `versions`, else build() with an ETag.
+
+    `build` is called only on a miss and returns anything a Flask view may
+    return. Error responses (status >= 400) are passed through untagged.
+    """
+    etag = data_etag(*versions)
+    matched = [tag for tag in etag_variants(etag) if tag in request.if_none_match]
+    if matched:
+        # Echo the tag of the variant the client holds
+        etag = matched[0]
+        response = Response(status=304)
+    else:
+        response = make_response(build())
+        if response.status_code >= 400:
+            return response
+    response.set_etag(etag)
+    # Versions are cheap to recompute, so caches must always revalidate
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
@@ -6,8 +6,14 @@ Handles daily logs, configuration loading, and nutrition statistics.
 import json
 import os
 import toml
+import atexit
+import fcntl
 import random
 import string
+import threading
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from contextlib import contextmanager
 from datetime import datetime, date, timedelta
 
 CONFIG_FILE = 'foods.toml'
@@ -152,34 +158,833 @@ def validate_config(config):
         raise ValueError(error_msg)
 
 
+# Parsed config cache, keyed on the file's (mtime, size, inode)
+_config_cache = None
+_config_signature = None
+_config_version = 0
+_config_lock = threading.Lock()
+
+
+def _file_signature(path):
+    """Return (mtime_ns, size, inode) for a file, or None if it is missing"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+class ProcessLock:
+    """Re-entrant lock shared by threads and by processes (flock on a file).
+
+    `path` is a function returning the lock file's path, called each time
+    the lock is taken so it follows a store whose directory changes.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+    def __enter__(self):
+        self._lock.acquire()
+        if self._depth == 0:
+            try:
+                path = self.path()
+                os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+                self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            except BaseException:
+                if self._fd is not None:
+                    os.close(self._fd)
+                    self._fd = None
+                self._lock.release()
+                raise
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc):
+        self._depth -= 1
+        if self._depth == 0:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+        self._lock.release()
+        return False
+
+
+def invalidate_config_cache():
+    """Drop the cached config so the next load_config() re-reads the file.
+
+    Writers call this after saving foods.toml, since two saves inside the
+    same mtime tick with the same size would otherwise look unchanged.
+    """
+    global _config_cache, _config_signature
+    with _config_lock:
+        _config_cache = None
+        _config_signature = None
+
+
+def get_config_version():
+    """Counter bumped every time foods.toml is (re)parsed"""
+    load_config()
+    return _config_version
+
+
+def get_config_signature():
+    """Version token for foods.toml that survives restarts (for ETags)"""
+    signature = _file_signature(CONFIG_FILE)
+    return list(signature) if signature else None
+
+
 def load_config():
-    """Load TOML config file, create default if not exists"""
+    """Load TOML config file, create default if not exists.
+
+    The parsed and validated config is cached per process and only re-read
+    when the file changes on disk. Callers must not mutate the result.
+    """
+    global _config_cache, _config_signature, _config_version
     if not os.path.exists(CONFIG_FILE):
         with open(CONFIG_FILE, 'w') as f:
             f.write(DEFAULT_CONFIG)
-    
-    with open(CONFIG_FILE, 'r') as f:
-        config = toml.load(f)
-    
-    validate_config(config)
-    return config
+
+    signature = _file_signature(CONFIG_FILE)
+    with _config_lock:
+        if _config_cache is not None and signature == _config_signature:
+            return _config_cache
+
+        with open(CONFIG_FILE, 'r') as f:
+            config = toml.load(f)
+
+        validate_config(config)
+        _config_cache = config
+        _config_signature = signature
+        _config_version += 1
+        return config
+
+def _date_key(target_date):
+    """Normalise a date or 'YYYY-MM-DD' string to the string form"""
+    if hasattr(target_date, 'strftime'):
+        return target_date.strftime('%Y-%m-%d')
+    return str(target_date)
+
+
+def is_day_log_filename(filename):
+    """True for daily_logs/<YYYY-MM-DD>.jsonl or legacy .json, false for notes and caches"""
+    stem, _, ext = filename.partition('.')
+    return ext in ('jsonl', 'json') and len(stem) == 10 and stem[:1].isdigit() and '_' not in stem
+
+
+# Day logs are JSON lines: one entry per line, plus patch records
+#   {"_op": "delete", "id": ...}
+#   {"_op": "patch", "id": ..., "fields": {...}}
+# which are folded in on read. Once a day has this many patch records
+# the file is rewritten with just the live entries.
+COMPACT_AFTER_PATCHES = 20
+
+# Entry ids are indexed in daily_logs/entry_index.jsonl, a journal of
+#   {"id": ..., "date": ..., "pos": <byte offset of the entry's line>}
+#   {"id": ..., "date": null}   (entry deleted)
+# rewritten once dead records outnumber live ones by this much.
+ENTRY_INDEX_FILE = 'entry_index.jsonl'
+INDEX_REWRITE_SLACK = 1000
+
+# Held by every log write, so worker processes (nutrition-pad --workers)
+# don't interleave appends, compactions and the shared index journals
+WRITE_LOCK_FILE = '.write.lock'
+
+# Eating sessions (see EatingSessionIndex) are journaled in
+# daily_logs/eating_sessions.jsonl: a {"gap": minutes} header, then a
+#   {"date": ..., "day": [log version, sessions]}   (null day: log removed)
+# record per write, the last one for a date winning. The journal is
+# rewritten with one record per day once it has SESSIONS_REWRITE_SLACK
+# records too many.
+SESSIONS_FILE = 'eating_sessions.jsonl'
+SESSIONS_REWRITE_SLACK = 1000
+
+
+def _replay_day_log(lines):
+    """Fold JSONL records into (entries, patch_count)"""
+    entries = []
+    positions = {}
+    patches = 0
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            # A torn final line from an interrupted append
+            continue
+        op = record.get('_op')
+        if op is None:
+            positions[record.get('id')] = len(entries)
+            entries.append(record)
+            continue
+        patches += 1
+        pos = positions.get(record.get('id'))
+        if pos is None or entries[pos] is None:
+            continue
+        if op == 'delete':
+            entries[pos] = None
+        elif op == 'patch':
+            entries[pos] = dict(entries[pos], **record.get('fields', {}))
+    return [e for e in entries if e is not None], patches
+
+
+class DayLogStore:
+    """Parsed day logs cached per file, keyed on the file's stat signature.
+
+    Logs are append-only JSON lines (<date>.jsonl): adding entries is a
+    single write, and deletes and edits are appended as patch records that
+    are compacted away once they pile up. Legacy <date>.json arrays are
+    still read, and are converted the first time that day is written.
+
+    Every reader and writer goes through one store, so a request parses
+    each file at most once and the disk is only re-read after a write
+    (ours or someone else's). Returned lists are shared between callers
+    and must be copied before being modified.
+
+    Writers also keep the entry-id index current, so finding the day an
+    entry lives in never means opening every log. The index is built by
+    scanning the logs the first time it is needed; run
+    `nutrition-logs reindex` after editing logs by hand.
+    """
+
+    def __init__(self, logs_dir, meals_file=MEALS_FILE):
+        self.logs_dir = logs_dir
+        self.meals_file = meals_file
+        self._cache = {}  # date_str -> (signature, entries, patch_count)
+        self._index = None  # entry id -> (date_str, byte offset)
+        self._index_signature = None
+        self._index_records = 0
+        self._lock = threading.RLock()
+        self._write_lock = ProcessLock(lambda: os.path.join(self.logs_dir, WRITE_LOCK_FILE))
+
+    def path(self, target_date):
+        return os.path.join(self.logs_dir, f'{_date_key(target_date)}.jsonl')
+
+    def write_lock(self):
+        """Lock held around a log write and its totals, in every process"""
+        return self._write_lock
+
+    def legacy_path(self, target_date):
+        return os.path.join(self.logs_dir, f'{_date_key(target_date)}.json')
+
+    def exists(self, target_date):
+        return os.path.exists(self.path(target_date)) or os.path.exists(self.legacy_path(target_date))
+
+    def _read(self, date_str):
+        """Return (signature, entries, patch_count), using the cache when fresh"""
+        path = self.path(date_str)
+        signature = _file_signature(path)
+        legacy = False
+        if signature is None:
+            path = self.legacy_path(date_str)
+            signature = _file_signature(path)
+            legacy = True
+            if signature is None:
+                return None, [], 0
+        cached = self._cache.get(date_str)
+        if cached and cached[0] == signature:
+            return cached
+        try:
+            with open(path, 'r') as f:
+                if legacy:
+                    entries, patches = json.load(f), 0
+                else:
+                    entries, patches = _replay_day_log(f)
+        except (json.JSONDecodeError, IOError):
+            return signature, [], 0
+        self._cache[date_str] = (signature, entries, patches)
+        return self._cache[date_str]
+
+    def load(self, target_date):
+        """Return the entries for a date ([] if there is no log)"""
+        with self._lock:
+            return self._read(_date_key(target_date))[1]
+
+    def save(self, target_date, entries):
+        """Rewrite a day's log with exactly these entries (also compacts it)"""
+        date_str = _date_key(target_date)
+        path = self.path(date_str)
+        tmp_path = path + '.tmp'
+        with self._lock:
+            index = self._load_index()
+            previous = self._read(date_str)[1]
+            lines = [json.dumps(e) + '\n' for e in entries]
+            with open(tmp_path, 'w') as f:
+                f.write(''.join(lines))
+            os.replace(tmp_path, path)
+            legacy_path = self.legacy_path(date_str)
+            if os.path.exists(legacy_path):
+                os.remove(legacy_path)
+            self._cache[date_str] = (_file_signature(path), entries, 0)
+
+            kept = {e.get('id') for e in entries}
+            index_records = [{'id': e['id'], 'date': None} for e in previous
+                             if e.get('id') and e['id'] not in kept and index.get(e['id'], (None,))[0] == date_str]
+            index_records += self._index_entries(date_str, entries, lines, 0)
+            self._write_index(index_records)
+
+    def _append_records(self, date_str, records, entries, patches):
+        """Append raw records in one write and cache the folded result"""
+        path = self.path(date_str)
+        if not os.path.exists(path) and os.path.exists(self.legacy_path(date_str)):
+            # First write to a legacy day: convert it, then append
+            self.save(date_str, self._read(date_str)[1])
+        self._load_index()
+        lines = [json.dumps(r) + '\n' for r in records]
+        with open(path, 'a') as f:
+            offset = f.tell()
+            f.write(''.join(lines))
+        self._cache[date_str] = (_file_signature(path), entries, patches)
+        self._write_index(self._index_entries(date_str, records, lines, offset))
+        if patches >= COMPACT_AFTER_PATCHES:
+            self.save(date_str, entries)
+
+    def append(self, target_date, new_entries):
+        """Add entries to the end of a day's log"""
+        date_str = _date_key(target_date)
+        with self._lock:
+            _, entries, patches = self._read(date_str)
+            self._append_records(date_str, new_entries, entries + list(new_entries), patches)
+
+    def delete(self, target_date, entry_id):
+        """Remove an entry by id. Returns the removed entry, or None."""
+        date_str = _date_key(target_date)
+        with self._lock:
+            _, entries, patches = self._read(date_str)
+            for i, entry in enumerate(entries):
+                if entry.get('id') == entry_id:
+                    remaining = entries[:i] + entries[i + 1:]
+                    self._append_records(date_str, [{'_op': 'delete', 'id': entry_id}],
+                                         remaining, patches + 1)
+                    return entry
+        return None
+
+    def patch(self, target_date, entry_id, fields):
+        """Update fields of an entry by id. Returns the updated entry, or None."""
+        updated = self.patch_many(target_date, {entry_id: fields})
+        return updated[0] if updated else None
+
+    def patch_many(self, target_date, fields_by_id):
+        """Update several entries of one day in a single write. Returns the updated entries."""
+        date_str = _date_key(target_date)
+        with self._lock:
+            _, entries, patches = self._read(date_str)
+            entries = list(entries)
+            records = []
+            updated = []
+            for i, entry in enumerate(entries):
+                fields = fields_by_id.get(entry.get('id'))
+                if fields is not None:
+                    entries[i] = dict(entry, **fields)
+                    records.append({'_op': 'patch', 'id': entry['id'], 'fields': fields})
+                    updated.append(entries[i])
+            if records:
+                self._append_records(date_str, records, entries, patches + len(records))
+            return updated
+
+    def compact(self, target_date):
+        """Rewrite a day's log without patch records. Returns True if it had any."""
+        date_str = _date_key(target_date)
+        with self._lock:
+            signature, entries, patches = self._read(date_str)
+            if signature is None or not patches:
+                return False
+            self.save(date_str, entries)
+            return True
+
+    def dates(self):
+        """All dates with a day log, oldest first"""
+        if not os.path.exists(self.logs_dir):
+            return []
+        return sorted({filename.split('.')[0] for filename in os.listdir(self.logs_dir)
+                       if is_day_log_filename(filename)})
+
+    def load_range(self, start_date, end_date):
+        """[(date_str, entries)] for days with entries in [start, end], newest first"""
+        result = []
+        current = end_date
+        while current >= start_date:
+            entries = self.load(current)
+            if entries:
+                result.append((_date_key(current), entries))
+            current -= timedelta(days=1)
+        return result
+
+    def locate(self, entry_ids):
+        """Map each of entry_ids that exists to the date of the log holding it"""
+        if self._index is None and not os.path.exists(self.index_path()):
+            self.reindex()  # takes the write lock before self._lock
+        with self._lock:
+            index = self._load_index()
+            return {entry_id: index[entry_id][0] for entry_id in entry_ids if entry_id in index}
+
+    def index_path(self):
+        return os.path.join(self.logs_dir, ENTRY_INDEX_FILE)
+
+    def _index_entries(self, date_str, records, lines, offset):
+        """Index records for the entry lines among records (written from offset)"""
+        index_records = []
+        for record, line in zip(records, lines):
+            op = record.get('_op')
+            if op is None and record.get('id'):
+                index_records.append({'id': record['id'], 'date': date_str, 'pos': offset})
+            elif op == 'delete':
+                index_records.append({'id': record['id'], 'date': None})
+            offset += len(line)
+        return index_records
+
+    def _load_index(self):
+        """The id index, re-read if the journal changed and rebuilt if it is missing"""
+        path = self.index_path()
+        signature = _file_signature(path)
+        if self._index is not None and signature == self._index_signature:
+            return self._index
+        if signature is None:
+            return self.reindex()
+        index = {}
+        records = 0
+        with open(path, 'r') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                records += 1
+                if record.get('date') is None:
+                    index.pop(record.get('id'), None)
+                else:
+                    index[record['id']] = (record['date'], record.get('pos'))
+        self._index, self._index_signature, self._index_records = index, signature, records
+        return index
+
+    def _write_index(self, index_records):
+        """Apply and journal index changes"""
+        if not index_records:
+            return
+        for record in index_records:
+            if record['date'] is None:
+                self._index.pop(record['id'], None)
+            else:
+                self._index[record['id']] = (record['date'], record['pos'])
+        self._index_records += len(index_records)
+        if self._index_records > len(self._index) + INDEX_REWRITE_SLACK:
+            self._rewrite_index()
+            return
+        with open(self.index_path(), 'a') as f:
+            f.write(''.join(json.dumps(r) + '\n' for r in index_records))
+        self._index_signature = _file_signature(self.index_path())
+
+    def _rewrite_index(self):
+        path = self.index_path()
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(''.join(json.dumps({'id': entry_id, 'date': date_str, 'pos': pos}) + '\n'
+                            for entry_id, (date_str, pos) in self._index.items()))
+        os.replace(tmp_path, path)
+        self._index_signature = _file_signature(path)
+        self._index_records = len(self._index)
+
+    def reindex(self):
+        """Rebuild the entry-id index from the logs. Returns the index."""
+        with self._write_lock, self._lock:
+            index = {}
+            for date_str in self.dates():
+                path = self.path(date_str)
+                if not os.path.exists(path):
+                    # Legacy JSON array: no line offsets
+                    for entry in self.load(date_str):
+                        if entry.get('id'):
+                            index[entry['id']] = (date_str, None)
+                    continue
+                offset = 0
+                with open(path, 'rb') as f:
+                    for line in f:
+                        try:
+                            record = json.loads(line)
+                        except json.JSONDecodeError:
+                            record = {}
+                        op = record.get('_op')
+                        if op is None and record.get('id'):
+                            index[record['id']] = (date_str, offset)
+                        elif op == 'delete':
+                            index.pop(record.get('id'), None)
+                        offset += len(line)
+            self._index = index
+            if os.path.exists(self.logs_dir):
+                self._rewrite_index()
+            else:
+                self._index_signature, self._index_records = None, 0
+            return index
+
+    def version(self, target_date):
+        """Opaque token that changes whenever a day's log changes"""
+        signature = _file_signature(self.path(target_date)) or _file_signature(self.legacy_path(target_date))
+        return list(signature) if signature else None
+
+    def totals_path(self, target_date):
+        return os.path.join(self.logs_dir, f'{_date_key(target_date)}_totals.json')
+
+    def load_totals(self, target_date):
+        try:
+            with open(self.totals_path(target_date), 'r') as f:
+                return json.load(f)
+        except (json.JSONDecodeError, IOError):
+            return None
+
+    def save_totals(self, target_date, totals):
+        with open(self.totals_path(target_date), 'w') as f:
+            json.dump(totals, f)
+
+    def notes_path(self, target_date):
+        return os.path.join(self.logs_dir, f'{_date_key(target_date)}_notes.json')
+
+    def load_notes(self, target_date):
+        try:
+            with open(self.notes_path(target_date), 'r') as f:
+                return json.load(f)
+        except (json.JSONDecodeError, IOError):
+            return []
+
+    def save_notes(self, target_date, notes):
+        os.makedirs(self.logs_dir, exist_ok=True)
+        with open(self.notes_path(target_date), 'w') as f:
+            json.dump(notes, f, indent=2)
+
+    def notes_version(self, target_date):
+        signature = _file_signature(self.notes_path(target_date))
+        return list(signature) if signature else None
+
+    def notes_dates(self):
+        if not os.path.exists(self.logs_dir):
+            return []
+        return sorted(filename[:-len('_notes.json')] for filename in os.listdir(self.logs_dir)
+                      if filename.endswith('_notes.json'))
+
+    def load_meals(self):
+        try:
+            with open(self.meals_file, 'r') as f:
+                return json.load(f)
+        except (json.JSONDecodeError, IOError):
+            return []
+
+    def save_meals(self, meals):
+        with open(self.meals_file, 'w') as f:
+            json.dump(meals, f, indent=2)
+
+    def meals_version(self):
+        signature = _file_signature(self.meals_file)
+        return list(signature) if signature else None
+
+    def sessions_path(self):
+        return os.path.join(self.logs_dir, SESSIONS_FILE)
+
+    def load_sessions(self):
+        """The session journal replayed: {'gap', 'days', 'records'}, or None if unreadable"""
+        try:
+            with open(self.sessions_path(), 'r') as f:
+                lines = f.readlines()
+            header = json.loads(lines[0])
+            days = {}
+            for line in lines[1:]:
+                record = json.loads(line)
+                if record['day'] is None:
+                    days.pop(record['date'], None)
+                else:
+                    days[record['date']] = record['day']
+        except (IndexError, KeyError, ValueError, IOError):
+            return None
+        return {'gap': header.get('gap'), 'days': days, 'records': len(lines) - 1}
+
+    def save_sessions(self, index):
+        """Rewrite the session journal with one record per day"""
+        os.makedirs(self.logs_dir, exist_ok=True)
+        tmp_path = f'{self.sessions_path()}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(json.dumps({'gap': index['gap']}) + '\n')
+            f.writelines(json.dumps({'date': date_str, 'day': day}) + '\n'
+                         for date_str, day in sorted(index['days'].items()))
+        os.replace(tmp_path, self.sessions_path())
+
+    def save_day_sessions(self, date_str, day):
+        """Append one day's record to the session journal (day None: forget it)"""
+        with open(self.sessions_path(), 'a') as f:
+            f.write(json.dumps({'date': date_str, 'day': day}) + '\n')
+
+    def sessions_version(self):
+        signature = _file_signature(self.sessions_path())
+        return list(signature) if signature else None
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self._index = None
+
+
+day_logs = DayLogStore(LOGS_DIR, MEALS_FILE)
+
+
+# --- DAILY TOTALS ---
+# A small per-day record kept next to each log and updated on every write,
+# so totals, counts and "last ate" never need the full entry list. Each
+# record carries the store version of its log and is rebuilt from the
+# entries if the log was changed behind our back.
+
+_totals_lock = threading.RLock()
+
+
+def is_food_entry(entry):
+    """Entries that count as eating: 20+ kcal, or an unknown food"""
+    return (entry.get('calories', 0) >= 20 or 'unknown' in entry.get('food', '').lower()
+            or 'unknown' in entry.get('name', '').lower())
+
+
+def _empty_totals():
+    # 'hourly' is calories per hour of the day (by the entry's HH:MM), so
+    # range views can draw each day's cumulative curve without its log
+    return {'calories': 0, 'protein': 0, 'fiber': 0, 'count': 0,
+            'last_eaten': None, 'first_timestamp': None, 'last_timestamp': None,
+            'hourly': [0] * 24}
+
+
+def _entry_hour(entry):
+    try:
+        return min(max(int(entry.get('time', '12:00').split(':')[0]), 0), 23)
+    except ValueError:
+        return 12
+
+
+def _totals_add(totals, entry):
+    for key in ('calories', 'protein', 'fiber'):
+        totals[key] = round(totals[key] + entry.get(key, 0), 1)
+    hour = _entry_hour(entry)
+    totals['hourly'][hour] = round(totals['hourly'][hour] + entry.get('calories', 0), 1)
+    totals['count'] += 1
+    timestamp = entry.get('timestamp')
+    if timestamp:
+        if is_food_entry(entry) and (totals['last_eaten'] is None or timestamp > totals['last_eaten']):
+            totals['last_eaten'] = timestamp
+        if totals['first_timestamp'] is None or timestamp < totals['first_timestamp']:
+            totals['first_timestamp'] = timestamp
+        if totals['last_timestamp'] is None or timestamp > totals['last_timestamp']:
+            totals['last_timestamp'] = timestamp
+
+
+def _totals_remove(totals, entry, remaining):
+    """Take entry out of totals; remaining is the day's entries without it"""
+    for key in ('calories', 'protein', 'fiber'):
+        totals[key] = round(totals[key] - entry.get(key, 0), 1)
+    hour = _entry_hour(entry)
+    totals['hourly'][hour] = round(totals['hourly'][hour] - entry.get('calories', 0), 1)
+    totals['count'] -= 1
+    timestamp = entry.get('timestamp')
+    if timestamp and timestamp in (totals['last_eaten'], totals['first_timestamp'], totals['last_timestamp']):
+        # Removed a boundary entry: the replacement has to come from the list
+        rebuilt = compute_day_totals(remaining)
+        for key in ('last_eaten', 'first_timestamp', 'last_timestamp'):
+            totals[key] = rebuilt[key]
+
+
+def compute_day_totals(entries):
+    """Build a totals record from scratch"""
+    totals = _empty_totals()
+    for entry in entries:
+        _totals_add(totals, entry)
+    return totals
+
+
+def _store_day_totals(target_date, totals, version=None):
+    """Save a totals record; pass the log `version` it was computed from
+    unless the caller holds the write lock"""
+    totals['version'] = day_logs.version(target_date) if version is None else version
+    try:
+        day_logs.save_totals(target_date, totals)
+    except IOError:
+        pass
+
+
+def get_day_totals(target_date):
+    """Totals record for a day: calories, protein, fiber, count, last_eaten,
+    first_timestamp and last_timestamp"""
+    with _totals_lock:
+        totals = day_logs.load_totals(target_date)
+        version = day_logs.version(target_date)
+        if totals is None or totals.get('version') != version or 'hourly' not in totals:
+            if day_logs.exists(target_date):
+                # Labelled with the version read before the log, so a write by
+                # another process in between leaves the record stale, not wrong
+                totals = compute_day_totals(day_logs.load(target_date))
+                _store_day_totals(target_date, totals, version)
+            else:
+                totals = _empty_totals()
+        return totals
+
+
+def load_day_rollups(start_date, end_date):
+    """[(date_str, totals)] for every day in the range, oldest first.
+
+    Reads the per-day totals records rather than the logs, so a year of
+    days costs one small read each.
+    """
+    start = date.fromisoformat(_date_key(start_date))
+    end = date.fromisoformat(_date_key(end_date))
+    return [((start + timedelta(days=i)).isoformat(), get_day_totals(start + timedelta(days=i)))
+            for i in range((end - start).days + 1)]
+
+
+# --- STORAGE LAYER ---
+# Everything outside this module reads and writes logs, notes and meals
+# through these functions, so the backend can be swapped at startup
+# (see sqlite_store.SqliteStore).
+
+# Called with the date (a date or 'YYYY-MM-DD') after each write to a day's
+# log, e.g. to drop pages rendered from it. The write lock is still held,
+# so listeners may update shared files.
+day_change_listeners = []
+
+
+def _notify_day_changed(target_date):
+    for listener in day_change_listeners:
+        listener(target_date)
+
+
+def get_storage():
+    """The active storage backend"""
+    return day_logs
+
+
+def set_storage(store):
+    """Replace the storage backend (call before serving requests)"""
+    global day_logs
+    day_logs = store
+    eating_sessions.clear()
+
+
+@contextmanager
+def _write_lock():
+    """Held around each log write with its totals and listeners, in this
+    process (_totals_lock) and across worker processes (the store's lock)"""
+    with _totals_lock, day_logs.write_lock():
+        yield
+
+
+def log_exists(target_date):
+    return day_logs.exists(target_date)
+
+
+def list_log_dates():
+    """All dates that have a food log, oldest first"""
+    return day_logs.dates()
+
+
+def save_log_for_date(target_date, entries):
+    """Replace a day's entries wholesale"""
+    with _write_lock():
+        day_logs.save(target_date, entries)
+        _store_day_totals(target_date, compute_day_totals(entries))
+        _notify_day_changed(target_date)
+
+
+def append_log_entries(target_date, entries):
+    """Append new entries to a day's log"""
+    with _write_lock():
+        totals = get_day_totals(target_date)
+        day_logs.append(target_date, entries)
+        for entry in entries:
+            _totals_add(totals, entry)
+        _store_day_totals(target_date, totals)
+        _notify_day_changed(target_date)
+
+
+def delete_log_entry(target_date, entry_id):
+    """Delete an entry by id. Returns the deleted entry or None."""
+    with _write_lock():
+        totals = get_day_totals(target_date)
+        entry = day_logs.delete(target_date, entry_id)
+        if entry is not None:
+            _totals_remove(totals, entry, day_logs.load(target_date))
+            _store_day_totals(target_date, totals)
+            _notify_day_changed(target_date)
+    return entry
+
+
+def patch_log_entry(target_date, entry_id, fields):
+    """Update some fields of an entry. Returns the new entry or None."""
+    updated = patch_log_entries(target_date, {entry_id: fields})
+    return updated[0] if updated else None
+
+
+def patch_log_entries(target_date, fields_by_id):
+    """Update several entries of one day in one write. Returns the new entries."""
+    with _write_lock():
+        totals = get_day_totals(target_date)
+        before = {e.get('id'): e for e in day_logs.load(target_date) if e.get('id') in fields_by_id}
+        updated = day_logs.patch_many(target_date, fields_by_id)
+        if updated:
+            remaining = day_logs.load(target_date)
+            for entry in updated:
+                _totals_remove(totals, before[entry['id']], remaining)
+                _totals_add(totals, entry)
+            _store_day_totals(target_date, totals)
+            _notify_day_changed(target_date)
+    return updated
+
+
+def load_logs_between(start_date, end_date):
+    """[(date_str, entries)] for non-empty days in the range, newest first"""
+    return day_logs.load_range(start_date, end_date)
+
+
+def log_version(target_date):
+    """Opaque token that changes whenever a day's log changes"""
+    return day_logs.version(target_date)
+
+
+def locate_entries(entry_ids):
+    """Map entry ids to the date of the log that holds them"""
+    return day_logs.locate(entry_ids)
+
+
+def load_notes_for_date(target_date):
+    return day_logs.load_notes(target_date)
+
+
+def save_notes_for_date(target_date, notes):
+    day_logs.save_notes(target_date, notes)
+
+
+def notes_version(target_date):
+    """Opaque token that changes whenever a day's notes change"""
+    return day_logs.notes_version(target_date)
+
+
+def load_meals():
+    """Load all meal definitions"""
+    return day_logs.load_meals()
+
+
+def save_meals(meals):
+    """Save all meal definitions"""
+    day_logs.save_meals(meals)
+
+
+def meals_version():
+    """Opaque token that changes whenever the meal definitions change"""
+    return day_logs.meals_version()
+
 
 def get_today_log_file():
     """Get path to today's log file"""
-    today = date.today().strftime('%Y-%m-%d')
-    return os.path.join(LOGS_DIR, f'{today}.json')
+    return day_logs.path(date.today())
 
 def load_log_for_date(target_date):
-    """Load food log for a specific date"""
-    date_str = target_date.strftime('%Y-%m-%d')
-    log_file = os.path.join(LOGS_DIR, f'{date_str}.json')
-    if not os.path.exists(log_file):
-        return []
-    try:
-        with open(log_file, 'r') as f:
-            return json.load(f)
-    except (json.JSONDecodeError, IOError):
-        return []
+    """Load food log for a specific date (a date or 'YYYY-MM-DD' string)"""
+    return day_logs.load(target_date)
 
 def load_today_log():
     """Load today's food log"""
@@ -204,29 +1009,37 @@ def backfill_entry_ids(entries):
             modified = True
     return modified
 
+def migrate_logs_to_jsonl():
+    """Convert every legacy daily_logs/<date>.json to JSON lines.
+
+    Entries missing IDs are backfilled on the way. Returns the number of
+    days converted.
+    """
+    converted = 0
+    for date_str in day_logs.dates():
+        if not os.path.exists(day_logs.legacy_path(date_str)) or os.path.exists(day_logs.path(date_str)):
+            continue
+        entries = list(day_logs.load(date_str))
+        backfill_entry_ids(entries)
+        day_logs.save(date_str, entries)
+        converted += 1
+    return converted
+
 def backfill_all_logs():
     """Backfill IDs for all historic log files. Returns count of files modified."""
-    if not os.path.exists(LOGS_DIR):
-        return 0
-    
     files_modified = 0
-    
-    for filename in os.listdir(LOGS_DIR):
-        if filename.endswith('.json') and not filename.endswith('_notes.json'):
-            filepath = os.path.join(LOGS_DIR, filename)
+
+    for date_str in day_logs.dates():
+        # Copies, so a failed save leaves the cached day untouched
+        entries = [dict(entry) for entry in day_logs.load(date_str)]
+        if backfill_entry_ids(entries):
             try:
-                with open(filepath, 'r') as f:
-                    entries = json.load(f)
-                
-                if backfill_entry_ids(entries):
-                    with open(filepath, 'w') as f:
-                        json.dump(entries, f, indent=2)
-                    files_modified += 1
-                    
-            except (json.JSONDecodeError, IOError) as e:
-                print(f"Warning: Could not process {filename}: {e}")
+                save_log_for_date(date_str, entries)
+            except IOError as e:
+                print(f"Warning: Could not process {date_str}.json: {e}")
                 continue
-    
+            files_modified += 1
+
     return files_modified
 
 def save_food_entry(pad_key, food_key, food_data, amount=None, meal_uid=None, at_timestamp=None):
@@ -241,15 +1054,10 @@ def save_food_entry(pad_key, food_key, food_data, amount=None, meal_uid=None, at
             entry_dt = datetime.fromisoformat(at_timestamp)
         else:
             entry_dt = at_timestamp
-        date_str = entry_dt.strftime('%Y-%m-%d')
-        log_file = os.path.join(LOGS_DIR, f'{date_str}.json')
-        entries = load_log_for_date(date_str) if os.path.exists(log_file) else []
     else:
-        log_file = get_today_log_file()
-        entries = load_today_log()
         entry_dt = datetime.now()
-
-    backfill_entry_ids(entries)
+    date_str = entry_dt.strftime('%Y-%m-%d')
+    entries = list(load_log_for_date(date_str))
 
     timestamp = entry_dt.isoformat()
     time_str = entry_dt.strftime('%H:%M')
@@ -290,27 +1098,304 @@ def save_food_entry(pad_key, food_key, food_data, amount=None, meal_uid=None, at
     if meal_uid:
         entry['meal_uid'] = meal_uid
 
-    entries.append(entry)
-
-    with open(log_file, 'w') as f:
-        json.dump(entries, f, indent=2)
+    if backfill_entry_ids(entries):
+        entries.append(entry)
+        save_log_for_date(date_str, entries)
+    else:
+        append_log_entries(date_str, [entry])
 
     return entry
 
+def resolve_entries(entry_ids, pad_key, food_key, food_data):
+    """Re-point entries (usually unknowns) at a known food and recompute nutrition.
+
+    Uses the entry-id index so only the logs holding the entries are
+    opened, and writes each of those logs once.
+
+    Returns (updated_entries, files_touched) where updated_entries is a
+    list of {id, date, calories, protein}.
+    """
+    by_date = {}
+    for entry_id, date_str in locate_entries(entry_ids).items():
+        by_date.setdefault(date_str, set()).add(entry_id)
+
+    updated_entries = []
+    for date_str in sorted(by_date, reverse=True):
+        fields_by_id = {}
+        for entry in load_log_for_date(date_str):
+            if entry.get('id') not in by_date[date_str]:
+                continue
+            amount = entry.get('amount', 100)
+            if food_data.get('type') == 'unit':
+                calories = food_data.get('calories', 0)
+                protein = food_data.get('protein', 0)
+                fiber = food_data.get('fiber', 0)
+                amount_display = "1 unit"
+            else:
+                calories = food_data.get('calories_per_gram', 0) * amount
+                protein = food_data.get('protein_per_gram', 0) * amount
+                fiber = food_data.get('fiber_per_gram', 0) * amount
+                amount_display = f"{amount}g"
+            fields_by_id[entry['id']] = {
+                'pad': pad_key,
+                'food': food_key,
+                'name': food_data.get('name', food_key),
+                'calories': round(calories, 1),
+                'protein': round(protein, 1),
+                'fiber': round(fiber, 1),
+                'amount_display': amount_display,
+            }
+        for resolved in patch_log_entries(date_str, fields_by_id):
+            updated_entries.append({
+                'id': resolved['id'],
+                'date': date_str,
+                'calories': resolved['calories'],
+                'protein': resolved['protein']
+            })
+    return updated_entries, len(by_date)
+
+# --- EATING SESSIONS ---
+# Food entries from the whole history merged into eating sessions (entries
+# within SESSION_GAP_MINUTES of each other, across midnight too), with the
+# fasts between them. Each day's own sessions are stored with the log
+# version they were built from (the daily_logs/eating_sessions.jsonl
+# journal, or the SQLite database). A write re-merges only the sessions
+# around the changed day and stores only that day's record. "Last ate", the longest fasts and a day's fasts are then
+# bisect lookups instead of day-log reads.
+
+SESSION_GAP_MINUTES = 15
+
+
+def _entry_timestamp(date_str, entry):
+    """'YYYY-MM-DDTHH:MM:SS' for an entry (old entries only have HH:MM)"""
+    timestamp = entry.get('timestamp')
+    if timestamp:
+        return timestamp[:19]
+    return f"{date_str}T{entry.get('time', '00:00')}:00"
+
+
+def _minutes_between(start, end):
+    """Whole minutes between two timestamps, by their HH:MM as shown"""
+    delta = datetime.fromisoformat(end[:16]) - datetime.fromisoformat(start[:16])
+    return int(delta.total_seconds() // 60)
+
+
+def _shift(timestamp, minutes):
+    return (datetime.fromisoformat(timestamp) + timedelta(minutes=minutes)).isoformat()
+
+
+def merge_sessions(sessions):
+    """Merge [start, end, count] sessions, sorted by start, that are
+    SESSION_GAP_MINUTES or less apart"""
+    merged = []
+    for start, end, count in sessions:
+        if merged and _minutes_between(merged[-1][1], start) <= SESSION_GAP_MINUTES:
+            merged[-1][1] = max(merged[-1][1], end)
+            merged[-1][2] += count
+        else:
+            merged.append([start, end, count])
+    return merged
+
+
+def day_sessions(date_str, entries):
+    """A day's food entries (see is_food_entry) as [start, end, count] sessions"""
+    timestamps = sorted(_entry_timestamp(date_str, e) for e in entries if is_food_entry(e))
+    return merge_sessions([[timestamp, timestamp, 1] for timestamp in timestamps])
+
+
+class EatingSessionIndex:
+    """Eating sessions over all days, sorted, and the fasts between them.
+
+    Fasts are (minutes, start, end, entries before, entries after) tuples
+    kept sorted by length. A write stores only the changed day's record.
+    The stored index is re-read when its version changes (another process
+    wrote it), and any day whose log version no longer matches is rebuilt
+    from its log then.
+    """
+
+    def __init__(self):
+        self._days = None  # date_str -> [log version, that day's sessions]
+        self._version = None
+        self._records = 0  # day records in the store, superseded ones included
+        self._stale = False  # the store needs rewriting from self._days
+        self._sessions = []  # merged [start, end, count], by start
+        self._starts = []
+        self._ends = []
+        self._fasts = []
+        self._lock = threading.RLock()
+
+    def clear(self):
+        with self._lock:
+            self._days = None
+            self._version = None
+
+    def _load(self):
+        version = day_logs.sessions_version()
+        if self._days is not None and version == self._version:
+            return
+        stored = day_logs.load_sessions()
+        if stored is not None and stored['gap'] != SESSION_GAP_MINUTES:
+            stored = None
+        stored_days = stored['days'] if stored else {}
+        days = {}
+        for date_str in day_logs.dates():
+            log_version = day_logs.version(date_str)
+            day = stored_days.get(date_str)
+            if day is None or day[0] != log_version:
+                day = [log_version, day_sessions(date_str, day_logs.load(date_str))]
+            days[date_str] = day
+        self._days = days
+        self._set_sessions(merge_sessions(sorted(
+            session for _, sessions in days.values() for session in sessions)))
+        self._version = version
+        self._records = stored['records'] if stored else 0
+        # Rewritten by the next write, which holds the store's write lock
+        self._stale = stored is None or days != stored_days
+
+    def _save_all(self):
+        try:
+            day_logs.save_sessions({'gap': SESSION_GAP_MINUTES, 'days': self._days})
+        except IOError:
+            return
+        self._records = len(self._days)
+        self._stale = False
+        self._version = day_logs.sessions_version()
+
+    def _save_day(self, date_str):
+        if self._stale or self._records > len(self._days) + SESSIONS_REWRITE_SLACK:
+            self._save_all()
+            return
+        try:
+            day_logs.save_day_sessions(date_str, self._days.get(date_str))
+        except IOError:
+            return
+        self._records += 1
+        self._version = day_logs.sessions_version()
+
+    def _set_sessions(self, sessions):
+        self._sessions = sessions
+        self._starts = [session[0] for session in sessions]
+        self._ends = [session[1] for session in sessions]
+        self._fasts = sorted(self._fast(i) for i in range(len(sessions) - 1))
+
+    def _fast(self, i):
+        before, after = self._sessions[i], self._sessions[i + 1]
+        return (_minutes_between(before[1], after[0]), before[1], after[0], before[2], after[2])
+
+    def _fast_range(self, first, stop):
+        return range(max(first, 0), min(stop, len(self._sessions) - 1))
+
+    def update_day(self, target_date):
+        """Rebuild a day's sessions after a write to its log (a day_change_listeners hook)"""
+        date_str = _date_key(target_date)
+        with self._lock:
+            self._load()
+            old = self._days.pop(date_str, [None, []])[1]
+            if day_logs.exists(date_str):
+                self._days[date_str] = [day_logs.version(date_str),
+                                        day_sessions(date_str, day_logs.load(date_str))]
+            new = self._days.get(date_str, [None, []])[1]
+            if old != new:
+                self._splice(old, new)
+            self._save_day(date_str)
+
+    def _splice(self, old, new):
+        """Swap a day's `old` sessions for `new` ones in the merged list.
+
+        Only merged sessions within reach of the day's sessions can change;
+        they are re-merged from the day sessions that fed them.
+        """
+        low = _shift(min(session[0] for session in old + new), -SESSION_GAP_MINUTES - 1)
+        high = _shift(max(session[1] for session in old + new), SESSION_GAP_MINUTES + 1)
+        a = bisect_left(self._ends, low)
+        b = bisect_right(self._starts, high)
+        span_start = min(self._starts[a], low) if a < b else low
+        span_end = max(self._ends[b - 1], high) if a < b else high
+        first_day = (date.fromisoformat(span_start[:10]) - timedelta(days=1)).isoformat()
+        last_day = (date.fromisoformat(span_end[:10]) + timedelta(days=1)).isoformat()
+        pieces = sorted(session for date_str, (_, sessions) in self._days.items()
+                        if first_day <= date_str <= last_day
+                        for session in sessions
+                        if session[0] >= span_start and session[1] <= span_end)
+        merged = merge_sessions(pieces)
+
+        for fast in [self._fast(i) for i in self._fast_range(a - 1, b)]:
+            del self._fasts[bisect_left(self._fasts, fast)]
+        self._sessions[a:b] = merged
+        self._starts[a:b] = [session[0] for session in merged]
+        self._ends[a:b] = [session[1] for session in merged]
+        for i in self._fast_range(a - 1, a + len(merged)):
+            insort(self._fasts, self._fast(i))
+
+    def version(self):
+        """Opaque token that changes whenever the index changes"""
+        with self._lock:
+            self._load()
+            return self._version
+
+    def last_eaten(self, now=None):
+        """Timestamp of the last food entry in the latest session started by `now`
+        (default: the current time)"""
+        now = now or datetime.now().isoformat(timespec='seconds')
+        with self._lock:
+            self._load()
+            i = bisect_right(self._starts, now) - 1
+            return self._sessions[i][1] if i >= 0 else None
+
+    def longest_fasts(self, limit=5):
+        """The longest fasts ever, longest first"""
+        with self._lock:
+            self._load()
+            return self._fasts[-limit:][::-1]
+
+    def fasts_between(self, start, end):
+        """Fasts overlapping the timestamps [start, end), longest first"""
+        with self._lock:
+            self._load()
+            first = bisect_right(self._starts, start) - 1
+            stop = bisect_left(self._ends, end)
+            return sorted((self._fast(i) for i in self._fast_range(first, stop)), reverse=True)
+
+    def fasts_on(self, target_date):
+        """Fasts overlapping a day, overnight ones included, longest first"""
+        day = date.fromisoformat(_date_key(target_date))
+        return self.fasts_between(f'{day.isoformat()}T00:00:00',
+                                  f'{(day + timedelta(days=1)).isoformat()}T00:00:00')
+
+    def stats(self):
+        """Session and fast counts and the longest and median fast in minutes"""
+        with self._lock:
+            self._load()
+            fasts = self._fasts
+            return {'sessions': len(self._sessions), 'fasts': len(fasts),
+                    'longest_minutes': fasts[-1][0] if fasts else None,
+                    'median_minutes': fasts[len(fasts) // 2][0] if fasts else None}
+
+    def fast_percentile(self, minutes):
+        """Percent of past fasts shorter than `minutes`"""
+        with self._lock:
+            self._load()
+            if not self._fasts:
+                return None
+            return round(bisect_left(self._fasts, (minutes,)) / len(self._fasts) * 100)
+
+
+eating_sessions = EatingSessionIndex()
+day_change_listeners.append(eating_sessions.update_day)
+
 def calculate_daily_total():
     """Calculate total protein for today"""
-    entries = load_today_log()
-    return sum(entry.get('protein', 0) for entry in entries)
+    return get_day_totals(date.today())['protein']
 
 def calculate_daily_item_count():
     """Calculate total items logged for today"""
-    return len(load_today_log())
+    return get_day_totals(date.today())['count']
 
 def calculate_nutrition_stats():
     """Calculate comprehensive nutrition stats for today"""
-    log = load_today_log()
+    totals = get_day_totals(date.today())
     
-    if not log:
+    if not totals['count']:
         return {
             'total_calories': 0,
             'total_protein': 0,
@@ -321,9 +1406,9 @@ def calculate_nutrition_stats():
             'kcal_per_fiber': '--'
         }
     
-    total_calories = sum(entry.get('calories', 0) for entry in log)
-    total_protein = sum(entry.get('protein', 0) for entry in log)
-    total_fiber = sum(entry.get('fiber', 0) for entry in log)
+    total_calories = totals['calories']
+    total_protein = totals['protein']
+    total_fiber = totals['fiber']
     
     avg_ratio = total_calories / total_protein if total_protein > 0 else 0
     kcal_per_fiber = total_calories / total_fiber if total_fiber > 0 else 0
@@ -349,30 +1434,8 @@ def calculate_nutrition_stats():
 
 def calculate_time_since_last_ate():
     """Calculate time since last food entry (excludes drinks/items under 20 kcal but includes unknowns)"""
-    entries = load_today_log()
-    food_entries = [e for e in entries if e.get('calories', 0) >= 20 or 'unknown' in e.get('food', '').lower() or 'unknown' in e.get('name', '').lower()]
-
-    # If no food today, check previous days
-    if not food_entries:
-        today = date.today()
-        for days_ago in range(1, 8):  # Check up to a week back
-            check_date = today - timedelta(days=days_ago)
-            log_file = os.path.join(LOGS_DIR, f'{check_date.strftime("%Y-%m-%d")}.json')
-            if os.path.exists(log_file):
-                try:
-                    with open(log_file, 'r') as f:
-                        old_entries = json.load(f)
-                    food_entries = [e for e in old_entries if e.get('calories', 0) >= 20 or 'unknown' in e.get('food', '').lower() or 'unknown' in e.get('name', '').lower()]
-                    if food_entries:
-                        break
-                except (json.JSONDecodeError, IOError):
-                    continue
+    timestamp_str = eating_sessions.last_eaten()
 
-    if not food_entries:
-        return None
-
-    last_entry = food_entries[-1]
-    timestamp_str = last_entry.get('timestamp')
     if not timestamp_str:
         return None
 
@@ -388,6 +1451,35 @@ def calculate_time_since_last_ate():
     except (ValueError, TypeError):
         return None
 
+def compare_to_previous_day(target_date, total_cal, total_prot, total_fib):
+    """Differences from the day before, up to the same time of day for today.
+
+    Returns cal_delta, cpp_delta (kcal/g protein) and cpf_delta (kcal/g
+    fiber); the ratios are None unless both days have protein or fiber.
+    """
+    prev_day = target_date - timedelta(days=1)
+    if target_date == date.today():
+        now_time = datetime.now().strftime('%H:%M')
+        prev_entries = [e for e in load_log_for_date(prev_day) if e.get('time', '00:00') <= now_time]
+        prev_cal = sum(e.get('calories', 0) for e in prev_entries)
+        prev_prot = sum(e.get('protein', 0) for e in prev_entries)
+        prev_fib = sum(e.get('fiber', 0) for e in prev_entries)
+    else:
+        prev_totals = get_day_totals(prev_day)
+        prev_cal = prev_totals['calories']
+        prev_prot = prev_totals['protein']
+        prev_fib = prev_totals['fiber']
+
+    curr_cpp = total_cal / total_prot if total_prot > 0 else 0
+    prev_cpp = prev_cal / prev_prot if prev_prot > 0 else 0
+    curr_cpf = total_cal / total_fib if total_fib > 0 else 0
+    prev_cpf = prev_cal / prev_fib if prev_fib > 0 else 0
+    return {
+        'cal_delta': round(total_cal - prev_cal),
+        'cpp_delta': round(curr_cpp - prev_cpp, 1) if prev_prot > 0 and total_prot > 0 else None,
+        'cpf_delta': round(curr_cpf - prev_cpf, 1) if prev_fib > 0 and total_fib > 0 else None,
+    }
+
 PERCENTILE_CONFIG_FILE = os.path.join(LOGS_DIR, 'percentile_config.json')
 
 
@@ -408,18 +1500,6 @@ def load_percentile_config():
         return None
 
 
-def load_log_for_date(date_str):
-    """Load log entries for a specific date"""
-    log_file = os.path.join(LOGS_DIR, f'{date_str}.json')
-    if not os.path.exists(log_file):
-        return []
-    try:
-        with open(log_file, 'r') as f:
-            return json.load(f)
-    except:
-        return []
-
-
 def _compute_day_event_samples(entries, day_date):
     """For a day's entries, compute time-weighted metric samples.
 
@@ -490,7 +1570,65 @@ PERCENTILE_METRICS = {
     'kcal_per_fiber': {'step': 5, 'count': 100},
 }
 
+# Seconds between a histogram update and it being written to disk; the
+# latest state is also flushed at exit
+PERCENTILE_FLUSH_SECONDS = 60
+
 _percentile_cache_mem = None
+_percentile_dirty = False
+_percentile_flush_timer = None
+_percentile_lock = threading.RLock()
+# Workers share the cache file: a flush only replaces a cache older than
+# its own, and adopts a newer one instead
+_percentile_file_lock = ProcessLock(lambda: PERCENTILE_CACHE_FILE + '.lock')
+
+
+class BucketHistogram:
+    """Bucket weights in an array('d') plus a Fenwick tree over them.
+
+    add() and tail() are O(log n), so a percentile lookup no longer sums
+    the histogram. Serialises to the plain list of weights.
+    """
+
+    def __init__(self, weights):
+        self.weights = array('d', weights)
+        self.total = sum(self.weights)
+        self._tree = array('d', [0.0]) + self.weights
+        size = len(self.weights)
+        for i in range(1, size + 1):
+            parent = i + (i & -i)
+            if parent <= size:
+                self._tree[parent] += self._tree[i]
+
+    def __len__(self):
+        return len(self.weights)
+
+    def __getitem__(self, idx):
+        return self.weights[idx]
+
+    def add(self, idx, amount):
+        self.weights[idx] += amount
+        self.total += amount
+        i = idx + 1
+        while i < len(self._tree):
+            self._tree[i] += amount
+            i += i & -i
+
+    def prefix(self, idx):
+        """Sum of weights[0..idx] inclusive"""
+        result = 0.0
+        i = idx + 1
+        while i > 0:
+            result += self._tree[i]
+            i -= i & -i
+        return result
+
+    def tail(self, idx):
+        """Sum of weights above bucket idx"""
+        return self.total - self.prefix(idx)
+
+    def to_list(self):
+        return self.weights.tolist()
 
 
 def _bucket_index(metric, value):
@@ -506,12 +1644,55 @@ def _empty_cache():
         'last_values': {},
     }
     for metric, cfg in PERCENTILE_METRICS.items():
-        cache[metric] = [0.0] * cfg['count']
+        cache[metric] = BucketHistogram([0.0] * cfg['count'])
     return cache
 
 
-def _seed_cache_from_history(cache):
-    """One-time seed from historical logs (cutoff to yesterday)."""
+# History seeding runs in the background in chunks of this many days,
+# optionally spread over a process pool (nutrition-pad --seed-processes)
+SEED_CHUNK_DAYS = 30
+
+_seed_thread = None
+_seed_progress = {'state': 'idle', 'days_done': 0, 'days_total': 0, 'error': None}
+
+
+def _store_spec(store):
+    """How a worker process can open the same storage"""
+    if isinstance(store, DayLogStore):
+        return ('json', store.logs_dir)
+    return ('sqlite', store.db_path)
+
+
+def _open_store(spec):
+    kind, location = spec
+    if kind == 'json':
+        return DayLogStore(location)
+    from .sqlite_store import SqliteStore
+    return SqliteStore(location)
+
+
+def _seed_range(spec, start_date, end_date):
+    """Bucket weights ({metric: [minutes]}) for the logs in [start, end].
+
+    Module-level so it can run in a worker process.
+    """
+    store = _open_store(spec) if spec else day_logs
+    buckets = {metric: [0.0] * cfg['count'] for metric, cfg in PERCENTILE_METRICS.items()}
+    for date_str, entries in store.load_range(start_date, end_date):
+        for metrics, weight_hours in _compute_day_event_samples(entries, date.fromisoformat(date_str)):
+            for metric in PERCENTILE_METRICS:
+                val = metrics.get(metric)
+                if val is not None:
+                    buckets[metric][_bucket_index(metric, val)] += weight_hours * 60
+    return buckets
+
+
+def _seed_cache_from_history(cache, processes=0):
+    """One-time seed from historical logs (cutoff to yesterday).
+
+    Splits the range into SEED_CHUNK_DAYS chunks, runs them serially or
+    on a process pool, and merges the bucket arrays into the cache.
+    """
     pconfig = load_percentile_config()
     if not pconfig:
         return
@@ -521,24 +1702,84 @@ def _seed_cache_from_history(cache):
         return
 
     cutoff_date = date.fromisoformat(cutoff_str)
-    today = date.today()
+    yesterday = date.today() - timedelta(days=1)
+    chunks = []
+    start = cutoff_date
+    while start <= yesterday:
+        end = min(start + timedelta(days=SEED_CHUNK_DAYS - 1), yesterday)
+        chunks.append((start, end))
+        start = end + timedelta(days=1)
+    _seed_progress.update(days_done=0, days_total=max((yesterday - cutoff_date).days + 1, 0))
+
+    def merge(chunk, buckets):
+        for metric, weights in buckets.items():
+            for idx, minutes in enumerate(weights):
+                if minutes:
+                    cache[metric].add(idx, minutes)
+        _seed_progress['days_done'] += (chunk[1] - chunk[0]).days + 1
+
+    if processes and processes > 1 and len(chunks) > 1:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+        spec = _store_spec(day_logs)
+        with ProcessPoolExecutor(max_workers=processes,
+                                 mp_context=multiprocessing.get_context('spawn')) as pool:
+            futures = {pool.submit(_seed_range, spec, *chunk): chunk for chunk in chunks}
+            for future in as_completed(futures):
+                merge(futures[future], future.result())
+    else:
+        for chunk in chunks:
+            merge(chunk, _seed_range(None, *chunk))
+
+
+def _run_seed_job(processes):
+    global _seed_thread
+    try:
+        cache = _empty_cache()
+        _seed_cache_from_history(cache, processes)
+        cache['timestamp'] = datetime.now().isoformat()
+        with _percentile_lock:
+            _save_percentile_cache(cache)
+            flush_percentile_cache()
+        _seed_progress['state'] = 'done'
+    except Exception as e:
+        with _percentile_lock:
+            _seed_progress['state'] = 'failed'
+            _seed_progress['error'] = str(e)
+            # Let the next start_percentile_seeding() call try again
+            _seed_thread = None
+
+
+def start_percentile_seeding(processes=0):
+    """Seed the percentile cache from history in a background thread.
+
+    Does nothing if a cache already exists or seeding is running or
+    finished; a failed run is retried.
+    """
+    global _seed_thread
+    with _percentile_lock:
+        if _seed_thread is not None or _percentile_cache_mem is not None or os.path.exists(PERCENTILE_CACHE_FILE):
+            return
+        _seed_progress.update(state='running', days_done=0, days_total=0, error=None)
+        _seed_thread = threading.Thread(target=_run_seed_job, args=(processes,),
+                                        name='percentile-seed', daemon=True)
+        _seed_thread.start()
+
+
+def wait_for_percentile_seeding(timeout=None):
+    """Block until a running seed job finishes (for tests and CLI tools)"""
+    thread = _seed_thread
+    if thread is not None:
+        thread.join(timeout)
 
-    current = cutoff_date
-    while current < today:
-        entries = load_log_for_date(current.strftime('%Y-%m-%d'))
-        if entries:
-            for metrics, weight_hours in _compute_day_event_samples(entries, current):
-                weight_minutes = weight_hours * 60
-                for metric in PERCENTILE_METRICS:
-                    val = metrics.get(metric)
-                    if val is not None:
-                        idx = _bucket_index(metric, val)
-                        cache[metric][idx] += weight_minutes
-        current += timedelta(days=1)
+
+def get_percentile_seed_progress():
+    """{'state': idle|running|done|failed, 'days_done', 'days_total', 'error'}"""
+    return dict(_seed_progress)
 
 
 def _load_percentile_cache():
-    """Load from memory, disk, or create+seed a new cache."""
+    """Load from memory or disk; None while a new cache is being seeded."""
     global _percentile_cache_mem
 
     if _percentile_cache_mem is not None:
@@ -546,40 +1787,82 @@ def _load_percentile_cache():
 
     if os.path.exists(PERCENTILE_CACHE_FILE):
         try:
-            with open(PERCENTILE_CACHE_FILE, 'r') as f:
-                cache = json.load(f)
-            _percentile_cache_mem = cache
-            return cache
+            _percentile_cache_mem = _read_percentile_cache_file()
+            return _percentile_cache_mem
         except:
             pass
 
-    # First run ever: create and seed
-    cache = _empty_cache()
-    _seed_cache_from_history(cache)
-    _save_percentile_cache(cache)
-    return cache
+    # First run ever: seed in the background, no percentiles until done
+    start_percentile_seeding()
+    return None
 
 
 def _save_percentile_cache(cache):
-    """Save to disk and memory."""
-    global _percentile_cache_mem
-    _percentile_cache_mem = cache
-    try:
-        with open(PERCENTILE_CACHE_FILE, 'w') as f:
-            json.dump(cache, f)
-    except:
-        pass
+    """Keep the cache in memory and schedule a write to disk."""
+    global _percentile_cache_mem, _percentile_dirty, _percentile_flush_timer
+    with _percentile_lock:
+        _percentile_cache_mem = cache
+        _percentile_dirty = True
+        if _percentile_flush_timer is None:
+            _percentile_flush_timer = threading.Timer(PERCENTILE_FLUSH_SECONDS, flush_percentile_cache)
+            _percentile_flush_timer.daemon = True
+            _percentile_flush_timer.start()
+
+
+def _read_percentile_cache_file():
+    with open(PERCENTILE_CACHE_FILE, 'r') as f:
+        cache = json.load(f)
+    for metric in PERCENTILE_METRICS:
+        cache[metric] = BucketHistogram(cache[metric])
+    return cache
+
+
+def flush_percentile_cache():
+    """Write the percentile cache to disk if it changed since the last write.
+
+    If another process has written a newer cache (by its 'timestamp'),
+    that one is loaded instead: both hold the same time, so it wins.
+    """
+    global _percentile_cache_mem, _percentile_dirty, _percentile_flush_timer
+    with _percentile_lock:
+        if _percentile_flush_timer is not None:
+            _percentile_flush_timer.cancel()
+            _percentile_flush_timer = None
+        if not _percentile_dirty or _percentile_cache_mem is None:
+            return
+        cache = dict(_percentile_cache_mem)
+        for metric in PERCENTILE_METRICS:
+            cache[metric] = cache[metric].to_list()
+        try:
+            with _percentile_file_lock:
+                try:
+                    on_disk = _read_percentile_cache_file()
+                except (OSError, ValueError, KeyError):
+                    on_disk = None
+                if on_disk is not None and on_disk.get('timestamp', '') > cache.get('timestamp', ''):
+                    _percentile_cache_mem = on_disk
+                else:
+                    tmp_path = f'{PERCENTILE_CACHE_FILE}.{os.getpid()}.tmp'
+                    with open(tmp_path, 'w') as f:
+                        json.dump(cache, f)
+                    os.replace(tmp_path, PERCENTILE_CACHE_FILE)
+            _percentile_dirty = False
+        except:
+            pass
+
+
+atexit.register(flush_percentile_cache)
 
 
 def _compute_today_metrics():
     """Compute today's live metric values."""
-    log = load_today_log()
-    if not log:
+    totals = get_day_totals(date.today())
+    if not totals['count']:
         return None
 
-    total_cal = sum(e.get('calories', 0) for e in log)
-    total_protein = sum(e.get('protein', 0) for e in log)
-    total_fiber = sum(e.get('fiber', 0) for e in log)
+    total_cal = totals['calories']
+    total_protein = totals['protein']
+    total_fiber = totals['fiber']
 
     return {
         'kcal_per_protein': total_cal / total_protein if total_protein > 0 else None,
@@ -589,7 +1872,14 @@ def _compute_today_metrics():
 
 def calculate_percentiles():
     """Incrementally update the histogram with elapsed minutes, then look up percentiles."""
+    with _percentile_lock:
+        return _calculate_percentiles_locked()
+
+
+def _calculate_percentiles_locked():
     cache = _load_percentile_cache()
+    if cache is None:
+        return None
     today_metrics = _compute_today_metrics()
     if not today_metrics:
         return None
@@ -609,7 +1899,7 @@ def calculate_percentiles():
             val = last_values.get(metric)
             if val is not None:
                 idx = _bucket_index(metric, val)
-                cache[metric][idx] += elapsed
+                cache[metric].add(idx, elapsed)
 
     # Store current timestamp and values for next call
     cache['timestamp'] = now.isoformat()
@@ -630,18 +1920,114 @@ def calculate_percentiles():
             continue
 
         buckets = cache[metric]
-        total = sum(buckets)
-        if total <= 0:
+        if buckets.total <= 0:
             percentiles[metric] = None
             continue
 
         idx = _bucket_index(metric, val)
-        worse_time = sum(buckets[idx + 1:])
-        percentiles[metric] = round(100 * worse_time / total)
+        worse_time = buckets.tail(idx)
+        percentiles[metric] = round(100 * worse_time / buckets.total)
 
     return percentiles
 
 
+# --- LIVE STATS ---
+# Today's figures for pages patched in place from poll change sets,
+# computed once per change to today's log however many clients ask.
+
+_live_stats = None  # (day, today's and yesterday's log versions, stats)
+_live_stats_lock = threading.Lock()
+
+
+def calculate_live_stats():
+    """Today's dashboard figures, formatted as the pages render them.
+
+    The calculate_nutrition_stats() fields plus item_count, last_eaten
+    (timestamp or None), the percentiles (pct_kcal_per_protein,
+    pct_kcal_per_fiber) and the compare_to_previous_day() deltas.
+    """
+    global _live_stats
+    today = date.today()
+    # Yesterday's log feeds the comparison deltas, and "last ate" can come
+    # from any day
+    key = (today, day_logs.version(today), day_logs.version(today - timedelta(days=1)),
+           eating_sessions.version())
+    with _live_stats_lock:
+        if _live_stats is not None and _live_stats[:4] == key:
+            return _live_stats[4]
+        stats = calculate_nutrition_stats()
+        last_ate = calculate_time_since_last_ate()
+        percentiles = calculate_percentiles() or {}
+        stats.update(
+            item_count=get_day_totals(today)['count'],
+            last_eaten=last_ate['timestamp'] if last_ate else None,
+            pct_kcal_per_protein=percentiles.get('kcal_per_protein'),
+            pct_kcal_per_fiber=percentiles.get('kcal_per_fiber'),
+            **compare_to_previous_day(today, stats['total_calories'],
+                                      float(stats['total_protein']), float(stats['total_fiber'])))
+        _live_stats = key + (stats,)
+        return stats
+
+
+# --- FOOD CATALOG ---
+
+def normalize_food_name(name):
+    """Lowercase a food name or key and collapse punctuation to single spaces"""
+    return ' '.join(''.join(c if c.isalnum() else ' ' for c in name.lower()).split())
+
+
+class FoodCatalog:
+    """Lookup tables over foods.toml, compiled once per config version.
+
+    foods:     [(pad_key, food_key, food)] in config order (no amounts pad)
+    active:    the same, without foods marked active = false
+    by_key:    food_key -> (pad_key, food); the first pad wins on clashes
+    by_name:   normalize_food_name(name or key) -> (pad_key, food_key, food)
+    active_pads: pad keys with at least one active food
+    """
+
+    def __init__(self, pads, version):
+        self.version = version
+        self.foods = []
+        self.by_key = {}
+        self.by_name = {}
+        for pad_key, pad_data in pads.items():
+            if pad_key == 'amounts':
+                continue
+            for food_key, food in pad_data.get('foods', {}).items():
+                self.foods.append((pad_key, food_key, food))
+                self.by_key.setdefault(food_key, (pad_key, food))
+                for name in (food_key, food.get('name', food_key)):
+                    self.by_name.setdefault(normalize_food_name(name), (pad_key, food_key, food))
+        self.active = [item for item in self.foods if item[2].get('active', True)]
+        self.active_pads = {pad_key for pad_key, _, _ in self.active}
+
+    def find(self, food_key):
+        """(pad_key, food) for a food key, or None"""
+        return self.by_key.get(food_key)
+
+    def find_by_name(self, name):
+        """(pad_key, food_key, food) for a food name or loosely-typed key, or None"""
+        return self.by_name.get(normalize_food_name(name))
+
+
+_food_catalog = None
+_food_catalog_lock = threading.Lock()
+
+
+def get_food_catalog():
+    """The FoodCatalog for the current foods.toml"""
+    global _food_catalog
+    # Version first: if foods.toml changes between the two calls the
+    # catalog is tagged with the older version and rebuilt next time
+    version = get_config_version()
+    pads = get_all_pads()
+    with _food_catalog_lock:
+        if _food_catalog is None or _food_catalog.version != version:
+            _food_catalog = FoodCatalog(pads, version)
+        return _food_catalog
+
+
 def validate_food_request(pad_key, food_key):
     """Validate that a pad and food key exist in the config"""
     if pad_key == '_unknown' and food_key in UNKNOWN_FOODS:
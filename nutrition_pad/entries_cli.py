@@ -33,12 +33,11 @@ def load_config():
 def fetch_from_server(server, days):
     """Fetch entries from remote server"""
     try:
-        import urllib.request
+        from .http_cache import fetch_cached
 
         url = f"http://{server}/api/entries?days={days}"
-        with urllib.request.urlopen(url, timeout=10) as response:
-            data = json.load(response)
-            return data.get('dates', [])
+        data = json.loads(fetch_cached(url, timeout=10))
+        return data.get('dates', [])
     except Exception as e:
         print(f"Error fetching from server: {e}")
         return None
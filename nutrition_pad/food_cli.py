@@ -25,11 +25,10 @@ def load_server_config():
 def fetch_from_server(server, endpoint):
     """Fetch data from server"""
     try:
-        import urllib.request
+        from .http_cache import fetch_cached
 
         url = f"http://{server}{endpoint}"
-        with urllib.request.urlopen(url, timeout=10) as response:
-            return json.load(response)
+        return json.loads(fetch_cached(url, timeout=10))
     except Exception as e:
         print(f"Error fetching from server: {e}", file=sys.stderr)
         return None
@@ -37,11 +36,10 @@ def fetch_from_server(server, endpoint):
 def fetch_text_from_server(server, endpoint):
     """Fetch text data from server"""
     try:
-        import urllib.request
+        from .http_cache import fetch_cached
 
         url = f"http://{server}{endpoint}"
-        with urllib.request.urlopen(url, timeout=10) as response:
-            return response.read().decode('utf-8')
+        return fetch_cached(url, timeout=10)
     except Exception as e:
         print(f"Error fetching from server: {e}", file=sys.stderr)
         return None
@@ -71,21 +69,30 @@ def get_server():
 
 def cmd_search(args):
     """Search for foods"""
+    from urllib.parse import urlencode
+
     query = args.query.lower()
     server = get_server()
 
-    data = fetch_from_server(server, f'/api/foods/search?q={query}')
+    params = {'q': query}
+    if args.limit:
+        params['limit'] = args.limit
+    data = fetch_from_server(server, f'/api/foods/search?{urlencode(params)}')
     if data is None:
         return 1
 
-    foods = data.get('foods', [])
-    matches = [f for f in foods if query in f['name'].lower() or query in f['food_key'].lower()]
+    # Already ranked by the server, best match first
+    matches = data.get('foods', [])
 
     if not matches:
         print(f"No foods found matching: {query}")
         return 0
 
-    print(f"\nFound {len(matches)} food(s):\n")
+    total = data.get('total', len(matches))
+    if total > len(matches):
+        print(f"\nFound {total} food(s), showing the best {len(matches)}:\n")
+    else:
+        print(f"\nFound {len(matches)} food(s):\n")
     for food in matches:
         print(f"  {food['pad_name']} / {food['name']}")
         print(f"    Key: {food['pad_key']}/{food['food_key']}")
@@ -430,6 +437,8 @@ def main():
     # Search command
     search_parser = subparsers.add_parser('search', help='Search for foods')
     search_parser.add_argument('query', help='Search query')
+    search_parser.add_argument('-n', '--limit', type=int, default=20,
+                               help='Show at most this many matches (default: 20, 0 for all)')
 
     # List command
     list_parser = subparsers.add_parser('list', help='List all foods')
@@ -0,0 +1,194 @@
+"""
+Ranked food search for /api/foods/search and `nutrition-food search`.
+
+The index is built from the food catalog once per config version (and
+once a day, to refresh logging frequencies) and holds:
+
+- sorted names, for whole-name prefixes
+- word -> foods, for whole-word matches
+- word prefix -> foods, for "chi bre" style typing
+- 1/2/3-gram -> foods, for substrings and typos
+
+Results are ranked by match quality first (exact name, name prefix,
+whole words, word prefixes, substring, fuzzy), then by how often the food was logged
+recently.
+"""
+import heapq
+import threading
+from bisect import bisect_left
+from collections import Counter
+from datetime import date, timedelta
+
+from .data import get_food_catalog, load_logs_between, normalize_food_name
+
+# Token prefixes up to this length are indexed; longer query tokens are
+# looked up by their first PREFIX_MAX characters and then checked
+PREFIX_MAX = 12
+# Logging history that counts towards ranking
+FREQUENCY_DAYS = 90
+# Typo-tolerant (trigram) matches are only offered when there are fewer
+# direct matches than this, and need this much trigram overlap (Jaccard)
+FUZZY_BELOW = 5
+FUZZY_THRESHOLD = 0.35
+
+# Match quality, best first
+EXACT, NAME_PREFIX, WHOLE_WORDS, WORD_PREFIX, SUBSTRING, FUZZY = 5, 4, 3, 2, 1, 0
+
+
+def ngrams(text, n):
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def food_frequencies(days=FREQUENCY_DAYS):
+    """Count how often each food_key was logged over the last `days` days"""
+    today = date.today()
+    counts = Counter()
+    for _, entries in load_logs_between(today - timedelta(days=days - 1), today):
+        counts.update(e.get('food') for e in entries if e.get('food'))
+    return counts
+
+
+class FoodSearchIndex:
+    """Exact, prefix, token and n-gram indexes over a FoodCatalog.
+
+    Each match tier is a set operation over the indexes, so a query costs
+    roughly the size of its result rather than the size of the catalog.
+    Within a tier foods are ordered by a precomputed rank (most logged
+    first, then by name).
+    """
+
+    def __init__(self, catalog, frequencies):
+        self.version = catalog.version
+        self.foods = catalog.foods
+        self.texts = []  # per food: (normalized name, normalized key)
+        self.exact = {}
+        self.prefixes = {}
+        self.tokens = {}
+        self.grams = {}  # 1-, 2- and 3-grams -> foods containing them
+        self.trigram_counts = []
+        for i, (pad_key, food_key, food) in enumerate(self.foods):
+            name = normalize_food_name(food.get('name', food_key))
+            key = normalize_food_name(food_key)
+            self.texts.append((name, key))
+            for text in (name, key):
+                self.exact.setdefault(text, set()).add(i)
+            for token in set(name.split()) | set(key.split()):
+                self.tokens.setdefault(token, set()).add(i)
+                for n in range(1, min(len(token), PREFIX_MAX) + 1):
+                    self.prefixes.setdefault(token[:n], set()).add(i)
+            for n in (1, 2, 3):
+                for gram in ngrams(name, n) | ngrams(key, n):
+                    self.grams.setdefault(gram, set()).add(i)
+            self.trigram_counts.append(len(ngrams(name, 3) | ngrams(key, 3)))
+
+        self.sorted_texts = sorted((text, i) for i, pair in enumerate(self.texts) for text in pair)
+        order = sorted(range(len(self.foods)),
+                       key=lambda i: (-frequencies.get(self.foods[i][1], 0), self.texts[i][0]))
+        self.rank = [0] * len(self.foods)
+        for position, i in enumerate(order):
+            self.rank[i] = position
+
+    def _name_prefix_matches(self, query):
+        lo = bisect_left(self.sorted_texts, (query,))
+        hi = bisect_left(self.sorted_texts, (query + '\U0010ffff',))
+        return {i for _, i in self.sorted_texts[lo:hi]}
+
+    def _whole_word_matches(self, query_tokens):
+        """Foods containing every query token as a word"""
+        postings = sorted((self.tokens.get(token, set()) for token in query_tokens), key=len)
+        return set.intersection(*postings)
+
+    def _word_prefix_matches(self, query_tokens):
+        """Foods where every query token starts one of the food's words"""
+        matches = None
+        for token in query_tokens:
+            found = self.prefixes.get(token[:PREFIX_MAX], set())
+            if len(token) > PREFIX_MAX:
+                found = {i for i in found
+                         if any(w.startswith(token) for text in self.texts[i] for w in text.split())}
+            matches = found if matches is None else matches & found
+            if not matches:
+                return set()
+        return matches
+
+    def _substring_matches(self, query):
+        if len(query) <= 3:
+            return self.grams.get(query, set())
+        postings = sorted((self.grams.get(gram, set()) for gram in ngrams(query, 3)), key=len)
+        found = set.intersection(*postings)
+        return {i for i in found if query in self.texts[i][0] or query in self.texts[i][1]}
+
+    def _fuzzy_matches(self, query, exclude):
+        """{food: similarity} for foods sharing enough trigrams with the query"""
+        query_grams = ngrams(query, 3)
+        shared = Counter()
+        for gram in query_grams:
+            shared.update(self.grams.get(gram, ()))
+        found = {}
+        for i, common in shared.items():
+            if i in exclude:
+                continue
+            similarity = common / (len(query_grams) + self.trigram_counts[i] - common)
+            if similarity >= FUZZY_THRESHOLD:
+                found[i] = similarity
+        return found
+
+    def search(self, query, limit=None, offset=0):
+        """Return (total, [(pad_key, food_key, food, score)]) for one page of results"""
+        query = normalize_food_name(query)
+        if not query:
+            return 0, []
+
+        query_tokens = query.split()
+        seen = set()
+        tiers = []
+        for quality, matches in ((EXACT, self.exact.get(query, set())),
+                                 (NAME_PREFIX, self._name_prefix_matches(query)),
+                                 (WHOLE_WORDS, self._whole_word_matches(query_tokens)),
+                                 (WORD_PREFIX, self._word_prefix_matches(query_tokens)),
+                                 (SUBSTRING, self._substring_matches(query))):
+            matches = matches - seen
+            if matches:
+                tiers.append((quality, matches))
+                seen |= matches
+
+        if len(seen) < FUZZY_BELOW and len(query) >= 3:
+            fuzzy = self._fuzzy_matches(query, seen)
+            for i in sorted(fuzzy, key=lambda i: (-fuzzy[i], self.rank[i])):
+                tiers.append((FUZZY + round(fuzzy[i], 3), {i}))
+            seen.update(fuzzy)
+
+        end = offset + limit if limit is not None else len(seen)
+        page = []
+        position = 0
+        for score, ids in tiers:
+            if position >= end:
+                break
+            if position + len(ids) > offset:
+                # Only order as much of the tier as the page needs
+                ordered = heapq.nsmallest(end - position, ids, key=self.rank.__getitem__)
+                page.extend(self.foods[i] + (score,) for i in ordered[max(offset - position, 0):])
+            position += len(ids)
+        return len(seen), page
+
+
+_index = None
+_index_day = None
+_index_lock = threading.Lock()
+
+
+def get_search_index():
+    """The FoodSearchIndex for the current config, rebuilt daily for frequencies"""
+    global _index, _index_day
+    catalog = get_food_catalog()
+    today = date.today()
+    with _index_lock:
+        if _index is None or _index.version != catalog.version or _index_day != today:
+            _index = FoodSearchIndex(catalog, food_frequencies())
+            _index_day = today
+        return _index
+
+
+def search_foods(query, limit=None, offset=0):
+    """Ranked search over all foods. Returns (total, page of (pad_key, food_key, food, score))"""
+    return get_search_index().search(query, limit, offset)
@@ -0,0 +1,64 @@
+"""
+ETag cache for the command-line tools' GET requests.
+
+The server tags its JSON read APIs with strong ETags (see conditional.py).
+fetch_cached() keeps the last body and ETag for each URL under
+~/.nutrition-pad/http-cache/ and sends If-None-Match, so when nothing has
+changed the server answers 304 and the stored body is reused.
+"""
+import os
+import json
+import hashlib
+import urllib.error
+import urllib.request
+
+CACHE_DIR = os.path.join(os.path.expanduser('~/.nutrition-pad'), 'http-cache')
+
+
+def _cache_path(url):
+    return os.path.join(CACHE_DIR, hashlib.sha256(url.encode('utf-8')).hexdigest()[:32] + '.json')
+
+
+def _load(url):
+    try:
+        with open(_cache_path(url), 'r') as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if cached.get('url') != url:
+        return None
+    return cached
+
+
+def _store(url, etag, body):
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        path = _cache_path(url)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'url': url, 'etag': etag, 'body': body}, f)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass  # The cache is only an optimisation
+
+
+def fetch_cached(url, timeout=10):
+    """GET `url` and return its body as text, revalidating a cached copy by ETag.
+
+    Raises the usual urllib errors, like urlopen().
+    """
+    cached = _load(url)
+    req = urllib.request.Request(url)
+    if cached:
+        req.add_header('If-None-Match', cached['etag'])
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            body = response.read().decode('utf-8')
+            etag = response.headers.get('ETag')
+    except urllib.error.HTTPError as e:
+        if e.code == 304 and cached:
+            return cached['body']
+        raise
+    if etag:
+        _store(url, etag, body)
+    return body
@@ -0,0 +1,285 @@
+"""
+Live state backends for polling.py.
+
+The live state is what every device shares while the app is open: the
+current amount, meal mode and meal items, and the time and nonce of the
+last update. Every change bumps a version and records a typed event
+(kept for EVENT_BACKLOG changes) for /events and the poll change sets.
+
+LocalLiveState keeps it in this process (the default). SharedLiveState
+keeps it in a memory-mapped file, so several worker processes on one box
+(`nutrition-pad --workers N`) see the same state, and wakes waiters in
+the other processes through Unix datagram sockets.
+
+A backend provides version(), read(), update(), events_since(), wait()
+and close(), and calls its on_change(version) after every change it
+makes or hears about.
+"""
+import fcntl
+import json
+import mmap
+import os
+import socket
+import struct
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+EVENT_BACKLOG = 256
+
+
+def initial_state():
+    return {
+        'last_update': time.time(),
+        'current_nonce': None,  # nonce of the last update
+        'current_amount': 100.0,
+        'meal_mode': False,
+        'meal_items': [],
+        # /set-amount calls, and the amount updates actually broadcast
+        'amount_updates': 0,
+        'amount_broadcasts': 0,
+    }
+
+
+def events_after(events, version, current):
+    """Events in `events` after `version`, or None if some have been dropped"""
+    if version > current:
+        return None  # state was reset since the client's last event
+    if version == current:
+        return []
+    if not events or events[0][0] > version + 1:
+        return None
+    # Events from before deltas were recorded have four fields
+    return [(tuple(event) + (None,))[:5] for event in events if event[0] > version]
+
+
+def make_event(version, event_type, nonce, state, delta):
+    """(version, type, nonce, last_update, delta); delta is the event's
+    change details, e.g. the log entries added and removed, or None"""
+    return (version, event_type, nonce, state['last_update'], delta)
+
+
+class LocalLiveState:
+    """Live state in this process's memory"""
+
+    def __init__(self):
+        self.on_change = None
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+        self._state = initial_state()
+        self._version = 0
+        self._events = deque(maxlen=EVENT_BACKLOG)
+
+    def version(self):
+        return self._version
+
+    def read(self):
+        """A copy of the state, with its 'version'"""
+        with self._lock:
+            return dict(self._state, meal_items=list(self._state['meal_items']),
+                        version=self._version)
+
+    def update(self, change, event_type, nonce=None, delta=None):
+        """Apply change(state) in place, record the event and wake waiters.
+
+        Returns the new version.
+        """
+        with self._lock:
+            change(self._state)
+            self._version += 1
+            self._events.append(make_event(self._version, event_type, nonce, self._state, delta))
+            self._condition.notify_all()
+            if self.on_change:
+                self.on_change(self._version)
+            return self._version
+
+    def events_since(self, version):
+        """(current version, events after `version` or None if some were dropped)"""
+        with self._lock:
+            return self._version, events_after(self._events, version, self._version)
+
+    def wait(self, version, timeout):
+        """Block until the version moves past `version` or timeout; return it"""
+        with self._condition:
+            self._condition.wait_for(lambda: self._version > version, timeout)
+            return self._version
+
+    def close(self):
+        pass
+
+
+# magic, version, length of the JSON that follows
+HEADER = struct.Struct('<8sQI')
+MAGIC = b'NPLIVE01'
+MIN_MAP_SIZE = 64 * 1024
+
+
+class SharedLiveState:
+    """Live state in a memory-mapped file shared by worker processes.
+
+    The file is a header (magic, version, length) followed by the state
+    and event backlog as JSON. Writers hold an flock on the file (and a
+    thread lock, since flock is per open file) while they rewrite it;
+    readers only reparse it when the header's version has moved. After a
+    change every other process gets a datagram on its socket in
+    <path>.notify/, which wakes its waiters; sockets whose process has
+    gone are removed by the next sender.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.on_change = None
+        self._lock = threading.Lock()
+        self._condition = threading.Condition()
+        self._cache_version = None
+        self._cache = None
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        self._map = None
+        with self._locked(fcntl.LOCK_EX):
+            if os.fstat(self._fd).st_size < HEADER.size:
+                self._write({'state': initial_state(), 'events': []}, 0)
+            else:
+                self._remap()
+                if HEADER.unpack_from(self._map)[0] != MAGIC:
+                    raise ValueError(f"{path} is not a live state file")
+
+        self.notify_dir = path + '.notify'
+        os.makedirs(self.notify_dir, exist_ok=True)
+        self._socket_path = os.path.join(self.notify_dir, f'{os.getpid()}.{id(self):x}')
+        self._receiver = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._receiver.bind(self._socket_path)
+        self._sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sender.setblocking(False)
+        self._closed = False
+        self._listener = threading.Thread(target=self._listen, daemon=True,
+                                          name='live-state-notify')
+        self._listener.start()
+
+    @contextmanager
+    def _locked(self, operation):
+        with self._lock:
+            fcntl.flock(self._fd, operation)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _remap(self):
+        # Old maps are left to the garbage collector: threads reading the
+        # version without the lock may still hold them
+        self._map = mmap.mmap(self._fd, os.fstat(self._fd).st_size)
+
+    def _write(self, data, version):
+        payload = json.dumps(data, separators=(',', ':')).encode()
+        needed = HEADER.size + len(payload)
+        if self._map is None or needed > len(self._map):
+            if needed > os.fstat(self._fd).st_size:
+                os.ftruncate(self._fd, max(needed * 2, MIN_MAP_SIZE))
+            self._remap()
+        self._map[HEADER.size:needed] = payload
+        HEADER.pack_into(self._map, 0, MAGIC, version, len(payload))
+        self._cache_version, self._cache = version, data
+
+    def _load(self):
+        """(data, version) from the file (hold the file lock)"""
+        _, version, length = HEADER.unpack_from(self._map)
+        if version != self._cache_version:
+            if HEADER.size + length > len(self._map):
+                self._remap()  # another process grew the file
+            data = json.loads(self._map[HEADER.size:HEADER.size + length])
+            self._cache_version, self._cache = version, data
+        return self._cache, version
+
+    def version(self):
+        return HEADER.unpack_from(self._map)[1]
+
+    def _snapshot(self):
+        if self.version() != self._cache_version:
+            with self._locked(fcntl.LOCK_SH):
+                self._load()
+        with self._lock:
+            return self._cache, self._cache_version
+
+    def read(self):
+        """A copy of the state, with its 'version'"""
+        data, version = self._snapshot()
+        state = data['state']
+        return dict(state, meal_items=list(state['meal_items']), version=version)
+
+    def update(self, change, event_type, nonce=None, delta=None):
+        """Apply change(state) in place, record the event and wake waiters
+        here and in the other processes. Returns the new version.
+        """
+        with self._locked(fcntl.LOCK_EX):
+            data, version = self._load()
+            data = json.loads(json.dumps(data))  # keep the cached copy intact for readers
+            change(data['state'])
+            version += 1
+            data['events'].append(list(make_event(version, event_type, nonce, data['state'], delta)))
+            del data['events'][:-EVENT_BACKLOG]
+            self._write(data, version)
+        self._wake_local(version)
+        self._notify_others()
+        return version
+
+    def events_since(self, version):
+        """(current version, events after `version` or None if some were dropped)"""
+        data, current = self._snapshot()
+        return current, events_after(data['events'], version, current)
+
+    def wait(self, version, timeout):
+        """Block until the version moves past `version` or timeout; return it"""
+        with self._condition:
+            self._condition.wait_for(lambda: self.version() > version, timeout)
+        return self.version()
+
+    def _wake_local(self, version):
+        with self._condition:
+            self._condition.notify_all()
+        if self.on_change:
+            self.on_change(version)
+
+    def _notify_others(self):
+        for name in os.listdir(self.notify_dir):
+            path = os.path.join(self.notify_dir, name)
+            if path == self._socket_path:
+                continue
+            try:
+                self._sender.sendto(b'.', path)
+            except BlockingIOError:
+                pass  # its queue is full of wakeups already
+            except (ConnectionRefusedError, FileNotFoundError):
+                try:
+                    os.unlink(path)  # process has gone
+                except OSError:
+                    pass
+            except OSError:
+                pass
+
+    def _listen(self):
+        while True:
+            try:
+                self._receiver.recv(16)
+            except OSError:
+                return
+            if self._closed:
+                return
+            self._wake_local(self.version())
+
+    def close(self):
+        """Stop listening for other processes and remove this process's socket"""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._sender.sendto(b'', self._socket_path)  # unblock the listener
+        except OSError:
+            pass
+        self._listener.join(1)
+        self._receiver.close()
+        self._sender.close()
+        try:
+            os.unlink(self._socket_path)
+        except OSError:
+            pass
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Maintenance commands for the local daily_logs directory.
+Run from the directory the server runs in (where daily_logs/ lives).
+
+Usage:
+    nutrition-logs migrate               # Convert legacy <date>.json logs to JSON lines
+    nutrition-logs compact [DATE ...]    # Fold delete/patch records back into the log
+    nutrition-logs reindex               # Rebuild the entry-id index after hand edits
+    nutrition-logs to-sqlite DB          # Copy logs, notes and meals into a SQLite database
+    nutrition-logs from-sqlite DB        # Copy them back out into daily_logs/ and meals.json
+"""
+import os
+import sys
+import argparse
+
+from .data import day_logs, migrate_logs_to_jsonl, LOGS_DIR
+
+
+def cmd_migrate(args):
+    """Convert legacy JSON array logs to JSON lines"""
+    if not os.path.exists(LOGS_DIR):
+        print(f"No logs directory found: {LOGS_DIR}")
+        return 1
+
+    converted = migrate_logs_to_jsonl()
+    print(f"✓ Converted {converted} day logs to JSON lines")
+    return 0
+
+
+def cmd_compact(args):
+    """Rewrite day logs without their delete/patch records"""
+    dates = args.dates or day_logs.dates()
+    compacted = 0
+    for date_str in dates:
+        if day_logs.compact(date_str):
+            print(f"  ✓ Compacted {date_str}")
+            compacted += 1
+    print(f"\nChecked {len(dates)} days, compacted {compacted}")
+    return 0
+
+
+def cmd_reindex(args):
+    """Rebuild daily_logs/entry_index.jsonl from the logs"""
+    if not os.path.exists(LOGS_DIR):
+        print(f"No logs directory found: {LOGS_DIR}")
+        return 1
+
+    index = day_logs.reindex()
+    print(f"✓ Indexed {len(index)} entries")
+    return 0
+
+
+def cmd_to_sqlite(args):
+    """Copy the JSON tree into a SQLite database"""
+    from .sqlite_store import SqliteStore, copy_storage
+
+    store = SqliteStore(args.db)
+    days, notes_days = copy_storage(day_logs, store)
+    store.close()
+    print(f"✓ Copied {days} day logs and {notes_days} days of notes into {args.db}")
+    return 0
+
+
+def cmd_from_sqlite(args):
+    """Copy a SQLite database back out into the JSON tree"""
+    from .sqlite_store import SqliteStore, copy_storage
+
+    if not os.path.exists(args.db):
+        print(f"Database not found: {args.db}")
+        return 1
+
+    os.makedirs(LOGS_DIR, exist_ok=True)
+    store = SqliteStore(args.db)
+    days, notes_days = copy_storage(store, day_logs)
+    store.close()
+    print(f"✓ Copied {days} day logs and {notes_days} days of notes into {LOGS_DIR}/")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Maintain the nutrition-pad daily_logs directory',
+        epilog='Stop the server before migrating so no entries are written mid-conversion'
+    )
+
+    subparsers = parser.add_subparsers(dest='command', help='Command')
+
+    # migrate command
+    subparsers.add_parser('migrate', help='Convert legacy .json day logs to .jsonl')
+
+    # compact command
+    compact_parser = subparsers.add_parser('compact', help='Compact day logs')
+    compact_parser.add_argument('dates', nargs='*', metavar='YYYY-MM-DD',
+                                help='Days to compact (default: all)')
+
+    # reindex command
+    subparsers.add_parser('reindex', help='Rebuild the entry-id index')
+
+    # to-sqlite / from-sqlite commands
+    to_sqlite_parser = subparsers.add_parser('to-sqlite', help='Export the JSON tree to SQLite')
+    to_sqlite_parser.add_argument('db', help='SQLite database path (created if missing)')
+    from_sqlite_parser = subparsers.add_parser('from-sqlite', help='Import a SQLite database into the JSON tree')
+    from_sqlite_parser.add_argument('db', help='SQLite database path')
+
+    args = parser.parse_args()
+
+    if args.command == 'migrate':
+        return cmd_migrate(args)
+    elif args.command == 'compact':
+        return cmd_compact(args)
+    elif args.command == 'reindex':
+        return cmd_reindex(args)
+    elif args.command == 'to-sqlite':
+        return cmd_to_sqlite(args)
+    elif args.command == 'from-sqlite':
+        return cmd_from_sqlite(args)
+    else:
+        parser.print_help()
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
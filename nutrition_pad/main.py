@@ -1,194 +1,214 @@
-from flask import Flask, render_template_string, request, redirect, url_for, jsonify
+from flask import Flask, render_template, request, redirect, url_for, jsonify
 from datetime import datetime, date, timedelta
 import os
 import json
 import argparse
 import toml
+import sys
 import time
+import signal
 import threading
 
 # Import our modules
-from .polling import register_polling_routes, get_current_amount, mark_updated, get_polling_javascript
+from .polling import (
+    register_polling_routes, get_current_amount, mark_updated, entry_changes, get_polling_javascript,
+    set_live_state, close_live_state
+)
 from .amounts import render_amounts_tab, get_amounts_javascript
 from .data import (
     ensure_logs_directory, load_config, load_today_log, load_log_for_date, save_food_entry,
     calculate_daily_total, calculate_daily_item_count, calculate_nutrition_stats,
     validate_food_request, get_food_data, get_all_pads, CONFIG_FILE, LOGS_DIR,
-    calculate_time_since_last_ate, calculate_percentiles
+    calculate_time_since_last_ate, calculate_percentiles, invalidate_config_cache,
+    log_exists, save_log_for_date, delete_log_entry,
+    load_logs_between, locate_entries, load_notes_for_date, set_storage, get_day_totals,
+    resolve_entries, get_food_catalog, start_percentile_seeding, get_percentile_seed_progress,
+    flush_percentile_cache, compare_to_previous_day, log_version, notes_version,
+    get_config_signature
 )
+from .food_search import search_foods
 from .styles import register_styles_routes
 from .notes import register_notes_routes
 from .calories import register_calories_routes
 from .meals import register_meals_routes, load_meals, calculate_meal_totals
+from .page_templates import register_template, setup_templates, compile_templates
+from .assets import register_asset, register_asset_routes, build_assets
+from .conditional import conditional_response
+from .compression import register_compression
+from .page_cache import past_page
 
 app = Flask(__name__)
 app.secret_key = os.urandom(24)
+setup_templates(app)
 
 # Initialize data directory
 ensure_logs_directory()
 
 # --- HTML TEMPLATES ---
 
+INDEX_CSS = """
+/* App-specific styles that may change frequently */
+.header-icons {
+    display: flex;
+    justify-content: center;
+    gap: 15px;
+    margin-bottom: 10px;
+}
+.settings-cog, .notes-link, .amounts-link, .food-link, .meal-link {
+    font-size: 1.5em;
+    color: rgba(255, 255, 255, 0.7);
+    text-decoration: none;
+    transition: all 0.3s ease;
+    cursor: pointer;
+    /* Larger touch target for tablets */
+    padding: 10px;
+    min-width: 44px;
+    min-height: 44px;
+    display: flex;
+    align-items: center;
+    justify-content: center;
+}
+.settings-cog:hover {
+    color: #ffd93d;
+    transform: rotate(90deg) scale(1.1);
+    text-shadow: 0 0 10px rgba(255, 217, 61, 0.5);
+}
+.notes-link:hover {
+    color: #ff6b6b;
+    transform: scale(1.1);
+    text-shadow: 0 0 10px rgba(255, 107, 107, 0.5);
+}
+.amounts-link:hover {
+    color: #4ecdc4;
+    transform: scale(1.1);
+    text-shadow: 0 0 10px rgba(78, 205, 196, 0.5);
+}
+.food-link:hover {
+    transform: scale(1.2);
+    filter: drop-shadow(0 0 8px rgba(255, 100, 100, 0.6));
+}
+.food-btn.amount-food {
+    border-color: rgba(255, 255, 255, 0.2);
+}
+.food-btn.unit-food {
+    border-color: rgba(255, 255, 255, 0.3);
+}
+/* Square grid layout for food buttons - float for max compatibility */
+.food-grid {
+    overflow: hidden;
+    padding: 10px;
+}
+.food-btn {
+    float: left;
+    width: 30%;
+    margin: 1.5%;
+    padding-bottom: 30%;
+    position: relative;
+    border-radius: 12px;
+    cursor: pointer;
+    border: 2px solid rgba(255, 255, 255, 0.2);
+    overflow: hidden;
+    -webkit-box-sizing: border-box;
+    box-sizing: border-box;
+}
+.food-btn-inner {
+    position: absolute;
+    top: 0;
+    left: 0;
+    right: 0;
+    bottom: 0;
+    display: -webkit-box;
+    display: -webkit-flex;
+    display: flex;
+    -webkit-box-orient: vertical;
+    -webkit-flex-direction: column;
+    flex-direction: column;
+    -webkit-box-align: center;
+    -webkit-align-items: center;
+    align-items: center;
+    -webkit-box-pack: center;
+    -webkit-justify-content: center;
+    justify-content: center;
+    padding: 10px;
+    text-align: center;
+}
+.food-btn:hover {
+    transform: scale(1.05);
+    box-shadow: 0 5px 20px rgba(0, 0, 0, 0.3);
+}
+.food-btn:active {
+    transform: scale(0.95);
+}
+.food-btn .food-name {
+    font-size: 2em;
+    font-weight: 600;
+    color: white;
+    text-shadow: 0 1px 3px rgba(0, 0, 0, 0.5);
+    line-height: 1.2;
+    word-break: break-word;
+    max-height: 3.6em;
+    overflow: hidden;
+}
+.food-btn .food-type-indicator {
+    position: absolute;
+    top: 8px;
+    right: 8px;
+    font-size: 1.4em;
+    padding: 4px 8px;
+    border-radius: 5px;
+    background: rgba(0, 0, 0, 0.5);
+    color: white;
+    line-height: 1;
+    max-width: 80px;
+    overflow: hidden;
+    text-overflow: ellipsis;
+    white-space: nowrap;
+}
+.food-btn .food-calories {
+    display: none;
+}
+@media (max-width: 480px) {
+    .food-btn .food-name {
+        font-size: 1.8em;
+    }
+    .food-btn .food-type-indicator {
+        font-size: 1.3em;
+    }
+}
+@media (min-width: 768px) {
+    .food-btn {
+        width: 22%;
+        padding-bottom: 22%;
+    }
+    .food-btn .food-name {
+        font-size: 1.6em;
+    }
+    .food-btn .food-type-indicator {
+        font-size: 1.2em;
+    }
+}
+@media (max-width: 768px) {
+    .header-icons {
+        top: 15px;
+        right: 15px;
+    }
+    .settings-cog, .notes-link, .amounts-link, .food-link, .meal-link {
+        font-size: 1.3em;
+    }
+}
+"""
+register_asset('index.css', INDEX_CSS)
+
 HTML_INDEX = """
 <!DOCTYPE html>
 <html>
 <head>
     <title>Food Pads</title>
     <meta name="viewport" content="width=device-width, initial-scale=1">
-    <link rel="stylesheet" href="/static/base.css">
+    <link rel="stylesheet" href="{{ asset_url('base.css') }}">
     <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css">
-    <style>
-        /* App-specific styles that may change frequently */
-        .header-icons {
-            display: flex;
-            justify-content: center;
-            gap: 15px;
-            margin-bottom: 10px;
-        }
-        .settings-cog, .notes-link, .amounts-link, .food-link, .meal-link {
-            font-size: 1.5em;
-            color: rgba(255, 255, 255, 0.7);
-            text-decoration: none;
-            transition: all 0.3s ease;
-            cursor: pointer;
-            /* Larger touch target for tablets */
-            padding: 10px;
-            min-width: 44px;
-            min-height: 44px;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-        }
-        .settings-cog:hover {
-            color: #ffd93d;
-            transform: rotate(90deg) scale(1.1);
-            text-shadow: 0 0 10px rgba(255, 217, 61, 0.5);
-        }
-        .notes-link:hover {
-            color: #ff6b6b;
-            transform: scale(1.1);
-            text-shadow: 0 0 10px rgba(255, 107, 107, 0.5);
-        }
-        .amounts-link:hover {
-            color: #4ecdc4;
-            transform: scale(1.1);
-            text-shadow: 0 0 10px rgba(78, 205, 196, 0.5);
-        }
-        .food-link:hover {
-            transform: scale(1.2);
-            filter: drop-shadow(0 0 8px rgba(255, 100, 100, 0.6));
-        }
-        .food-btn.amount-food {
-            border-color: rgba(255, 255, 255, 0.2);
-        }
-        .food-btn.unit-food {
-            border-color: rgba(255, 255, 255, 0.3);
-        }
-        /* Square grid layout for food buttons - float for max compatibility */
-        .food-grid {
-            overflow: hidden;
-            padding: 10px;
-        }
-        .food-btn {
-            float: left;
-            width: 30%;
-            margin: 1.5%;
-            padding-bottom: 30%;
-            position: relative;
-            border-radius: 12px;
-            cursor: pointer;
-            border: 2px solid rgba(255, 255, 255, 0.2);
-            overflow: hidden;
-            -webkit-box-sizing: border-box;
-            box-sizing: border-box;
-        }
-        .food-btn-inner {
-            position: absolute;
-            top: 0;
-            left: 0;
-            right: 0;
-            bottom: 0;
-            display: -webkit-box;
-            display: -webkit-flex;
-            display: flex;
-            -webkit-box-orient: vertical;
-            -webkit-flex-direction: column;
-            flex-direction: column;
-            -webkit-box-align: center;
-            -webkit-align-items: center;
-            align-items: center;
-            -webkit-box-pack: center;
-            -webkit-justify-content: center;
-            justify-content: center;
-            padding: 10px;
-            text-align: center;
-        }
-        .food-btn:hover {
-            transform: scale(1.05);
-            box-shadow: 0 5px 20px rgba(0, 0, 0, 0.3);
-        }
-        .food-btn:active {
-            transform: scale(0.95);
-        }
-        .food-btn .food-name {
-            font-size: 2em;
-            font-weight: 600;
-            color: white;
-            text-shadow: 0 1px 3px rgba(0, 0, 0, 0.5);
-            line-height: 1.2;
-            word-break: break-word;
-            max-height: 3.6em;
-            overflow: hidden;
-        }
-        .food-btn .food-type-indicator {
-            position: absolute;
-            top: 8px;
-            right: 8px;
-            font-size: 1.4em;
-            padding: 4px 8px;
-            border-radius: 5px;
-            background: rgba(0, 0, 0, 0.5);
-            color: white;
-            line-height: 1;
-            max-width: 80px;
-            overflow: hidden;
-            text-overflow: ellipsis;
-            white-space: nowrap;
-        }
-        .food-btn .food-calories {
-            display: none;
-        }
-        @media (max-width: 480px) {
-            .food-btn .food-name {
-                font-size: 1.8em;
-            }
-            .food-btn .food-type-indicator {
-                font-size: 1.3em;
-            }
-        }
-        @media (min-width: 768px) {
-            .food-btn {
-                width: 22%;
-                padding-bottom: 22%;
-            }
-            .food-btn .food-name {
-                font-size: 1.6em;
-            }
-            .food-btn .food-type-indicator {
-                font-size: 1.2em;
-            }
-        }
-        @media (max-width: 768px) {
-            .header-icons {
-                top: 15px;
-                right: 15px;
-            }
-            .settings-cog, .notes-link, .amounts-link, .food-link, .meal-link {
-                font-size: 1.3em;
-            }
-        }
-    </style>
-    <script src="/static/polling.js"></script>
+    <link rel="stylesheet" href="{{ asset_url('index.css') }}">
+    <script src="{{ asset_url('polling.js') }}"></script>
     <script>
         // Generate consistent color from string
         function hashColor(str) {
@@ -351,6 +371,10 @@ HTML_INDEX = """
                 nonce: nonce
             }));
         }
+        // Food log changes only move the header figures here (data-stat)
+        function applyLogChanges(changes) {
+            return true;
+        }
         function showTodayLog() {
             window.location.href = '/today';
         }
@@ -386,8 +410,8 @@ HTML_INDEX = """
         </div>
         <h1>Food Pads</h1>
         <div class="current-amount">{{ current_amount }}g</div>
-        <div class="cal-per-protein">{{ avg_ratio }} kcal/g protein</div>
-        <div class="item-count">{{ item_count }} items logged today</div>
+        <div class="cal-per-protein" data-stat="avg_ratio" data-suffix=" kcal/g protein">{{ avg_ratio }} kcal/g protein</div>
+        <div class="item-count" data-stat="item_count" data-suffix=" items logged today">{{ item_count }} items logged today</div>
     </div>
     <div id="meal-mode-indicator" style="display:none; text-align:center; padding:8px; background:rgba(78,205,196,0.15); border-bottom:2px solid rgba(78,205,196,0.4); color:#4ecdc4; font-weight:600;">
         Building Meal &mdash; click foods to add
@@ -483,6 +507,80 @@ HTML_INDEX = """
 </body>
 </html>
 """
+register_template('index.html', HTML_INDEX)
+
+TODAY_CSS = """
+.header-icons {
+    display: flex;
+    justify-content: center;
+    gap: 15px;
+    margin-bottom: 10px;
+}
+.settings-cog, .notes-link, .food-link, .meal-link, .amounts-link {
+    font-size: 1.5em;
+    color: rgba(255, 255, 255, 0.7);
+    text-decoration: none;
+    transition: all 0.3s ease;
+    cursor: pointer;
+    padding: 10px;
+    min-width: 44px;
+    min-height: 44px;
+    display: flex;
+    align-items: center;
+    justify-content: center;
+}
+.settings-cog:hover {
+    color: #ffd93d;
+    transform: rotate(90deg) scale(1.1);
+    text-shadow: 0 0 10px rgba(255, 217, 61, 0.5);
+}
+.notes-link:hover {
+    color: #ff6b6b;
+    transform: scale(1.1);
+    text-shadow: 0 0 10px rgba(255, 107, 107, 0.5);
+}
+.food-link:hover {
+    transform: scale(1.2);
+    filter: drop-shadow(0 0 8px rgba(255, 100, 100, 0.6));
+}
+.meal-link:hover {
+    color: #4ecdc4;
+    transform: scale(1.1);
+    text-shadow: 0 0 10px rgba(78, 205, 196, 0.5);
+}
+.meal-link.active {
+    color: #4ecdc4;
+}
+.log-item {
+    position: relative;
+    padding-right: 50px;
+}
+.log-item-delete {
+    position: absolute;
+    top: 50%;
+    right: 15px;
+    transform: translateY(-50%);
+    color: #ff6b6b;
+    cursor: pointer;
+    font-size: 1.8em;
+    padding: 10px;
+    line-height: 1;
+    opacity: 0.7;
+}
+.log-item-delete:hover {
+    opacity: 1;
+}
+@media (max-width: 768px) {
+    .header-icons {
+        top: 15px;
+        right: 15px;
+    }
+    .settings-cog, .notes-link, .amounts-link, .food-link, .meal-link {
+        font-size: 1.3em;
+    }
+}
+"""
+register_asset('today.css', TODAY_CSS)
 
 HTML_TODAY = """
 <!DOCTYPE html>
@@ -490,123 +588,105 @@ HTML_TODAY = """
 <head>
     <title>Today's Log</title>
     <meta name="viewport" content="width=device-width, initial-scale=1">
-    <link rel="stylesheet" href="/static/base.css">
+    <link rel="stylesheet" href="{{ asset_url('base.css') }}">
     <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css">
-    <style>
-        .header-icons {
-            display: flex;
-            justify-content: center;
-            gap: 15px;
-            margin-bottom: 10px;
-        }
-        .settings-cog, .notes-link, .food-link, .meal-link, .amounts-link {
-            font-size: 1.5em;
-            color: rgba(255, 255, 255, 0.7);
-            text-decoration: none;
-            transition: all 0.3s ease;
-            cursor: pointer;
-            padding: 10px;
-            min-width: 44px;
-            min-height: 44px;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-        }
-        .settings-cog:hover {
-            color: #ffd93d;
-            transform: rotate(90deg) scale(1.1);
-            text-shadow: 0 0 10px rgba(255, 217, 61, 0.5);
-        }
-        .notes-link:hover {
-            color: #ff6b6b;
-            transform: scale(1.1);
-            text-shadow: 0 0 10px rgba(255, 107, 107, 0.5);
-        }
-        .food-link:hover {
-            transform: scale(1.2);
-            filter: drop-shadow(0 0 8px rgba(255, 100, 100, 0.6));
-        }
-        .meal-link:hover {
-            color: #4ecdc4;
-            transform: scale(1.1);
-            text-shadow: 0 0 10px rgba(78, 205, 196, 0.5);
-        }
-        .meal-link.active {
-            color: #4ecdc4;
-        }
-        .log-item {
-            position: relative;
-            padding-right: 50px;
-        }
-        .log-item-delete {
-            position: absolute;
-            top: 50%;
-            right: 15px;
-            transform: translateY(-50%);
-            color: #ff6b6b;
-            cursor: pointer;
-            font-size: 1.8em;
-            padding: 10px;
-            line-height: 1;
-            opacity: 0.7;
-        }
-        .log-item-delete:hover {
-            opacity: 1;
-        }
-        @media (max-width: 768px) {
-            .header-icons {
-                top: 15px;
-                right: 15px;
-            }
-            .settings-cog, .notes-link, .amounts-link, .food-link, .meal-link {
-                font-size: 1.3em;
-            }
-        }
-    </style>
-    <script src="/static/polling.js"></script>
+    <link rel="stylesheet" href="{{ asset_url('today.css') }}">
+    <script src="{{ asset_url('polling.js') }}"></script>
     <script>
         setDebugMode({{ 'true' if js_debug else 'false' }});
-        function deleteEntry(index) {
+        var PAGE_DATE = '{{ current_date }}';
+        var IS_TODAY = {{ 'true' if is_today else 'false' }};
+        function deleteEntry(entryId, index) {
             var xhr = new XMLHttpRequest();
             xhr.open('POST', '/delete-entry', true);
             xhr.setRequestHeader('Content-Type', 'application/json');
             xhr.onreadystatechange = function() {
                 if (xhr.readyState === 4) {
                     if (xhr.status === 200) {
-                        window.location.reload();
+                        if (entryId) {
+                            removeLogItem(entryId);
+                        } else {
+                            window.location.reload();
+                        }
                     } else {
                         alert('Error deleting entry');
                     }
                 }
             };
-            xhr.send(JSON.stringify({ index: index }));
+            xhr.send(JSON.stringify(entryId ? { id: entryId } : { index: index, date: PAGE_DATE }));
         }
-        // Simplified polling for today page - just refresh on updates
-        function simplePoll() {
-            if (isPolling) return;
-            isPolling = true;
-            var xhr = new XMLHttpRequest();
-            xhr.open('GET', '/poll-updates?since=' + lastUpdate, true);
-            xhr.onreadystatechange = function() {
-                if (xhr.readyState === 4) {
-                    isPolling = false;
-                    if (xhr.status === 200) {
-                        try {
-                            var data = JSON.parse(xhr.responseText);
-                            if (data.updated && data.timestamp > lastUpdate) {
-                                lastUpdate = data.timestamp;
-                                localStorage.setItem('lastUpdate', lastUpdate.toString());
-                                setTimeout(function() {
-                                    window.location.reload();
-                                }, 1000);
-                                return;
-                            }
-                        } catch (e) {}
-                    }
-                    setTimeout(simplePoll, 30000);
+        function removeLogItem(entryId) {
+            var row = document.querySelector('.log-item[data-entry-id="' + entryId + '"]');
+            if (row) {
+                row.parentNode.removeChild(row);
+            }
+            var container = document.querySelector('.log-container');
+            if (!container.querySelector('.log-item') && !container.querySelector('.no-entries')) {
+                var empty = document.createElement('div');
+                empty.className = 'no-entries';
+                empty.textContent = 'No foods logged today';
+                container.appendChild(empty);
+            }
+        }
+        function addLogItem(entry) {
+            if (document.querySelector('.log-item[data-entry-id="' + entry.id + '"]')) {
+                return;
+            }
+            var container = document.querySelector('.log-container');
+            var empty = container.querySelector('.no-entries');
+            if (empty) {
+                container.removeChild(empty);
+            }
+            var row = document.createElement('div');
+            row.className = 'log-item';
+            row.setAttribute('data-entry-id', entry.id);
+            row.setAttribute('data-timestamp', entry.timestamp || '');
+            row.innerHTML = '<span class="log-item-delete">&times;</span>' +
+                '<div class="log-item-header"><div class="log-item-name"></div>' +
+                '<div style="display: flex; align-items: center; gap: 15px;">' +
+                '<div class="log-item-amount"></div><div class="log-item-cal"></div></div></div>' +
+                '<div class="log-item-time"></div>';
+            row.querySelector('.log-item-delete').onclick = function() { deleteEntry(entry.id); };
+            row.querySelector('.log-item-name').textContent = entry.name;
+            row.querySelector('.log-item-amount').textContent = entry.amount_display;
+            row.querySelector('.log-item-cal').textContent = entry.protein + 'g protein';
+            row.querySelector('.log-item-time').textContent = entry.time;
+            // Keep rows in time order: a backdated or resolved entry goes
+            // before the first row logged after it, not at the end.
+            var rows = container.querySelectorAll('.log-item');
+            var later = null;
+            for (var i = 0; i < rows.length && entry.timestamp; i++) {
+                var ts = rows[i].getAttribute('data-timestamp');
+                if (ts && ts > entry.timestamp) {
+                    later = rows[i];
+                    break;
                 }
-            };
-            xhr.send();
+            }
+            if (later) {
+                container.insertBefore(row, later);
+            } else {
+                container.appendChild(row);
+            }
+        }
+        // Patch this day's entries in from a poll change set (see polling.js).
+        // The stats are today's, so another day's totals need a reload.
+        function applyLogChanges(changes) {
+            for (var i = 0; i < changes.entries.length; i++) {
+                var day = changes.entries[i];
+                if (day.date !== PAGE_DATE) {
+                    continue;
+                }
+                if (!IS_TODAY) {
+                    return false;
+                }
+                for (var j = 0; j < day.added.length; j++) {
+                    addLogItem(day.added[j]);
+                }
+                for (var k = 0; k < day.removed.length; k++) {
+                    removeLogItem(day.removed[k]);
+                }
+            }
+            return true;
         }
         // Check if meal mode is active and show indicator
         function checkMealMode() {
@@ -620,7 +700,7 @@ HTML_TODAY = """
 
         window.onload = function() {
             checkMealMode();
-            simplePoll();
+            startLongPolling();
         };
     </script>
 </head>
@@ -642,18 +722,24 @@ HTML_TODAY = """
             <span style="width: 44px;"></span>
             {% endif %}
         </div>
+        {% if is_today %}
+        <div class="total-protein" data-stat="total_protein" data-suffix="g protein">{{ total_protein }}g protein</div>
+        <div class="cal-per-protein" data-stat="avg_ratio" data-suffix=" kcal/g protein">{{ avg_ratio }} kcal/g protein</div>
+        <div class="item-count" data-stat="item_count" data-suffix=" items logged">{{ item_count }} items logged</div>
+        {% else %}
         <div class="total-protein">{{ total_protein }}g protein</div>
         <div class="cal-per-protein">{{ avg_ratio }} kcal/g protein</div>
         <div class="item-count">{{ item_count }} items logged</div>
+        {% endif %}
     </div>
     <div id="meal-active-indicator" style="display:none; text-align:center; padding:10px; background:rgba(78,205,196,0.15); border-bottom:2px solid rgba(78,205,196,0.4); color:#4ecdc4; font-weight:600;">
         <a href="/meals/build" style="color:#4ecdc4; text-decoration:none;">Meal active &mdash; tap to view</a>
     </div>
     <div class="log-container">
         {% if log_entries %}
-            {% for entry in log_entries %}
-            <div class="log-item">
-                <span class="log-item-delete" onclick="deleteEntry({{ loop.index0 }})">&times;</span>
+            {% for index, entry in log_entries %}
+            <div class="log-item" data-entry-id="{{ entry.id or '' }}" data-timestamp="{{ entry.timestamp or '' }}">
+                <span class="log-item-delete" onclick="deleteEntry('{{ entry.id or '' }}', {{ index }})">&times;</span>
                 <div class="log-item-header">
                     <div class="log-item-name">{{ entry.name }}</div>
                     <div style="display: flex; align-items: center; gap: 15px;">
@@ -676,6 +762,108 @@ HTML_TODAY = """
 </body>
 </html>
 """
+register_template('today.html', HTML_TODAY)
+
+NUTRITION_CSS = """
+.header-icons {
+    display: flex;
+    justify-content: center;
+    gap: 15px;
+    margin-bottom: 10px;
+}
+.settings-cog, .food-link, .notes-link, .meal-link, .amounts-link {
+    font-size: 1.5em;
+    color: rgba(255, 255, 255, 0.7);
+    text-decoration: none;
+    transition: all 0.3s ease;
+    cursor: pointer;
+    padding: 10px;
+    min-width: 44px;
+    min-height: 44px;
+    display: flex;
+    align-items: center;
+    justify-content: center;
+}
+.settings-cog:hover {
+    color: #ffd93d;
+    transform: rotate(90deg) scale(1.1);
+    text-shadow: 0 0 10px rgba(255, 217, 61, 0.5);
+}
+.food-link:hover {
+    transform: scale(1.2);
+    filter: drop-shadow(0 0 8px rgba(255, 100, 100, 0.6));
+}
+.notes-link:hover {
+    color: #ff6b6b;
+    transform: scale(1.1);
+    text-shadow: 0 0 10px rgba(255, 107, 107, 0.5);
+}
+.nav-links {
+    display: flex;
+    justify-content: center;
+    gap: 15px;
+    margin: 20px auto;
+    max-width: 600px;
+    padding: 0 20px;
+}
+.nav-link {
+    flex: 1;
+    padding: 15px 20px;
+    background: rgba(255, 255, 255, 0.1);
+    border: 1px solid rgba(255, 255, 255, 0.2);
+    border-radius: 15px;
+    color: white;
+    text-decoration: none;
+    text-align: center;
+    font-weight: 600;
+    transition: all 0.3s ease;
+}
+.nav-link:hover {
+    background: rgba(255, 217, 61, 0.2);
+    border-color: #ffd93d;
+    transform: translateY(-2px);
+}
+.nav-link.notes {
+    background: rgba(255, 107, 107, 0.1);
+    border-color: rgba(255, 107, 107, 0.3);
+}
+.nav-link.notes:hover {
+    background: rgba(255, 107, 107, 0.2);
+    border-color: #ff6b6b;
+}
+.nav-link.resolve {
+    background: rgba(78, 205, 196, 0.1);
+    border-color: rgba(78, 205, 196, 0.3);
+}
+.nav-link.resolve:hover {
+    background: rgba(78, 205, 196, 0.2);
+    border-color: #4ecdc4;
+}
+.nav-link.timeline {
+    background: rgba(255, 107, 107, 0.1);
+    border-color: rgba(255, 107, 107, 0.3);
+}
+.nav-link.timeline:hover {
+    background: rgba(255, 107, 107, 0.2);
+    border-color: #ff6b6b;
+}
+.stat-pct {
+    font-size: 0.75em;
+    color: rgba(255, 255, 255, 0.45);
+    margin-top: 2px;
+}
+@media (max-width: 768px) {
+    .settings-cog {
+        font-size: 1.3em;
+        top: 15px;
+        right: 15px;
+    }
+    .nav-links {
+        flex-direction: column;
+    }
+}
+"""
+register_asset('nutrition.css', NUTRITION_CSS)
 
 HTML_NUTRITION = """
 <!DOCTYPE html>
@@ -683,108 +871,10 @@ HTML_NUTRITION = """
 <head>
     <title>Nutrition Dashboard</title>
     <meta name="viewport" content="width=device-width, initial-scale=1">
-    <link rel="stylesheet" href="/static/base.css">
+    <link rel="stylesheet" href="{{ asset_url('base.css') }}">
     <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css">
-    <style>
-        .header-icons {
-            display: flex;
-            justify-content: center;
-            gap: 15px;
-            margin-bottom: 10px;
-        }
-        .settings-cog, .food-link, .notes-link, .meal-link, .amounts-link {
-            font-size: 1.5em;
-            color: rgba(255, 255, 255, 0.7);
-            text-decoration: none;
-            transition: all 0.3s ease;
-            cursor: pointer;
-            padding: 10px;
-            min-width: 44px;
-            min-height: 44px;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-        }
-        .settings-cog:hover {
-            color: #ffd93d;
-            transform: rotate(90deg) scale(1.1);
-            text-shadow: 0 0 10px rgba(255, 217, 61, 0.5);
-        }
-        .food-link:hover {
-            transform: scale(1.2);
-            filter: drop-shadow(0 0 8px rgba(255, 100, 100, 0.6));
-        }
-        .notes-link:hover {
-            color: #ff6b6b;
-            transform: scale(1.1);
-            text-shadow: 0 0 10px rgba(255, 107, 107, 0.5);
-        }
-        .nav-links {
-            display: flex;
-            justify-content: center;
-            gap: 15px;
-            margin: 20px auto;
-            max-width: 600px;
-            padding: 0 20px;
-        }
-        .nav-link {
-            flex: 1;
-            padding: 15px 20px;
-            background: rgba(255, 255, 255, 0.1);
-            border: 1px solid rgba(255, 255, 255, 0.2);
-            border-radius: 15px;
-            color: white;
-            text-decoration: none;
-            text-align: center;
-            font-weight: 600;
-            transition: all 0.3s ease;
-        }
-        .nav-link:hover {
-            background: rgba(255, 217, 61, 0.2);
-            border-color: #ffd93d;
-            transform: translateY(-2px);
-        }
-        .nav-link.notes {
-            background: rgba(255, 107, 107, 0.1);
-            border-color: rgba(255, 107, 107, 0.3);
-        }
-        .nav-link.notes:hover {
-            background: rgba(255, 107, 107, 0.2);
-            border-color: #ff6b6b;
-        }
-        .nav-link.resolve {
-            background: rgba(78, 205, 196, 0.1);
-            border-color: rgba(78, 205, 196, 0.3);
-        }
-        .nav-link.resolve:hover {
-            background: rgba(78, 205, 196, 0.2);
-            border-color: #4ecdc4;
-        }
-        .nav-link.timeline {
-            background: rgba(255, 107, 107, 0.1);
-            border-color: rgba(255, 107, 107, 0.3);
-        }
-        .nav-link.timeline:hover {
-            background: rgba(255, 107, 107, 0.2);
-            border-color: #ff6b6b;
-        }
-        .stat-pct {
-            font-size: 0.75em;
-            color: rgba(255, 255, 255, 0.45);
-            margin-top: 2px;
-        }
-        @media (max-width: 768px) {
-            .settings-cog {
-                font-size: 1.3em;
-                top: 15px;
-                right: 15px;
-            }
-            .nav-links {
-                flex-direction: column;
-            }
-        }
-    </style>
-    <script src="/static/polling.js"></script>
+    <link rel="stylesheet" href="{{ asset_url('nutrition.css') }}">
+    <script src="{{ asset_url('polling.js') }}"></script>
     <script>
         setDebugMode({{ 'true' if js_debug else 'false' }});
         var pageLoadTime = new Date(); // Client time when page loaded
@@ -826,6 +916,24 @@ HTML_NUTRITION = """
                 if (ind) ind.style.display = 'block';
             }
         }
+        // Food log changes move today's figures (data-stat, see polling.js);
+        // another day's page reloads if its own log changed
+        function applyLogChanges(changes) {
+            if (!{{ 'true' if is_today else 'false' }}) {
+                for (var i = 0; i < changes.entries.length; i++) {
+                    if (changes.entries[i].date === '{{ current_date }}') {
+                        return false;
+                    }
+                }
+                return true;
+            }
+            var timeEl = document.getElementById('time-since-ate');
+            if (timeEl) {
+                timeEl.setAttribute('data-last-meal-timestamp', changes.stats.last_eaten || '');
+                updateTimeSinceAte();
+            }
+            return true;
+        }
         window.onload = function() {
             startLongPolling();
             updateTimeSinceAte();
@@ -859,19 +967,19 @@ HTML_NUTRITION = """
     </div>
     <div class="nutrition-stats">
         <div class="stat-cards">
+            {# Today's figures carry data-stat so polling.js can patch them in place #}
+            {% macro stat(name) %}{% if is_today %} data-stat="{{ name }}"{% endif %}{% endmacro %}
             <div class="stat-card">
-                <div class="stat-value calories">{{ total_calories }} <span class="stat-rate">({{ cal_per_hour }}/h)</span></div>
+                <div class="stat-value calories"><span{{ stat('total_calories') }}>{{ total_calories }}</span> <span class="stat-rate">(<span{{ stat('cal_per_hour') }} data-suffix="/h">{{ cal_per_hour }}/h</span>)</span></div>
                 <div class="stat-label">Calories</div>
-                {% if cal_delta and cal_delta != 0 %}
-                <div style="font-size:0.85em;font-weight:600;color:{{ '#4ecdc4' if cal_delta < 0 else '#ff6b6b' }};">{{ '%+d'|format(cal_delta) }}</div>
-                {% endif %}
+                <div{{ stat('cal_delta') }} data-signed="0" style="font-size:0.85em;font-weight:600;{% if cal_delta %}color:{{ '#4ecdc4' if cal_delta < 0 else '#ff6b6b' }};{% else %}display:none;{% endif %}">{{ '%+d'|format(cal_delta or 0) }}</div>
             </div>
             <div class="stat-card">
-                <div class="stat-value protein">{{ total_protein }}g <span class="stat-rate">({{ protein_per_hour }}g/h)</span></div>
+                <div class="stat-value protein"><span{{ stat('total_protein') }} data-suffix="g">{{ total_protein }}g</span> <span class="stat-rate">(<span{{ stat('protein_per_hour') }} data-suffix="g/h">{{ protein_per_hour }}g/h</span>)</span></div>
                 <div class="stat-label">Protein</div>
             </div>
             <div class="stat-card">
-                <div class="stat-value fiber">{{ total_fiber }}g</div>
+                <div class="stat-value fiber"{{ stat('total_fiber') }} data-suffix="g">{{ total_fiber }}g</div>
                 <div class="stat-label">Fiber</div>
             </div>
             <div class="stat-card">
@@ -891,20 +999,16 @@ HTML_NUTRITION = """
                 <div class="stat-label">Since Last Ate</div>
             </div>
             <div class="stat-card">
-                <div class="stat-value ratio">{{ avg_ratio }}</div>
-                {% if percentiles and percentiles.kcal_per_protein is not none %}<div class="stat-pct">{{ percentiles.kcal_per_protein }}%</div>{% endif %}
+                <div class="stat-value ratio"{{ stat('avg_ratio') }}>{{ avg_ratio }}</div>
+                <div class="stat-pct"{{ stat('pct_kcal_per_protein') }} data-suffix="%"{% if not percentiles or percentiles.kcal_per_protein is none %} style="display:none;"{% endif %}>{{ percentiles.kcal_per_protein if percentiles else '' }}%</div>
                 <div class="stat-label">kcal/g Protein</div>
-                {% if cpp_delta is not none %}
-                <div style="font-size:0.85em;font-weight:600;color:{{ '#4ecdc4' if cpp_delta < 0 else '#ff6b6b' }};">{{ '%+.1f'|format(cpp_delta) }}</div>
-                {% endif %}
+                <div{{ stat('cpp_delta') }} data-signed="1" style="font-size:0.85em;font-weight:600;{% if cpp_delta is not none %}color:{{ '#4ecdc4' if cpp_delta < 0 else '#ff6b6b' }};{% else %}display:none;{% endif %}">{{ '%+.1f'|format(cpp_delta or 0) }}</div>
             </div>
             <div class="stat-card">
-                <div class="stat-value fiber-ratio">{{ kcal_per_fiber }}</div>
-                {% if percentiles and percentiles.kcal_per_fiber is not none %}<div class="stat-pct">{{ percentiles.kcal_per_fiber }}%</div>{% endif %}
+                <div class="stat-value fiber-ratio"{{ stat('kcal_per_fiber') }}>{{ kcal_per_fiber }}</div>
+                <div class="stat-pct"{{ stat('pct_kcal_per_fiber') }} data-suffix="%"{% if not percentiles or percentiles.kcal_per_fiber is none %} style="display:none;"{% endif %}>{{ percentiles.kcal_per_fiber if percentiles else '' }}%</div>
                 <div class="stat-label">kcal/g Fiber</div>
-                {% if cpf_delta is not none %}
-                <div style="font-size:0.85em;font-weight:600;color:{{ '#4ecdc4' if cpf_delta < 0 else '#ff6b6b' }};">{{ '%+.1f'|format(cpf_delta) }}</div>
-                {% endif %}
+                <div{{ stat('cpf_delta') }} data-signed="1" style="font-size:0.85em;font-weight:600;{% if cpf_delta is not none %}color:{{ '#4ecdc4' if cpf_delta < 0 else '#ff6b6b' }};{% else %}display:none;{% endif %}">{{ '%+.1f'|format(cpf_delta or 0) }}</div>
             </div>
         </div>
     </div>
@@ -916,6 +1020,220 @@ HTML_NUTRITION = """
 </body>
 </html>
 """
+register_template('nutrition.html', HTML_NUTRITION)
+
+FOOD_EDITOR_CSS = """
+.header-icons {
+    display: flex;
+    justify-content: center;
+    gap: 15px;
+    margin-bottom: 10px;
+}
+.settings-cog, .food-link, .notes-link, .meal-link, .amounts-link {
+    font-size: 1.5em;
+    color: rgba(255, 255, 255, 0.7);
+    text-decoration: none;
+    transition: all 0.3s ease;
+    cursor: pointer;
+    padding: 10px;
+    min-width: 44px;
+    min-height: 44px;
+    display: flex;
+    align-items: center;
+    justify-content: center;
+}
+.settings-cog:hover {
+    color: #ffd93d;
+    transform: rotate(90deg) scale(1.1);
+    text-shadow: 0 0 10px rgba(255, 217, 61, 0.5);
+}
+.food-link:hover {
+    transform: scale(1.2);
+    filter: drop-shadow(0 0 8px rgba(255, 100, 100, 0.6));
+}
+.notes-link:hover {
+    color: #ff6b6b;
+    transform: scale(1.1);
+    text-shadow: 0 0 10px rgba(255, 107, 107, 0.5);
+}
+.editor-container {
+    max-width: 1000px;
+    margin: 0 auto;
+    padding: 30px 20px;
+}
+.editor-header {
+    text-align: center;
+    margin-bottom: 30px;
+}
+.editor-header h2 {
+    color: #ffd93d;
+    font-size: 2em;
+    margin-bottom: 10px;
+}
+.editor-header p {
+    color: rgba(255, 255, 255, 0.7);
+    font-size: 1.1em;
+}
+.editor-form {
+    background: rgba(255, 255, 255, 0.05);
+    border-radius: 20px;
+    padding: 30px;
+    backdrop-filter: blur(20px);
+    border: 1px solid rgba(255, 255, 255, 0.1);
+}
+.editor-textarea {
+    width: 100%;
+    min-height: 600px;
+    background: rgba(0, 0, 0, 0.3);
+    border: 2px solid rgba(255, 255, 255, 0.2);
+    border-radius: 15px;
+    padding: 20px;
+    color: white;
+    font-family: 'Monaco', 'Menlo', 'Ubuntu Mono', monospace;
+    font-size: 14px;
+    line-height: 1.5;
+    resize: vertical;
+    outline: none;
+    tab-size: 2;
+}
+.editor-textarea:focus {
+    border-color: #00d4ff;
+    box-shadow: 0 0 0 3px rgba(0, 212, 255, 0.1);
+}
+.editor-buttons {
+    display: flex;
+    gap: 15px;
+    margin-top: 20px;
+    flex-wrap: wrap;
+}
+.editor-btn {
+    padding: 15px 30px;
+    border: none;
+    border-radius: 15px;
+    font-size: 1.1em;
+    font-weight: 600;
+    cursor: pointer;
+    transition: all 0.3s ease;
+    flex: 1;
+    min-width: 150px;
+}
+.save-btn {
+    background: linear-gradient(135deg, #4ecdc4, #00d4ff);
+    color: white;
+}
+.save-btn:hover {
+    transform: translateY(-2px);
+    box-shadow: 0 10px 30px rgba(78, 205, 196, 0.3);
+}
+.cancel-btn {
+    background: rgba(255, 255, 255, 0.1);
+    color: white;
+    border: 2px solid rgba(255, 255, 255, 0.2);
+}
+.cancel-btn:hover {
+    background: rgba(255, 107, 107, 0.2);
+    border-color: #ff6b6b;
+}
+.status-message {
+    margin-top: 20px;
+    padding: 15px;
+    border-radius: 10px;
+    font-weight: 600;
+    display: none;
+}
+.status-success {
+    background: rgba(78, 205, 196, 0.2);
+    border: 2px solid rgba(78, 205, 196, 0.5);
+    color: #4ecdc4;
+}
+.status-error {
+    background: rgba(255, 107, 107, 0.2);
+    border: 2px solid rgba(255, 107, 107, 0.5);
+    color: #ff6b6b;
+}
+.help-text {
+    margin-bottom: 20px;
+    padding: 20px;
+    background: rgba(255, 217, 61, 0.1);
+    border: 1px solid rgba(255, 217, 61, 0.3);
+    border-radius: 10px;
+    color: rgba(255, 255, 255, 0.9);
+    font-size: 0.95em;
+    line-height: 1.6;
+}
+@media (max-width: 768px) {
+    .editor-container {
+        padding: 20px 15px;
+    }
+    .editor-form {
+        padding: 20px;
+    }
+    .editor-textarea {
+        min-height: 400px;
+        font-size: 12px;
+    }
+    .editor-buttons {
+        flex-direction: column;
+    }
+}
+"""
+register_asset('food_editor.css', FOOD_EDITOR_CSS)
+
+FOOD_EDITOR_JS = """
+function saveFoods(event) {
+    event.preventDefault();
+    var content = document.getElementById('foodsContent').value;
+    var statusEl = document.getElementById('statusMessage');
+    var saveBtn = event.target.querySelector('.save-btn');
+    // Disable save button
+    saveBtn.disabled = true;
+    saveBtn.textContent = '💾 Saving...';
+    var xhr = new XMLHttpRequest();
+    xhr.open('POST', '/edit-foods', true);
+    xhr.setRequestHeader('Content-Type', 'application/json');
+    xhr.onreadystatechange = function() {
+        if (xhr.readyState === 4) {
+            saveBtn.disabled = false;
+            saveBtn.textContent = '💾 Save Changes';
+            if (xhr.status === 200) {
+                try {
+                    var response = JSON.parse(xhr.responseText);
+                    if (response.success) {
+                        showStatus('✅ Configuration saved! All devices will refresh automatically.', 'success');
+                        setTimeout(function() {
+                            window.location.href = '/nutrition';
+                        }, 2000);
+                    } else {
+                        showStatus('❌ Error: ' + (response.error || 'Failed to save'), 'error');
+                    }
+                } catch (e) {
+                    showStatus('❌ Error parsing response', 'error');
+                }
+            } else {
+                try {
+                    var response = JSON.parse(xhr.responseText);
+                    showStatus('❌ Error: ' + (response.error || 'Failed to save'), 'error');
+                } catch (e) {
+                    showStatus('❌ Server error: ' + xhr.status, 'error');
+                }
+            }
+        }
+    };
+    xhr.send(JSON.stringify({ content: content }));
+}
+function showStatus(message, type) {
+    var statusEl = document.getElementById('statusMessage');
+    statusEl.textContent = message;
+    statusEl.className = 'status-message status-' + type;
+    statusEl.style.display = 'block';
+    if (type === 'success') {
+        setTimeout(function() {
+            statusEl.style.display = 'none';
+        }, 3000);
+    }
+}
+"""
+register_asset('food_editor.js', FOOD_EDITOR_JS)
 
 HTML_FOOD_EDITOR = """
 <!DOCTYPE html>
@@ -923,163 +1241,9 @@ HTML_FOOD_EDITOR = """
 <head>
     <title>Edit Foods Configuration</title>
     <meta name="viewport" content="width=device-width, initial-scale=1">
-    <link rel="stylesheet" href="/static/base.css">
+    <link rel="stylesheet" href="{{ asset_url('base.css') }}">
     <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css">
-    <style>
-        .header-icons {
-            display: flex;
-            justify-content: center;
-            gap: 15px;
-            margin-bottom: 10px;
-        }
-        .settings-cog, .food-link, .notes-link, .meal-link, .amounts-link {
-            font-size: 1.5em;
-            color: rgba(255, 255, 255, 0.7);
-            text-decoration: none;
-            transition: all 0.3s ease;
-            cursor: pointer;
-            padding: 10px;
-            min-width: 44px;
-            min-height: 44px;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-        }
-        .settings-cog:hover {
-            color: #ffd93d;
-            transform: rotate(90deg) scale(1.1);
-            text-shadow: 0 0 10px rgba(255, 217, 61, 0.5);
-        }
-        .food-link:hover {
-            transform: scale(1.2);
-            filter: drop-shadow(0 0 8px rgba(255, 100, 100, 0.6));
-        }
-        .notes-link:hover {
-            color: #ff6b6b;
-            transform: scale(1.1);
-            text-shadow: 0 0 10px rgba(255, 107, 107, 0.5);
-        }
-        .editor-container {
-            max-width: 1000px;
-            margin: 0 auto;
-            padding: 30px 20px;
-        }
-        .editor-header {
-            text-align: center;
-            margin-bottom: 30px;
-        }
-        .editor-header h2 {
-            color: #ffd93d;
-            font-size: 2em;
-            margin-bottom: 10px;
-        }
-        .editor-header p {
-            color: rgba(255, 255, 255, 0.7);
-            font-size: 1.1em;
-        }
-        .editor-form {
-            background: rgba(255, 255, 255, 0.05);
-            border-radius: 20px;
-            padding: 30px;
-            backdrop-filter: blur(20px);
-            border: 1px solid rgba(255, 255, 255, 0.1);
-        }
-        .editor-textarea {
-            width: 100%;
-            min-height: 600px;
-            background: rgba(0, 0, 0, 0.3);
-            border: 2px solid rgba(255, 255, 255, 0.2);
-            border-radius: 15px;
-            padding: 20px;
-            color: white;
-            font-family: 'Monaco', 'Menlo', 'Ubuntu Mono', monospace;
-            font-size: 14px;
-            line-height: 1.5;
-            resize: vertical;
-            outline: none;
-            tab-size: 2;
-        }
-        .editor-textarea:focus {
-            border-color: #00d4ff;
-            box-shadow: 0 0 0 3px rgba(0, 212, 255, 0.1);
-        }
-        .editor-buttons {
-            display: flex;
-            gap: 15px;
-            margin-top: 20px;
-            flex-wrap: wrap;
-        }
-        .editor-btn {
-            padding: 15px 30px;
-            border: none;
-            border-radius: 15px;
-            font-size: 1.1em;
-            font-weight: 600;
-            cursor: pointer;
-            transition: all 0.3s ease;
-            flex: 1;
-            min-width: 150px;
-        }
-        .save-btn {
-            background: linear-gradient(135deg, #4ecdc4, #00d4ff);
-            color: white;
-        }
-        .save-btn:hover {
-            transform: translateY(-2px);
-            box-shadow: 0 10px 30px rgba(78, 205, 196, 0.3);
-        }
-        .cancel-btn {
-            background: rgba(255, 255, 255, 0.1);
-            color: white;
-            border: 2px solid rgba(255, 255, 255, 0.2);
-        }
-        .cancel-btn:hover {
-            background: rgba(255, 107, 107, 0.2);
-            border-color: #ff6b6b;
-        }
-        .status-message {
-            margin-top: 20px;
-            padding: 15px;
-            border-radius: 10px;
-            font-weight: 600;
-            display: none;
-        }
-        .status-success {
-            background: rgba(78, 205, 196, 0.2);
-            border: 2px solid rgba(78, 205, 196, 0.5);
-            color: #4ecdc4;
-        }
-        .status-error {
-            background: rgba(255, 107, 107, 0.2);
-            border: 2px solid rgba(255, 107, 107, 0.5);
-            color: #ff6b6b;
-        }
-        .help-text {
-            margin-bottom: 20px;
-            padding: 20px;
-            background: rgba(255, 217, 61, 0.1);
-            border: 1px solid rgba(255, 217, 61, 0.3);
-            border-radius: 10px;
-            color: rgba(255, 255, 255, 0.9);
-            font-size: 0.95em;
-            line-height: 1.6;
-        }
-        @media (max-width: 768px) {
-            .editor-container {
-                padding: 20px 15px;
-            }
-            .editor-form {
-                padding: 20px;
-            }
-            .editor-textarea {
-                min-height: 400px;
-                font-size: 12px;
-            }
-            .editor-buttons {
-                flex-direction: column;
-            }
-        }
-    </style>
+    <link rel="stylesheet" href="{{ asset_url('food_editor.css') }}">
 </head>
 <body>
     <div class="header">
@@ -1136,63 +1300,11 @@ HTML_FOOD_EDITOR = """
             </form>
         </div>
     </div>
-    <script>
-        function saveFoods(event) {
-            event.preventDefault();
-            var content = document.getElementById('foodsContent').value;
-            var statusEl = document.getElementById('statusMessage');
-            var saveBtn = event.target.querySelector('.save-btn');
-            // Disable save button
-            saveBtn.disabled = true;
-            saveBtn.textContent = '💾 Saving...';
-            var xhr = new XMLHttpRequest();
-            xhr.open('POST', '/edit-foods', true);
-            xhr.setRequestHeader('Content-Type', 'application/json');
-            xhr.onreadystatechange = function() {
-                if (xhr.readyState === 4) {
-                    saveBtn.disabled = false;
-                    saveBtn.textContent = '💾 Save Changes';
-                    if (xhr.status === 200) {
-                        try {
-                            var response = JSON.parse(xhr.responseText);
-                            if (response.success) {
-                                showStatus('✅ Configuration saved! All devices will refresh automatically.', 'success');
-                                setTimeout(function() {
-                                    window.location.href = '/nutrition';
-                                }, 2000);
-                            } else {
-                                showStatus('❌ Error: ' + (response.error || 'Failed to save'), 'error');
-                            }
-                        } catch (e) {
-                            showStatus('❌ Error parsing response', 'error');
-                        }
-                    } else {
-                        try {
-                            var response = JSON.parse(xhr.responseText);
-                            showStatus('❌ Error: ' + (response.error || 'Failed to save'), 'error');
-                        } catch (e) {
-                            showStatus('❌ Server error: ' + xhr.status, 'error');
-                        }
-                    }
-                }
-            };
-            xhr.send(JSON.stringify({ content: content }));
-        }
-        function showStatus(message, type) {
-            var statusEl = document.getElementById('statusMessage');
-            statusEl.textContent = message;
-            statusEl.className = 'status-message status-' + type;
-            statusEl.style.display = 'block';
-            if (type === 'success') {
-                setTimeout(function() {
-                    statusEl.style.display = 'none';
-                }, 3000);
-            }
-        }
-    </script>
+    <script src="{{ asset_url('food_editor.js') }}"></script>
 </body>
 </html>
 """
+register_template('food_editor.html', HTML_FOOD_EDITOR)
 
 
 # --- HELPER FUNCTIONS ---
@@ -1213,9 +1325,8 @@ def hash_color(text):
 def index():
     pads = get_all_pads()
     # Filter out pads where all foods are inactive
-    pads = {k: v for k, v in pads.items() if k == 'amounts' or any(
-        f.get('active', True) for f in v.get('foods', {}).values()
-    )}
+    active_pads = get_food_catalog().active_pads
+    pads = {k: v for k, v in pads.items() if k == 'amounts' or k in active_pads}
     # Always ensure amounts tab is available
     if 'amounts' not in pads:
         pads['amounts'] = {'name': 'Set Amount'}
@@ -1266,7 +1377,7 @@ def index():
                 'total_protein': total_protein,
                 'item_count': len(m.get('items', []))
             })
-    return render_template_string(HTML_INDEX,
+    return render_template('index.html',
                                 pads=pads,
                                 current_pad=current_pad,
                                 current_pad_data=current_pad_data,
@@ -1294,33 +1405,41 @@ def today_log():
     else:
         target_date = date.today()
 
-    log_entries = load_log_for_date(target_date)
-    total_protein = sum(e.get('protein', 0) for e in log_entries)
-    total_calories = sum(e.get('calories', 0) for e in log_entries)
-    avg_ratio = f"{total_calories / total_protein:.1f}" if total_protein > 0 else '--'
-    item_count = len(log_entries)
-    is_today = (target_date == date.today())
-
-    prev_date = (target_date - timedelta(days=1)).isoformat()
-    next_date = (target_date + timedelta(days=1)).isoformat()
-
-    if target_date == date.today():
-        title = "Today"
-    elif target_date == date.today() - timedelta(days=1):
-        title = "Yesterday"
-    else:
-        title = target_date.strftime('%a %d %b')
+    def render():
+        # Time order, as addLogItem inserts pushed rows; each entry keeps its
+        # file index for the index-based delete of entries without an id
+        log_entries = sorted(enumerate(load_log_for_date(target_date)),
+                             key=lambda item: item[1].get('timestamp') or '')
+        totals = get_day_totals(target_date)
+        total_protein = totals['protein']
+        total_calories = totals['calories']
+        avg_ratio = f"{total_calories / total_protein:.1f}" if total_protein > 0 else '--'
+        item_count = totals['count']
+        is_today = (target_date == date.today())
+
+        prev_date = (target_date - timedelta(days=1)).isoformat()
+        next_date = (target_date + timedelta(days=1)).isoformat()
+
+        if target_date == date.today():
+            title = "Today"
+        elif target_date == date.today() - timedelta(days=1):
+            title = "Yesterday"
+        else:
+            title = target_date.strftime('%a %d %b')
+
+        return render_template('today.html',
+                                    log_entries=log_entries,
+                                    total_protein=total_protein,
+                                    avg_ratio=avg_ratio,
+                                    item_count=item_count,
+                                    title=title,
+                                    prev_date=prev_date,
+                                    next_date=next_date,
+                                    is_today=is_today,
+                                    current_date=target_date.isoformat(),
+                                    js_debug=app.config.get('JS_DEBUG', False))
 
-    return render_template_string(HTML_TODAY,
-                                log_entries=log_entries,
-                                total_protein=total_protein,
-                                avg_ratio=avg_ratio,
-                                item_count=item_count,
-                                title=title,
-                                prev_date=prev_date,
-                                next_date=next_date,
-                                is_today=is_today,
-                                js_debug=app.config.get('JS_DEBUG', False))
+    return past_page('today', target_date, render)
 
 
 @app.route('/nutrition')
@@ -1334,84 +1453,72 @@ def nutrition_dashboard():
     else:
         target_date = date.today()
 
-    is_today = (target_date == date.today())
-    prev_date = (target_date - timedelta(days=1)).isoformat()
-    next_date = (target_date + timedelta(days=1)).isoformat()
+    def render():
+        is_today = (target_date == date.today())
+        prev_date = (target_date - timedelta(days=1)).isoformat()
+        next_date = (target_date + timedelta(days=1)).isoformat()
 
-    if is_today:
-        title = "Nutrition Dashboard"
-    elif target_date == date.today() - timedelta(days=1):
-        title = "Yesterday"
-    else:
-        title = target_date.strftime('%a %d %b')
+        if is_today:
+            title = "Nutrition Dashboard"
+        elif target_date == date.today() - timedelta(days=1):
+            title = "Yesterday"
+        else:
+            title = target_date.strftime('%a %d %b')
 
-    if is_today:
-        log_entries = load_today_log()
-        stats = calculate_nutrition_stats()
-        time_since_last_ate = calculate_time_since_last_ate()
-    else:
-        log_entries = load_log_for_date(target_date)
-        total_cal = sum(e.get('calories', 0) for e in log_entries)
-        total_prot = sum(e.get('protein', 0) for e in log_entries)
-        total_fib = sum(e.get('fiber', 0) for e in log_entries)
-        stats = {
-            'total_calories': round(total_cal),
-            'total_protein': round(total_prot, 1),
-            'total_fiber': round(total_fib, 1),
-            'avg_ratio': f"{total_cal / total_prot:.1f}" if total_prot > 0 else '--',
-            'cal_per_hour': '--',
-            'protein_per_hour': '--',
-            'kcal_per_fiber': f"{total_cal / total_fib:.1f}" if total_fib > 0 else '--',
-        }
-        time_since_last_ate = None
-
-    server_time = datetime.now().isoformat()
-    percentiles = calculate_percentiles() if is_today else None
-
-    # Compare to previous day at same time
-    prev_day = target_date - timedelta(days=1)
-    prev_entries = load_log_for_date(prev_day)
-    if is_today:
-        now_time = datetime.now().strftime('%H:%M')
-        prev_entries = [e for e in prev_entries if e.get('time', '00:00') <= now_time]
-
-    prev_cal = sum(e.get('calories', 0) for e in prev_entries)
-    prev_prot = sum(e.get('protein', 0) for e in prev_entries)
-    prev_fib = sum(e.get('fiber', 0) for e in prev_entries)
-
-    total_cal = stats['total_calories']
-    total_prot = float(stats['total_protein'])
-    total_fib = float(stats.get('total_fiber', 0))
-
-    cal_delta = round(total_cal - prev_cal)
-    curr_cpp = total_cal / total_prot if total_prot > 0 else 0
-    prev_cpp = prev_cal / prev_prot if prev_prot > 0 else 0
-    curr_cpf = total_cal / total_fib if total_fib > 0 else 0
-    prev_cpf = prev_cal / prev_fib if prev_fib > 0 else 0
-    cpp_delta = round(curr_cpp - prev_cpp, 1) if prev_prot > 0 and total_prot > 0 else None
-    cpf_delta = round(curr_cpf - prev_cpf, 1) if prev_fib > 0 and total_fib > 0 else None
-
-    return render_template_string(HTML_NUTRITION,
-                                log_entries=log_entries,
-                                total_calories=total_cal,
-                                total_protein=stats['total_protein'],
-                                total_fiber=stats.get('total_fiber', 0),
-                                avg_ratio=stats['avg_ratio'],
-                                cal_per_hour=stats.get('cal_per_hour', '--'),
-                                protein_per_hour=stats.get('protein_per_hour', '--'),
-                                kcal_per_fiber=stats.get('kcal_per_fiber', '--'),
-                                time_since_last_ate=time_since_last_ate,
-                                server_time=server_time,
-                                percentiles=percentiles,
-                                cal_delta=cal_delta,
-                                cpp_delta=cpp_delta,
-                                cpf_delta=cpf_delta,
-                                title=title,
-                                prev_date=prev_date,
-                                next_date=next_date,
-                                is_today=is_today,
-                                current_date=target_date.isoformat(),
-                                js_debug=app.config.get('JS_DEBUG', False))
+        if is_today:
+            log_entries = load_today_log()
+            stats = calculate_nutrition_stats()
+            time_since_last_ate = calculate_time_since_last_ate()
+        else:
+            log_entries = load_log_for_date(target_date)
+            totals = get_day_totals(target_date)
+            total_cal = totals['calories']
+            total_prot = totals['protein']
+            total_fib = totals['fiber']
+            stats = {
+                'total_calories': round(total_cal),
+                'total_protein': round(total_prot, 1),
+                'total_fiber': round(total_fib, 1),
+                'avg_ratio': f"{total_cal / total_prot:.1f}" if total_prot > 0 else '--',
+                'cal_per_hour': '--',
+                'protein_per_hour': '--',
+                'kcal_per_fiber': f"{total_cal / total_fib:.1f}" if total_fib > 0 else '--',
+            }
+            time_since_last_ate = None
+
+        # Only used to tick time-since-ate, which past days don't show; leaving it
+        # out keeps their pages byte-identical between requests
+        server_time = datetime.now().isoformat() if is_today else ''
+        percentiles = calculate_percentiles() if is_today else None
+
+        # Compare to previous day at same time
+        total_cal = stats['total_calories']
+        comparison = compare_to_previous_day(target_date, total_cal, float(stats['total_protein']),
+                                             float(stats.get('total_fiber', 0)))
+
+        return render_template('nutrition.html',
+                                    log_entries=log_entries,
+                                    total_calories=total_cal,
+                                    total_protein=stats['total_protein'],
+                                    total_fiber=stats.get('total_fiber', 0),
+                                    avg_ratio=stats['avg_ratio'],
+                                    cal_per_hour=stats.get('cal_per_hour', '--'),
+                                    protein_per_hour=stats.get('protein_per_hour', '--'),
+                                    kcal_per_fiber=stats.get('kcal_per_fiber', '--'),
+                                    time_since_last_ate=time_since_last_ate,
+                                    server_time=server_time,
+                                    percentiles=percentiles,
+                                    cal_delta=comparison['cal_delta'],
+                                    cpp_delta=comparison['cpp_delta'],
+                                    cpf_delta=comparison['cpf_delta'],
+                                    title=title,
+                                    prev_date=prev_date,
+                                    next_date=next_date,
+                                    is_today=is_today,
+                                    current_date=target_date.isoformat(),
+                                    js_debug=app.config.get('JS_DEBUG', False))
+
+    return past_page('nutrition', target_date, render)
 
 
 @app.route('/edit-foods', methods=['GET', 'POST'])
@@ -1426,7 +1533,7 @@ def edit_foods():
             foods_content = "# Food configuration file not found"
         except Exception as e:
             foods_content = f"# Error loading configuration: {str(e)}"
-        return render_template_string(HTML_FOOD_EDITOR,
+        return render_template('food_editor.html',
                                     foods_content=foods_content,
                                     js_debug=app.config.get('JS_DEBUG', False))
     elif request.method == 'POST':
@@ -1452,8 +1559,9 @@ def edit_foods():
             # Save new content
             with open(CONFIG_FILE, 'w') as f:
                 f.write(content)
+            invalidate_config_cache()
             # Trigger polling update to refresh all devices
-            mark_updated("config_updated")
+            mark_updated("config_updated", event_type='config')
             return jsonify({'success': True, 'message': 'Configuration saved successfully'})
         except Exception as e:
             return jsonify({'success': False, 'error': f'Failed to save file: {str(e)}'}), 500
@@ -1478,11 +1586,11 @@ def log_food():
         food_data = result
         # Pass amount for amount-based foods, None for unit foods
         if food_data.get('type') == 'unit':
-            save_food_entry(pad_key, food_key, food_data, None, at_timestamp=at_timestamp)
+            entry = save_food_entry(pad_key, food_key, food_data, None, at_timestamp=at_timestamp)
         else:
             current_amount = get_current_amount()
-            save_food_entry(pad_key, food_key, food_data, current_amount, at_timestamp=at_timestamp)
-        mark_updated(nonce)
+            entry = save_food_entry(pad_key, food_key, food_data, current_amount, at_timestamp=at_timestamp)
+        mark_updated(nonce, entries=[entry_changes(entry['timestamp'][:10], added=[entry])])
         return jsonify({'status': 'success'})
     except Exception as e:
         import traceback
@@ -1509,28 +1617,23 @@ def delete_entry():
         # ID-based deletion (preferred)
         if 'id' in data:
             entry_id = data['id']
-            # Extract date from ID (format: YYYYMMDDHHMMSSxxxx)
-            try:
-                date_part = entry_id[:8]
-                target_date = f"{date_part[:4]}-{date_part[4:6]}-{date_part[6:8]}"
-            except:
-                return jsonify({'error': 'Invalid entry ID format'}), 400
-
-            log_file = os.path.join(LOGS_DIR, f'{target_date}.json')
-            if not os.path.exists(log_file):
+            # Look the date up in the entry index; backdated entries don't
+            # live on the day their ID was generated
+            target_date = locate_entries([entry_id]).get(entry_id)
+            if target_date is None:
+                # Fall back to the date encoded in the ID (format: YYYYMMDDHHMMSSxxxx)
+                try:
+                    date_part = entry_id[:8]
+                    target_date = f"{date_part[:4]}-{date_part[4:6]}-{date_part[6:8]}"
+                except:
+                    return jsonify({'error': 'Invalid entry ID format'}), 400
+
+            if not log_exists(target_date):
                 return jsonify({'error': f'No log file for {target_date}'}), 400
 
-            with open(log_file, 'r') as f:
-                log_entries = json.load(f)
-
-            # Find and remove entry by ID
-            for i, entry in enumerate(log_entries):
-                if entry.get('id') == entry_id:
-                    del log_entries[i]
-                    with open(log_file, 'w') as f:
-                        json.dump(log_entries, f, indent=2)
-                    mark_updated("delete_entry")
-                    return jsonify({'status': 'success'})
+            if delete_log_entry(target_date, entry_id):
+                mark_updated("delete_entry", entries=[entry_changes(target_date, removed=[entry_id])])
+                return jsonify({'status': 'success'})
 
             return jsonify({'error': f'Entry with ID {entry_id} not found'}), 404
 
@@ -1539,17 +1642,18 @@ def delete_entry():
             return jsonify({'error': 'No id or index provided'}), 400
         index = data['index']
         target_date = data.get('date', date.today().strftime('%Y-%m-%d'))
-        log_file = os.path.join(LOGS_DIR, f'{target_date}.json')
-        if not os.path.exists(log_file):
+        if not log_exists(target_date):
             return jsonify({'error': f'No log file for {target_date}'}), 400
-        with open(log_file, 'r') as f:
-            log_entries = json.load(f)
+        log_entries = load_log_for_date(target_date)
         if index < 0 or index >= len(log_entries):
             return jsonify({'error': 'Invalid index'}), 400
-        del log_entries[index]
-        with open(log_file, 'w') as f:
-            json.dump(log_entries, f, indent=2)
-        mark_updated("delete_entry")
+        entry_id = log_entries[index].get('id')
+        if entry_id:
+            delete_log_entry(target_date, entry_id)
+            mark_updated("delete_entry", entries=[entry_changes(target_date, removed=[entry_id])])
+        else:
+            save_log_for_date(target_date, log_entries[:index] + log_entries[index + 1:])
+            mark_updated("delete_entry")
         return jsonify({'status': 'success'})
     except Exception as e:
         import traceback
@@ -1562,41 +1666,36 @@ def api_notes():
     """API endpoint to get notes and unknowns as JSON"""
     from datetime import timedelta
     days = int(request.args.get('days', 7))
-    result = {
-        'dates': []
-    }
-    for days_ago in range(days):
-        target_date = date.today() - timedelta(days=days_ago)
-        date_str = target_date.strftime('%Y-%m-%d')
-        # Load notes
-        notes_file = os.path.join(LOGS_DIR, f'{date_str}_notes.json')
-        notes = []
-        if os.path.exists(notes_file):
-            try:
-                with open(notes_file, 'r') as f:
-                    notes = json.load(f)
-            except:
-                pass
-        # Load unknowns
-        log_file = os.path.join(LOGS_DIR, f'{date_str}.json')
-        unknowns = []
-        if os.path.exists(log_file):
-            try:
-                with open(log_file, 'r') as f:
-                    log_entries = json.load(f)
-                for i, entry in enumerate(log_entries):
-                    if 'unknown' in entry.get('food', '').lower() or 'unknown' in entry.get('name', '').lower():
-                        entry['index'] = i
-                        unknowns.append(entry)
-            except:
-                pass
-        if notes or unknowns:
-            result['dates'].append({
-                'date': date_str,
-                'notes': notes,
-                'unknowns': unknowns
-            })
-    return jsonify(result)
+    target_dates = [date.today() - timedelta(days=days_ago) for days_ago in range(days)]
+
+    def build():
+        result = {
+            'dates': []
+        }
+        for target_date in target_dates:
+            date_str = target_date.strftime('%Y-%m-%d')
+            notes = load_notes_for_date(date_str)
+            # Load unknowns
+            unknowns = []
+            for i, entry in enumerate(load_log_for_date(date_str)):
+                if 'unknown' in entry.get('food', '').lower() or 'unknown' in entry.get('name', '').lower():
+                    unknowns.append(dict(entry, index=i))
+            if notes or unknowns:
+                result['dates'].append({
+                    'date': date_str,
+                    'notes': notes,
+                    'unknowns': unknowns
+                })
+        return jsonify(result)
+
+    versions = [(d.isoformat(), notes_version(d), log_version(d)) for d in target_dates]
+    return conditional_response(versions, build)
+
+
+@app.route('/api/percentiles/status')
+def api_percentiles_status():
+    """Progress of the one-off percentile history seeding"""
+    return jsonify(get_percentile_seed_progress())
 
 
 @app.route('/api/entries')
@@ -1604,102 +1703,86 @@ def api_entries():
     """API endpoint to get food log entries as JSON"""
     from datetime import timedelta
     days = int(request.args.get('days', 1))
-    result = {
-        'dates': []
+    today = date.today()
+    start = today - timedelta(days=days - 1)
+
+    def build():
+        return jsonify({
+            'dates': [{'date': date_str, 'entries': entries}
+                      for date_str, entries in load_logs_between(start, today)]
+        })
+
+    versions = [((start + timedelta(days=i)).isoformat(), log_version(start + timedelta(days=i)))
+                for i in range(max(days, 0))]
+    return conditional_response(versions, build)
+
+
+def _food_json(pad_key, pad_name, food_key, food):
+    """The summary of a food returned by the foods list and search APIs"""
+    food_entry = {
+        'pad_key': pad_key,
+        'pad_name': pad_name,
+        'food_key': food_key,
+        'name': food.get('name', food_key),
+        'type': food.get('type', 'amount')
     }
-    for days_ago in range(days):
-        target_date = date.today() - timedelta(days=days_ago)
-        date_str = target_date.strftime('%Y-%m-%d')
-        log_file = os.path.join(LOGS_DIR, f'{date_str}.json')
-        entries = []
-        if os.path.exists(log_file):
-            try:
-                with open(log_file, 'r') as f:
-                    entries = json.load(f)
-            except:
-                pass
-        if entries:
-            result['dates'].append({
-                'date': date_str,
-                'entries': entries
-            })
-    return jsonify(result)
+    if food.get('type') == 'unit':
+        food_entry['calories'] = food.get('calories', 0)
+        food_entry['protein'] = food.get('protein', 0)
+    else:
+        food_entry['calories_per_gram'] = food.get('calories_per_gram', 0)
+        food_entry['protein_per_gram'] = food.get('protein_per_gram', 0)
+    if food.get('scale') and food.get('scale') != 1.0:
+        food_entry['scale'] = food.get('scale')
+    return food_entry
 
 
 @app.route('/api/foods')
 def api_foods():
     """API endpoint to get all foods as JSON"""
-    pads = get_all_pads()
-    foods = []
-    for pad_key, pad_data in pads.items():
-        if pad_key == 'amounts':
-            continue
-        pad_name = pad_data.get('name', pad_key)
-        for food_key, food in pad_data.get('foods', {}).items():
-            food_entry = {
-                'pad_key': pad_key,
-                'pad_name': pad_name,
-                'food_key': food_key,
-                'name': food.get('name', food_key),
-                'type': food.get('type', 'amount')
-            }
-            if food.get('type') == 'unit':
-                food_entry['calories'] = food.get('calories', 0)
-                food_entry['protein'] = food.get('protein', 0)
-            else:
-                food_entry['calories_per_gram'] = food.get('calories_per_gram', 0)
-                food_entry['protein_per_gram'] = food.get('protein_per_gram', 0)
-            if food.get('scale') and food.get('scale') != 1.0:
-                food_entry['scale'] = food.get('scale')
-            foods.append(food_entry)
-    return jsonify({'foods': foods})
+    def build():
+        pads = get_all_pads()
+        foods = [_food_json(pad_key, pads[pad_key].get('name', pad_key), food_key, food)
+                 for pad_key, food_key, food in get_food_catalog().foods]
+        return jsonify({'foods': foods})
+
+    return conditional_response([get_config_signature()], build)
 
 
 @app.route('/api/foods/raw')
 def api_foods_raw():
     """API endpoint to get raw foods.toml content"""
-    try:
-        with open(CONFIG_FILE, 'r') as f:
-            content = f.read()
-        from flask import Response
-        return Response(content, mimetype='text/plain')
-    except FileNotFoundError:
-        return jsonify({'error': 'Config file not found'}), 404
+    def build():
+        try:
+            with open(CONFIG_FILE, 'r') as f:
+                content = f.read()
+            from flask import Response
+            return Response(content, mimetype='text/plain')
+        except FileNotFoundError:
+            return jsonify({'error': 'Config file not found'}), 404
+
+    return conditional_response([get_config_signature()], build)
 
 
 @app.route('/api/foods/search')
 def api_foods_search():
-    """API endpoint to search foods"""
+    """API endpoint to search foods, best matches first.
+
+    Query params: q (required), limit, offset.
+    """
     query = request.args.get('q', '').lower()
     if not query:
         return jsonify({'error': 'No query provided'}), 400
+    limit = request.args.get('limit', type=int)
+    offset = max(request.args.get('offset', 0, type=int), 0)
     pads = get_all_pads()
+    total, results = search_foods(query, limit, offset)
     foods = []
-    for pad_key, pad_data in pads.items():
-        if pad_key == 'amounts':
-            continue
-        pad_name = pad_data.get('name', pad_key)
-        for food_key, food in pad_data.get('foods', {}).items():
-            # Check if query matches
-            if query not in food.get('name', '').lower() and query not in food_key.lower():
-                continue
-            food_entry = {
-                'pad_key': pad_key,
-                'pad_name': pad_name,
-                'food_key': food_key,
-                'name': food.get('name', food_key),
-                'type': food.get('type', 'amount')
-            }
-            if food.get('type') == 'unit':
-                food_entry['calories'] = food.get('calories', 0)
-                food_entry['protein'] = food.get('protein', 0)
-            else:
-                food_entry['calories_per_gram'] = food.get('calories_per_gram', 0)
-                food_entry['protein_per_gram'] = food.get('protein_per_gram', 0)
-            if food.get('scale') and food.get('scale') != 1.0:
-                food_entry['scale'] = food.get('scale')
-            foods.append(food_entry)
-    return jsonify({'foods': foods, 'query': query})
+    for pad_key, food_key, food, score in results:
+        food_entry = _food_json(pad_key, pads[pad_key].get('name', pad_key), food_key, food)
+        food_entry['score'] = score
+        foods.append(food_entry)
+    return jsonify({'foods': foods, 'query': query, 'total': total, 'offset': offset})
 
 
 @app.route('/api/foods/<pad_key>/<food_key>')
@@ -1718,20 +1801,22 @@ def api_foods_get(pad_key, food_key):
 
 @app.route('/api/foods/by-id/<food_id>')
 def api_foods_get_by_id(food_id):
-    """API endpoint to get food by ID (searches all pads)"""
-    pads = get_all_pads()
-    for pad_key, pad_data in pads.items():
-        if pad_key == 'amounts':
-            continue
-        foods = pad_data.get('foods', {})
-        if food_id in foods:
-            food_data = foods[food_id]
-            return jsonify({
-                'food': food_data,
-                'pad_key': pad_key,
-                'food_key': food_id
-            })
-    return jsonify({'error': 'Food not found'}), 404
+    """API endpoint to get food by ID (any pad), falling back to a name match"""
+    catalog = get_food_catalog()
+    found = catalog.find(food_id)
+    if found:
+        pad_key, food_data = found
+        food_key = food_id
+    else:
+        found = catalog.find_by_name(food_id)
+        if not found:
+            return jsonify({'error': 'Food not found'}), 404
+        pad_key, food_key, food_data = found
+    return jsonify({
+        'food': food_data,
+        'pad_key': pad_key,
+        'food_key': food_key
+    })
 
 
 @app.route('/api/foods', methods=['POST'])
@@ -1807,8 +1892,9 @@ def api_foods_add():
         # Save new config
         with open(CONFIG_FILE, 'w') as f:
             toml.dump(config, f)
+        invalidate_config_cache()
         # Trigger polling update
-        mark_updated("food_added")
+        mark_updated("food_added", event_type='config')
         return jsonify({
             'success': True,
             'message': 'Food added successfully',
@@ -1844,8 +1930,9 @@ def api_foods_replace_all():
         # Write new config
         with open(CONFIG_FILE, 'w') as f:
             f.write(toml_content)
+        invalidate_config_cache()
 
-        mark_updated("replace_all_foods")
+        mark_updated("replace_all_foods", event_type='config')
         return jsonify({'success': True, 'backup': backup_file})
 
     except Exception as e:
@@ -1874,15 +1961,10 @@ def api_foods_deactivate():
         if not pad or food_key not in pad.get('foods', {}):
             return jsonify({'success': False, 'error': f'Food {pad_key}/{food_key} not found'}), 404
     else:
-        # Search all pads
-        for pk, pd in config.get('pads', {}).items():
-            if pk == 'amounts':
-                continue
-            if food_key in pd.get('foods', {}):
-                pad_key = pk
-                break
-        if not pad_key:
+        found = get_food_catalog().find(food_key)
+        if not found or food_key not in config.get('pads', {}).get(found[0], {}).get('foods', {}):
             return jsonify({'success': False, 'error': f'Food {food_key} not found'}), 404
+        pad_key = found[0]
     config['pads'][pad_key]['foods'][food_key]['active'] = False
     # Save
     try:
@@ -1894,7 +1976,8 @@ def api_foods_deactivate():
                 f.write(backup_content)
         with open(CONFIG_FILE, 'w') as f:
             toml.dump(config, f)
-        mark_updated("food_deactivated")
+        invalidate_config_cache()
+        mark_updated("food_deactivated", event_type='config')
         return jsonify({
             'success': True,
             'pad_key': pad_key,
@@ -1916,81 +1999,33 @@ def api_resolve_unknown():
     if not entry_ids or not food_key:
         return jsonify({'success': False, 'error': 'Missing entry_ids or food_key'}), 400
     # Find the food in the config
-    pad_key = None
-    food_data = None
-    pads = get_all_pads()
-    for pk, pad_data in pads.items():
-        if pk == 'amounts':
-            continue
-        foods = pad_data.get('foods', {})
-        if food_key in foods:
-            pad_key = pk
-            food_data = foods[food_key]
-            break
-    if not food_data:
+    found = get_food_catalog().find(food_key)
+    if not found:
         return jsonify({'success': False, 'error': f'Food "{food_key}" not found'}), 404
-    # Find and update entries in log files
-    updated_count = 0
-    updated_entries = []
-    for filename in sorted(os.listdir(LOGS_DIR), reverse=True):
-        if not filename.endswith('.json') or filename.endswith('_notes.json') or not filename[0].isdigit():
-            continue
-        filepath = os.path.join(LOGS_DIR, filename)
-        try:
-            with open(filepath, 'r') as f:
-                entries = json.load(f)
-        except:
-            continue
-        modified = False
-        for entry in entries:
-            if entry.get('id') in entry_ids:
-                # Resolve the entry
-                amount = entry.get('amount', 100)
-                if food_data.get('type') == 'unit':
-                    calories = food_data.get('calories', 0)
-                    protein = food_data.get('protein', 0)
-                    fiber = food_data.get('fiber', 0)
-                    amount_display = "1 unit"
-                else:
-                    calories = food_data.get('calories_per_gram', 0) * amount
-                    protein = food_data.get('protein_per_gram', 0) * amount
-                    fiber = food_data.get('fiber_per_gram', 0) * amount
-                    amount_display = f"{amount}g"
-                entry['pad'] = pad_key
-                entry['food'] = food_key
-                entry['name'] = food_data.get('name', food_key)
-                entry['calories'] = round(calories, 1)
-                entry['protein'] = round(protein, 1)
-                entry['fiber'] = round(fiber, 1)
-                entry['amount_display'] = amount_display
-                modified = True
-                updated_count += 1
-                updated_entries.append({
-                    'id': entry['id'],
-                    'date': filename.replace('.json', ''),
-                    'calories': entry['calories'],
-                    'protein': entry['protein']
-                })
-        if modified:
-            with open(filepath, 'w') as f:
-                json.dump(entries, f, indent=2)
-            # Trigger update notification
-            mark_updated("resolve_unknown")
+    pad_key, food_data = found
+    # Only the logs the ids live in are opened (see data.resolve_entries)
+    updated_entries, files_touched = resolve_entries(entry_ids, pad_key, food_key, food_data)
+    if updated_entries:
+        # Trigger update notification
+        mark_updated("resolve_unknown")
     return jsonify({
         'success': True,
-        'updated_count': updated_count,
+        'updated_count': len(updated_entries),
         'total_requested': len(entry_ids),
         'updated_entries': updated_entries,
+        'files_touched': files_touched,
         'food_name': food_data.get('name', food_key)
     })
 
 
 # Register polling and styles routes
+register_asset_routes(app)
 register_polling_routes(app)
 register_styles_routes(app)
 register_notes_routes(app)
 register_calories_routes(app)
 register_meals_routes(app)
+register_compression(app)
 
 
 # --- MAIN ---
@@ -2001,8 +2036,58 @@ def main():
     parser.add_argument('--port', type=int, default=5001, help='Port')
     parser.add_argument('--debug', action='store_true', help='Debug mode')
     parser.add_argument('--js-debug', action='store_true', help='Enable JavaScript debugging')
+    parser.add_argument('--event-stream', action='store_true',
+                        help='Have pages use the /events stream instead of long polling by default')
+    parser.add_argument('--async', dest='async_mode', action='store_true',
+                        help='Serve polling and /events on asyncio, so idle devices need no thread each')
     parser.add_argument('--pidfile', default='/tmp/nutrition-pad.pid', help='PID file location')
+    parser.add_argument('--sqlite', metavar='PATH', help='Store logs, notes and meals in this SQLite database')
+    parser.add_argument('--seed-processes', type=int, default=0, metavar='N',
+                        help='Seed percentile history with N worker processes (first run only)')
+    parser.add_argument('--workers', type=int, default=1, metavar='N',
+                        help='Serve from N processes sharing live state (amount, meal mode)')
+    parser.add_argument('--template-cache', metavar='DIR',
+                        help='Keep compiled page templates in this directory across restarts')
+    parser.add_argument('--no-compress', action='store_true',
+                        help='Send responses uncompressed instead of gzip/deflate')
+    parser.add_argument('--live-state', metavar='PATH',
+                        help='Share live state with other processes through this file '
+                             '(default with --workers: a file in the temp directory)')
     args = parser.parse_args()
+    if args.workers > 1 and not args.live_state:
+        import tempfile
+        args.live_state = os.path.join(tempfile.gettempdir(), 'nutrition-pad-{}.live'.format(args.port))
+
+    def setup_process():
+        # Per worker: connections, notifier sockets and threads don't survive fork
+        if args.sqlite:
+            from .sqlite_store import SqliteStore
+            set_storage(SqliteStore(args.sqlite))
+        if args.live_state:
+            from .live_state import SharedLiveState
+            set_live_state(SharedLiveState(args.live_state))
+        # No-op once percentile_cache.json exists
+        start_percentile_seeding(args.seed_processes)
+
+    def serve(sock=None):
+        if args.async_mode:
+            from .async_server import serve as serve_async
+            serve_async(app, host=args.host, port=args.port, sock=sock)
+        elif sock is not None:
+            from werkzeug.serving import make_server
+            make_server(args.host, args.port, app, threaded=True, fd=sock.fileno()).serve_forever()
+        else:
+            app.run(debug=args.debug, host=args.host, port=args.port, threaded=True)
+
+    def run_worker(sock, index):
+        setup_process()
+        try:
+            serve(sock)
+        finally:
+            # Workers end with os._exit, which skips atexit handlers
+            flush_percentile_cache()
+            close_live_state()
+
     # Write PID file for watchdog
     try:
         with open(args.pidfile, 'w') as f:
@@ -2012,12 +2097,33 @@ def main():
         print("Warning: Could not write PID file: {}".format(e))
     print("Starting Nutrition Pad on http://{}:{}".format(args.host, args.port))
     print("Config file: {}".format(CONFIG_FILE))
-    print("Logs directory: {}".format(LOGS_DIR))
+    if args.sqlite:
+        print("Storage: SQLite database {}".format(args.sqlite))
+    else:
+        print("Logs directory: {}".format(LOGS_DIR))
     if args.js_debug:
         print("JavaScript debugging enabled")
+    if args.live_state:
+        print("Live state: {}".format(args.live_state))
     app.config['JS_DEBUG'] = args.js_debug
+    app.config['EVENT_STREAM'] = args.event_stream
+    app.config['COMPRESS'] = not args.no_compress
+    # Compiled and built before forking, so workers share the pages and bundles
+    setup_templates(app, args.template_cache)
+    compile_templates(app)
+    build_assets(app)
+    # Exit normally on SIGTERM (watchdog restarts) so atexit handlers flush caches
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    if args.async_mode:
+        print("Serving with asyncio (--async)")
     try:
-        app.run(debug=args.debug, host=args.host, port=args.port, threaded=True)
+        if args.workers > 1:
+            from .workers import serve_workers
+            print("Workers: {}".format(args.workers))
+            serve_workers(args.workers, args.host, args.port, run_worker)
+        else:
+            setup_process()
+            serve()
     finally:
         # Clean up PID file on exit
         try:
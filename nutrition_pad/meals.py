@@ -1,32 +1,19 @@
 """
 Meals feature: define reusable meals (collections of foods) and log them in one click.
 """
-import os
-import json
 import random
 import string
 from datetime import datetime, date
-from flask import render_template_string, request, jsonify
+from flask import render_template, request, jsonify
 
-from .data import MEALS_FILE, load_today_log, get_today_log_file, generate_entry_id, backfill_entry_ids
-from .polling import get_current_amount, mark_updated
-
-
-def load_meals():
-    """Load all meal definitions from meals.json"""
-    if not os.path.exists(MEALS_FILE):
-        return []
-    try:
-        with open(MEALS_FILE, 'r') as f:
-            return json.load(f)
-    except (json.JSONDecodeError, IOError):
-        return []
-
-
-def save_meals(meals):
-    """Save all meal definitions to meals.json"""
-    with open(MEALS_FILE, 'w') as f:
-        json.dump(meals, f, indent=2)
+from .data import (
+    generate_entry_id, append_log_entries, load_meals, save_meals, meals_version,
+    get_config_signature
+)
+from .polling import get_current_amount, mark_updated, entry_changes
+from .assets import register_asset
+from .page_templates import register_template
+from .conditional import conditional_response
 
 
 def generate_meal_id():
@@ -58,231 +45,237 @@ def calculate_meal_totals(meal):
     return round(total_cal), round(total_protein, 1)
 
 
-HTML_MEALS_BUILD = """
-<!DOCTYPE html>
-<html>
-<head>
-    <title>Building Meal</title>
-    <meta name="viewport" content="width=device-width, initial-scale=1">
-    <link rel="stylesheet" href="/static/base.css">
-    <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css">
-    <style>
-        body {
-            background: linear-gradient(135deg, #1a2a2e 0%, #163e3e 50%, #0f4660 100%);
-            min-height: 100vh;
-            margin: 0;
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-        }
-        .header-icons {
-            display: flex;
-            justify-content: center;
-            gap: 15px;
-            margin-bottom: 10px;
-        }
-        .header-icons a {
-            font-size: 1.5em;
-            color: rgba(255, 255, 255, 0.7);
-            text-decoration: none;
-            transition: all 0.3s ease;
-            cursor: pointer;
-            padding: 10px;
-            min-width: 44px;
-            min-height: 44px;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-        }
-        .meal-name-input {
-            width: 90%;
-            max-width: 500px;
-            margin: 15px auto;
-            display: block;
-            padding: 12px 16px;
-            font-size: 1.3em;
-            background: rgba(255, 255, 255, 0.1);
-            border: 2px solid rgba(78, 205, 196, 0.4);
-            border-radius: 12px;
-            color: white;
-            text-align: center;
-            outline: none;
-            -webkit-box-sizing: border-box;
-            box-sizing: border-box;
-        }
-        .meal-name-input:focus { border-color: #4ecdc4; }
-        .meal-name-input::placeholder { color: rgba(255, 255, 255, 0.4); }
-        .meal-items {
-            max-width: 600px;
-            margin: 0 auto;
-            padding: 0 15px;
-        }
-        .meal-item {
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-            padding: 10px 12px;
-            margin: 4px 0;
-            background: rgba(255, 255, 255, 0.08);
-            border-radius: 10px;
-            color: white;
-        }
-        .meal-item .item-detail {
-            color: rgba(255, 255, 255, 0.5);
-            font-size: 0.85em;
-        }
-        .meal-item-remove {
-            color: #ff6b6b;
-            cursor: pointer;
-            font-size: 1.4em;
-            padding: 0 0 0 10px;
-            opacity: 0.6;
-        }
-        .meal-item-remove:hover { opacity: 1; }
-        .meal-totals {
-            text-align: center;
-            padding: 10px;
-            color: rgba(255, 255, 255, 0.6);
-            font-size: 0.95em;
-            margin-top: 8px;
-        }
-        .meal-empty {
-            text-align: center;
-            color: rgba(255, 255, 255, 0.4);
-            padding: 30px 15px;
-            font-size: 1.1em;
-        }
-        .meal-empty a {
-            color: #4ecdc4;
-            text-decoration: none;
-            font-weight: 600;
-        }
-    </style>
-    <script>
-        function itemCal(item) {
-            if (item.type === 'unit') return item.calories || 0;
-            return (item.calories_per_gram || 0) * (item.amount || 100);
-        }
-        function itemProt(item) {
-            if (item.type === 'unit') return item.protein || 0;
-            return (item.protein_per_gram || 0) * (item.amount || 100);
-        }
-
-        var cachedItems = [];
-
-        function loadItemsFromServer(callback) {
-            var xhr = new XMLHttpRequest();
-            xhr.open('GET', '/get-meal-items', true);
-            xhr.onreadystatechange = function() {
-                if (xhr.readyState === 4 && xhr.status === 200) {
-                    var data = JSON.parse(xhr.responseText);
-                    cachedItems = data.meal_items || [];
-                    if (callback) callback(cachedItems);
-                }
-            };
-            xhr.send();
+MEALS_BUILD_CSS = """
+body {
+    background: linear-gradient(135deg, #1a2a2e 0%, #163e3e 50%, #0f4660 100%);
+    min-height: 100vh;
+    margin: 0;
+    font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
+}
+.header-icons {
+    display: flex;
+    justify-content: center;
+    gap: 15px;
+    margin-bottom: 10px;
+}
+.header-icons a {
+    font-size: 1.5em;
+    color: rgba(255, 255, 255, 0.7);
+    text-decoration: none;
+    transition: all 0.3s ease;
+    cursor: pointer;
+    padding: 10px;
+    min-width: 44px;
+    min-height: 44px;
+    display: flex;
+    align-items: center;
+    justify-content: center;
+}
+.meal-name-input {
+    width: 90%;
+    max-width: 500px;
+    margin: 15px auto;
+    display: block;
+    padding: 12px 16px;
+    font-size: 1.3em;
+    background: rgba(255, 255, 255, 0.1);
+    border: 2px solid rgba(78, 205, 196, 0.4);
+    border-radius: 12px;
+    color: white;
+    text-align: center;
+    outline: none;
+    -webkit-box-sizing: border-box;
+    box-sizing: border-box;
+}
+.meal-name-input:focus { border-color: #4ecdc4; }
+.meal-name-input::placeholder { color: rgba(255, 255, 255, 0.4); }
+.meal-items {
+    max-width: 600px;
+    margin: 0 auto;
+    padding: 0 15px;
+}
+.meal-item {
+    display: flex;
+    justify-content: space-between;
+    align-items: center;
+    padding: 10px 12px;
+    margin: 4px 0;
+    background: rgba(255, 255, 255, 0.08);
+    border-radius: 10px;
+    color: white;
+}
+.meal-item .item-detail {
+    color: rgba(255, 255, 255, 0.5);
+    font-size: 0.85em;
+}
+.meal-item-remove {
+    color: #ff6b6b;
+    cursor: pointer;
+    font-size: 1.4em;
+    padding: 0 0 0 10px;
+    opacity: 0.6;
+}
+.meal-item-remove:hover { opacity: 1; }
+.meal-totals {
+    text-align: center;
+    padding: 10px;
+    color: rgba(255, 255, 255, 0.6);
+    font-size: 0.95em;
+    margin-top: 8px;
+}
+.meal-empty {
+    text-align: center;
+    color: rgba(255, 255, 255, 0.4);
+    padding: 30px 15px;
+    font-size: 1.1em;
+}
+.meal-empty a {
+    color: #4ecdc4;
+    text-decoration: none;
+    font-weight: 600;
+}
+"""
+register_asset('meals_build.css', MEALS_BUILD_CSS)
+
+MEALS_BUILD_JS = """
+function itemCal(item) {
+    if (item.type === 'unit') return item.calories || 0;
+    return (item.calories_per_gram || 0) * (item.amount || 100);
+}
+function itemProt(item) {
+    if (item.type === 'unit') return item.protein || 0;
+    return (item.protein_per_gram || 0) * (item.amount || 100);
+}
+
+var cachedItems = [];
+
+function loadItemsFromServer(callback) {
+    var xhr = new XMLHttpRequest();
+    xhr.open('GET', '/get-meal-items', true);
+    xhr.onreadystatechange = function() {
+        if (xhr.readyState === 4 && xhr.status === 200) {
+            var data = JSON.parse(xhr.responseText);
+            cachedItems = data.meal_items || [];
+            if (callback) callback(cachedItems);
         }
-
-        function removeItem(index) {
-            // For now, just don't support removal (would need server endpoint)
-            alert('Item removal not yet supported in server-sync mode');
+    };
+    xhr.send();
+}
+
+function removeItem(index) {
+    // For now, just don't support removal (would need server endpoint)
+    alert('Item removal not yet supported in server-sync mode');
+}
+
+function renderItems() {
+    loadItemsFromServer(function(items) {
+        var container = document.getElementById('meal-items');
+        var totalsEl = document.getElementById('meal-totals');
+        var doneBtn = document.getElementById('done-btn');
+
+        if (items.length === 0) {
+            container.innerHTML = '<div class="meal-empty">No items yet.<br><a href="/">Go to Food Pads</a> and click foods to add them.</div>';
+            if (totalsEl) totalsEl.innerHTML = '';
+            if (doneBtn) doneBtn.disabled = true;
+            return;
         }
 
-        function renderItems() {
-            loadItemsFromServer(function(items) {
-                var container = document.getElementById('meal-items');
-                var totalsEl = document.getElementById('meal-totals');
-                var doneBtn = document.getElementById('done-btn');
-
-                if (items.length === 0) {
-                    container.innerHTML = '<div class="meal-empty">No items yet.<br><a href="/">Go to Food Pads</a> and click foods to add them.</div>';
-                    if (totalsEl) totalsEl.innerHTML = '';
-                    if (doneBtn) doneBtn.disabled = true;
-                    return;
-                }
-
-                var html = '';
-                var totalCal = 0;
-                var totalProt = 0;
-                for (var i = 0; i < items.length; i++) {
-                    var item = items[i];
-                    var cal = Math.round(itemCal(item));
-                    var prot = Math.round(itemProt(item) * 10) / 10;
-                    totalCal += cal;
-                    totalProt += prot;
-                    var detail = item.type === 'unit' ? '1 unit' : (item.amount || 100) + 'g';
-                    html += '<div class="meal-item">';
-                    html += '<span>' + item.name + ' <span class="item-detail">' + detail + '</span></span>';
-                    html += '<span>' + cal + ' kcal</span>';
-                    html += '</div>';
-                }
-                container.innerHTML = html;
-                if (totalsEl) totalsEl.innerHTML = items.length + ' items &middot; ' + totalCal + ' kcal &middot; ' + totalProt + 'g protein';
-                updateDoneBtn();
-            });
+        var html = '';
+        var totalCal = 0;
+        var totalProt = 0;
+        for (var i = 0; i < items.length; i++) {
+            var item = items[i];
+            var cal = Math.round(itemCal(item));
+            var prot = Math.round(itemProt(item) * 10) / 10;
+            totalCal += cal;
+            totalProt += prot;
+            var detail = item.type === 'unit' ? '1 unit' : (item.amount || 100) + 'g';
+            html += '<div class="meal-item">';
+            html += '<span>' + item.name + ' <span class="item-detail">' + detail + '</span></span>';
+            html += '<span>' + cal + ' kcal</span>';
+            html += '</div>';
         }
-
-        function updateDoneBtn() {
-            var doneBtn = document.getElementById('done-btn');
-            var nameInput = document.getElementById('meal-name');
-            if (doneBtn && nameInput) {
-                doneBtn.disabled = !(cachedItems.length > 0 && nameInput.value.trim().length > 0);
+        container.innerHTML = html;
+        if (totalsEl) totalsEl.innerHTML = items.length + ' items &middot; ' + totalCal + ' kcal &middot; ' + totalProt + 'g protein';
+        updateDoneBtn();
+    });
+}
+
+function updateDoneBtn() {
+    var doneBtn = document.getElementById('done-btn');
+    var nameInput = document.getElementById('meal-name');
+    if (doneBtn && nameInput) {
+        doneBtn.disabled = !(cachedItems.length > 0 && nameInput.value.trim().length > 0);
+    }
+}
+
+function doneMeal() {
+    var nameInput = document.getElementById('meal-name');
+    var name = nameInput ? nameInput.value.trim() : '';
+    if (!name || cachedItems.length === 0) return;
+
+    var doneBtn = document.getElementById('done-btn');
+    if (doneBtn) { doneBtn.disabled = true; doneBtn.textContent = 'Saving...'; }
+
+    var xhr = new XMLHttpRequest();
+    xhr.open('POST', '/meals/create', true);
+    xhr.setRequestHeader('Content-Type', 'application/json');
+    xhr.onreadystatechange = function() {
+        if (xhr.readyState === 4) {
+            if (xhr.status === 200) {
+                sessionStorage.removeItem('mealMode');
+                sessionStorage.removeItem('mealName');
+                setServerMealMode(false);
+                window.location.href = '/?pad=meals';
+            } else {
+                alert('Error saving meal');
+                if (doneBtn) { doneBtn.disabled = false; doneBtn.textContent = 'Done'; }
             }
         }
+    };
+    xhr.send(JSON.stringify({ name: name, items: cachedItems }));
+}
+
+function cancelMeal() {
+    sessionStorage.removeItem('mealMode');
+    sessionStorage.removeItem('mealName');
+    setServerMealMode(false);
+    window.location.href = '/today';
+}
+
+function setServerMealMode(active) {
+    var xhr = new XMLHttpRequest();
+    xhr.open('POST', '/set-meal-mode', true);
+    xhr.setRequestHeader('Content-Type', 'application/json');
+    xhr.send(JSON.stringify({ active: active }));
+}
+
+window.onload = function() {
+    // Activate meal mode (local + server)
+    sessionStorage.setItem('mealMode', '1');
+    setServerMealMode(true);
+    // Restore name
+    var nameInput = document.getElementById('meal-name');
+    if (nameInput) {
+        nameInput.value = sessionStorage.getItem('mealName') || '';
+    }
+    renderItems();
+    // Poll for changes (items added from food pads)
+    setInterval(renderItems, 2000);
+};
+"""
+register_asset('meals_build.js', MEALS_BUILD_JS)
 
-        function doneMeal() {
-            var nameInput = document.getElementById('meal-name');
-            var name = nameInput ? nameInput.value.trim() : '';
-            if (!name || cachedItems.length === 0) return;
-
-            var doneBtn = document.getElementById('done-btn');
-            if (doneBtn) { doneBtn.disabled = true; doneBtn.textContent = 'Saving...'; }
-
-            var xhr = new XMLHttpRequest();
-            xhr.open('POST', '/meals/create', true);
-            xhr.setRequestHeader('Content-Type', 'application/json');
-            xhr.onreadystatechange = function() {
-                if (xhr.readyState === 4) {
-                    if (xhr.status === 200) {
-                        sessionStorage.removeItem('mealMode');
-                        sessionStorage.removeItem('mealName');
-                        setServerMealMode(false);
-                        window.location.href = '/?pad=meals';
-                    } else {
-                        alert('Error saving meal');
-                        if (doneBtn) { doneBtn.disabled = false; doneBtn.textContent = 'Done'; }
-                    }
-                }
-            };
-            xhr.send(JSON.stringify({ name: name, items: cachedItems }));
-        }
-
-        function cancelMeal() {
-            sessionStorage.removeItem('mealMode');
-            sessionStorage.removeItem('mealName');
-            setServerMealMode(false);
-            window.location.href = '/today';
-        }
-
-        function setServerMealMode(active) {
-            var xhr = new XMLHttpRequest();
-            xhr.open('POST', '/set-meal-mode', true);
-            xhr.setRequestHeader('Content-Type', 'application/json');
-            xhr.send(JSON.stringify({ active: active }));
-        }
-
-        window.onload = function() {
-            // Activate meal mode (local + server)
-            sessionStorage.setItem('mealMode', '1');
-            setServerMealMode(true);
-            // Restore name
-            var nameInput = document.getElementById('meal-name');
-            if (nameInput) {
-                nameInput.value = sessionStorage.getItem('mealName') || '';
-            }
-            renderItems();
-            // Poll for changes (items added from food pads)
-            setInterval(renderItems, 2000);
-        };
-    </script>
+HTML_MEALS_BUILD = """
+<!DOCTYPE html>
+<html>
+<head>
+    <title>Building Meal</title>
+    <meta name="viewport" content="width=device-width, initial-scale=1">
+    <link rel="stylesheet" href="{{ asset_url('base.css') }}">
+    <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css">
+    <link rel="stylesheet" href="{{ asset_url('meals_build.css') }}">
+    <script src="{{ asset_url('meals_build.js') }}"></script>
 </head>
 <body>
     <div class="header">
@@ -315,6 +308,7 @@ HTML_MEALS_BUILD = """
 </body>
 </html>
 """
+register_template('meals_build.html', HTML_MEALS_BUILD)
 
 
 def register_meals_routes(app):
@@ -323,7 +317,7 @@ def register_meals_routes(app):
 
     @app.route('/meals/build')
     def meals_build_page():
-        return render_template_string(HTML_MEALS_BUILD)
+        return render_template('meals_build.html')
 
     @app.route('/meals/create', methods=['POST'])
     def meals_create_save():
@@ -354,19 +348,22 @@ def register_meals_routes(app):
 
     @app.route('/api/meals')
     def api_meals_list():
-        meals = load_meals()
-        result = []
-        for meal in meals:
-            total_cal, total_protein = calculate_meal_totals(meal)
-            result.append({
-                'id': meal['id'],
-                'name': meal['name'],
-                'item_count': len(meal.get('items', [])),
-                'total_calories': total_cal,
-                'total_protein': total_protein,
-                'created': meal.get('created')
-            })
-        return jsonify({'meals': result})
+        def build():
+            result = []
+            for meal in load_meals():
+                total_cal, total_protein = calculate_meal_totals(meal)
+                result.append({
+                    'id': meal['id'],
+                    'name': meal['name'],
+                    'item_count': len(meal.get('items', [])),
+                    'total_calories': total_cal,
+                    'total_protein': total_protein,
+                    'created': meal.get('created')
+                })
+            return jsonify({'meals': result})
+
+        # Totals come from foods.toml, so a food edit changes them too
+        return conditional_response([meals_version(), get_config_signature()], build)
 
     @app.route('/log-meal', methods=['POST'])
     def log_meal():
@@ -395,9 +392,7 @@ def register_meals_routes(app):
         now = datetime.now()
         time_str = now.strftime('%H:%M')
 
-        log_file = get_today_log_file()
-        entries = load_today_log()
-        backfill_entry_ids(entries)
+        entries = []
 
         # Create meal header entry (zero-calorie marker)
         header_entry = {
@@ -449,10 +444,9 @@ def register_meals_routes(app):
             }
             entries.append(food_entry)
 
-        with open(log_file, 'w') as f:
-            json.dump(entries, f, indent=2)
+        append_log_entries(now.date(), entries)
 
-        mark_updated(nonce)
+        mark_updated(nonce, entries=[entry_changes(now.date(), added=entries)])
 
         total_cal, total_protein = calculate_meal_totals(meal)
         return jsonify({
@@ -7,8 +7,6 @@ Can read from local files or remote server.
 import os
 import json
 import argparse
-import random
-import string
 from datetime import date, datetime, timedelta
 
 LOGS_DIR = 'daily_logs'
@@ -38,68 +36,35 @@ def save_config(config):
 def fetch_from_server(server, days):
     """Fetch notes from remote server"""
     try:
-        import urllib.request
-        
+        from .http_cache import fetch_cached
+
         url = f"http://{server}/api/notes?days={days}"
-        with urllib.request.urlopen(url, timeout=10) as response:
-            data = json.load(response)
-            return data.get('dates', [])
+        data = json.loads(fetch_cached(url, timeout=10))
+        return data.get('dates', [])
     except Exception as e:
         print(f"Error fetching from server: {e}")
         return None
 
 
-def backfill_ids_for_file(filepath):
-    """Add IDs to entries in a log file that don't have them. Returns True if modified."""
-    try:
-        with open(filepath, 'r') as f:
-            entries = json.load(f)
-    except (json.JSONDecodeError, IOError):
-        return False
-    
-    modified = False
-    for entry in entries:
-        if 'id' not in entry or not entry['id']:
-            # Generate ID based on timestamp if available
-            if entry.get('timestamp'):
-                try:
-                    ts = datetime.fromisoformat(entry['timestamp'])
-                    timestamp_part = ts.strftime('%Y%m%d%H%M%S')
-                except:
-                    timestamp_part = datetime.now().strftime('%Y%m%d%H%M%S')
-            else:
-                timestamp_part = datetime.now().strftime('%Y%m%d%H%M%S')
-            
-            suffix = ''.join(random.choices(string.ascii_lowercase + string.digits, k=4))
-            entry['id'] = f"{timestamp_part}{suffix}"
-            modified = True
-    
-    if modified:
-        with open(filepath, 'w') as f:
-            json.dump(entries, f, indent=2)
-    
-    return modified
-
-
 def backfill_all_ids():
     """Backfill IDs for all historic log files."""
+    from .data import list_log_dates, load_log_for_date, save_log_for_date, backfill_entry_ids
+
     if not os.path.exists(LOGS_DIR):
         print("No logs directory found")
-        return 0
-    
+        return 0, 0
+
     files_modified = 0
     files_checked = 0
-    
-    for filename in sorted(os.listdir(LOGS_DIR)):
-        # Only process daily log files (YYYY-MM-DD.json), not notes files
-        if filename.endswith('.json') and not filename.endswith('_notes.json'):
-            filepath = os.path.join(LOGS_DIR, filename)
-            files_checked += 1
-            
-            if backfill_ids_for_file(filepath):
-                print(f"  ✓ Added IDs to: {filename}")
-                files_modified += 1
-    
+
+    for date_str in list_log_dates():
+        files_checked += 1
+        entries = [dict(entry) for entry in load_log_for_date(date_str)]
+        if backfill_entry_ids(entries):
+            save_log_for_date(date_str, entries)
+            print(f"  ✓ Added IDs to: {date_str}")
+            files_modified += 1
+
     return files_checked, files_modified
 
 
@@ -118,23 +83,14 @@ def load_notes_local(date_str):
 
 def load_unknowns_local(date_str):
     """Load unknown entries for a specific date from local files"""
-    log_file = os.path.join(LOGS_DIR, f'{date_str}.json')
-    if not os.path.exists(log_file):
-        return []
-    
-    try:
-        with open(log_file, 'r') as f:
-            log_entries = json.load(f)
-        
-        unknowns = []
-        for i, entry in enumerate(log_entries):
-            if 'unknown' in entry.get('food', '').lower() or 'unknown' in entry.get('name', '').lower():
-                entry['index'] = i
-                unknowns.append(entry)
-        
-        return unknowns
-    except:
-        return []
+    from .data import load_log_for_date
+
+    unknowns = []
+    for i, entry in enumerate(load_log_for_date(date_str)):
+        if 'unknown' in entry.get('food', '').lower() or 'unknown' in entry.get('name', '').lower():
+            unknowns.append(dict(entry, index=i))
+
+    return unknowns
 
 
 def display_data(dates_data):
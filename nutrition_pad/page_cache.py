@@ -0,0 +1,109 @@
+"""
+Rendered /today, /nutrition and /calories pages for past dates.
+
+Flipping back through history used to load two day logs, build the SVG
+paths and fasting gaps and render the template on every visit, although
+past days almost never change. past_page() keeps the rendered HTML in an
+LRU cache capped at PAGE_CACHE_MAX_BYTES, keyed on the route, the date,
+the versions of its log and the previous day's log (which pages compare
+against), the config version, today's date (for "Yesterday" titles) and
+any extra state the route renders from (the calories page's fasts, which
+run across midnight).
+
+A changed log or foods.toml therefore never serves a stale page, even when
+another worker process made the change. Writes in this process also drop
+the affected pages straight away (a day's own and the next day's), via
+data.day_change_listeners, so the memory goes to pages that can be used.
+"""
+import threading
+from collections import OrderedDict
+from datetime import date, timedelta
+
+from .data import _date_key, day_change_listeners, get_config_version, log_version
+from .compression import cache_compressed
+
+PAGE_CACHE_MAX_BYTES = 8 * 1024 * 1024
+
+
+class PageCache:
+    """LRU cache of rendered pages, bounded by their total size"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._pages = OrderedDict()  # key -> html; key[1] is the page's date
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            html = self._pages.get(key)
+            if html is None:
+                self.misses += 1
+                return None
+            self._pages.move_to_end(key)
+            self.hits += 1
+            return html
+
+    def put(self, key, html):
+        with self._lock:
+            if key in self._pages or len(html) > self.max_bytes:
+                return
+            self._pages[key] = html
+            self._bytes += len(html)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._pages.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def invalidate(self, date_strs):
+        """Drop every page for one of `date_strs`"""
+        with self._lock:
+            for key in [key for key in self._pages if key[1] in date_strs]:
+                self._bytes -= len(self._pages.pop(key))
+
+    def clear(self):
+        with self._lock:
+            self._pages.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {'pages': len(self._pages), 'bytes': self._bytes,
+                    'hits': self.hits, 'misses': self.misses}
+
+
+page_cache = PageCache(PAGE_CACHE_MAX_BYTES)
+
+
+def _hashable(version):
+    # JSON-store log versions are lists
+    return tuple(version) if isinstance(version, list) else version
+
+
+def past_page(route, target_date, render, extra=None):
+    """HTML for `route` on `target_date`: render() for today, cached for past dates.
+
+    `extra` is any other hashable state the page is rendered from.
+    """
+    today = date.today()
+    if target_date >= today:
+        return render()
+    cache_compressed()
+    previous = target_date - timedelta(days=1)
+    key = (route, target_date.isoformat(), today.isoformat(), _hashable(log_version(target_date)),
+           _hashable(log_version(previous)), get_config_version(), extra)
+    html = page_cache.get(key)
+    if html is None:
+        html = render()
+        page_cache.put(key, html)
+    return html
+
+
+def invalidate_day(target_date):
+    """Drop the pages that read `target_date`'s log: its own and the next day's"""
+    day = date.fromisoformat(_date_key(target_date))
+    page_cache.invalidate({day.isoformat(), (day + timedelta(days=1)).isoformat()})
+
+
+day_change_listeners.append(invalidate_day)
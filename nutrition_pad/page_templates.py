@@ -0,0 +1,72 @@
+"""
+Page templates, compiled once instead of on every request.
+
+render_template_string() makes Jinja lex and compile the page source each
+time it is called. Instead, modules register their HTML strings here by
+name when they are imported, the app's Jinja environment loads them from
+memory, and routes render them with flask.render_template(), so each page
+is compiled once and then served from the environment's template cache.
+
+With a bytecode cache directory (`nutrition-pad --template-cache DIR`)
+the compiled code is also kept on disk, so restarted servers and new
+worker processes skip compiling too.
+"""
+import os
+
+from jinja2 import BaseLoader, ChoiceLoader, FileSystemBytecodeCache, TemplateNotFound
+
+# name -> source; names end in .html so Flask autoescapes them as it did
+# for render_template_string()
+_templates = {}
+
+
+def register_template(name, source):
+    """Make `source` available to render_template() as `name`"""
+    _templates[name] = source
+    return name
+
+
+def registered_templates():
+    return sorted(_templates)
+
+
+class RegisteredTemplateLoader(BaseLoader):
+    """Jinja loader for the templates passed to register_template()"""
+
+    def get_source(self, environment, template):
+        try:
+            source = _templates[template]
+        except KeyError:
+            raise TemplateNotFound(template)
+        # Only checked when templates auto-reload (debug mode)
+        return source, None, lambda: _templates.get(template) is source
+
+    def list_templates(self):
+        return registered_templates()
+
+
+def setup_templates(app, bytecode_cache_dir=None):
+    """Serve registered templates from the app's Jinja environment.
+
+    Templates in the app's templates folder still load after them. Pass
+    `bytecode_cache_dir` to keep compiled templates on disk as well; set
+    it before any template is compiled.
+    """
+    env = app.jinja_env
+    if not isinstance(env.loader, ChoiceLoader) or \
+            not isinstance(env.loader.loaders[0], RegisteredTemplateLoader):
+        env.loader = ChoiceLoader([RegisteredTemplateLoader(), env.loader])
+    if bytecode_cache_dir:
+        os.makedirs(bytecode_cache_dir, exist_ok=True)
+        env.bytecode_cache = FileSystemBytecodeCache(bytecode_cache_dir)
+
+
+def compile_templates(app):
+    """Compile every registered template now (e.g. before forking workers).
+
+    Returns how many were compiled.
+    """
+    names = registered_templates()
+    for name in names:
+        app.jinja_env.get_template(name)
+    return len(names)
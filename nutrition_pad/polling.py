@@ -1,26 +1,82 @@
 """
-Long polling functionality for real-time updates across devices.
+Long polling and Server-Sent Events for real-time updates across devices.
 Handles food log updates and amount synchronization.
 """
+import json
 import time
 import threading
+from datetime import date
 from flask import request, jsonify, Response
 
-# Long polling update tracking
-last_update = time.time()
-update_lock = threading.Lock()
-update_event = threading.Event()
-current_nonce = None  # Store the nonce from the last update
-current_amount = 100.0  # Server-side amount state - ensure it's a float
-meal_mode_active = False  # Server-side meal mode state - shared across all clients
-meal_items = []  # Server-side meal items - shared across all clients
+from .assets import register_asset, send_bundle
+from .live_state import LocalLiveState
+
+# Live state shared by every device (amount, meal mode and items, last
+# update time and nonce) lives in a backend from live_state.py; the
+# default keeps it in this process, SharedLiveState across worker
+# processes. Every change bumps its version and wakes all waiters; a
+# poller remembers the version it saw and waits for it to move, so no
+# update can slip past.
+live_state = LocalLiveState()
+POLL_TIMEOUT = 30  # seconds a poll waits before a keepalive response
+# Callables run after every update, including ones made by other worker
+# processes (e.g. to wake the asyncio server's waiters); they get the new
+# version and must not block
+update_listeners = []
+
+# Server-Sent Events (/events). Each update also records
+# (version, type, nonce, last_update, delta) so a stream can tell its client what
+# changed, and a reconnecting client (Last-Event-ID) can be replayed what it missed.
+# Polls from a client that saw an older version get the merged change set.
+EVENT_TYPES = ('log', 'amount', 'meal_mode', 'meal_items', 'config')
+# What each event type changes, as named in poll change sets
+EVENT_FIELDS = {
+    'log': ('entries',),
+    'amount': ('current_amount',),
+    'meal_mode': ('meal_mode', 'meal_items'),
+    'meal_items': ('meal_items',),
+    'config': ('config',),
+}
+SSE_HEARTBEAT_SECONDS = 15  # comment line so proxies keep the connection
+SSE_MAX_SECONDS = 300  # streams end after this; EventSource reconnects
+SSE_RETRY_MS = 3000
+
+# /set-amount coalescing. Slider drags post many amounts; they are
+# broadcast at most once per window (the first straight away, the last
+# when the window closes), so other tablets see a few updates per second
+# rather than one per post. Per client, the poll and stream responses
+# that carried a new amount (sent) are counted against the posted
+# amounts those responses folded in (suppressed).
+#
+# The window and the pending amount are per process: with --workers, posts
+# that land on different workers are coalesced separately, so a drag may
+# be broadcast up to once per window per worker. Each worker still ends
+# on the last amount it received, and the broadcasts go through the shared
+# live state in the order they are made.
+AMOUNT_COALESCE_SECONDS = 0.15
+CLIENT_STATS_TTL = 600  # forget clients idle this long
+_amount_lock = threading.Lock()
+_pending_amount = None  # (amount, nonce) waiting for the window to close
+_pending_posts = 0  # posts since the last broadcast
+_amount_flush_timer = None
+_last_amount_broadcast = 0.0
+_client_stats = {}
+_client_stats_lock = threading.Lock()
 
 # JavaScript for polling functionality
 POLLING_JAVASCRIPT = """
 var lastUpdate = parseFloat(localStorage.getItem('lastUpdate') || '0');
 var lastAmountUpdate = parseFloat(localStorage.getItem('lastAmountUpdate') || '0');
+var lastVersion = null; // server update version from the last poll response
 var isPolling = false;
 var myNonce = null;
+var myRecentNonces = []; // nonces of this device's recent updates (event stream)
+var eventSource = null;
+// Identifies this tab in the server's amount fan-out counters (/api/polling/stats)
+var pollClientId = sessionStorage.getItem('pollClientId') ||
+    (Date.now().toString(36) + Math.random().toString(36).substr(2, 6));
+sessionStorage.setItem('pollClientId', pollClientId);
+var EVENT_STREAM_DEFAULT = false; // served as true when the server runs with --event-stream
 var debugMode = false; // Will be set by main template
 
 // Keepalive tracking - if no poll response for this long, refresh the page
@@ -47,6 +103,10 @@ function debug(msg) {
 }
 
 function checkKeepalive() {
+    if (eventSource && eventSource.readyState === EventSource.OPEN) {
+        // Heartbeats are comments, which scripts never see
+        lastPollResponse = Date.now();
+    }
     var timeSinceLastPoll = Date.now() - lastPollResponse;
     if (timeSinceLastPoll > KEEPALIVE_TIMEOUT) {
         debug('KEEPALIVE TIMEOUT! No poll response for ' + Math.round(timeSinceLastPoll/1000) + 's - refreshing page');
@@ -59,6 +119,118 @@ function generateNonce() {
     return Date.now().toString() + Math.random().toString(36).substr(2);
 }
 
+// --- Change sets ---
+// Poll responses (once the page knows a version) and stream log events
+// carry 'changes': the fields that changed, the food log entries added
+// and removed per day, and today's recomputed stats. A page patches food
+// log changes in place if it defines applyLogChanges(changes), returning
+// false when it can't; elements with a data-stat attribute are then
+// refreshed from the stats (data-suffix is appended, data-signed="N"
+// shows a signed delta with N decimals and its colour).
+function patchStats(stats) {
+    var elements = document.querySelectorAll('[data-stat]');
+    for (var i = 0; i < elements.length; i++) {
+        var el = elements[i];
+        var value = stats[el.getAttribute('data-stat')];
+        if (typeof value === 'undefined') {
+            continue;
+        }
+        var decimals = el.getAttribute('data-signed');
+        if (value === null || (decimals === '0' && value === 0)) {
+            el.style.display = 'none';
+            continue;
+        }
+        el.style.display = '';
+        if (decimals !== null) {
+            el.style.color = value < 0 ? '#4ecdc4' : '#ff6b6b';
+            value = (value >= 0 ? '+' : '') + value.toFixed(parseInt(decimals));
+        }
+        el.textContent = value + (el.getAttribute('data-suffix') || '');
+    }
+}
+
+// Returns true if the page now shows the change set
+function applyChanges(changes) {
+    if (changes.reload) {
+        return false;
+    }
+    if (changes.entries) {
+        if (typeof window.applyLogChanges !== 'function' || !window.applyLogChanges(changes)) {
+            return false;
+        }
+    }
+    if (changes.stats) {
+        patchStats(changes.stats);
+    }
+    return true;
+}
+
+// A food log (or config) change: patch the page from the change set if
+// there is one, else reload unless it was this device's own update.
+// Returns true if the page is about to reload.
+function handleLogUpdate(data) {
+    if (data.timestamp <= lastUpdate) {
+        return false;
+    }
+    lastUpdate = data.timestamp;
+    localStorage.setItem('lastUpdate', lastUpdate.toString());
+
+    var mine = data.nonce && myNonce && data.nonce === myNonce;
+    if (mine) {
+        myNonce = null;
+    }
+    if (data.changes && applyChanges(data.changes)) {
+        debug('Patched in place (nonce: ' + data.nonce + ')');
+        if (data.changes.fields.indexOf('current_amount') !== -1 && !isMyNonce(data.nonce) &&
+                typeof updateAmountDisplay === 'function') {
+            updateAmountDisplay(data.current_amount);
+        }
+        return false;
+    }
+    if (mine) {
+        debug('Skipping refresh - this was my update (nonce: ' + data.nonce + ')');
+        return false;
+    }
+    debug('Refreshing - update from other device (nonce: ' + data.nonce + ')');
+    var itemCountEl = document.querySelector('.item-count');
+    if (itemCountEl && typeof data.item_count !== 'undefined') {
+        itemCountEl.textContent = data.item_count + ' items logged today';
+    }
+
+    // Update amount display too
+    if (typeof updateAmountDisplay === 'function' && typeof data.current_amount !== 'undefined') {
+        updateAmountDisplay(data.current_amount);
+    }
+
+    setTimeout(function() {
+        window.location.reload();
+    }, 1000);
+    return true;
+}
+
+function applyMealMode(active) {
+    var mealBg = 'linear-gradient(135deg, #1a2a2e 0%, #163e3e 50%, #0f4660 100%)';
+    var normalBg = 'linear-gradient(135deg, #1a1a2e 0%, #16213e 50%, #0f3460 100%)';
+    if (active) {
+        document.body.style.background = mealBg;
+        sessionStorage.setItem('mealMode', '1');
+        // Update local mealMode variable if it exists (food pads page)
+        if (typeof window.setMealModeFromServer === 'function') {
+            window.setMealModeFromServer(true);
+        }
+        var ind = document.getElementById('meal-mode-indicator');
+        if (ind) ind.style.display = 'block';
+    } else {
+        document.body.style.background = normalBg;
+        sessionStorage.removeItem('mealMode');
+        if (typeof window.setMealModeFromServer === 'function') {
+            window.setMealModeFromServer(false);
+        }
+        var ind = document.getElementById('meal-mode-indicator');
+        if (ind) ind.style.display = 'none';
+    }
+}
+
 function poll() {
     if (isPolling) {
         debug('Poll already running, skipping');
@@ -69,7 +241,9 @@ function poll() {
     debug('Starting poll, lastUpdate: ' + lastUpdate + ', lastAmountUpdate: ' + lastAmountUpdate);
 
     var xhr = new XMLHttpRequest();
-    xhr.open('GET', '/poll-updates?since=' + lastUpdate + '&amount_since=' + lastAmountUpdate, true);
+    xhr.open('GET', '/poll-updates?since=' + lastUpdate + '&amount_since=' + lastAmountUpdate +
+             (lastVersion !== null ? '&version=' + lastVersion : '') +
+             '&client=' + encodeURIComponent(pollClientId), true);
 
     // Set timeout on the XHR - if it hangs for 45 seconds, refresh the page
     xhr.timeout = 45000;
@@ -98,6 +272,9 @@ function poll() {
                     var data = JSON.parse(xhr.responseText);
                     debug('Poll response: updated=' + data.updated + ', current_amount=' + data.current_amount +
                           (data.server_timestamp ? ', server_ts=' + data.server_timestamp : ''));
+                    if (typeof data.version !== 'undefined') {
+                        lastVersion = data.version;
+                    }
 
                     // Check if server is stuck by seeing if its timestamp changes between responses
                     // (We're NOT comparing server time to client time - just checking if it advances)
@@ -119,30 +296,8 @@ function poll() {
                         }
                     }
 
-                    if (data.updated && data.timestamp > lastUpdate) {
-                        lastUpdate = data.timestamp;
-                        localStorage.setItem('lastUpdate', lastUpdate.toString());
-
-                        if (data.nonce && myNonce && data.nonce === myNonce) {
-                            debug('Skipping refresh - this was my update (nonce: ' + myNonce + ')');
-                            myNonce = null;
-                        } else {
-                            debug('Refreshing - update from other device (nonce: ' + data.nonce + ')');
-                            var itemCountEl = document.querySelector('.item-count');
-                            if (itemCountEl) {
-                                itemCountEl.textContent = data.item_count + ' items logged today';
-                            }
-
-                            // Update amount display too
-                            if (typeof updateAmountDisplay === 'function') {
-                                updateAmountDisplay(data.current_amount);
-                            }
-
-                            setTimeout(function() {
-                                window.location.reload();
-                            }, 1000);
-                            return;
-                        }
+                    if (data.updated && handleLogUpdate(data)) {
+                        return;
                     }
 
                     if (!data.updated) {
@@ -151,26 +306,7 @@ function poll() {
 
                     // Handle meal mode changes from server
                     if (typeof data.meal_mode !== 'undefined') {
-                        var mealBg = 'linear-gradient(135deg, #1a2a2e 0%, #163e3e 50%, #0f4660 100%)';
-                        var normalBg = 'linear-gradient(135deg, #1a1a2e 0%, #16213e 50%, #0f3460 100%)';
-                        if (data.meal_mode) {
-                            document.body.style.background = mealBg;
-                            sessionStorage.setItem('mealMode', '1');
-                            // Update local mealMode variable if it exists (food pads page)
-                            if (typeof window.setMealModeFromServer === 'function') {
-                                window.setMealModeFromServer(true);
-                            }
-                            var ind = document.getElementById('meal-mode-indicator');
-                            if (ind) ind.style.display = 'block';
-                        } else {
-                            document.body.style.background = normalBg;
-                            sessionStorage.removeItem('mealMode');
-                            if (typeof window.setMealModeFromServer === 'function') {
-                                window.setMealModeFromServer(false);
-                            }
-                            var ind = document.getElementById('meal-mode-indicator');
-                            if (ind) ind.style.display = 'none';
-                        }
+                        applyMealMode(data.meal_mode);
                     }
                 } catch (e) {
                     debug('JSON parse error: ' + e.message);
@@ -185,8 +321,88 @@ function poll() {
     xhr.send();
 }
 
+// --- Server-Sent Events (/events) ---
+// Opt in with ?stream=1 on any page (remembered in localStorage, ?stream=0
+// turns it off) or start the server with --event-stream. Long polling is
+// used when EventSource is missing or the stream never connects.
+function eventStreamWanted() {
+    var match = /[?&]stream=([01])/.exec(window.location.search);
+    if (match) {
+        localStorage.setItem('eventStream', match[1]);
+    }
+    var preference = localStorage.getItem('eventStream');
+    if (preference !== null) {
+        return preference === '1';
+    }
+    return EVENT_STREAM_DEFAULT;
+}
+
+function isMyNonce(nonce) {
+    return !!nonce && myRecentNonces.indexOf(nonce) !== -1;
+}
+
+function startEventStream() {
+    var opened = false;
+    eventSource = new EventSource('/events?since=' + lastUpdate +
+                                  '&client=' + encodeURIComponent(pollClientId));
+
+    eventSource.onopen = function() {
+        opened = true;
+        lastPollResponse = Date.now();
+        debug('Event stream open');
+    };
+
+    eventSource.onerror = function() {
+        if (!opened) {
+            debug('Event stream unavailable - falling back to long polling');
+            eventSource.close();
+            eventSource = null;
+            poll();
+        } else {
+            // EventSource reconnects by itself and sends Last-Event-ID
+            debug('Event stream interrupted, reconnecting');
+        }
+    };
+
+    function on(type, handler) {
+        eventSource.addEventListener(type, function(e) {
+            lastPollResponse = Date.now();
+            try {
+                var data = JSON.parse(e.data);
+            } catch (err) {
+                debug('Event parse error: ' + err.message);
+                return;
+            }
+            debug('Event ' + type + ' #' + e.lastEventId + ' (nonce: ' + data.nonce + ')');
+            handler(data);
+        });
+    }
+
+    on('log', handleLogUpdate);
+    on('config', handleLogUpdate);
+    on('amount', function(data) {
+        lastUpdate = Math.max(lastUpdate, data.timestamp);
+        localStorage.setItem('lastUpdate', lastUpdate.toString());
+        if (!isMyNonce(data.nonce) && typeof updateAmountDisplay === 'function') {
+            updateAmountDisplay(data.current_amount);
+        }
+    });
+    on('meal_mode', function(data) {
+        applyMealMode(data.meal_mode);
+    });
+    on('meal_items', function(data) {
+        if (typeof window.setMealItemsFromServer === 'function') {
+            window.setMealItemsFromServer(data.meal_items);
+        }
+    });
+}
+
 function startLongPolling() {
-    poll();
+    if (window.EventSource && eventStreamWanted()) {
+        startEventStream();
+    } else {
+        poll();
+    }
     // Check keepalive every 10 seconds
     setInterval(checkKeepalive, 10000);
 }
@@ -194,6 +410,10 @@ function startLongPolling() {
 // Expose functions that main.js might need
 function setMyNonce(nonce) {
     myNonce = nonce;
+    myRecentNonces.push(nonce);
+    if (myRecentNonces.length > 20) {
+        myRecentNonces.shift();
+    }
     debug('Set my nonce to: ' + nonce);
 }
 
@@ -202,85 +422,323 @@ function setDebugMode(enabled) {
 }
 """
 
-def mark_updated(nonce=None):
-    """Mark that data has been updated for long polling"""
-    global last_update, current_nonce
-    with update_lock:
-        last_update = time.time()
-        current_nonce = nonce
-    update_event.set()
-    threading.Timer(0.1, update_event.clear).start()
+def _notify_listeners(version):
+    for listener in update_listeners:
+        listener(version)
+
+live_state.on_change = _notify_listeners
+
+def set_live_state(backend):
+    """Replace the live state backend (call before serving requests)"""
+    global live_state, _poll_snapshot
+    live_state.close()
+    backend.on_change = _notify_listeners
+    live_state = backend
+    _poll_snapshot = None
+
+def close_live_state():
+    """Release the live state backend's resources (process shutdown)"""
+    live_state.close()
+
+def get_live_state():
+    """A copy of the live state, with its 'version'"""
+    return live_state.read()
+
+def get_update_version():
+    """Current update version, for waiters that track it themselves"""
+    return live_state.version()
+
+def wait_for_update(version, timeout):
+    """Block until the update version moves past `version` or timeout.
+
+    Returns the version at wakeup (equal to `version` on timeout).
+    """
+    return live_state.wait(version, timeout)
+
+def _mark(event_type, nonce, delta=None, **changes):
+    """Record an update (setting last_update and current_nonce) and wake pollers"""
+    def change(state):
+        state.update(changes, last_update=time.time(), current_nonce=nonce)
+    return live_state.update(change, event_type, nonce, delta)
+
+def entry_changes(day, added=(), removed=()):
+    """One day's food log changes for mark_updated(): entries added, ids removed"""
+    return {'date': str(day), 'added': list(added), 'removed': list(removed)}
+
+def mark_updated(nonce=None, event_type='log', entries=None):
+    """Mark that data has been updated for long polling.
+
+    event_type is 'log' for food log/notes changes and 'config' when the
+    food config was rewritten; /events streams it to clients.
+
+    entries is a list of entry_changes() describing a log change, which
+    clients patch into their pages; without it they reload.
+    """
+    _mark(event_type, nonce, {'entries': entries} if entries is not None else None)
 
 def mark_amount_updated(nonce=None):
     """Mark that amount has been updated"""
-    global last_update, current_nonce
-    with update_lock:
-        last_update = time.time()
-        current_nonce = nonce
-    # Use the same event mechanism to wake up long polling requests
-    update_event.set()
-    threading.Timer(0.1, update_event.clear).start()
+    _mark('amount', nonce)
+
+def change_set(events, stats):
+    """Merge events into the change set pages patch themselves from.
+
+    'fields' names what changed (live state fields, plus 'entries' for the
+    food log and 'config'); 'entries' is the entry_changes() per day,
+    with entries added then removed in between left out; 'stats' (today's
+    calculate_live_stats()) comes with log changes. 'reload' is set when
+    the change can't be patched: the food config changed, a log change
+    had no details, or `events` is None because some have been dropped.
+    """
+    if events is None:
+        return {'fields': [], 'reload': True}
+    fields = []
+    days = {}
+    reload = False
+    for event in events:
+        event_type, delta = event[1], event[4]
+        for field in EVENT_FIELDS[event_type]:
+            if field not in fields:
+                fields.append(field)
+        if event_type == 'config' or (event_type == 'log' and not delta):
+            reload = True
+        elif event_type == 'log':
+            for change in delta['entries']:
+                day = days.setdefault(change['date'], {'date': change['date'], 'added': {}, 'removed': []})
+                for entry in change['added']:
+                    day['added'][entry.get('id')] = entry
+                for entry_id in change['removed']:
+                    if day['added'].pop(entry_id, None) is None:
+                        day['removed'].append(entry_id)
+    changes = {'fields': fields, 'reload': reload}
+    if 'entries' in fields and not reload:
+        changes['entries'] = [dict(day, added=list(day['added'].values())) for day in days.values()]
+        changes['stats'] = stats
+    return changes
+
+class PollSnapshot:
+    """The /poll-updates payload for one live state version.
+
+    Built once per version (and day) and shared by every poller woken for
+    it, with both response bodies already serialized; only the
+    per-response server_timestamp (and the change set since the client's
+    version, serialized once per version it is asked for) is appended
+    when answering.
+    """
+
+    MAX_CHANGE_SETS = 16
+
+    def __init__(self, state, item_count, total_protein, stats=None):
+        self.version = state['version']
+        self.day = date.today()
+        self.last_update = state['last_update']
+        self.item_count = item_count
+        self.total_protein = total_protein
+        self.stats = stats
+        self.state = state
+        self._change_sets = {}
+        updated = {
+            'updated': True,
+            'timestamp': state['last_update'],
+            'item_count': item_count,
+            'total_protein': total_protein,
+            'nonce': state['current_nonce'],
+            'current_amount': state['current_amount'],
+            'meal_mode': state['meal_mode'],
+            'meal_items': state['meal_items'],
+            'version': state['version']
+        }
+        # No update, but send server timestamp as keepalive
+        keepalive = {
+            'updated': False,
+            'amount_changed': False,
+            'current_amount': state['current_amount'],
+            'meal_mode': state['meal_mode'],
+            'meal_items': state['meal_items'],
+            'version': state['version']
+        }
+        # Without the closing brace, so server_timestamp can be appended
+        self._updated_json = json.dumps(updated)[:-1]
+        self._keepalive_json = json.dumps(keepalive)[:-1]
+
+    def is_current(self):
+        return self.version == live_state.version() and self.day == date.today()
+
+    def changed_since(self, since):
+        """Whether a client that last saw an update at `since` should hear about this one"""
+        return self.last_update > since
+
+    def changes_json(self, client_version):
+        """The serialized change set from `client_version` to this version"""
+        cached = self._change_sets.get(client_version)
+        if cached is None:
+            _, events = live_state.events_since(client_version)
+            if events is not None:
+                events = [event for event in events if event[0] <= self.version]
+            cached = json.dumps(change_set(events, self.stats))
+            if len(self._change_sets) < self.MAX_CHANGE_SETS:
+                self._change_sets[client_version] = cached
+        return cached
+
+    def body(self, since, client_version=None):
+        """The JSON response for a client that last saw an update at `since`
+        and, if given, the update version `client_version`"""
+        prefix = self._updated_json if self.changed_since(since) else self._keepalive_json
+        if client_version is not None and client_version != self.version:
+            prefix += ', "changes": ' + self.changes_json(client_version)
+        return f'{prefix}, "server_timestamp": {time.time()!r}}}'
+
+
+_poll_snapshot = None
+_poll_snapshot_lock = threading.Lock()
+
+def current_poll_snapshot():
+    """The shared PollSnapshot if it is still current, else None (no I/O)"""
+    snapshot = _poll_snapshot
+    if snapshot is not None and snapshot.is_current():
+        return snapshot
+    return None
+
+def poll_snapshot():
+    """The PollSnapshot for the current live state.
+
+    Single flight: when many pollers wake for one update, the first builds
+    the snapshot (reading today's log) while the rest wait for it. The
+    live state backend's lock is not held during the file I/O.
+    """
+    global _poll_snapshot
+    # Import here to avoid circular imports
+    from .data import calculate_daily_item_count, calculate_daily_total, calculate_live_stats
+
+    snapshot = current_poll_snapshot()
+    if snapshot is not None:
+        return snapshot
+    with _poll_snapshot_lock:
+        snapshot = current_poll_snapshot()
+        if snapshot is None:
+            state = live_state.read()
+            snapshot = PollSnapshot(state, calculate_daily_item_count(), calculate_daily_total(),
+                                    calculate_live_stats())
+            _poll_snapshot = snapshot
+        return snapshot
 
 def poll_updates():
-    """Long polling endpoint using threading events"""
-    # Import here to avoid circular imports
-    from .data import calculate_daily_item_count, calculate_daily_total
-    
+    """Long polling endpoint, woken by the live state backend"""
     since = float(request.args.get('since', 0))
-    amount_since = float(request.args.get('amount_since', 0))
-    timeout = 30
-    
-    print(f"[DEBUG] Poll request: since={since}, amount_since={amount_since}, current_amount={current_amount}")
-    
-    with update_lock:
-        if last_update > since:
-            response = {
-                'updated': last_update > since,
-                'timestamp': last_update,
-                'item_count': calculate_daily_item_count(),
-                'total_protein': calculate_daily_total(),
-                'nonce': current_nonce,
-                'current_amount': current_amount,
-                'server_timestamp': time.time(),
-                'meal_mode': meal_mode_active,
-                'meal_items': meal_items
-            }
-            print(f"[DEBUG] Immediate response: {response}")
-            return jsonify(response)
-    
-    event_occurred = update_event.wait(timeout)
-    
-    if event_occurred:
-        with update_lock:
-            if last_update > since:
-                response = {
-                    'updated': last_update > since,
-                    'timestamp': last_update,
-                    'item_count': calculate_daily_item_count(),
-                    'total_protein': calculate_daily_total(),
-                    'nonce': current_nonce,
-                    'current_amount': current_amount,
-                    'server_timestamp': time.time(),
-                    'meal_mode': meal_mode_active,
-                    'meal_items': meal_items
-                }
-                print(f"[DEBUG] Event response: {response}")
-                return jsonify(response)
-    
-    # No update, but send server timestamp as keepalive
-    return jsonify({
-        'updated': False,
-        'amount_changed': False,
-        'current_amount': current_amount,
-        'server_timestamp': time.time(),
-        'meal_mode': meal_mode_active,
-        'meal_items': meal_items
-    })
+    # Update version from the client's last response; a different one means
+    # something (e.g. meal mode) changed between its polls
+    client_version = request.args.get('version', type=int)
+    client = request.args.get('client') or request.remote_addr
+
+    print(f"[DEBUG] Poll request: since={since}, version={client_version}")
+
+    # Version read before checking, so an update landing in between either
+    # shows up in the check or wakes the wait at once. A client that last
+    # saw a different version missed a change between polls and is
+    # answered straight away.
+    version = get_update_version()
+    snapshot = poll_snapshot()
+    if snapshot.changed_since(since):
+        print(f"[DEBUG] Immediate response: version {snapshot.version}")
+    elif client_version is None or client_version == version:
+        if wait_for_update(version, POLL_TIMEOUT) > version:
+            snapshot = poll_snapshot()
+            if snapshot.changed_since(since):
+                print(f"[DEBUG] Event response: version {snapshot.version}")
+
+    count_amount_delivery(client, snapshot.state)
+    return Response(snapshot.body(since, client_version), mimetype='application/json')
+
+def format_events(events, client=None):
+    """SSE text for a batch of events.
+
+    Only the latest amount/meal event of a burst is sent, since each
+    carries the full current state; every log and config event is sent so
+    clients can tell their own updates (by nonce) from other devices', and
+    log events carry their own change set.
+    """
+    snapshot = poll_snapshot()
+    state = snapshot.state
+    amount, meal_mode, items = state['current_amount'], state['meal_mode'], state['meal_items']
+    latest = {event[1]: event[0] for event in events}
+    chunks = []
+    for event in events:
+        version, event_type, nonce, timestamp = event[:4]
+        if event_type not in ('log', 'config') and latest[event_type] != version:
+            continue
+        data = {'nonce': nonce, 'timestamp': timestamp, 'server_timestamp': time.time()}
+        if event_type == 'log':
+            data.update(item_count=snapshot.item_count, total_protein=snapshot.total_protein,
+                        current_amount=amount, changes=change_set([event], snapshot.stats))
+        elif event_type == 'amount':
+            data['current_amount'] = amount
+        elif event_type == 'meal_mode':
+            data.update(meal_mode=meal_mode, meal_items=items)
+        elif event_type == 'meal_items':
+            data['meal_items'] = items
+        chunks.append(f"id: {version}\nevent: {event_type}\ndata: {json.dumps(data)}\n\n")
+    count_amount_delivery(client, state)
+    return ''.join(chunks)
+
+def stream_start(last_event_id=None, since=None):
+    """(version, events to send first) for a new /events connection.
+
+    The SSE id is the update version, so a client reconnecting with
+    Last-Event-ID is replayed what it missed; if that has already left
+    the event backlog it gets a log event (with no nonce), which reloads it.
+    A new client (no Last-Event-ID) that last saw an update older than
+    `since` gets a log event straight away, as /poll-updates would answer.
+    """
+    state = live_state.read()
+    seen = state['version']
+    if last_event_id is not None:
+        seen, missed = live_state.events_since(last_event_id)
+    elif since is not None and state['last_update'] > since:
+        missed = None
+    else:
+        missed = []
+    if missed is None:
+        nonce = state['current_nonce'] if last_event_id is None else None
+        missed = [(seen, 'log', nonce, state['last_update'], None)]
+    return seen, missed
+
+def stream_next(seen):
+    """(version, events) for a stream woken after `seen`"""
+    version, events = live_state.events_since(seen)
+    if events is None:
+        events = [(version, 'log', None, live_state.read()['last_update'], None)]
+    return version, events
+
+def event_stream(last_event_id=None, since=None, client=None,
+                 heartbeat=SSE_HEARTBEAT_SECONDS, max_seconds=SSE_MAX_SECONDS):
+    """Generate the /events text stream"""
+    seen, missed = stream_start(last_event_id, since)
+    yield f"retry: {SSE_RETRY_MS}\n\n"
+    if missed:
+        yield format_events(missed, client)
+
+    deadline = time.time() + max_seconds
+    while True:
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            return
+        if wait_for_update(seen, min(heartbeat, remaining)) == seen:
+            yield ": heartbeat\n\n"
+            continue
+        seen, events = stream_next(seen)
+        yield format_events(events, client)
+
+def stream_events():
+    """Server-Sent Events endpoint: typed events over one long-lived connection"""
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+    since = request.args.get('since', type=float)
+    client = request.args.get('client') or request.remote_addr
+    return Response(event_stream(last_event_id, since, client),
+                    mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 def set_amount():
     """Set the current amount"""
-    global current_amount
-    
     data = request.json
     if not data or 'amount' not in data:
         return jsonify({'error': 'No amount provided'}), 400
@@ -292,62 +750,139 @@ def set_amount():
         if new_amount < 0 or new_amount > 500:
             return jsonify({'error': 'Amount must be between 0 and 500'}), 400
         
-        old_amount = current_amount
-        with update_lock:
-            current_amount = new_amount
-        
-        print(f"[DEBUG] Amount changed from {old_amount} to {current_amount} (nonce: {nonce})")
-        mark_amount_updated(nonce)  # Pass nonce to mark_amount_updated
-        print(f"[DEBUG] Amount update marked, new timestamp: {last_update}")
+        # Amount, time and nonce change together, in one (coalesced) update
+        update_amount(new_amount, nonce)
         
-        return jsonify({'status': 'success', 'amount': current_amount})
+        return jsonify({'status': 'success', 'amount': new_amount})
     except (ValueError, TypeError):
         return jsonify({'error': 'Invalid amount'}), 400
 
+def _broadcast_amount(amount, nonce):
+    """Publish an amount with the posts it stands for (hold _amount_lock)"""
+    global _pending_posts, _last_amount_broadcast
+    posts, _pending_posts = _pending_posts, 0
+
+    def change(state):
+        state.update(current_amount=amount, last_update=time.time(), current_nonce=nonce,
+                     amount_updates=state.get('amount_updates', 0) + posts,
+                     amount_broadcasts=state.get('amount_broadcasts', 0) + 1)
+    live_state.update(change, 'amount', nonce)
+    _last_amount_broadcast = time.monotonic()
+
+def _flush_amount():
+    global _pending_amount, _amount_flush_timer
+    with _amount_lock:
+        pending, _pending_amount = _pending_amount, None
+        _amount_flush_timer = None
+        if pending is not None:
+            _broadcast_amount(*pending)
+
+def update_amount(amount, nonce=None):
+    """Set the amount, coalescing bursts into one broadcast per window.
+
+    A post outside a window is broadcast at once; later posts inside it
+    only replace the pending value, which is broadcast when it closes.
+    """
+    global _pending_amount, _pending_posts, _amount_flush_timer
+    with _amount_lock:
+        _pending_posts += 1
+        wait = _last_amount_broadcast + AMOUNT_COALESCE_SECONDS - time.monotonic()
+        if _amount_flush_timer is None and wait <= 0:
+            _broadcast_amount(amount, nonce)
+            return
+        _pending_amount = (amount, nonce)
+        if _amount_flush_timer is None:
+            _amount_flush_timer = threading.Timer(wait, _flush_amount)
+            _amount_flush_timer.daemon = True
+            _amount_flush_timer.start()
+
 def get_current_amount():
-    """Get the current amount value"""
-    return current_amount
+    """Get the current amount value (including one still waiting to be broadcast)"""
+    pending = _pending_amount
+    if pending is not None:
+        return pending[0]
+    return live_state.read()['current_amount']
+
+def count_amount_delivery(client, state):
+    """Update a client's amount sent/suppressed counters for a response built from `state`"""
+    if not client:
+        return
+    updates = state.get('amount_updates', 0)
+    broadcasts = state.get('amount_broadcasts', 0)
+    now = time.time()
+    with _client_stats_lock:
+        stats = _client_stats.get(client)
+        if stats is None:
+            if len(_client_stats) > 100:
+                for key in [k for k, v in _client_stats.items() if now - v['last_seen'] > CLIENT_STATS_TTL]:
+                    del _client_stats[key]
+            _client_stats[client] = {'amount_sent': 0, 'amount_suppressed': 0,
+                                     'updates_seen': updates, 'broadcasts_seen': broadcasts,
+                                     'last_seen': now}
+            return
+        if broadcasts > stats['broadcasts_seen']:
+            stats['amount_sent'] += 1
+            stats['amount_suppressed'] += max(updates - stats['updates_seen'] - 1, 0)
+        stats.update(updates_seen=updates, broadcasts_seen=broadcasts, last_seen=now)
+
+def get_polling_stats():
+    """Amount fan-out counters: overall, and per client seen in the last CLIENT_STATS_TTL"""
+    state = live_state.read()
+    updates = state.get('amount_updates', 0) + _pending_posts
+    broadcasts = state.get('amount_broadcasts', 0)
+    now = time.time()
+    with _client_stats_lock:
+        clients = {client: {'amount_sent': stats['amount_sent'],
+                            'amount_suppressed': stats['amount_suppressed'],
+                            'idle_seconds': round(now - stats['last_seen'], 1)}
+                   for client, stats in _client_stats.items()
+                   if now - stats['last_seen'] <= CLIENT_STATS_TTL}
+    return {
+        'amount': {'posted': updates, 'broadcast': broadcasts,
+                   'suppressed': updates - broadcasts,
+                   'window_ms': int(AMOUNT_COALESCE_SECONDS * 1000)},
+        'clients': clients,
+    }
 
 def get_meal_mode():
     """Get the current meal mode state"""
-    return meal_mode_active
+    return live_state.read()['meal_mode']
 
 def set_meal_mode(active):
     """Set the meal mode state and notify all clients"""
-    global meal_mode_active, meal_items
-    with update_lock:
-        meal_mode_active = active
+    def change(state):
+        state['meal_mode'] = active
         if not active:
-            meal_items = []  # Clear items when meal mode ends
+            state['meal_items'] = []  # Clear items when meal mode ends
     # Wake up polling clients to inform them of the change
-    update_event.set()
-    threading.Timer(0.1, update_event.clear).start()
+    live_state.update(change, 'meal_mode')
 
 def get_meal_items():
     """Get the current meal items"""
-    return meal_items
+    return live_state.read()['meal_items']
 
 def add_meal_item(item):
     """Add an item to the current meal"""
-    global meal_items
-    with update_lock:
-        meal_items.append(item)
     # Wake up polling clients
-    update_event.set()
-    threading.Timer(0.1, update_event.clear).start()
+    live_state.update(lambda state: state['meal_items'].append(item), 'meal_items')
 
 def clear_meal_items():
     """Clear all meal items"""
-    global meal_items
-    with update_lock:
-        meal_items = []
-    update_event.set()
-    threading.Timer(0.1, update_event.clear).start()
+    live_state.update(lambda state: state.update(meal_items=[]), 'meal_items')
 
 def get_polling_javascript():
     """Get the JavaScript code for polling functionality"""
     return POLLING_JAVASCRIPT
 
+def build_polling_javascript(app):
+    """polling.js for an app, defaulting to the event stream with --event-stream"""
+    if app.config.get('EVENT_STREAM'):
+        return POLLING_JAVASCRIPT.replace('var EVENT_STREAM_DEFAULT = false;',
+                                          'var EVENT_STREAM_DEFAULT = true;', 1)
+    return POLLING_JAVASCRIPT
+
+register_asset('polling.js', build_polling_javascript)
+
 def register_polling_routes(app):
     """Register polling routes with the Flask app"""
 
@@ -355,6 +890,10 @@ def register_polling_routes(app):
     def poll_updates_route():
         return poll_updates()
 
+    @app.route('/events')
+    def events_route():
+        return stream_events()
+
     @app.route('/set-amount', methods=['POST'])
     def set_amount_route():
         return set_amount()
@@ -376,10 +915,15 @@ def register_polling_routes(app):
         add_meal_item(data)
         return jsonify({'status': 'success', 'meal_items': get_meal_items()})
 
+    @app.route('/api/polling/stats')
+    def polling_stats_route():
+        return jsonify(get_polling_stats())
+
     @app.route('/get-meal-items')
     def get_meal_items_route():
         return jsonify({'meal_items': get_meal_items(), 'meal_mode': get_meal_mode()})
 
+    # Pages link to the hashed bundle; this URL stays for old pages
     @app.route('/static/polling.js')
     def polling_js():
-        return Response(POLLING_JAVASCRIPT, mimetype='application/javascript')
\ No newline at end of file
+        return send_bundle('polling.js')
@@ -97,6 +97,8 @@ def main():
 
     food_data = result['food']
     pad_key = result['pad_key']
+    # The server also matches food names, so use the key it found
+    food_key = result.get('food_key', food_key)
     food_name = food_data.get('name', food_key)
     food_type = food_data.get('type', 'amount')
 
@@ -0,0 +1,323 @@
+"""
+SQLite storage backend for food logs, notes and meals.
+
+A drop-in alternative to data.DayLogStore for long histories: range
+queries and id lookups use indexes instead of opening one file per day.
+Enable it with `nutrition-pad --sqlite PATH`, and move existing data in
+or out with `nutrition-logs to-sqlite` / `nutrition-logs from-sqlite`.
+"""
+import json
+import sqlite3
+import threading
+
+from .data import ProcessLock, _date_key
+
+LOCATE_CHUNK = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    date TEXT NOT NULL,
+    id TEXT,
+    food TEXT,
+    pad TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_date ON entries (date, seq);
+CREATE INDEX IF NOT EXISTS entries_id ON entries (id);
+CREATE INDEX IF NOT EXISTS entries_food ON entries (food);
+CREATE INDEX IF NOT EXISTS entries_pad ON entries (pad);
+
+CREATE TABLE IF NOT EXISTS days (
+    date TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0,
+    totals TEXT
+);
+
+CREATE TABLE IF NOT EXISTS notes (
+    date TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS meals (
+    pos INTEGER PRIMARY KEY,
+    id TEXT,
+    data TEXT NOT NULL
+);
+
+-- Change counters for notes ('notes:<date>'), meals ('meals') and the
+-- eating-session index ('sessions')
+CREATE TABLE IF NOT EXISTS stamps (
+    key TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+);
+
+-- data.EatingSessionIndex: a row per day, and the merge gap under date ''
+CREATE TABLE IF NOT EXISTS eating_session_days (
+    date TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+"""
+
+
+class SqliteStore:
+    """Food logs, notes and meals in one SQLite database (WAL mode).
+
+    Implements the same interface as data.DayLogStore. Parsed days are
+    cached and dropped whenever the database changes, including commits
+    from other processes (detected with PRAGMA data_version).
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+        self._cache = {}
+        self._data_version = None
+        self._write_lock = ProcessLock(lambda: db_path + '.lock')
+
+    def write_lock(self):
+        """Lock held around a log write and its totals, in every process.
+
+        SQLite transactions cover single statements, but a totals update
+        is a read, a write and another write.
+        """
+        return self._write_lock
+
+    def _check_external_changes(self):
+        version = self._conn.execute('PRAGMA data_version').fetchone()[0]
+        if version != self._data_version:
+            self._cache.clear()
+            self._data_version = version
+
+    def _rows_to_entries(self, rows):
+        return [json.loads(row[0]) for row in rows]
+
+    def path(self, target_date):
+        return self.db_path
+
+    def exists(self, target_date):
+        with self._lock:
+            row = self._conn.execute('SELECT 1 FROM entries WHERE date = ? LIMIT 1',
+                                     (_date_key(target_date),)).fetchone()
+        return row is not None
+
+    def load(self, target_date):
+        date_str = _date_key(target_date)
+        with self._lock:
+            self._check_external_changes()
+            if date_str not in self._cache:
+                rows = self._conn.execute('SELECT data FROM entries WHERE date = ? ORDER BY seq',
+                                          (date_str,)).fetchall()
+                self._cache[date_str] = self._rows_to_entries(rows)
+            return self._cache[date_str]
+
+    def _insert(self, date_str, entries):
+        self._conn.executemany(
+            'INSERT INTO entries (date, id, food, pad, data) VALUES (?, ?, ?, ?, ?)',
+            [(date_str, e.get('id'), e.get('food'), e.get('pad'), json.dumps(e)) for e in entries])
+        self._bump_version(date_str)
+
+    def _bump_version(self, date_str):
+        self._conn.execute('INSERT INTO days (date, version) VALUES (?, 1) '
+                           'ON CONFLICT(date) DO UPDATE SET version = version + 1', (date_str,))
+
+    def save(self, target_date, entries):
+        date_str = _date_key(target_date)
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM entries WHERE date = ?', (date_str,))
+            self._insert(date_str, entries)
+        with self._lock:
+            self._cache.pop(date_str, None)
+
+    def append(self, target_date, new_entries):
+        date_str = _date_key(target_date)
+        with self._lock, self._conn:
+            self._insert(date_str, new_entries)
+        with self._lock:
+            self._cache.pop(date_str, None)
+
+    def delete(self, target_date, entry_id):
+        date_str = _date_key(target_date)
+        with self._lock:
+            entry = next((e for e in self.load(date_str) if e.get('id') == entry_id), None)
+            if entry is None:
+                return None
+            with self._conn:
+                self._conn.execute('DELETE FROM entries WHERE date = ? AND id = ?', (date_str, entry_id))
+                self._bump_version(date_str)
+            self._cache.pop(date_str, None)
+            return entry
+
+    def patch(self, target_date, entry_id, fields):
+        updated = self.patch_many(target_date, {entry_id: fields})
+        return updated[0] if updated else None
+
+    def patch_many(self, target_date, fields_by_id):
+        date_str = _date_key(target_date)
+        with self._lock:
+            updated = [dict(e, **fields_by_id[e['id']]) for e in self.load(date_str)
+                       if e.get('id') in fields_by_id]
+            if not updated:
+                return []
+            with self._conn:
+                self._conn.executemany(
+                    'UPDATE entries SET food = ?, pad = ?, data = ? WHERE date = ? AND id = ?',
+                    [(e.get('food'), e.get('pad'), json.dumps(e), date_str, e['id']) for e in updated])
+                self._bump_version(date_str)
+            self._cache.pop(date_str, None)
+            return updated
+
+    def compact(self, target_date):
+        return False
+
+    def version(self, target_date):
+        with self._lock:
+            row = self._conn.execute('SELECT version FROM days WHERE date = ?',
+                                     (_date_key(target_date),)).fetchone()
+        return row[0] if row else None
+
+    def _bump_stamp(self, key):
+        self._conn.execute('INSERT INTO stamps (key, version) VALUES (?, 1) '
+                           'ON CONFLICT(key) DO UPDATE SET version = version + 1', (key,))
+
+    def _stamp(self, key):
+        with self._lock:
+            row = self._conn.execute('SELECT version FROM stamps WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def load_totals(self, target_date):
+        with self._lock:
+            row = self._conn.execute('SELECT totals FROM days WHERE date = ?',
+                                     (_date_key(target_date),)).fetchone()
+        return json.loads(row[0]) if row and row[0] else None
+
+    def save_totals(self, target_date, totals):
+        with self._lock, self._conn:
+            self._conn.execute('UPDATE days SET totals = ? WHERE date = ?',
+                               (json.dumps(totals), _date_key(target_date)))
+
+    def dates(self):
+        with self._lock:
+            rows = self._conn.execute('SELECT DISTINCT date FROM entries ORDER BY date').fetchall()
+        return [row[0] for row in rows]
+
+    def load_range(self, start_date, end_date):
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT date, data FROM entries WHERE date BETWEEN ? AND ? ORDER BY date DESC, seq',
+                (_date_key(start_date), _date_key(end_date))).fetchall()
+        result = []
+        for date_str, data in rows:
+            if not result or result[-1][0] != date_str:
+                result.append((date_str, []))
+            result[-1][1].append(json.loads(data))
+        return result
+
+    def locate(self, entry_ids):
+        entry_ids = list(entry_ids)
+        result = {}
+        # Chunked to stay under SQLite's bound-variable limit (999 on older builds)
+        for i in range(0, len(entry_ids), LOCATE_CHUNK):
+            chunk = entry_ids[i:i + LOCATE_CHUNK]
+            placeholders = ','.join('?' * len(chunk))
+            with self._lock:
+                rows = self._conn.execute(
+                    f'SELECT id, date FROM entries WHERE id IN ({placeholders})', chunk).fetchall()
+            result.update(rows)
+        return result
+
+    def load_notes(self, target_date):
+        with self._lock:
+            row = self._conn.execute('SELECT data FROM notes WHERE date = ?',
+                                     (_date_key(target_date),)).fetchone()
+        return json.loads(row[0]) if row else []
+
+    def save_notes(self, target_date, notes):
+        with self._lock, self._conn:
+            self._conn.execute('INSERT OR REPLACE INTO notes (date, data) VALUES (?, ?)',
+                               (_date_key(target_date), json.dumps(notes)))
+            self._bump_stamp('notes:' + _date_key(target_date))
+
+    def notes_version(self, target_date):
+        return self._stamp('notes:' + _date_key(target_date))
+
+    def notes_dates(self):
+        with self._lock:
+            rows = self._conn.execute('SELECT date FROM notes ORDER BY date').fetchall()
+        return [row[0] for row in rows]
+
+    def load_meals(self):
+        with self._lock:
+            rows = self._conn.execute('SELECT data FROM meals ORDER BY pos').fetchall()
+        return self._rows_to_entries(rows)
+
+    def save_meals(self, meals):
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM meals')
+            self._conn.executemany('INSERT INTO meals (pos, id, data) VALUES (?, ?, ?)',
+                                   [(i, m.get('id'), json.dumps(m)) for i, m in enumerate(meals)])
+            self._bump_stamp('meals')
+
+    def meals_version(self):
+        return self._stamp('meals')
+
+    def load_sessions(self):
+        with self._lock:
+            rows = self._conn.execute('SELECT date, data FROM eating_session_days').fetchall()
+        days = {date_str: json.loads(data) for date_str, data in rows}
+        if '' not in days:
+            return None
+        gap = days.pop('')
+        return {'gap': gap, 'days': days, 'records': len(days)}
+
+    def save_sessions(self, index):
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM eating_session_days')
+            self._conn.executemany('INSERT INTO eating_session_days (date, data) VALUES (?, ?)',
+                                   [('', json.dumps(index['gap']))] +
+                                   [(date_str, json.dumps(day)) for date_str, day in index['days'].items()])
+            self._bump_stamp('sessions')
+
+    def save_day_sessions(self, date_str, day):
+        with self._lock, self._conn:
+            if day is None:
+                self._conn.execute('DELETE FROM eating_session_days WHERE date = ?', (date_str,))
+            else:
+                self._conn.execute('INSERT OR REPLACE INTO eating_session_days (date, data) VALUES (?, ?)',
+                                   (date_str, json.dumps(day)))
+            self._bump_stamp('sessions')
+
+    def sessions_version(self):
+        return self._stamp('sessions')
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def copy_storage(source, dest):
+    """Copy every log, notes file and the meal list from one store to another.
+
+    Returns (days, notes_days) copied. Used for JSON <-> SQLite conversion.
+    """
+    days = 0
+    for date_str in source.dates():
+        dest.save(date_str, list(source.load(date_str)))
+        days += 1
+    notes_days = 0
+    for date_str in source.notes_dates():
+        dest.save_notes(date_str, source.load_notes(date_str))
+        notes_days += 1
+    meals = source.load_meals()
+    if meals:
+        dest.save_meals(meals)
+    return days, notes_days
@@ -2,7 +2,7 @@
 CSS styles for the nutrition pad application.
 """
 
-from flask import Response
+from .assets import register_asset, send_bundle
 
 BASE_CSS = """
 * { box-sizing: border-box; margin: 0; padding: 0; }
@@ -197,7 +197,10 @@ body {
 }
 """
 
+register_asset('base.css', BASE_CSS)
+
 def register_styles_routes(app):
+    # Pages link to the hashed bundle; this URL stays for old pages
     @app.route('/static/base.css')
     def base_css():
-        return Response(BASE_CSS, mimetype='text/css')
\ No newline at end of file
+        return send_bundle('base.css')
\ No newline at end of file
@@ -107,7 +107,11 @@ def main():
         for entry_info in result['updated_entries']:
             print(f"  ✓ {entry_info['calories']} cal, {entry_info['protein']}g protein")
     
-    print(f"Updated {updated_count}/{total_requested} entries")
+    files_touched = result.get('files_touched')
+    if files_touched is not None:
+        print(f"Updated {updated_count}/{total_requested} entries ({files_touched} day logs touched)")
+    else:
+        print(f"Updated {updated_count}/{total_requested} entries")
     
     if updated_count < total_requested:
         missing = total_requested - updated_count
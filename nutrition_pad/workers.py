@@ -0,0 +1,71 @@
+"""
+Pre-forked worker processes (`nutrition-pad --workers N`).
+
+The parent binds the listening socket and forks N workers that all
+accept on it. Workers set themselves up after the fork, since database
+connections, the live state's notifier and background threads don't
+survive one. The parent restarts workers that die and passes SIGTERM
+and Ctrl-C on to them.
+"""
+import os
+import signal
+import socket
+import time
+import traceback
+
+RESTART_DELAY = 1  # seconds before replacing a worker that died
+
+
+def serve_workers(count, host, port, run_worker):
+    """Fork `count` processes that each call run_worker(sock, index).
+
+    Returns once every worker has exited after SIGTERM or Ctrl-C.
+    """
+    sock = socket.create_server((host, port), backlog=1024)
+    worker_sigterm = signal.getsignal(signal.SIGTERM)
+    children = {}
+    stopping = False
+
+    def spawn(index):
+        pid = os.fork()
+        if pid:
+            children[pid] = index
+            return
+        signal.signal(signal.SIGTERM, worker_sigterm)
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        code = 0
+        try:
+            run_worker(sock, index)
+        except (SystemExit, KeyboardInterrupt):
+            pass
+        except BaseException:
+            traceback.print_exc()
+            code = 1
+        os._exit(code)
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    for index in range(count):
+        spawn(index)
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    try:
+        while children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            index = children.pop(pid, None)
+            if index is not None and not stopping:
+                print("Worker {} (pid {}) exited with status {}, restarting".format(index, pid, status))
+                time.sleep(RESTART_DELAY)
+                spawn(index)
+    finally:
+        sock.close()
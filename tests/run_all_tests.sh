@@ -11,6 +11,10 @@ python3 tests/test_nutrition_unknown_cli.py
 python3 tests/test_api_routes.py
 python3 tests/test_entries_api.py
 python3 tests/test_meals.py
+python3 tests/test_data_caches.py
+python3 tests/test_sqlite_store.py
+python3 tests/test_food_search.py
+python3 tests/test_polling.py
 
 echo ""
 echo "✅ All tests completed!"
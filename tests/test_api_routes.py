@@ -69,6 +69,9 @@ def test_critical_routes():
         ('GET', '/api/foods/search?q=test', 'Search foods API'),
         ('POST', '/api/resolve-unknown', 'Resolve unknown API'),
         ('GET', '/api/entries', 'List entries API'),
+        ('GET', '/calories', 'Calories timeline'),
+        ('GET', '/api/timeline', 'Timeline API'),
+        ('GET', '/api/fasts', 'Fasting stats API'),
     ]
 
     results = []
@@ -88,6 +91,10 @@ def test_css_classes_exist():
 
         response = client.get('/')
         html = response.data.decode('utf-8')
+        # Page styles are served as bundles the page links to
+        import re
+        for url in re.findall(r'href="(/assets/[^"]+\.css)"', html):
+            html += client.get(url).get_data(as_text=True)
 
         # Check for float-based CSS (not aspect-ratio which breaks Nexus 10)
         assert 'food-btn' in html or 'food-grid' in html, \
@@ -98,7 +105,7 @@ def test_css_classes_exist():
             "Should NOT use aspect-ratio CSS (breaks Nexus 10)"
 
         # Verify we're using float-based layout
-        # (This is in the inline CSS in main.py)
+        # (This is in INDEX_CSS in main.py)
         assert 'float: left' in html or 'float:left' in html, \
             "Should use float-based layout for Nexus 10 compatibility"
 
@@ -114,6 +121,237 @@ def test_css_classes_exist():
         return False
 
 
+def test_templates_compiled_once():
+    """Page templates come from the registry, compiled once and autoescaped"""
+    print("\n🧪 Testing precompiled page templates\n")
+
+    import tempfile
+    from flask import render_template
+    from nutrition_pad.page_templates import (
+        register_template, registered_templates, setup_templates, compile_templates)
+
+    env = app.jinja_env
+    saved_cache = env.bytecode_cache
+    try:
+        assert {'index.html', 'today.html', 'nutrition.html', 'food_editor.html', 'calories.html',
+                'notes.html', 'meals_build.html', 'resolve_unknowns.html'} <= set(registered_templates())
+
+        cache_dir = tempfile.mkdtemp(prefix='nutrition_pad_templates_')
+        setup_templates(app, cache_dir)
+        register_template('test_escape.html', '<p>{{ value }}</p>')
+        assert compile_templates(app) == len(registered_templates())
+        assert os.listdir(cache_dir), "Compiled templates should be written to the bytecode cache"
+
+        compiled = env.get_template('index.html')
+        app.test_client().get('/')
+        assert env.get_template('index.html') is compiled, "Routes should reuse the compiled template"
+
+        with app.test_request_context():
+            assert render_template('test_escape.html', value='<b>') == '<p>&lt;b&gt;</p>'
+        print("  ✓ Pages registered, compiled once, bytecode cached, still autoescaped")
+        return True
+    except Exception as e:
+        print(f"  ❌ Error: {e}")
+        return False
+    finally:
+        env.bytecode_cache = saved_cache
+
+
+def test_static_bundles():
+    """CSS and JS bundles are served from hashed, immutable, gzipped URLs"""
+    print("\n🧪 Testing static asset bundles\n")
+
+    import re
+    try:
+        client = app.test_client()
+        html = client.get('/nutrition').get_data(as_text=True)
+        urls = re.findall(r'(?:href|src)="(/assets/[^"]+)"', html)
+        assert any('/assets/base.' in url for url in urls) and any('/assets/polling.' in url for url in urls), urls
+        assert '<style>' not in html, "Page CSS should be linked, not inline"
+
+        for url in urls:
+            response = client.get(url, headers={'Accept-Encoding': 'gzip'})
+            assert response.status_code == 200, url
+            assert 'immutable' in response.headers['Cache-Control'], url
+            assert response.headers['Content-Encoding'] == 'gzip', url
+            again = client.get(url, headers={'Accept-Encoding': 'gzip',
+                                             'If-None-Match': response.headers['ETag']})
+            assert again.status_code == 304, url
+
+        plain = client.get('/static/base.css')
+        assert plain.status_code == 200 and plain.headers['Cache-Control'] == 'no-cache'
+        assert 'Content-Encoding' not in plain.headers and b'box-sizing' in plain.data
+        stale = client.get('/assets/base.000000000000.css')
+        assert stale.status_code == 200 and stale.headers['Cache-Control'] == 'no-cache'
+        assert client.get('/assets/missing.css').status_code == 404
+        print(f"  ✓ {len(urls)} bundles: immutable, gzipped, 304 on matching ETag")
+        print("  ✓ Unhashed and stale URLs revalidate")
+        return True
+    except Exception as e:
+        print(f"  ❌ Error: {e}")
+        return False
+
+
+def test_response_compression():
+    """Pages and JSON are compressed for clients that accept it"""
+    print("\n🧪 Testing response compression\n")
+
+    import gzip
+    import zlib
+    from datetime import date, timedelta
+    from nutrition_pad.compression import clear_compression_cache, get_compression_stats
+    try:
+        client = app.test_client()
+        plain = client.get('/')
+        assert 'Content-Encoding' not in plain.headers, "No Accept-Encoding, no compression"
+        assert plain.headers['Vary'] == 'Accept-Encoding'
+
+        response = client.get('/', headers={'Accept-Encoding': 'gzip, deflate'})
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert gzip.decompress(response.data) == plain.data
+        assert len(response.data) < len(plain.data) // 2
+        response = client.get('/', headers={'Accept-Encoding': 'gzip;q=0.5, deflate'})
+        assert response.headers['Content-Encoding'] == 'deflate'
+        assert zlib.decompress(response.data) == plain.data
+
+        # Compressed variants get their own ETag, which still revalidates
+        response = client.get('/api/foods', headers={'Accept-Encoding': 'gzip'})
+        etag = response.headers['ETag']
+        assert etag.endswith('-gz"'), etag
+        again = client.get('/api/foods', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+        assert again.status_code == 304 and again.headers['ETag'] == etag
+
+        # Past-date pages reuse their compressed body
+        clear_compression_cache()
+        past = '/today?date=' + (date.today() - timedelta(days=2)).isoformat()
+        first = client.get(past, headers={'Accept-Encoding': 'gzip'})
+        hits = get_compression_stats()['cache_hits']
+        second = client.get(past, headers={'Accept-Encoding': 'gzip'})
+        assert first.data == second.data
+        assert get_compression_stats()['cache_hits'] == hits + 1, "Second request should hit the cache"
+
+        app.config['COMPRESS'] = False
+        try:
+            off = client.get('/', headers={'Accept-Encoding': 'gzip'})
+            assert 'Content-Encoding' not in off.headers, "--no-compress should send identity"
+        finally:
+            app.config['COMPRESS'] = True
+        print("  ✓ gzip/deflate negotiated, ETags revalidate, past pages cached")
+        return True
+    except Exception as e:
+        print(f"  ❌ Error: {e}")
+        return False
+
+
+def test_past_page_cache():
+    """Past-date pages are rendered once until their logs change"""
+    print("\n🧪 Testing the past-date page cache\n")
+
+    from datetime import date, timedelta
+    from nutrition_pad.page_cache import page_cache
+    try:
+        client = app.test_client()
+        day = date.today() - timedelta(days=5)
+        routes = [f'/today?date={day}', f'/nutrition?date={day}', f'/calories?date={day}']
+        page_cache.clear()
+        first = [client.get(route).data for route in routes]
+        hits = page_cache.stats()['hits']
+        assert [client.get(route).data for route in routes] == first
+        assert page_cache.stats()['hits'] == hits + len(routes), page_cache.stats()
+
+        # Backdating an entry to the day drops its pages and the next day's
+        next_day = f'/calories?date={day + timedelta(days=1)}'
+        client.get(next_day)
+        assert page_cache.stats()['pages'] == len(routes) + 1
+        response = client.post('/log', json={'pad': 'proteins', 'food': 'chicken_breast',
+                                             'at': f'{day}T12:30:00'})
+        assert response.status_code == 200, response.status_code
+        assert page_cache.stats()['pages'] == 0, page_cache.stats()
+        page = client.get(routes[0]).get_data(as_text=True)
+        assert page != first[0].decode() and '12:30' in page, "Page should show the new entry"
+
+        # Today is never cached
+        client.get('/today')
+        assert page_cache.stats()['pages'] == 1
+        print("  ✓ Cached until a write to the day or the day before")
+        return True
+    except Exception as e:
+        print(f"  ❌ Error: {e}")
+        return False
+
+
+def test_timeline_api():
+    """/api/timeline sends a day as compact arrays for the client-rendered page"""
+    print("\n🧪 Testing the timeline API and client-rendered calories page\n")
+
+    from datetime import date, timedelta
+    try:
+        client = app.test_client()
+        day = date.today() - timedelta(days=7)
+        for at in ('07:00', '07:10', '13:30'):
+            client.post('/log', json={'pad': 'proteins', 'food': 'chicken_breast', 'at': f'{day}T{at}:00'})
+
+        response = client.get(f'/api/timeline?date={day}')
+        assert response.status_code == 200, response.status_code
+        data = response.get_json()
+        entries = data['entries']
+        assert entries['t'][-3:] == [420, 430, 810], entries['t']
+        assert len(entries['cal']) == len(entries['name']) == len(entries['t'])
+        assert round(sum(entries['cal']), 1) == round(data['totals']['calories'], 1)
+        # Fasts can run into the neighbouring days, so others may be longer
+        assert [430, 810, 380] in [f[:3] for f in data['fasts']], data['fasts']
+        assert data['title'] == day.strftime('%a %d %b') and not data['is_today']
+        assert sum(g[1] for g in data['groups']) == len(entries['t'])
+
+        again = client.get(f'/api/timeline?date={day}', headers={'If-None-Match': response.headers['ETag']})
+        assert again.status_code == 304, "Unchanged day should revalidate"
+        assert client.get('/api/timeline?date=nope').status_code == 400
+
+        fasts = client.get('/api/fasts').get_json()
+        assert fasts['longest'][0][2] == fasts['longest_minutes'] >= 380, fasts
+        assert fasts['last_eaten'] is not None
+
+        # ?client=1 serves the shell and is remembered; ?client=0 goes back
+        shell = client.get(f'/calories?date={day}&client=1')
+        assert 'calories_client=1' in shell.headers['Set-Cookie']
+        assert 'data-initial="%s"' % day in shell.get_data(as_text=True)
+        assert 'id="timelineApp"' in client.get('/calories').get_data(as_text=True)
+        assert 'id="timelineApp"' not in client.get('/calories?client=0').get_data(as_text=True)
+        assert 'id="timelineApp"' not in client.get('/calories').get_data(as_text=True)
+        print("  ✓ Compact day arrays, aggregates and ETag; client mode remembered")
+        return True
+    except Exception as e:
+        print(f"  ❌ Error: {e}")
+        return False
+
+
+def test_calories_ranges():
+    """/calories?range= draws week, month and year views from day rollups"""
+    print("\n🧪 Testing calories range views\n")
+
+    import re
+    from datetime import date, timedelta
+    from nutrition_pad.calories import downsample_cumulative
+    try:
+        assert downsample_cumulative([10] * 24, 4) == [60, 120, 180, 240]
+        client = app.test_client()
+        for range_name, days, points in (('week', 7, 12), ('month', 30, 4), ('year', 365, 1)):
+            html = client.get(f'/calories?range={range_name}').get_data(as_text=True)
+            line = re.search(r'class="graph-line calories-line" d="([^"]*)"', html).group(1)
+            assert line.count('M ') == days, f"{range_name}: one curve per day"
+            assert line.count('L ') == days * points, f"{range_name}: {points} points per day"
+            assert '&rarr;' not in html, "No next range after today"
+        past = (date.today() - timedelta(days=20)).isoformat()
+        html = client.get(f'/calories?range=week&date={past}').get_data(as_text=True)
+        assert '&rarr;' in html and 'By Day' in html
+        assert 'By Month' in client.get('/calories?range=year').get_data(as_text=True)
+        print("  ✓ Week, month and year views with fixed points per day")
+        return True
+    except Exception as e:
+        print(f"  ❌ Error: {e}")
+        return False
+
+
 def run_all_tests():
     """Run all tests"""
     print("\n" + "="*60)
@@ -129,6 +367,12 @@ def run_all_tests():
     results = []
     results.append(test_critical_routes())
     results.append(test_css_classes_exist())
+    results.append(test_templates_compiled_once())
+    results.append(test_static_bundles())
+    results.append(test_response_compression())
+    results.append(test_past_page_cache())
+    results.append(test_timeline_api())
+    results.append(test_calories_ranges())
 
     print("\n" + "="*60)
     passed = sum(results)
@@ -0,0 +1,715 @@
+#!/usr/bin/env python3
+"""
+Tests for the in-process caches in nutrition_pad.data
+
+Each test points the data module at a scratch directory so it never
+touches the real foods.toml or daily_logs.
+"""
+
+import sys
+import os
+import json
+import tempfile
+import shutil
+
+# Add parent dir to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from nutrition_pad import data
+    TOML_AVAILABLE = True
+except ImportError as e:
+    print(f"Warning: Could not import data module: {e}")
+    print("Skipping tests. Install with: pip install toml")
+    TOML_AVAILABLE = False
+
+
+class ScratchData:
+    """Point foods.toml and the day-log store at a temporary directory"""
+
+    def __enter__(self):
+        self.tmpdir = tempfile.mkdtemp(prefix='nutrition_pad_test_')
+        self.saved_config = data.CONFIG_FILE
+        self.saved_logs_dir = data.day_logs.logs_dir
+        self.saved_percentile_files = (data.PERCENTILE_CONFIG_FILE, data.PERCENTILE_CACHE_FILE)
+        data.CONFIG_FILE = os.path.join(self.tmpdir, 'foods.toml')
+        data.day_logs.logs_dir = self.tmpdir
+        data.PERCENTILE_CONFIG_FILE = os.path.join(self.tmpdir, 'percentile_config.json')
+        data.PERCENTILE_CACHE_FILE = os.path.join(self.tmpdir, 'percentile_cache.json')
+        data.day_logs.clear()
+        data.eating_sessions.clear()
+        data.invalidate_config_cache()
+        data._percentile_cache_mem = None
+        data._seed_thread = None
+        return self.tmpdir
+
+    def __exit__(self, *exc):
+        data.wait_for_percentile_seeding()
+        data.flush_percentile_cache()
+        data._percentile_cache_mem = None
+        data._seed_thread = None
+        data.PERCENTILE_CONFIG_FILE, data.PERCENTILE_CACHE_FILE = self.saved_percentile_files
+        data.CONFIG_FILE = self.saved_config
+        data.day_logs.logs_dir = self.saved_logs_dir
+        data.day_logs.clear()
+        data.eating_sessions.clear()
+        data.invalidate_config_cache()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+        return False
+
+
+def test_config_cache_reuses_parse():
+    """Repeated load_config() calls return the same parsed object"""
+    print("\n🧪 Test: config cache reuses parse")
+
+    try:
+        with ScratchData():
+            first = data.load_config()
+            version = data.get_config_version()
+            second = data.load_config()
+            assert first is second, "Unchanged file should not be re-parsed"
+            assert data.get_config_version() == version, "Version should not move"
+        print("  ✓ Config parsed once")
+        return True
+    except Exception as e:
+        print(f"  ❌ Error: {e}")
+        return False
+
+
+def test_config_cache_sees_writes():
+    """Writing foods.toml and invalidating picks up the new content"""
+    print("\n🧪 Test: config cache sees writes")
+
+    try:
+        with ScratchData():
+            data.load_config()
+            version = data.get_config_version()
+            with open(data.CONFIG_FILE, 'a') as f:
+                f.write('\n[pads.drinks]\nname = "Drinks"\n')
+            data.invalidate_config_cache()
+            config = data.load_config()
+            assert 'drinks' in config['pads'], "New pad should be visible"
+            assert data.get_config_version() > version, "Version should advance"
+        print("  ✓ Config reloaded after write")
+        return True
+    except Exception as e:
+        print(f"  ❌ Error: {e}")
+        return False
+
+
+def test_day_log_store_parses_once():
+    """Readers share one parsed copy until the log is written"""
+    print("\n🧪 Test: day-log store parses once")
+
+    try:
+        with ScratchData():
+            eggs = data.UNKNOWN_FOODS['unit']
+            data.save_food_entry('_unknown', 'unit', eggs)
+            first = data.load_today_log()
+            assert data.load_today_log() is first, "Second read should hit the cache"
+            assert data.calculate_daily_item_count() == 1
+
+            data.save_food_entry('_unknown', 'unit', eggs)
+            assert data.load_today_log() is not first, "Write should replace cached copy"
+            assert data.calculate_daily_item_count() == 2
+            assert len(first) == 1, "Earlier readers' list must not be modified"
+        print("  ✓ Day log parsed once per write")
+        return True
+    except Exception as e:
+        print(f"  ❌ Error: {e}")
+        return False
+
+
+def test_day_log_store_sees_external_edits():
+    """A file rewritten outside the store is re-read"""
+    print("\n🧪 Test: day-log store sees external edits")
+
+    try:
+        with ScratchData() as tmpdir:
+            path = os.path.join(tmpdir, '2026-01-02.jsonl')
+            with open(path, 'w') as f:
+                f.write('{"id": "a", "protein": 1}\n')
+            assert len(data.load_log_for_date('2026-01-02')) == 1
+            with open(path, 'a') as f:
+                f.write('{"id": "b", "protein": 2}\n')
+            assert len(data.load_log_for_date('2026-01-02')) == 2, "Edit should be seen"
+            assert data.day_logs.dates() == ['2026-01-02']
+        print("  ✓ External edit picked up")
+        return True
+    except Exception as e:
+        print(f"  ❌ Error: {e}")
+        return False
+
+
+def test_jsonl_append_delete_patch():
+    """Adds are appended, deletes and patches are folded in on read"""
+    print("\n🧪 Test: JSONL append, delete and patch")
+
+    try:
+        with ScratchData():
+            day = '2026-01-03'
+            data.day_logs.append(day, [{'id': 'a', 'calories': 10}, {'id': 'b', 'calories': 20}])
+            data.day_logs.append(day, [{'id': 'c', 'calories': 30}])
+            data.day_logs.delete(day, 'b')
+            data.day_logs.patch(day, 'c', {'calories': 35})
+
+            with open(data.day_logs.path(day)) as f:
+                lines = f.read().splitlines()
+            assert len(lines) == 5, f"Expected 5 records on disk, got {len(lines)}"
+
+            data.day_logs.clear()
+            entries = data.load_log_for_date(day)
+            assert [e['id'] for e in entries] == ['a', 'c'], "Delete should be replayed"
+            assert entries[1]['calories'] == 35, "Patch should be replayed"
+
+            assert data.day_logs.compact(day), "Patch records should be compacted"
+            with open(data.day_logs.path(day)) as f:
+                assert len(f.read().splitlines()) == 2, "Compacted file holds live entries only"
+        print("  ✓ Records replayed and compacted")
+        return True
+    except Exception as e:
+        print(f"  ❌ Error: {e}")
+        return False
+
+
+def test_legacy_json_migration():
+    """Legacy JSON array logs are read, and converted by the migration"""
+    print("\n🧪 Test: legacy JSON logs")
+
+    try:
+        with ScratchData() as tmpdir:
+            legacy = os.path.join(tmpdir, '2025-12-31.json')
+            with open(legacy, 'w') as f:
+                json.dump([{'timestamp': '2025-12-31T09:00:00', 'calories': 5}], f)
+            assert len(data.load_log_for_date('2025-12-31')) == 1, "Legacy log should load"
+
+            assert data.migrate_logs_to_jsonl() == 1
+            assert not os.path.exists(legacy), "Legacy file should be replaced"
+            entries = data.load_log_for_date('2025-12-31')
+            assert len(entries) == 1 and entries[0].get('id'), "Migrated entry should have an id"
+        print("  ✓ Legacy log migrated")
+        return True
+    except Exception as e:
+        print(f"  ❌ Error: {e}")
+        return False
+
+
+def test_day_totals_follow_writes():
+    """Per-day totals are updated by appends, deletes and patches"""
+    print("\n🧪 Test: day totals follow writes")
+
+    try:
+        with ScratchData():
+            day = '2026-01-04'
+            data.append_log_entries(day, [
+                {'id': 'a', 'calories': 100, 'protein': 10, 'timestamp': '2026-01-04T08:00:00'},
+                {'id': 'b', 'calories': 200, 'protein': 5, 'timestamp': '2026-01-04T12:00:00'},
+            ])
+            totals = data.get_day_totals(day)
+            assert totals['calories'] == 300 and totals['count'] == 2
+
+            data.patch_log_entry(day, 'a', {'calories': 150})
+            data.delete_log_entry(day, 'b')
+            totals = data.get_day_totals(day)
+            assert totals['calories'] == 150 and totals['protein'] == 10
+            assert totals['last_timestamp'] == '2026-01-04T08:00:00', "Removed boundary should be rebuilt"
+            assert totals == dict(data.compute_day_totals(data.load_log_for_date(day)),
+                                  version=totals['version'])
+        print("  ✓ Totals kept in step with the log")
+        return True
+    except Exception as e:
+        print(f"  ❌ Error: {e}")
+        return False
+
+
+def test_last_eaten_survives_older_writes():
+    """Patching or backdating an earlier food entry leaves last_eaten at the latest one"""
+    print("\n🧪 Test: last_eaten follows the latest food entry")
+
+    try:
+        with ScratchData():
+            day = '2026-01-07'
+            data.append_log_entries(day, [
+                {'id': 'a', 'food': 'unknown_snack', 'calories': 0, 'timestamp': '2026-01-07T00:16:00'},
+                {'id': 'b', 'calories': 300, 'timestamp': '2026-01-07T23:22:00'},
+            ])
+            data.patch_log_entry(day, 'a', {'food': 'toast', 'calories': 150})
+            assert data.get_day_totals(day)['last_eaten'] == '2026-01-07T23:22:00'
+            data.append_log_entries(day, [{'id': 'c', 'calories': 200, 'timestamp': '2026-01-07T09:00:00'}])
+            assert data.get_day_totals(day)['last_eaten'] == '2026-01-07T23:22:00'
+
+            data.delete_log_entry(day, 'b')
+            totals = data.get_day_totals(day)
+            assert totals['last_eaten'] == '2026-01-07T09:00:00', totals['last_eaten']
+            assert totals == dict(data.compute_day_totals(data.load_log_for_date(day)),
+                                  version=totals['version'])
+        print("  ✓ Older entries don't move last_eaten back")
+        return True
+    except Exception as e:
+        print(f"  ❌ Error: {e}")
+        return False
+
+
+def test_day_rollups_without_logs():
+    """Range rollups carry hourly calories and come from the totals records"""
+    print("\n🧪 Test: day rollups read totals, not logs")
+
+    try:
+        with ScratchData():
+            data.append_log_entries('2026-01-06', [
+                {'id': 'a', 'calories': 100, 'time': '08:15'},
+                {'id': 'b', 'calories': 50, 'time': '08:45'},
+                {'id': 'c', 'calories': 200, 'time': '19:00'},
+            ])
+            data.delete_log_entry('2026-01-06', 'b')
+            data.append_log_entries('2026-01-08', [{'id': 'd', 'calories': 70, 'time': '23:59'}])
+
+            saved_load = data.day_logs.load
+            data.day_logs.load = lambda *args: (_ for _ in ()).throw(AssertionError("log read"))
+            try:
+                rollups = data.load_day_rollups('2026-01-06', '2026-01-08')
+            finally:
+                data.day_logs.load = saved_load
+            assert [d for d, _ in rollups] == ['2026-01-06', '2026-01-07', '2026-01-08']
+            hourly = rollups[0][1]['hourly']
+            assert hourly[8] == 100 and hourly[19] == 200 and sum(hourly) == 300, hourly
+            assert rollups[1][1]['count'] == 0 and rollups[2][1]['hourly'][23] == 70
+        print("  ✓ Hourly rollups kept without reading the logs")
+        return True
+    except Exception as e:
+        print(f"  ❌ Error: {e}")
+        return False
+
+
+def test_eating_sessions_across_midnight():
+    """Eating sessions merge across midnight and fasts span days, without log reads"""
+    print("\n🧪 Test: eating-session index across days")
+
+    try:
+        with ScratchData():
+            data.append_log_entries('2026-01-09', [
+                {'id': 'a', 'calories': 300, 'timestamp': '2026-01-09T12:00:00'},
+                {'id': 'b', 'calories': 400, 'timestamp': '2026-01-09T23:55:00'},
+                {'id': 'c', 'calories': 5, 'timestamp': '2026-01-09T23:58:00'},  # a drink
+            ])
+            data.append_log_entries('2026-01-10', [
+                {'id': 'd', 'calories': 150, 'timestamp': '2026-01-10T00:05:00'},
+                {'id': 'e', 'calories': 500, 'timestamp': '2026-01-10T09:00:00'},
+            ])
+            sessions = data.eating_sessions
+
+            saved_load = data.day_logs.load
+            data.day_logs.load = lambda *args: (_ for _ in ()).throw(AssertionError("log read"))
+            try:
+                assert sessions.stats()['sessions'] == 3, sessions.stats()
+                # 23:55 and 00:05 are one session, so the fast runs 00:05 -> 09:00
+                overnight = (535, '2026-01-10T00:05:00', '2026-01-10T09:00:00', 2, 1)
+                assert sessions.fasts_on('2026-01-10')[0] == overnight, sessions.fasts_on('2026-01-10')
+                assert [fast[0] for fast in sessions.longest_fasts(5)] == [715, 535]
+                assert sessions.last_eaten('2026-01-10T08:00:00') == '2026-01-10T00:05:00'
+                assert sessions.last_eaten('2026-01-09T20:00:00') == '2026-01-09T12:00:00'
+            finally:
+                data.day_logs.load = saved_load
+
+            # Deleting the post-midnight entry splits the session again; the
+            # write appends just that day's record to the journal
+            with open(data.day_logs.sessions_path()) as f:
+                records = len(f.readlines())
+            data.delete_log_entry('2026-01-10', 'd')
+            assert sessions.fasts_on('2026-01-10')[0][:3] == (545, '2026-01-09T23:55:00', '2026-01-10T09:00:00')
+            with open(data.day_logs.sessions_path()) as f:
+                lines = f.readlines()
+            assert len(lines) == records + 1 and json.loads(lines[-1])['date'] == '2026-01-10'
+
+            # Another process replays the journal without opening the logs
+            fasts = sessions.longest_fasts(5)
+            sessions.clear()
+            data.day_logs.load = lambda *args: (_ for _ in ()).throw(AssertionError("log read"))
+            try:
+                assert sessions.longest_fasts(5) == fasts
+            finally:
+                data.day_logs.load = saved_load
+
+            # A failed write leaves the index usable and doesn't claim to be stored
+            version = sessions.version()
+            data.day_logs.save_day_sessions = lambda *args: (_ for _ in ()).throw(IOError("disk full"))
+            try:
+                data.append_log_entries('2026-01-10', [{'id': 'g', 'calories': 90, 'timestamp': '2026-01-10T15:00:00'}])
+                assert sessions._version == version
+            finally:
+                del data.day_logs.save_day_sessions
+            assert sessions.last_eaten('2026-01-10T16:00:00') == '2026-01-10T15:00:00'
+
+            # A log written behind our back is picked up when the index is reloaded
+            with open(data.day_logs.path('2026-01-11'), 'w') as f:
+                f.write('{"id": "f", "calories": 250, "timestamp": "2026-01-11T07:00:00"}\n')
+            data.eating_sessions.clear()
+            assert sessions.last_eaten('2026-01-12T00:00:00') == '2026-01-11T07:00:00'
+            assert sessions.stats()['fasts'] == 4
+        print("  ✓ Sessions and fasts follow writes across midnight")
+        return True
+    except Exception as e:
+        print(f"  ❌ Error: {e}")
+        return False
+
+
+def test_day_totals_rebuilt_on_external_edit():
+    """A totals record whose version no longer matches the log is rebuilt"""
+    print("\n🧪 Test: stale day totals rebuilt")
+
+    try:
+        with ScratchData():
+            day = '2026-01-05'
+            data.append_log_entries(day, [{'id': 'a', 'calories': 100}])
+            assert data.get_day_totals(day)['calories'] == 100
+            with open(data.day_logs.path(day), 'a') as f:
+                f.write('{"id": "b", "calories": 40, "timestamp": "2026-01-05T10:00:00"}\n')
+            assert data.get_day_totals(day)['calories'] == 140, "Edit should trigger a rebuild"
+        print("  ✓ Stale totals rebuilt")
+        return True
+    except Exception as e:
+        print(f"  ❌ Error: {e}")
+        return False
+
+
+def test_entry_index_follows_writes():
+    """Writers keep the id index current, and it matches a rebuild"""
+    print("\n🧪 Test: entry-id index")
+
+    try:
+        with ScratchData() as tmpdir:
+            data.append_log_entries('2026-01-06', [{'id': 'a'}, {'id': 'b'}])
+            data.append_log_entries('2026-01-07', [{'id': 'c'}])
+            data.delete_log_entry('2026-01-06', 'a')
+            data.save_log_for_date('2026-01-07', [{'id': 'c'}, {'id': 'd'}])
+
+            assert os.path.exists(os.path.join(tmpdir, data.ENTRY_INDEX_FILE))
+            assert data.locate_entries(['a', 'b', 'c', 'd']) == {
+                'b': '2026-01-06', 'c': '2026-01-07', 'd': '2026-01-07'}
+
+            _, pos = data.day_logs._index['b']
+            with open(data.day_logs.path('2026-01-06'), 'rb') as f:
+                f.seek(pos)
+                assert json.loads(f.readline())['id'] == 'b', "Position should point at the entry's line"
+
+            incremental = dict(data.day_logs._index)
+            data.day_logs.clear()
+            assert data.day_logs._load_index() == incremental, "Journal should reload as written"
+            assert data.day_logs.reindex() == incremental, "Rebuild should agree with the journal"
+        print("  ✓ Index kept current")
+        return True
+    except Exception as e:
+        print(f"  ❌ Error: {e}")
+        return False
+
+
+def test_backfill_all_logs_writes_through():
+    """Backfilled IDs go through the normal write path, and a failed save changes nothing"""
+    print("\n🧪 Test: backfill all logs")
+
+    try:
+        with ScratchData():
+            day = '2026-01-05'
+            data.append_log_entries(day, [{'calories': 100, 'timestamp': '2026-01-05T08:00:00'}])
+
+            def failing_save(date_str, entries):
+                raise IOError("disk full")
+            data.day_logs.save = failing_save
+            try:
+                assert data.backfill_all_logs() == 0
+            finally:
+                del data.day_logs.save
+            assert 'id' not in data.load_log_for_date(day)[0], "Cached day should be untouched"
+
+            assert data.backfill_all_logs() == 1
+            [entry] = data.load_log_for_date(day)
+            assert entry.get('id') and data.locate_entries([entry['id']]) == {entry['id']: day}
+            data.day_logs.clear()
+            assert data.load_log_for_date(day) == [entry], "IDs should be on disk"
+        print("  ✓ IDs written through save_log_for_date")
+        return True
+    except Exception as e:
+        print(f"  ❌ Error: {e}")
+        return False
+
+
+def test_resolve_entries_touches_only_their_logs():
+    """Batch resolve patches entries and reports the day logs it opened"""
+    print("\n🧪 Test: batch resolve")
+
+    try:
+        with ScratchData():
+            for day in ('2026-01-08', '2026-01-09', '2026-01-10'):
+                data.append_log_entries(day, [{'id': day + 'x', 'food': 'unit', 'amount': 1}])
+            data.append_log_entries('2026-01-08', [{'id': 'y', 'food': 'amount', 'amount': 50}])
+
+            food = {'name': 'Rice', 'type': 'amount', 'calories_per_gram': 2.0, 'protein_per_gram': 0.1}
+            updated, files_touched = data.resolve_entries(['2026-01-08x', 'y', 'missing'],
+                                                          'carbs', 'rice', food)
+            assert files_touched == 1, f"Expected 1 log touched, got {files_touched}"
+            assert sorted(e['id'] for e in updated) == ['2026-01-08x', 'y']
+            assert data.get_day_totals('2026-01-08')['calories'] == 102
+            with open(data.day_logs.path('2026-01-08')) as f:
+                assert len(f.read().splitlines()) == 4, "Both patches should land in one log"
+        print("  ✓ Only the affected log was touched")
+        return True
+    except Exception as e:
+        print(f"  ❌ Error: {e}")
+        return False
+
+
+def test_food_catalog_per_config_version():
+    """The catalog is compiled once per config version and finds foods by key or name"""
+    print("\n🧪 Test: food catalog")
+
+    try:
+        with ScratchData():
+            catalog = data.get_food_catalog()
+            assert data.get_food_catalog() is catalog, "Unchanged config should reuse the catalog"
+            assert catalog.find('salmon')[0] == 'proteins'
+            assert catalog.find_by_name('chicken breast')[1] == 'chicken_breast'
+            assert catalog.find_by_name('Eggs (2 large)')[1] == 'eggs'
+            assert catalog.find('missing') is None
+
+            with open(data.CONFIG_FILE, 'a') as f:
+                f.write('\n[pads.drinks]\nname = "Drinks"\n'
+                        '[pads.drinks.foods.cola]\nname = "Cola"\ntype = "unit"\n'
+                        'calories = 140\nprotein = 0\nactive = false\n')
+            data.invalidate_config_cache()
+            catalog = data.get_food_catalog()
+            assert catalog.find('cola')[0] == 'drinks', "New food should be indexed"
+            assert 'drinks' not in catalog.active_pads, "Pad with only inactive foods"
+            assert all(food_key != 'cola' for _, food_key, _ in catalog.active)
+        print("  ✓ Catalog rebuilt only when the config changes")
+        return True
+    except Exception as e:
+        print(f"  ❌ Error: {e}")
+        return False
+
+
+def test_bucket_histogram_tail_sums():
+    """Fenwick tail sums match summing the buckets directly"""
+    print("\n🧪 Test: bucket histogram tail sums")
+
+    try:
+        import random
+        rng = random.Random(7)
+        weights = [rng.random() * 10 for _ in range(100)]
+        histogram = data.BucketHistogram(weights)
+        for _ in range(500):
+            idx, amount = rng.randrange(100), rng.random() * 5
+            histogram.add(idx, amount)
+            weights[idx] += amount
+        for idx in (0, 1, 37, 98, 99):
+            assert abs(histogram.tail(idx) - sum(weights[idx + 1:])) < 1e-6, f"tail({idx}) mismatch"
+        assert histogram.to_list() == weights
+        print("  ✓ Tail sums agree")
+        return True
+    except Exception as e:
+        print(f"  ❌ Error: {e}")
+        return False
+
+
+def test_percentile_cache_writes_are_debounced():
+    """Percentile lookups update memory; the file is written on flush"""
+    print("\n🧪 Test: percentile cache persistence")
+
+    try:
+        with ScratchData():
+            data.save_food_entry('_unknown', 'unit', {'type': 'unit', 'calories': 300,
+                                                      'protein': 20, 'fiber': 5})
+            data.calculate_percentiles()
+            data.wait_for_percentile_seeding()
+            assert data.calculate_percentiles() is not None
+            with open(data.PERCENTILE_CACHE_FILE) as f:
+                seeded = f.read()
+
+            data._percentile_cache_mem['timestamp'] = '2000-01-01T00:00:00'
+            data.calculate_percentiles()
+            with open(data.PERCENTILE_CACHE_FILE) as f:
+                assert f.read() == seeded, "Lookups should not write the file"
+
+            data.flush_percentile_cache()
+            with open(data.PERCENTILE_CACHE_FILE) as f:
+                flushed = json.load(f)
+            assert sum(flushed['kcal_per_protein']) > 0, "Flush should write the updated histogram"
+        print("  ✓ Written on flush only")
+        return True
+    except Exception as e:
+        print(f"  ❌ Error: {e}")
+        return False
+
+
+def test_percentile_seeding_in_background():
+    """Seeding returns None until done, and a process pool gives the same histogram"""
+    print("\n🧪 Test: background percentile seeding")
+
+    try:
+        with ScratchData():
+            start = data.date.today() - data.timedelta(days=75)
+            with open(data.PERCENTILE_CONFIG_FILE, 'w') as f:
+                json.dump({'cutoff': start.isoformat()}, f)
+            for days_ago in range(1, 75, 3):
+                day = data.date.today() - data.timedelta(days=days_ago)
+                data.append_log_entries(day, [
+                    {'id': f'{days_ago}a', 'calories': 400, 'protein': 30, 'fiber': 4,
+                     'timestamp': f'{day.isoformat()}T08:00:00'},
+                    {'id': f'{days_ago}b', 'calories': 600, 'protein': 10 + days_ago, 'fiber': 2,
+                     'timestamp': f'{day.isoformat()}T13:00:00'},
+                ])
+
+            serial = data._empty_cache()
+            data._seed_cache_from_history(serial)
+            progress = data.get_percentile_seed_progress()
+            assert progress['days_done'] == progress['days_total'] == 75, progress
+
+            pooled = data._empty_cache()
+            data._seed_cache_from_history(pooled, processes=2)
+            for metric in data.PERCENTILE_METRICS:
+                assert all(abs(a - b) < 1e-6 for a, b in
+                           zip(serial[metric].to_list(), pooled[metric].to_list())), metric
+            assert serial['kcal_per_protein'].total > 0
+
+            data.start_percentile_seeding()
+            data.wait_for_percentile_seeding()
+            assert data.get_percentile_seed_progress()['state'] == 'done'
+            assert os.path.exists(data.PERCENTILE_CACHE_FILE), "Seeded cache should be saved"
+        print("  ✓ Serial and pooled seeding agree")
+        return True
+    except Exception as e:
+        print(f"  ❌ Error: {e}")
+        return False
+
+
+def test_percentile_seeding_retried_after_failure():
+    """A failed seed run doesn't stop a later start_percentile_seeding() call"""
+    print("\n🧪 Test: percentile seeding retried after a failure")
+
+    try:
+        with ScratchData():
+            day = data.date.today() - data.timedelta(days=2)
+            data.append_log_entries(day, [{'id': 'a', 'calories': 400, 'protein': 30, 'fiber': 4,
+                                           'timestamp': f'{day.isoformat()}T08:00:00'}])
+            saved_seed = data._seed_cache_from_history
+            data._seed_cache_from_history = lambda *args: (_ for _ in ()).throw(IOError("unreadable log"))
+            try:
+                data.start_percentile_seeding()
+                data.wait_for_percentile_seeding()
+            finally:
+                data._seed_cache_from_history = saved_seed
+            progress = data.get_percentile_seed_progress()
+            assert progress['state'] == 'failed' and 'unreadable' in progress['error'], progress
+            assert not os.path.exists(data.PERCENTILE_CACHE_FILE)
+
+            data.start_percentile_seeding()
+            data.wait_for_percentile_seeding()
+            assert data.get_percentile_seed_progress()['state'] == 'done'
+            assert os.path.exists(data.PERCENTILE_CACHE_FILE), "Retried seed should be saved"
+        print("  ✓ Seeding ran again after the failed run")
+        return True
+    except Exception as e:
+        print(f"  ❌ Error: {e}")
+        return False
+
+
+def _append_from_worker(day, worker):
+    for i in range(15):
+        data.append_log_entries(day, [{'id': f'w{worker}-{i}', 'calories': 10 + worker,
+                                       'timestamp': f'{day}T{8 + worker:02d}:{i:02d}:00'}])
+        if i % 5 == 4:
+            data.delete_log_entry(day, f'w{worker}-{i - 1}')
+
+
+def test_worker_processes_share_writes():
+    """Writes from several processes to one day keep the log, totals and indexes whole"""
+    print("\n🧪 Test: concurrent writes from worker processes")
+
+    import multiprocessing
+    try:
+        with ScratchData():
+            day = '2026-01-13'
+            data.append_log_entries(day, [{'id': 'first', 'calories': 100, 'timestamp': f'{day}T07:00:00'}])
+            context = multiprocessing.get_context('fork')
+            workers = [context.Process(target=_append_from_worker, args=(day, worker)) for worker in range(4)]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            assert all(worker.exitcode == 0 for worker in workers)
+
+            data.day_logs.clear()
+            data.eating_sessions.clear()
+            entries = data.load_log_for_date(day)
+            assert len(entries) == 1 + 4 * 12, len(entries)
+            totals = data.get_day_totals(day)
+            assert totals == dict(data.compute_day_totals(entries), version=totals['version']), totals
+            located = data.locate_entries([e['id'] for e in entries])
+            assert len(located) == len(entries), "Every entry should be in the id index"
+            sessions = data.day_logs.load_sessions()
+            assert sessions['days'][day][1] == data.day_sessions(day, entries)
+
+            # A flush never replaces a newer cache another worker wrote
+            newer = data._empty_cache()
+            newer['timestamp'] = '2099-01-01T00:00:00'
+            data._save_percentile_cache(newer)
+            data.flush_percentile_cache()
+            older = data._empty_cache()
+            older['timestamp'] = '2026-01-01T00:00:00'
+            data._save_percentile_cache(older)
+            data.flush_percentile_cache()
+            assert data._percentile_cache_mem['timestamp'] == '2099-01-01T00:00:00'
+            with open(data.PERCENTILE_CACHE_FILE) as f:
+                assert json.load(f)['timestamp'] == '2099-01-01T00:00:00'
+        print("  ✓ No appends, totals or index records lost")
+        return True
+    except Exception as e:
+        print(f"  ❌ Error: {e}")
+        return False
+
+
+def run_all_tests():
+    """Run all tests"""
+    print("\n" + "="*60)
+    print("  DATA CACHE TESTS")
+    print("="*60)
+
+    if not TOML_AVAILABLE:
+        print("\n  ⚠ toml not available - skipping tests")
+        print("\n" + "="*60)
+        return True
+
+    results = [
+        test_config_cache_reuses_parse(),
+        test_config_cache_sees_writes(),
+        test_day_log_store_parses_once(),
+        test_day_log_store_sees_external_edits(),
+        test_jsonl_append_delete_patch(),
+        test_legacy_json_migration(),
+        test_day_totals_follow_writes(),
+        test_last_eaten_survives_older_writes(),
+        test_day_rollups_without_logs(),
+        test_eating_sessions_across_midnight(),
+        test_day_totals_rebuilt_on_external_edit(),
+        test_entry_index_follows_writes(),
+        test_backfill_all_logs_writes_through(),
+        test_resolve_entries_touches_only_their_logs(),
+        test_food_catalog_per_config_version(),
+        test_bucket_histogram_tail_sums(),
+        test_percentile_cache_writes_are_debounced(),
+        test_percentile_seeding_in_background(),
+        test_percentile_seeding_retried_after_failure(),
+        test_worker_processes_share_writes(),
+    ]
+
+    print("\n" + "="*60)
+    passed = sum(results)
+    total = len(results)
+    print(f"  RESULTS: {passed}/{total} tests passed")
+    print("="*60 + "\n")
+
+    return all(results)
+
+
+if __name__ == '__main__':
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -111,6 +111,94 @@ def test_api_entries_days_parameter():
         return False
 
 
+def test_api_conditional_get():
+    """Test ETag / If-None-Match on the JSON read APIs"""
+    print("\n🧪 Test: read APIs answer 304 for a current ETag")
+
+    try:
+        import nutrition_pad.main as main_module
+        app.config['TESTING'] = True
+        client = app.test_client()
+
+        for path in ['/api/entries?days=2', '/api/notes', '/api/foods', '/api/foods/raw', '/api/meals']:
+            response = client.get(path)
+            assert response.status_code == 200, f"{path} should succeed (got {response.status_code})"
+            etag = response.headers.get('ETag')
+            assert etag and not etag.startswith('W/'), f"{path} should have a strong ETag"
+            again = client.get(path, headers={'If-None-Match': etag})
+            assert again.status_code == 304, f"{path} should be 304 (got {again.status_code})"
+            assert again.headers.get('ETag') == etag, f"{path} 304 should repeat the ETag"
+            assert again.data == b'', f"{path} 304 should have no body"
+
+        # A matching ETag is answered without loading any log
+        etag = client.get('/api/entries?days=2').headers['ETag']
+        original = main_module.load_logs_between
+        main_module.load_logs_between = lambda *args: (_ for _ in ()).throw(AssertionError("log read"))
+        try:
+            assert client.get('/api/entries?days=2', headers={'If-None-Match': etag}).status_code == 304
+        finally:
+            main_module.load_logs_between = original
+
+        # Logging changes the ETag
+        client.post('/log', json={'pad': 'proteins', 'food': 'chicken_breast',
+                                  'nonce': 'test_entries_etag'}, content_type='application/json')
+        response = client.get('/api/entries?days=2', headers={'If-None-Match': etag})
+        assert response.status_code == 200, f"Should be 200 after logging (got {response.status_code})"
+        assert response.headers['ETag'] != etag, "ETag should change after logging"
+
+        # Different query strings get different ETags
+        assert client.get('/api/entries?days=3').headers['ETag'] != response.headers['ETag']
+
+        print("  ✓ 304 on match, new ETag after a change")
+        return True
+    except Exception as e:
+        print(f"  ❌ Error: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+def test_cli_fetch_uses_etag():
+    """Test that the CLI fetch helper revalidates its cached copy"""
+    print("\n🧪 Test: CLI fetch sends the stored ETag")
+
+    try:
+        import tempfile
+        import threading
+        from werkzeug.serving import make_server
+        from nutrition_pad import http_cache
+
+        http_cache.CACHE_DIR = tempfile.mkdtemp(prefix='nutrition_pad_http_cache_')
+        statuses = []
+
+        def recording_app(environ, start_response):
+            def record_status(status, headers, *args):
+                statuses.append(int(status.split()[0]))
+                return start_response(status, headers, *args)
+            return app(environ, record_status)
+
+        server = make_server('127.0.0.1', 0, recording_app, threaded=True)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            url = f"http://127.0.0.1:{server.server_port}/api/foods"
+            first = http_cache.fetch_cached(url)
+            second = http_cache.fetch_cached(url)
+        finally:
+            server.shutdown()
+
+        assert first == second, "Cached body should be returned on 304"
+        assert statuses == [200, 304], f"Expected a 200 then a 304 (got {statuses})"
+
+        print("  ✓ Second fetch revalidated with a 304")
+        return True
+    except Exception as e:
+        print(f"  ❌ Error: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
 def run_all_tests():
     """Run all tests"""
     print("\n" + "="*60)
@@ -127,6 +215,8 @@ def run_all_tests():
         test_api_entries_endpoint_exists,
         test_api_entries_returns_recorded_entry,
         test_api_entries_days_parameter,
+        test_api_conditional_get,
+        test_cli_fetch_uses_etag,
     ]
 
     results = []
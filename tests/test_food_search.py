@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Tests for the ranked food search index (nutrition_pad.food_search)
+
+Builds indexes straight from FoodCatalog objects, so no server, config
+file or logs are needed.
+"""
+
+import sys
+import os
+import time
+import random
+
+# Add parent dir to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from nutrition_pad.data import FoodCatalog
+    from nutrition_pad.food_search import FoodSearchIndex
+    TOML_AVAILABLE = True
+except ImportError as e:
+    print(f"Warning: Could not import search modules: {e}")
+    print("Skipping tests. Install with: pip install toml")
+    TOML_AVAILABLE = False
+
+
+def unit_food(name):
+    return {'name': name, 'type': 'unit', 'calories': 100, 'protein': 1}
+
+
+PADS = {
+    'proteins': {'name': 'Proteins', 'foods': {
+        'chicken_breast': unit_food('Chicken Breast'),
+        'chicken_thigh': unit_food('Chicken Thigh'),
+        'kfc_mini_fillet': unit_food('KFC Mini Fillet'),
+        'broccoli_chicken_bake': unit_food('Broccoli Chicken Bake'),
+    }},
+    'veg': {'name': 'Vegetables', 'foods': {
+        'broccoli': unit_food('Broccoli'),
+        'spinach': unit_food('Spinach'),
+    }},
+    'amounts': {'name': 'Set Amount'},
+}
+
+
+def food_keys(results):
+    return [food_key for _, food_key, _, _ in results]
+
+
+def test_ranking_by_match_quality():
+    """Exact > name prefix > whole word > word prefix > substring > fuzzy"""
+    print("\n🧪 Test: ranking by match quality")
+
+    try:
+        index = FoodSearchIndex(FoodCatalog(PADS, 1), {})
+
+        total, results = index.search('broccoli')
+        assert food_keys(results) == ['broccoli', 'broccoli_chicken_bake'], food_keys(results)
+
+        _, results = index.search('chicken')
+        assert food_keys(results)[-1] == 'broccoli_chicken_bake', "Mid-name word ranks after prefixes"
+
+        _, results = index.search('chi thi')
+        assert food_keys(results) == ['chicken_thigh'], "Word prefixes should match"
+
+        _, results = index.search('illet')
+        assert food_keys(results) == ['kfc_mini_fillet'], "Substrings should match"
+
+        _, results = index.search('spinnach')
+        assert food_keys(results) == ['spinach'], "Typos should still find the food"
+        assert results[0][3] < 1, "Fuzzy matches score below every direct match"
+
+        print("  ✓ Results ordered by match quality")
+        return True
+    except Exception as e:
+        print(f"  ❌ Error: {e}")
+        return False
+
+
+def test_frequency_and_paging():
+    """Frequently logged foods rank first within a tier; limit/offset page through"""
+    print("\n🧪 Test: frequency ranking and paging")
+
+    try:
+        index = FoodSearchIndex(FoodCatalog(PADS, 1), {'chicken_thigh': 12, 'chicken_breast': 3})
+
+        total, results = index.search('chicken')
+        assert total == 3
+        assert food_keys(results)[:2] == ['chicken_thigh', 'chicken_breast'], food_keys(results)
+
+        _, page = index.search('chicken', limit=1, offset=1)
+        assert page == results[1:2], "Pages should be slices of the full ranking"
+        _, page = index.search('chicken', limit=5, offset=3)
+        assert page == []
+
+        print("  ✓ Frequency used as tie-breaker, paging consistent")
+        return True
+    except Exception as e:
+        print(f"  ❌ Error: {e}")
+        return False
+
+
+def test_large_catalog_speed():
+    """Queries over thousands of foods stay around a millisecond"""
+    print("\n🧪 Test: large catalog speed")
+
+    try:
+        words = ['chicken', 'breast', 'beef', 'salmon', 'rice', 'brown', 'oat', 'egg',
+                 'greek', 'yogurt', 'apple', 'banana', 'bread', 'cheese', 'milk', 'protein',
+                 'bar', 'pasta', 'sauce', 'tomato', 'burger', 'cola', 'coffee', 'peanut']
+        rng = random.Random(1)
+        pads = {}
+        for p in range(10):
+            foods = {}
+            for f in range(500):
+                name = ' '.join(rng.choice(words) for _ in range(rng.randint(1, 4))) + f' {p}{f}'
+                foods[name.replace(' ', '_')] = unit_food(name.title())
+            pads[f'pad{p}'] = {'name': f'Pad {p}', 'foods': foods}
+        index = FoodSearchIndex(FoodCatalog(pads, 1), {})
+
+        queries = ['c', 'chi', 'chicken br', 'greek yogurt', 'brwn rice', 'zzz']
+        rounds = 20
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for query in queries:
+                index.search(query, limit=20)
+        per_query_ms = (time.perf_counter() - start) / (rounds * len(queries)) * 1000
+
+        print(f"  ✓ {per_query_ms:.3f} ms per query over 5000 foods")
+        assert per_query_ms < 5, "Search should not scale with catalog size"
+        return True
+    except Exception as e:
+        print(f"  ❌ Error: {e}")
+        return False
+
+
+def run_all_tests():
+    """Run all tests"""
+    print("\n" + "="*60)
+    print("  FOOD SEARCH TESTS")
+    print("="*60)
+
+    if not TOML_AVAILABLE:
+        print("\n  ⚠ toml not available - skipping tests")
+        print("\n" + "="*60)
+        return True
+
+    results = [
+        test_ranking_by_match_quality(),
+        test_frequency_and_paging(),
+        test_large_catalog_speed(),
+    ]
+
+    print("\n" + "="*60)
+    passed = sum(results)
+    total = len(results)
+    print(f"  RESULTS: {passed}/{total} tests passed")
+    print("="*60 + "\n")
+
+    return all(results)
+
+
+if __name__ == '__main__':
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -16,7 +16,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 try:
     from nutrition_pad.main import app
-    from nutrition_pad.data import MEALS_FILE, LOGS_DIR, get_today_log_file
+    from nutrition_pad.data import MEALS_FILE, LOGS_DIR, load_today_log, day_logs
     FLASK_AVAILABLE = True
 except ImportError as e:
     print(f"Warning: Could not import Flask modules: {e}")
@@ -45,16 +45,11 @@ def restore_meals():
 
 def remove_test_entries_from_log():
     """Remove any entries with meal_uid starting with 'meallog_' that were created during tests"""
-    log_file = get_today_log_file()
-    if not os.path.exists(log_file):
-        return
-    with open(log_file, 'r') as f:
-        entries = json.load(f)
+    entries = load_today_log()
     # Keep entries that don't have a test marker
     cleaned = [e for e in entries if not e.get('name', '').startswith('__test_meal_')]
     if len(cleaned) != len(entries):
-        with open(log_file, 'w') as f:
-            json.dump(cleaned, f, indent=2)
+        day_logs.save(date.today(), cleaned)
 
 
 def test_meals_routes_exist():
@@ -262,14 +257,11 @@ def test_log_meal_creates_entries():
     print(f"  ✓ Meal logged (items: {log_data['items_logged']}, calories: {log_data['total_calories']})")
 
     # Read today's log and verify entries
-    log_file = get_today_log_file()
-    if not os.path.exists(log_file):
+    entries = load_today_log()
+    if not entries:
         print(f"  ❌ Today's log file not found")
         return False
 
-    with open(log_file, 'r') as f:
-        entries = json.load(f)
-
     # Find entries with this meal's name prefix
     meal_entries = [e for e in entries if e.get('name', '').startswith('__test_meal_log_entries') or
                     (e.get('meal_uid') and e.get('food') in ['chicken_breast', 'eggs'] and
@@ -17,7 +17,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 try:
     from nutrition_pad.main import app
-    from nutrition_pad.data import LOGS_DIR
+    from nutrition_pad.data import LOGS_DIR, day_logs
     FLASK_AVAILABLE = True
 except ImportError as e:
     print(f"Warning: Could not import Flask modules: {e}")
@@ -32,7 +32,6 @@ def create_test_log_with_unknown():
     os.makedirs(LOGS_DIR, exist_ok=True)
 
     today = date.today().strftime('%Y-%m-%d')
-    log_file = os.path.join(LOGS_DIR, f'{today}.json')
 
     # Create log with unknown entry
     entries = [
@@ -64,10 +63,9 @@ def create_test_log_with_unknown():
         }
     ]
 
-    with open(log_file, 'w') as f:
-        json.dump(entries, f, indent=2)
+    day_logs.save(today, entries)
 
-    return log_file, entries[0]['id']
+    return today, entries[0]['id']
 
 
 def test_api_resolve_unknown_endpoint_exists():
@@ -159,7 +157,7 @@ def test_api_resolve_unknown_success():
 
     try:
         # Create test log
-        log_file, entry_id = create_test_log_with_unknown()
+        log_date, entry_id = create_test_log_with_unknown()
 
         app.config['TESTING'] = True
         client = app.test_client()
@@ -184,8 +182,7 @@ def test_api_resolve_unknown_success():
         assert 'updated_count' in data, "Should include update count"
 
         # Verify log was updated
-        with open(log_file, 'r') as f:
-            updated_entries = json.load(f)
+        updated_entries = day_logs.load(log_date)
 
         updated_entry = next((e for e in updated_entries if e['id'] == entry_id), None)
         if updated_entry:
@@ -0,0 +1,498 @@
+#!/usr/bin/env python3
+"""
+Tests for long polling and the /events stream in nutrition_pad.polling
+
+Uses the Flask test client in a scratch directory, so no server is needed.
+"""
+
+import sys
+import os
+import io
+import re
+import time
+import tempfile
+import threading
+import contextlib
+
+# Add parent dir to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    os.chdir(tempfile.mkdtemp(prefix='nutrition_pad_test_'))
+    with contextlib.redirect_stdout(io.StringIO()):
+        from nutrition_pad.main import app
+    from nutrition_pad import polling
+    FLASK_AVAILABLE = True
+except ImportError as e:
+    print(f"Warning: Could not import app: {e}")
+    print("Skipping tests. Install with: pip install flask toml")
+    FLASK_AVAILABLE = False
+
+
+def quiet_get(client, url):
+    """GET without the poll route's debug output"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return client.get(url).get_json()
+
+
+def test_update_before_wait_is_not_missed():
+    """An update between reading the version and waiting still wakes the waiter"""
+    print("\n🧪 Test: no missed wakeups")
+
+    try:
+        version = polling.get_update_version()
+        polling.mark_updated()
+        start = time.time()
+        assert polling.wait_for_update(version, 5) > version
+        assert time.time() - start < 0.5, "Waiter should return immediately"
+
+        threads_before = threading.active_count()
+        for _ in range(50):
+            polling.mark_amount_updated()
+        assert threading.active_count() == threads_before, "Updates must not start threads"
+        print("  ✓ Late waiter woken, no per-update threads")
+        return True
+    except Exception as e:
+        print(f"  ❌ Error: {e}")
+        return False
+
+
+def test_all_pollers_woken():
+    """One update wakes every concurrent waiter"""
+    print("\n🧪 Test: broadcast to many pollers")
+
+    try:
+        version = polling.get_update_version()
+        woken = []
+        threads = [threading.Thread(target=lambda: woken.append(polling.wait_for_update(version, 5)))
+                   for _ in range(20)]
+        for t in threads:
+            t.start()
+        time.sleep(0.1)
+        polling.set_meal_mode(False)
+        for t in threads:
+            t.join(5)
+        assert len(woken) == 20 and all(v > version for v in woken), woken
+        print("  ✓ All 20 waiters woken")
+        return True
+    except Exception as e:
+        print(f"  ❌ Error: {e}")
+        return False
+
+
+def test_poll_route_reports_missed_versions():
+    """A client that saw an older version is answered at once"""
+    print("\n🧪 Test: /poll-updates version catch-up")
+
+    try:
+        client = app.test_client()
+        now = time.time() + 1
+        data = quiet_get(client, f'/poll-updates?since={now}&version=-1')
+        assert 'version' in data, "Responses should carry the update version"
+
+        polling.set_meal_mode(True)
+        start = time.time()
+        data2 = quiet_get(client, f'/poll-updates?since={now}&version={data["version"]}')
+        assert time.time() - start < 1, "Changed version should not wait for the timeout"
+        assert data2['meal_mode'] is True and data2['version'] > data['version']
+        polling.set_meal_mode(False)
+        print("  ✓ Meal mode change delivered without waiting")
+        return True
+    except Exception as e:
+        print(f"  ❌ Error: {e}")
+        return False
+
+
+def test_poll_snapshot_single_flight():
+    """Pollers woken by one update share one snapshot, built by one of them"""
+    print("\n🧪 Test: single-flight poll snapshot")
+
+    import json
+    from nutrition_pad import data
+
+    calls = []
+    original = data.calculate_daily_item_count
+
+    def slow_item_count():
+        calls.append(1)
+        time.sleep(0.1)
+        return original()
+
+    data.calculate_daily_item_count = slow_item_count
+    try:
+        polling.mark_updated('snap')
+        snapshots = []
+        threads = [threading.Thread(target=lambda: snapshots.append(polling.poll_snapshot()))
+                   for _ in range(20)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(5)
+        assert len(calls) == 1, f"Today's log read {len(calls)} times"
+        assert all(s is snapshots[0] for s in snapshots), "Pollers should share the snapshot"
+
+        snapshot = snapshots[0]
+        assert polling.poll_snapshot() is snapshot, "No rebuild until the version moves"
+        updated = json.loads(snapshot.body(0))
+        assert updated['updated'] is True and updated['nonce'] == 'snap'
+        keepalive = json.loads(snapshot.body(snapshot.last_update))
+        assert keepalive['updated'] is False and keepalive['version'] == snapshot.version
+        time.sleep(0.01)
+        assert json.loads(snapshot.body(0))['server_timestamp'] > updated['server_timestamp']
+
+        polling.mark_amount_updated()
+        assert polling.poll_snapshot() is not snapshot and len(calls) == 2
+        print("  ✓ One log read per version, bodies pre-serialized")
+        return True
+    except Exception as e:
+        print(f"  ❌ Error: {e}")
+        return False
+    finally:
+        data.calculate_daily_item_count = original
+
+
+def test_amount_coalescing():
+    """Slider bursts are broadcast at most once per window, ending on the final value"""
+    print("\n🧪 Test: /set-amount coalescing")
+
+    window = polling.AMOUNT_COALESCE_SECONDS
+    polling.AMOUNT_COALESCE_SECONDS = 0.5  # wide enough for 20 test-client posts
+    try:
+        client = app.test_client()
+        quiet_get(client, f'/poll-updates?since={time.time() + 60}&version=-1&client=tablet')
+        time.sleep(polling.AMOUNT_COALESCE_SECONDS)
+        start_version = polling.get_update_version()
+
+        for amount in range(100, 140, 2):
+            response = client.post('/set-amount', json={'amount': amount, 'nonce': f'n{amount}'})
+            assert response.status_code == 200
+        assert polling.get_current_amount() == 138, "Latest amount visible before the broadcast"
+        assert polling.get_update_version() - start_version == 1, "Only the first post broadcasts at once"
+        assert polling._amount_flush_timer.daemon, "A pending flush must not hold up shutdown"
+
+        time.sleep(polling.AMOUNT_COALESCE_SECONDS * 2)
+        assert polling.get_update_version() - start_version == 2, "Final value broadcast when the window closes"
+        state = polling.get_live_state()
+        assert state['current_amount'] == 138 and state['current_nonce'] == 'n138'
+
+        data = quiet_get(client, f'/poll-updates?since={time.time() + 60}&version=-1&client=tablet')
+        assert data['current_amount'] == 138
+        stats = client.get('/api/polling/stats').get_json()
+        assert stats['clients']['tablet'] == {'amount_sent': 1, 'amount_suppressed': 19,
+                                              'idle_seconds': stats['clients']['tablet']['idle_seconds']}
+        assert stats['amount']['suppressed'] >= 18
+        print(f"  ✓ 20 posts -> 2 broadcasts; tablet counters {stats['clients']['tablet']}")
+        return True
+    except Exception as e:
+        print(f"  ❌ Error: {e}")
+        return False
+    finally:
+        polling.AMOUNT_COALESCE_SECONDS = window
+
+
+def test_poll_change_sets():
+    """Polls from an older version carry the entries added/removed and today's stats"""
+    print("\n🧪 Test: poll change sets")
+
+    from nutrition_pad.data import get_all_pads
+
+    try:
+        client = app.test_client()
+        pad_key, pad = next((k, p) for k, p in get_all_pads().items() if p.get('foods'))
+        food_key = next(iter(pad['foods']))
+        since = time.time() + 60
+        start = quiet_get(client, f'/poll-updates?since={since}&version=-1')['version']
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            assert client.post('/log', json={'pad': pad_key, 'food': food_key, 'nonce': 'cs1'}).status_code == 200
+        data = quiet_get(client, f'/poll-updates?since={since}&version={start}')
+        changes = data['changes']
+        assert changes['fields'] == ['entries'] and not changes['reload'], changes
+        [day] = changes['entries']
+        [entry] = day['added']
+        assert day['removed'] == [] and entry['food'] == food_key
+        assert changes['stats']['item_count'] == polling.poll_snapshot().item_count >= 1
+        assert 'total_calories' in changes['stats'] and 'cal_delta' in changes['stats']
+        logged = data['version']
+        # Pushed rows are placed by timestamp among the server-rendered ones
+        html = client.get('/today').get_data(as_text=True)
+        assert f'data-entry-id="{entry["id"]}" data-timestamp="{entry["timestamp"]}"' in html
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            assert client.post('/delete-entry', json={'id': entry['id']}).status_code == 200
+        polling.set_meal_mode(False)
+        data = quiet_get(client, f'/poll-updates?since={since}&version={logged}')
+        changes = data['changes']
+        assert changes['fields'] == ['entries', 'meal_mode', 'meal_items'], changes
+        assert changes['entries'] == [dict(day, added=[], removed=[entry['id']])], changes
+
+        # Added then removed since the client's version: nothing to patch
+        data = quiet_get(client, f'/poll-updates?since={since}&version={start}')
+        assert data['changes']['entries'] == [dict(day, added=[], removed=[])], data['changes']
+
+        # Up to date clients get no change set
+        data = quiet_get(client, f'/poll-updates?since=0&version=-1')
+        assert 'changes' in data and data['changes']['reload'], "Unknown history should reload"
+        assert 'changes' not in quiet_get(client, f'/poll-updates?since=0&version={data["version"]}')
+
+        version = data['version']
+        polling.mark_updated("config_updated", event_type='config')
+        changes = quiet_get(client, f'/poll-updates?since={since}&version={version}')['changes']
+        assert changes['reload'] and 'stats' not in changes, changes
+
+        for page in ('/', '/today', '/nutrition'):
+            html = client.get(page).get_data(as_text=True)
+            assert 'data-stat="item_count"' in html or 'data-stat="total_calories"' in html, page
+            assert 'function applyLogChanges' in html, page
+
+        # A backdated entry renders in time order, where addLogItem would put it
+        from datetime import date
+        with contextlib.redirect_stdout(io.StringIO()):
+            assert client.post('/log', json={'pad': pad_key, 'food': food_key, 'nonce': 'cs2'}).status_code == 200
+            assert client.post('/log', json={'pad': pad_key, 'food': food_key, 'nonce': 'cs3',
+                                             'at': f'{date.today()}T00:00:00'}).status_code == 200
+        html = client.get('/today').get_data(as_text=True)
+        stamps = re.findall(r'data-timestamp="([^"]*)"', html)
+        assert stamps[0] == f'{date.today()}T00:00:00' and stamps == sorted(stamps), stamps
+        print("  ✓ Added and removed entries, merged fields and stats; config changes reload")
+        return True
+    except Exception as e:
+        print(f"  ❌ Error: {e}")
+        return False
+
+
+def parse_events(text):
+    """[(id, event, data)] from SSE text, skipping comments"""
+    import json
+    events = []
+    for block in text.strip().split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.splitlines() if not line.startswith(':'))
+        if 'event' in fields:
+            events.append((int(fields['id']), fields['event'], json.loads(fields['data'])))
+    return events
+
+
+def test_event_stream_types():
+    """/events streams typed events, collapsing amount bursts to the latest"""
+    print("\n🧪 Test: typed event stream")
+
+    try:
+        stream = polling.event_stream(heartbeat=0.2, max_seconds=5)
+        assert next(stream).startswith('retry:')
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            polling.mark_amount_updated('n1')
+            polling.mark_amount_updated('n2')
+            polling.set_meal_mode(True)
+            polling.add_meal_item({'food': 'apple'})
+            polling.mark_updated('log-nonce')
+            polling.mark_updated('cfg', event_type='config')
+            events = parse_events(next(stream))
+        types = [event for _, event, _ in events]
+        assert types == ['amount', 'meal_mode', 'meal_items', 'log', 'config'], types
+        assert events[0][2]['nonce'] == 'n2', "Amount burst should send only the latest"
+        assert events[2][2]['meal_items'] == [{'food': 'apple'}]
+        assert events[3][2]['nonce'] == 'log-nonce' and 'item_count' in events[3][2]
+        assert events[3][2]['changes']['reload'], "A log change without entries reloads"
+        assert [i for i, _, _ in events] == sorted(i for i, _, _ in events)
+
+        assert next(stream) == ': heartbeat\n\n', "Idle streams send heartbeat comments"
+        stream.close()
+        polling.set_meal_mode(False)
+        print("  ✓ amount, meal_mode, meal_items, log, config events and heartbeats")
+        return True
+    except Exception as e:
+        print(f"  ❌ Error: {e}")
+        return False
+
+
+def test_event_stream_resume():
+    """Last-Event-ID replays missed events; too old an id forces a reload event"""
+    print("\n🧪 Test: event stream resume")
+
+    try:
+        last_seen = polling.get_update_version()
+        polling.set_meal_mode(True)
+        polling.set_meal_mode(False)
+        stream = polling.event_stream(last_event_id=last_seen, max_seconds=0)
+        next(stream)
+        events = parse_events(next(stream))
+        assert [event for _, event, _ in events] == ['meal_mode'], events
+        assert events[0][2]['meal_mode'] is False
+
+        stream = polling.event_stream(last_event_id=-5, max_seconds=0)
+        next(stream)
+        events = parse_events(next(stream))
+        assert events[0][1] == 'log' and events[0][2]['nonce'] is None, events
+
+        client = app.test_client()
+        response = client.get('/events', buffered=False)
+        assert response.mimetype == 'text/event-stream'
+        assert response.headers['Cache-Control'] == 'no-cache'
+        response.close()
+        print("  ✓ Missed events replayed, stale ids resynced")
+        return True
+    except Exception as e:
+        print(f"  ❌ Error: {e}")
+        return False
+
+
+def test_async_server():
+    """--async mode: polls wait on asyncio, other routes go through the WSGI bridge"""
+    print("\n🧪 Test: asyncio server")
+
+    import asyncio
+    import json
+    import urllib.request
+    from nutrition_pad import async_server
+
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+    state = {}
+
+    async def serve():
+        server = async_server.AsyncServer(app, loop, wsgi_threads=2)
+        polling.update_listeners.append(server.notifier.wake)
+        state['listener'] = server.notifier.wake
+        listener = await asyncio.start_server(server.handle, '127.0.0.1', 0)
+        state['port'] = listener.sockets[0].getsockname()[1]
+        started.set()
+        async with listener:
+            await listener.serve_forever()
+
+    def run_loop():
+        state['task'] = loop.create_task(serve())
+        try:
+            loop.run_until_complete(state['task'])
+        except asyncio.CancelledError:
+            pass
+
+    thread = threading.Thread(target=run_loop, daemon=True)
+    thread.start()
+    try:
+        started.wait(5)
+        base = f"http://127.0.0.1:{state['port']}"
+        with urllib.request.urlopen(base + '/get-meal-items', timeout=5) as response:
+            assert json.loads(response.read())['meal_mode'] is False
+
+        request = urllib.request.Request(base + '/set-amount', data=b'{"amount": 130}',
+                                         headers={'Content-Type': 'application/json'})
+        with contextlib.redirect_stdout(io.StringIO()):
+            urllib.request.urlopen(request, timeout=5).read()
+        assert polling.get_current_amount() == 130
+
+        threads_before = threading.active_count()
+        version = polling.get_update_version()
+        result = {}
+
+        def poll():
+            url = f"{base}/poll-updates?since={time.time() + 60}&version={version}"
+            with urllib.request.urlopen(url, timeout=10) as response:
+                result['data'] = json.loads(response.read())
+
+        pollers = [threading.Thread(target=poll) for _ in range(5)]
+        for t in pollers:
+            t.start()
+        time.sleep(0.3)
+        assert threading.active_count() <= threads_before + 5 + 2, "Idle polls should not hold server threads"
+        polling.set_meal_mode(True)
+        for t in pollers:
+            t.join(5)
+        assert result['data']['meal_mode'] is True and result['data']['version'] > version
+        polling.set_meal_mode(False)
+        print("  ✓ WSGI routes served, waiting polls woken from another thread")
+        return True
+    except Exception as e:
+        print(f"  ❌ Error: {e}")
+        return False
+    finally:
+        polling.update_listeners.remove(state['listener'])
+        loop.call_soon_threadsafe(state['task'].cancel)
+        thread.join(5)
+
+
+def test_shared_live_state():
+    """SharedLiveState keeps processes consistent and wakes their waiters"""
+    print("\n🧪 Test: shared live state across processes")
+
+    import multiprocessing
+    from nutrition_pad.live_state import SharedLiveState, MIN_MAP_SIZE
+
+    path = os.path.join(tempfile.mkdtemp(prefix='nutrition_pad_live_'), 'live')
+    first = SharedLiveState(path)
+    second = SharedLiveState(path)
+    try:
+        version = second.version()
+        first.update(lambda state: state.update(current_amount=150.0), 'amount', 'n1')
+        assert second.read()['current_amount'] == 150.0
+        current, events = second.events_since(version)
+        assert events == [(version + 1, 'amount', 'n1', events[0][3], None)], events
+
+        # Meal items outgrowing the initial mapping
+        item = {'food': 'x' * 1000}
+        for _ in range(MIN_MAP_SIZE // 1000 + 10):
+            first.update(lambda state: state['meal_items'].append(item), 'meal_items')
+        assert len(second.read()['meal_items']) == MIN_MAP_SIZE // 1000 + 10
+
+        # A separate process's update wakes a waiter here
+        def child(path):
+            backend = SharedLiveState(path)
+            time.sleep(0.2)
+            backend.update(lambda state: state.update(meal_mode=True), 'meal_mode')
+            backend.close()
+
+        version = second.version()
+        process = multiprocessing.get_context('fork').Process(target=child, args=(path,))
+        start = time.time()
+        process.start()
+        assert second.wait(version, 5) == version + 1
+        assert time.time() - start < 2, "Wakeup should not wait for the timeout"
+        assert first.read()['meal_mode'] is True
+        process.join(5)
+        assert process.exitcode == 0
+        print("  ✓ State shared, file grows, other processes' updates wake waiters")
+        return True
+    except Exception as e:
+        print(f"  ❌ Error: {e}")
+        return False
+    finally:
+        first.close()
+        second.close()
+
+
+def run_all_tests():
+    """Run all tests"""
+    print("\n" + "="*60)
+    print("  LONG-POLL TESTS")
+    print("="*60)
+
+    if not FLASK_AVAILABLE:
+        print("\n  ⚠ Flask not available - skipping tests")
+        print("\n" + "="*60)
+        return True
+
+    results = [
+        test_update_before_wait_is_not_missed(),
+        test_all_pollers_woken(),
+        test_poll_route_reports_missed_versions(),
+        test_poll_snapshot_single_flight(),
+        test_amount_coalescing(),
+        test_poll_change_sets(),
+        test_event_stream_types(),
+        test_event_stream_resume(),
+        test_async_server(),
+        test_shared_live_state(),
+    ]
+
+    print("\n" + "="*60)
+    passed = sum(results)
+    total = len(results)
+    print(f"  RESULTS: {passed}/{total} tests passed")
+    print("="*60 + "\n")
+
+    return all(results)
+
+
+if __name__ == '__main__':
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Tests for the SQLite storage backend
+
+Checks it behaves like the JSON-lines day-log store, and that
+copy_storage moves a JSON tree into SQLite and back unchanged.
+"""
+
+import sys
+import os
+import tempfile
+import shutil
+import sqlite3
+
+# Add parent dir to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from nutrition_pad.data import DayLogStore
+    from nutrition_pad.sqlite_store import SqliteStore, copy_storage
+    TOML_AVAILABLE = True
+except ImportError as e:
+    print(f"Warning: Could not import storage modules: {e}")
+    print("Skipping tests. Install with: pip install toml")
+    TOML_AVAILABLE = False
+
+
+def test_sqlite_entries():
+    """Append, delete, patch, range and id lookups"""
+    print("\n🧪 Test: SQLite entry operations")
+
+    tmpdir = tempfile.mkdtemp(prefix='nutrition_pad_test_')
+    try:
+        store = SqliteStore(os.path.join(tmpdir, 'test.db'))
+        store.append('2026-01-01', [{'id': 'a', 'food': 'eggs', 'calories': 140}])
+        store.append('2026-01-02', [{'id': 'b', 'food': 'rice'}, {'id': 'c', 'food': 'salmon'}])
+        store.delete('2026-01-02', 'b')
+        store.patch('2026-01-01', 'a', {'calories': 150})
+
+        assert store.dates() == ['2026-01-01', '2026-01-02']
+        assert [e['id'] for e in store.load('2026-01-02')] == ['c']
+        assert store.load('2026-01-01')[0]['calories'] == 150
+        assert [d for d, _ in store.load_range('2026-01-01', '2026-01-02')] == ['2026-01-02', '2026-01-01']
+        assert store.locate(['a', 'c', 'zz']) == {'a': '2026-01-01', 'c': '2026-01-02'}
+        # Older SQLite builds bind at most 999 variables per statement
+        store._conn.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 999)
+        many = [f'x{i}' for i in range(2500)]
+        store.append('2026-01-03', [{'id': entry_id} for entry_id in many[::100]])
+        assert store.locate(many + ['a']) == dict({i: '2026-01-03' for i in many[::100]}, a='2026-01-01'), \
+            "Lookups past the bound-variable limit should be chunked"
+
+        # Notes and meals versions change on every save (used for ETags)
+        assert store.notes_version('2026-01-01') is None and store.meals_version() is None
+        store.save_notes('2026-01-01', ['note'])
+        notes_version = store.notes_version('2026-01-01')
+        store.save_notes('2026-01-01', ['note'])
+        assert store.notes_version('2026-01-01') not in (None, notes_version)
+        store.save_meals([{'id': 'm', 'name': 'Lunch'}])
+        assert store.meals_version() is not None
+
+        # The eating-session index is stored alongside, with its own version
+        assert store.load_sessions() is None and store.sessions_version() is None
+        store.save_sessions({'gap': 15, 'days': {'2026-01-01': [1, []]}})
+        version = store.sessions_version()
+        store.save_day_sessions('2026-01-02', [2, [['2026-01-02T08:00:00', '2026-01-02T08:00:00', 1]]])
+        store.save_day_sessions('2026-01-01', None)
+        assert store.load_sessions() == {'gap': 15, 'records': 1, 'days': {
+            '2026-01-02': [2, [['2026-01-02T08:00:00', '2026-01-02T08:00:00', 1]]]}}
+        assert store.sessions_version() not in (None, version)
+        store.close()
+
+        print("  ✓ Entries stored and queried")
+        return True
+    except Exception as e:
+        print(f"  ❌ Error: {e}")
+        return False
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+def test_copy_json_tree_roundtrip():
+    """JSON tree -> SQLite -> JSON tree keeps logs, notes and meals"""
+    print("\n🧪 Test: JSON <-> SQLite roundtrip")
+
+    tmpdir = tempfile.mkdtemp(prefix='nutrition_pad_test_')
+    try:
+        source = DayLogStore(os.path.join(tmpdir, 'logs'), os.path.join(tmpdir, 'meals.json'))
+        os.makedirs(source.logs_dir)
+        source.append('2026-01-01', [{'id': 'a', 'food': 'eggs'}])
+        source.save_notes('2026-01-01', [{'id': 'n1', 'text': 'hungry'}])
+        source.save_meals([{'id': 'meal_1', 'name': 'Breakfast', 'items': []}])
+
+        db = SqliteStore(os.path.join(tmpdir, 'test.db'))
+        assert copy_storage(source, db) == (1, 1)
+
+        dest = DayLogStore(os.path.join(tmpdir, 'out'), os.path.join(tmpdir, 'out_meals.json'))
+        os.makedirs(dest.logs_dir)
+        copy_storage(db, dest)
+        db.close()
+
+        assert dest.load('2026-01-01') == source.load('2026-01-01')
+        assert dest.load_notes('2026-01-01') == source.load_notes('2026-01-01')
+        assert dest.load_meals() == source.load_meals()
+
+        print("  ✓ Roundtrip preserved logs, notes and meals")
+        return True
+    except Exception as e:
+        print(f"  ❌ Error: {e}")
+        return False
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+def run_all_tests():
+    """Run all tests"""
+    print("\n" + "="*60)
+    print("  SQLITE STORAGE TESTS")
+    print("="*60)
+
+    if not TOML_AVAILABLE:
+        print("\n  ⚠ toml not available - skipping tests")
+        print("\n" + "="*60)
+        return True
+
+    results = [
+        test_sqlite_entries(),
+        test_copy_json_tree_roundtrip(),
+    ]
+
+    print("\n" + "="*60)
+    passed = sum(results)
+    total = len(results)
+    print(f"  RESULTS: {passed}/{total} tests passed")
+    print("="*60 + "\n")
+
+    return all(results)
+
+
+if __name__ == '__main__':
+    success = run_all_tests()
+    sys.exit(0 if success else 1)